@@ -1089,6 +1089,7 @@ class LaurelinSchema(BaseLaurelinSchema):
     class Binary(SyntaxRule):
         OID = '1.3.6.1.4.1.1466.115.121.1.5'
         DESC = 'Binary'
+        binary = True
 
         def validate(self, s):
             if not isinstance(s, six.binary_type):
@@ -1097,6 +1098,7 @@ class LaurelinSchema(BaseLaurelinSchema):
     class Certificate(SyntaxRule):
         OID = '1.3.6.1.4.1.1466.115.121.1.8'
         DESC = 'Certificate'
+        binary = True
 
         def validate(self, s):
             if not isinstance(s, six.binary_type):
@@ -1288,6 +1290,7 @@ class LaurelinSchema(BaseLaurelinSchema):
     class Fax(SyntaxRule):
         OID = '1.3.6.1.4.1.1466.115.121.1.23'
         DESC = 'Fax'
+        binary = True
 
         def validate(self, s):
             # The LDAP-specific encoding of a value of this syntax is the
@@ -1370,6 +1373,7 @@ class LaurelinSchema(BaseLaurelinSchema):
     class JPEG(SyntaxRule):
         OID = '1.3.6.1.4.1.1466.115.121.1.28'
         DESC = 'JPEG'
+        binary = True
 
         def validate(self, s):
             # The LDAP-specific encoding of a value of this syntax is the sequence
@@ -1417,6 +1421,7 @@ class LaurelinSchema(BaseLaurelinSchema):
     class OctetString(SyntaxRule):
         OID = '1.3.6.1.4.1.1466.115.121.1.40'
         DESC = 'Octet String'
+        binary = True
 
         def validate(self, s):
             # Any arbitrary sequence of octets
@@ -1599,6 +1604,11 @@ class LaurelinSchema(BaseLaurelinSchema):
         OID = '2.5.13.0'
         NAME = 'objectIdentifierMatch'
         SYNTAX = '1.3.6.1.4.1.1466.115.121.1.38'
+        # descriptors are case-insensitive, and case folding leaves numeric OIDs unchanged
+        prep_methods = (
+            rfc4518.Transcode,
+            rfc4518.Map.casefold,
+        )
 
     class OctetStringMatch(EqualityMatchingRule):
         OID = '2.5.13.17'
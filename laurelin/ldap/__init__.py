@@ -3,8 +3,9 @@
 from __future__ import absolute_import
 
 from .attributetype import get_attribute_type, AttributeType
-from .base import LDAP, LDAPURI
-from .constants import Scope, DerefAliases, DELETE_ALL, FilterSyntax
+from .base import LDAP, LDAPURI, ResultTuple, deadline
+from .cache import EntryCache
+from .constants import Scope, DerefAliases, DELETE_ALL, FilterSyntax, ResultFormat, ServerStrategy, ValueDecoding
 from .controls import Control, critical, optional
 from .exceptions import LDAPError, NoSearchResults, Abandon
 from .extensible import (
@@ -18,12 +19,14 @@ from .extensible import (
     LaurelinTransiter,
     LaurelinRegistrar,
 )
-from .filter import escape as filter_escape
-from .ldapobject import LDAPObject
+from .filter import escape as filter_escape, F
+from .ldapobject import LDAPObject, LazyLDAPObject
 from .modify import Mod
+from .pool import LDAPPool, get_pool
 from .objectclass import get_object_class, ObjectClass, ExtensibleObjectClass
 from .rules import SyntaxRule, RegexSyntaxRule, MatchingRule, EqualityMatchingRule
 from .schema import SchemaValidator
+from .servers import ServerSet
 from .validation import Validator
 from .pyasn1.type import univ as _pyasn1_type_univ
 
@@ -43,10 +46,16 @@ __all__ = [
     'AttributeType',
     'LDAP',
     'LDAPURI',
+    'ResultTuple',
+    'deadline',
+    'EntryCache',
     'Scope',
     'DerefAliases',
     'DELETE_ALL',
     'FilterSyntax',
+    'ResultFormat',
+    'ServerStrategy',
+    'ValueDecoding',
     'Control',
     'critical',
     'optional',
@@ -63,8 +72,13 @@ __all__ = [
     'LaurelinTransiter',
     'LaurelinRegistrar',
     'filter_escape',
+    'F',
     'LDAPObject',
+    'LazyLDAPObject',
     'Mod',
+    'LDAPPool',
+    'get_pool',
+    'ServerSet',
     'get_object_class',
     'ObjectClass',
     'ExtensibleObjectClass',
@@ -0,0 +1,846 @@
+"""Native asyncio client.
+
+Provides :class:`AsyncLDAP` and :class:`AsyncLDAPSocket`, asyncio counterparts to :class:`.LDAP` and
+:class:`.LDAPSocket`. Requests are built, and responses interpreted, by the same code used by the blocking client, so
+schema, filter, control, and validation handling all behave identically.
+
+This module requires Python 3.7 or later and is not imported by :mod:`laurelin.ldap`. Import it explicitly::
+
+    from laurelin.ldap.aio import AsyncLDAP
+"""
+
+import asyncio
+import logging
+import six
+import time
+from socket import socket, SOCK_STREAM, error as SocketError
+from warnings import warn
+
+from . import ber
+from . import utils
+from .base import (
+    LDAP,
+    LDAPResponse,
+    SearchResultHandle,
+    ExtendedResponseHandle,
+    _Columns,
+    _result_row,
+    _split_new_dn,
+)
+from .constants import Scope
+from .exceptions import (
+    ConnectionUnbound,
+    LDAPConnectionError,
+    LDAPError,
+    LDAPWarning,
+    MultipleSearchResults,
+    NoSearchResults,
+    ResponseTimeout,
+)
+from .ldapobject import LDAPObject, LazyLDAPObject
+from .modify import Mod, Modlist, AddModlist, DeleteModlist
+from .net import LDAPSocket, AF_UNIX, _have_unix_socket, _INTERMEDIATE_RESPONSE_OPS
+from .protoutils import RESULT_saslBindInProgress, RESULT_success, unpack, get_string_component
+from . import controls
+
+logger = logging.getLogger(__name__)
+
+
+class _LDAPProtocol(asyncio.BufferedProtocol):
+    """Receives data directly into the preallocated buffer of an :class:`AsyncLDAPSocket` and handles write flow
+    control"""
+
+    def __init__(self, ldap_sock):
+        self._ldap_sock = ldap_sock
+        self._paused = False
+        self._drain_waiters = []
+        self.closed = asyncio.get_event_loop().create_future()
+
+    def get_buffer(self, sizehint):
+        return self._ldap_sock._recv_view
+
+    def buffer_updated(self, nbytes):
+        self._ldap_sock._data_received(self._ldap_sock._received(nbytes))
+
+    def eof_received(self):
+        # let the transport close itself
+        return False
+
+    def connection_lost(self, exc):
+        self._ldap_sock._connection_lost(exc)
+        self._wake_drain_waiters()
+        if not self.closed.done():
+            self.closed.set_result(None)
+
+    def pause_writing(self):
+        self._paused = True
+
+    def resume_writing(self):
+        self._paused = False
+        self._wake_drain_waiters()
+
+    def _wake_drain_waiters(self):
+        waiters = self._drain_waiters
+        self._drain_waiters = []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def drain(self):
+        if not self._paused:
+            return
+        waiter = asyncio.get_event_loop().create_future()
+        self._drain_waiters.append(waiter)
+        await waiter
+
+
+class AsyncLDAPSocket(LDAPSocket):
+    """Holds an asyncio connection to an LDAP server.
+
+    Accepts the same parameters as :class:`.LDAPSocket`, but does not connect until :meth:`connect` is awaited.
+    Responses are always routed to the operation waiting for their message ID, so any number of tasks may share one
+    socket. The ``multiplex`` parameter is accepted for compatibility and ignored.
+    """
+
+    def __init__(self, host_uri, connect_timeout=5, ssl_verify=True, ssl_ca_file=None, ssl_ca_path=None,
+                 ssl_ca_data=None, recv_buffer_size=None, max_recv_buffer_size=None, tcp_nodelay=False,
+                 tcp_keepalive=False, so_rcvbuf=None, so_sndbuf=None, multiplex=True):
+        self._prop_init(connect_timeout)
+        self._io_init(recv_buffer_size, max_recv_buffer_size, tcp_nodelay, tcp_keepalive, so_rcvbuf, so_sndbuf)
+        self.multiplex = True
+        self._host_uri = host_uri
+        self._ssl_params = (ssl_verify, ssl_ca_file, ssl_ca_path, ssl_ca_data)
+        self._transport = None
+        self._protocol = None
+        self._closing = False
+        self._parse_uri(host_uri)
+
+    async def connect(self):
+        """Connect to the server given in the constructor, and install TLS for ``ldaps://``."""
+        scheme, netloc = self._parse_uri(self._host_uri)
+        logger.info('Connecting to {0} on #{1}'.format(self.uri, self.ID))
+        if scheme == 'ldap':
+            await self._inet_connect_async(netloc, 389)
+        elif scheme == 'ldaps':
+            await self._inet_connect_async(netloc, 636)
+            await self.start_tls(*self._ssl_params)
+            logger.info('Connected with TLS on #{0}'.format(self.ID))
+        elif scheme == 'ldapi':
+            await self._unix_connect_async(netloc)
+        else:
+            raise LDAPError('Unsupported scheme "{0}"'.format(scheme))
+
+    async def _inet_connect_async(self, netloc, default_port):
+        port = self._parse_netloc(netloc, default_port)
+        loop = asyncio.get_event_loop()
+        try:
+            sock = await asyncio.wait_for(self._open_inet_socket(loop, port), self.connect_timeout)
+        except (SocketError, asyncio.TimeoutError) as e:
+            raise LDAPConnectionError('failed connect to {0}:{1} - {2}'.format(self.host, port, e or 'timed out'))
+        self._set_tcp_options(sock)
+        self._transport, self._protocol = await loop.create_connection(lambda: _LDAPProtocol(self), sock=sock)
+        logger.debug('Connected to {0}:{1} on #{2}'.format(self.host, port, self.ID))
+
+    async def _open_inet_socket(self, loop, port):
+        err = None
+        for af, socktype, proto, canonname, sa in await loop.getaddrinfo(self.host, port, type=SOCK_STREAM):
+            sock = socket(af, socktype, proto)
+            try:
+                sock.setblocking(False)
+                self._set_buffer_options(sock)
+                await loop.sock_connect(sock, sa)
+                return sock
+            except SocketError as e:
+                err = e
+                sock.close()
+            except BaseException:
+                sock.close()
+                raise
+        if err is not None:
+            raise err
+        raise SocketError('getaddrinfo returned an empty list')
+
+    async def _unix_connect_async(self, netloc):
+        if not _have_unix_socket:
+            raise LDAPError('Unix sockets are not supported on your platform, please choose a protocol other'
+                            'than ldapi')
+        loop = asyncio.get_event_loop()
+        self.sock_path = None
+        self.host = 'localhost'
+
+        if netloc == '/':
+            for fn in self._find_ldapi_sockets():
+                try:
+                    sock = await self._open_unix_socket(loop, fn)
+                    self.sock_path = fn
+                    break
+                except (SocketError, asyncio.TimeoutError):
+                    continue
+            if self.sock_path is None:
+                raise LDAPConnectionError('Could not find any local LDAPI unix socket - full '
+                                          'socket path must be supplied in URI')
+        else:
+            try:
+                sock = await self._open_unix_socket(loop, netloc)
+                self.sock_path = netloc
+            except (SocketError, asyncio.TimeoutError) as e:
+                raise LDAPConnectionError('failed connect to unix socket {0} - {1}'.format(netloc, e or 'timed out'))
+
+        self._transport, self._protocol = await loop.create_unix_connection(lambda: _LDAPProtocol(self), sock=sock)
+        logger.debug('Connected to unix socket {0} on #{1}'.format(self.sock_path, self.ID))
+
+    async def _open_unix_socket(self, loop, path):
+        sock = socket(AF_UNIX)
+        try:
+            sock.setblocking(False)
+            self._set_buffer_options(sock)
+            await asyncio.wait_for(loop.sock_connect(sock, path), self.connect_timeout)
+            return sock
+        except BaseException:
+            sock.close()
+            raise
+
+    async def start_tls(self, verify=True, ca_file=None, ca_path=None, ca_data=None):
+        """Install TLS layer on this socket connection.
+
+        Accepts the same parameters as :meth:`.LDAPSocket.start_tls`.
+        """
+        if self.started_tls:
+            raise LDAPError('TLS layer already installed')
+
+        ctx = self._ssl_context(verify, ca_file, ca_path, ca_data)
+        loop = asyncio.get_event_loop()
+        self._transport = await loop.start_tls(self._transport, self._protocol, ctx, server_hostname=self.host)
+        self._verify_peer(verify, lambda: self._transport.get_extra_info('peercert'))
+        self.started_tls = True
+        logger.debug('Installed TLS layer on #{0}'.format(self.ID))
+
+    def _send_raw(self, raw, deadline=None):
+        self._transport.write(raw)
+
+    async def drain(self):
+        """Wait until the transport's write buffer has been flushed below its high-water mark"""
+        if self._reader_error is not None:
+            raise self._reader_error
+        await self._protocol.drain()
+
+    def _register_mux_queue(self, mid):
+        if self._reader_error is not None:
+            raise self._reader_error
+        if self._transport is None or self._transport.is_closing():
+            raise LDAPConnectionError('Socket #{0} is not connected'.format(self.ID))
+        self._mux_queues[mid] = asyncio.Queue()
+
+    def _data_received(self, data):
+        if self._has_sasl_client():
+            data = self._sasl_client.unwrap(data.tobytes())
+        self._framer.feed(data)
+        try:
+            pdu = self._framer.next_pdu()
+            while pdu is not None:
+                self._route_pdu(pdu)
+                pdu = self._framer.next_pdu()
+        except Exception as e:
+            logger.debug('Failed to handle received data on #{0}: {1}'.format(self.ID, e))
+            self._fail_waiters(e)
+            self._transport.close()
+
+    def _connection_lost(self, exc):
+        if self._closing:
+            return
+        if exc is None:
+            msg = 'Connection closed by server on #{0}'.format(self.ID)
+        else:
+            msg = 'Connection lost on #{0} - {1}'.format(self.ID, exc)
+        self._fail_waiters(LDAPConnectionError(msg))
+
+    async def recv_messages(self, want_message_id, deadline=None):
+        """Iterate all messages with ``want_message_id`` being sent by the server.
+
+        :param int want_message_id: The desired message ID.
+        :param float deadline: Optional :func:`time.time` timestamp by which all messages must arrive.
+        :return: An asynchronous iterator over :class:`.rfc4511.LDAPMessage`.
+        :raises ResponseTimeout: if the deadline passes first
+        """
+        q = self._mux_queues.get(want_message_id)
+        if q is None:
+            if self._reader_error is not None:
+                raise self._reader_error
+            raise LDAPError('No outstanding request with ID={0} on #{1}'.format(want_message_id, self.ID))
+        while True:
+            if want_message_id in self.abandoned_mids:
+                self._unregister_mux_queue(want_message_id)
+                return
+            if deadline is None:
+                response = await q.get()
+            else:
+                try:
+                    response = await asyncio.wait_for(q.get(), max(deadline - time.time(), 0))
+                except asyncio.TimeoutError:
+                    raise self._response_timeout()
+            if isinstance(response, Exception):
+                raise response
+            if response.getComponentByName('protocolOp').getName() not in _INTERMEDIATE_RESPONSE_OPS:
+                self._unregister_mux_queue(want_message_id)
+            yield response
+
+    async def recv_one(self, want_message_id, deadline=None):
+        """Get the next message with ``want_message_id`` being sent by the server
+
+        :param int want_message_id: The desired message ID.
+        :param float deadline: Optional :func:`time.time` timestamp by which the message must arrive.
+        :return: The LDAP message
+        :rtype: rfc4511.LDAPMessage
+        :raises ResponseTimeout: if the deadline passes first
+        """
+        recvr = self.recv_messages(want_message_id, deadline)
+        try:
+            return await recvr.__anext__()
+        finally:
+            await recvr.aclose()
+
+    def close(self):
+        """Close the connection. Use :meth:`wait_closed` to wait for it to finish closing."""
+        self._closing = True
+        if self._transport is not None:
+            self._transport.close()
+
+    async def wait_closed(self):
+        if self._protocol is not None:
+            await self._protocol.closed
+
+
+class AsyncSearchResultHandle(SearchResultHandle):
+    """Returned by :meth:`AsyncLDAP.search`. Use with ``async for`` to obtain results, and optionally with
+    ``async with`` to abandon unread results on exit."""
+
+    def __iter__(self):
+        raise TypeError('Use "async for" to iterate AsyncLDAP search results')
+
+    def __aiter__(self):
+        return self._aiter()
+
+    async def _aiter(self):
+        if self.abandoned:
+            logger.debug('ID={0} has been abandoned'.format(self.message_id))
+            return
+        async for msg in self._recv_messages():
+            kind, value = self._process_message(msg)
+            if kind == SearchResultHandle.ENTRY:
+                yield value
+            elif kind == SearchResultHandle.REFERENCE:
+                if self.fetch_result_refs:
+                    async for obj in _fetch_reference(value, self.obj_kwds):
+                        yield obj
+                else:
+                    yield value
+            elif kind == SearchResultHandle.REFERRAL:
+                async for obj in _fetch_reference(self._reference_handle(value), self.obj_kwds):
+                    yield obj
+                return
+            else:
+                return
+
+    async def to_columns(self, attrs, missing=None):
+        """Read all remaining results into columns. See :meth:`.SearchResultHandle.to_columns`."""
+        columns = _Columns(attrs, missing)
+        async for dn, row in self._rows(frozenset(columns.keys)):
+            columns.add(dn, row)
+        return columns.result()
+
+    async def iter_columns(self, attrs, chunk_size=1000, missing=None):
+        """Read the remaining results into columns, one chunk at a time. Use with ``async for``. See
+        :meth:`.SearchResultHandle.iter_columns`."""
+        columns = _Columns(attrs, missing)
+        keys = frozenset(columns.keys)
+        async for dn, row in self._rows(keys):
+            columns.add(dn, row)
+            if columns.size >= chunk_size:
+                yield columns.result()
+                columns = _Columns(attrs, missing)
+        if columns.size:
+            yield columns.result()
+
+    async def _rows(self, keys):
+        if self.abandoned:
+            logger.debug('ID={0} has been abandoned'.format(self.message_id))
+            return
+        async for msg in self._recv_messages():
+            row = self._entry_row(msg, keys)
+            if row is not None:
+                yield row
+                continue
+            kind, value = self._process_message(msg)
+            if kind == SearchResultHandle.REFERENCE:
+                if self.fetch_result_refs:
+                    async for obj in _fetch_reference(value, self.obj_kwds):
+                        row = _result_row(obj)
+                        if row is not None:
+                            yield row
+            elif kind == SearchResultHandle.REFERRAL:
+                async for obj in _fetch_reference(self._reference_handle(value), self.obj_kwds):
+                    row = _result_row(obj)
+                    if row is not None:
+                        yield row
+                return
+            else:
+                return
+
+    async def _recv_messages(self):
+        """Iterate the response messages for this search, abandoning it if its deadline passes"""
+        try:
+            async for msg in self.ldap_conn.sock.recv_messages(self.message_id, self._deadline):
+                yield msg
+        except ResponseTimeout:
+            self.abandon()
+            raise
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, etype, e, trace):
+        return self.__exit__(etype, e, trace)
+
+
+async def _fetch_reference(ref, obj_kwds):
+    """Asynchronously perform a reference or referral search, like :meth:`.SearchReferenceHandle.fetch`"""
+
+    # If multiple URIs are present, the client assumes that any supported URI
+    # may be used to progress the operation. ~ RFC4511 sec 4.5.3 p28
+    for uri in ref.uris:
+        ldap = AsyncLDAP(uri.host_uri, reuse_connection=False)
+        try:
+            await ldap.open()
+        except LDAPConnectionError as e:
+            warn('Error connecting to URI {0} ({1})'.format(uri, six.text_type(e)), LDAPWarning)
+            continue
+        try:
+            if uri.starttls:
+                await ldap.start_tls()
+            async for obj in ldap.search(uri.dn, uri.scope, filter=uri.filter, attrs=uri.attrs,
+                                         result_format=ref.result_format, value_decoding=ref.value_decoding,
+                                         **obj_kwds):
+                yield obj
+        finally:
+            await ldap.unbind()
+        return
+    raise LDAPError('Could not complete reference URI search with any supplied URIs')
+
+
+class AsyncExtendedResponseHandle(ExtendedResponseHandle):
+    """Returned by :meth:`AsyncLDAP.send_extended_request`. Use with ``async for``, or await :meth:`recv_response`."""
+
+    def __iter__(self):
+        raise TypeError('Use "async for" to iterate AsyncLDAP extended responses')
+
+    def __aiter__(self):
+        return self._aiter()
+
+    async def _aiter(self):
+        while not self.done:
+            try:
+                lm = await self._recv()
+            except StopAsyncIteration:
+                return
+            yield self._handle_msg(lm)
+
+    async def recv_response(self):
+        return self._handle_msg(await self._recv())
+
+    async def _recv(self):
+        try:
+            return await self._recvr.__anext__()
+        except ResponseTimeout:
+            self.abandon()
+            raise
+
+
+class AsyncLDAP(LDAP):
+    """asyncio counterpart to :class:`.LDAP`.
+
+    Accepts all of the same constructor parameters and uses the same global defaults, but does not connect until
+    :meth:`open` is awaited or the instance is used with ``async with``. ``reuse_connection`` is ignored; every
+    instance opens its own :class:`AsyncLDAPSocket` unless one is passed as ``server``. ``auto_reconnect`` is not
+    supported. Operations are coroutines, except :meth:`search` and :meth:`send_extended_request`, which send their
+    request immediately and return a handle to be used with ``async for``. ``response_timeout`` applies to every
+    operation, but :func:`.deadline` blocks do not; use :func:`asyncio.wait_for` to limit a group of operations.
+
+    Objects returned by this class are not bound to the connection, since the :class:`.LDAPObject` methods that
+    communicate with the server are blocking. Pass ``obj.dn`` to the methods of this class instead. Extensions are also
+    not supported.
+
+    Example::
+
+        async with AsyncLDAP('ldaps://dir.example.org') as ldap:
+            await ldap.simple_bind(username='cn=admin,dc=example,dc=org', password='secret')
+            async for user in ldap.search('ou=people,dc=example,dc=org', filter='(uid=a*)'):
+                print(user.format_ldif())
+    """
+
+    def _connect(self, server, reuse_connection, base_dn):
+        if self.auto_reconnect:
+            raise LDAPError('auto_reconnect is not supported by AsyncLDAP')
+        # defer until open()
+        self._connect_params = (server, base_dn)
+        self.sock = None
+        self.root_dse = None
+
+    async def open(self):
+        """Connect, fetch the root DSE, and set up the base DN. Returns this instance."""
+        server, base_dn = self._connect_params
+        if isinstance(server, six.string_types):
+            self.host_uri = server
+            self.sock = AsyncLDAPSocket(self.host_uri, *self.sock_params)
+            await self.sock.connect()
+            logger.info('Connected to {0} (#{1})'.format(self.host_uri, self.sock.ID))
+        elif isinstance(server, AsyncLDAPSocket):
+            self.sock = server
+            self.host_uri = server.uri
+            logger.info('Using existing socket {0} (#{1})'.format(self.host_uri, self.sock.ID))
+        else:
+            raise TypeError('Must supply URI string or AsyncLDAPSocket for server')
+        self.sock.refcount += 1
+
+        await self.refresh_root_dse()
+        self._init_base(base_dn)
+        return self
+
+    def __enter__(self):
+        raise TypeError('Use "async with" with AsyncLDAP')
+
+    async def __aenter__(self):
+        if self.sock is None:
+            await self.open()
+        return self
+
+    async def __aexit__(self, etype, e, trace):
+        await self.close()
+
+    async def refresh_root_dse(self):
+        """Update the local copy of the root DSE. See :meth:`.LDAP.refresh_root_dse`."""
+        self.root_dse = await self.get('', ['*', '+'])
+        self._sasl_mechs = self.root_dse.get_attr('supportedSASLMechanisms')
+
+    def _deadline(self):
+        # deadline() blocks are per thread, and so cannot distinguish between tasks
+        if self.response_timeout:
+            return time.time() + self.response_timeout
+        return None
+
+    async def _recv_one(self, message_id):
+        sock = self.sock
+        try:
+            return await sock.recv_one(message_id, self._deadline())
+        except ResponseTimeout:
+            self._abandon_timed_out(sock, message_id)
+            raise
+
+    async def _success_result(self, message_id, operation):
+        return self._check_success_result(await self._recv_one(message_id), operation)
+
+    async def _send(self, op, obj, ctrls):
+        mid = self.sock.send_message(op, obj, ctrls)
+        await self.sock.drain()
+        return mid
+
+    async def simple_bind(self, username='', password='', **ctrl_kwds):
+        """Perform a simple bind operation. See :meth:`.LDAP.simple_bind`."""
+        br, req_ctrls = self._prep_simple_bind(username, password, ctrl_kwds)
+        mid = await self._send('bindRequest', br, req_ctrls)
+        logger.debug('Sent bind request (ID {0}) on connection #{1} for {2}'.format(mid, self.sock.ID, username))
+        ret = await self._success_result(mid, 'bindResponse')
+        self.sock.bound = True
+        logger.info('Simple bind successful')
+        return ret
+
+    async def get_sasl_mechs(self):
+        """Query root DSE for supported SASL mechanisms. See :meth:`.LDAP.get_sasl_mechs`."""
+        if self._sasl_mechs is None:
+            logger.debug('Querying server to find supported SASL mechs')
+            o = await self.get('', ['supportedSASLMechanisms'])
+            self._sasl_mechs = o.get_attr('supportedSASLMechanisms')
+            logger.debug('Server supported SASL mechs = {0}'.format(','.join(self._sasl_mechs)))
+        return self._sasl_mechs
+
+    async def recheck_sasl_mechs(self):
+        """Check for a downgrade attack after a SASL bind. See :meth:`.LDAP.recheck_sasl_mechs`."""
+        if self._sasl_mechs is None:
+            raise LDAPError('SASL mechs have not yet been queried')
+        orig_mechs = set(self._sasl_mechs)
+        self._sasl_mechs = None
+        await self.get_sasl_mechs()
+        self._check_sasl_downgrade(orig_mechs)
+
+    async def sasl_bind(self, mech=None, **props):
+        """Perform a SASL bind operation. See :meth:`.LDAP.sasl_bind`."""
+        self._check_bind_allowed()
+
+        req_ctrls = self._process_ctrl_kwds('bind', props)
+        self._sasl_init(await self.get_sasl_mechs(), mech, props)
+
+        challenge_response = None
+        while True:
+            br = self._sasl_bind_request(challenge_response)
+            mid = await self._send('bindRequest', br, req_ctrls)
+            logger.debug('Sent SASL bind request (ID {0}) on connection #{1}'.format(mid, self.sock.ID))
+
+            mid, res, res_ctrls = unpack('bindResponse', await self._recv_one(mid))
+            status = res.getComponentByName('resultCode')
+            if status == RESULT_saslBindInProgress:
+                challenge_response = self.sock.sasl_process_auth_challenge(res.getComponentByName('serverSaslCreds'))
+                continue
+            elif status == RESULT_success:
+                logger.info('SASL bind successful')
+                logger.debug('Negotiated SASL QoP = {0}'.format(self.sock.sasl_qop))
+                self.sock.bound = True
+                await self.recheck_sasl_mechs()
+
+                ret = LDAPResponse()
+                controls.handle_response(ret, res_ctrls)
+                return ret
+            else:
+                msg = res.getComponentByName('diagnosticMessage')
+                raise LDAPError('Got {0} during SASL bind ({1})'.format(repr(status), msg))
+
+    async def unbind(self, force=False):
+        """Send an unbind request and close the socket. See :meth:`.LDAP.unbind`."""
+        if self.sock.unbound:
+            raise ConnectionUnbound()
+
+        self.sock.refcount -= 1
+        if force or self.sock.refcount == 0:
+            self.sock.unbound = True
+            self.sock.send_message('unbindRequest', ber.UnbindRequest())
+            self.sock.close()
+            await self.sock.wait_closed()
+            logger.info('Unbound on {0} (#{1})'.format(self.sock.uri, self.sock.ID))
+        else:
+            logger.debug('Socket still in use')
+
+    close = unbind
+
+    def obj(self, dn, attrs_dict=None, tag=None, **kwds):
+        """Factory for LDAPObjects. Unlike :meth:`.LDAP.obj`, the objects are not bound to the connection.
+
+        :param str dn: The DN of the object.
+        :param attrs_dict: Optional. The object's attributes and values.
+        :type attrs_dict: dict(str, list[str or bytes]) or AttrsDict or None
+        :param tag: Optional. The tag for this object. Tagged objects can be retrieved with :meth:`.LDAP.tag`.
+        :type tag: str or None
+        :return: The new object.
+        :rtype: LDAPObject
+        :raises TagError: if the tag parameter is already defined
+        """
+        obj = LDAPObject(dn, attrs_dict=attrs_dict, **kwds)
+        obj._built_in_only = self._built_in_only
+        if tag is not None:
+            self._add_tag(tag, obj)
+        return obj
+
+    def _lazy_obj(self, entry, value_decoding, tag=None, **kwds):
+        obj = LazyLDAPObject(entry.dn, entry, value_decoding, **kwds)
+        obj._built_in_only = self._built_in_only
+        if tag is not None:
+            self._add_tag(tag, obj)
+        return obj
+
+    async def get(self, dn, attrs=None, **kwds):
+        """Get a specific object by DN. See :meth:`.LDAP.get`."""
+        if self.sock.unbound:
+            raise ConnectionUnbound()
+        self._object_result_format(kwds)
+        results = []
+        async for result in self.search(dn, Scope.BASE, attrs=attrs, limit=2, **kwds):
+            results.append(result)
+        return utils.get_one_result(results)
+
+    async def exists(self, dn):
+        """Simply check if a DN exists. See :meth:`.LDAP.exists`."""
+        if self.sock.unbound:
+            raise ConnectionUnbound()
+        try:
+            await self.get(dn, [LDAP.NO_ATTRS])
+            return True
+        except NoSearchResults:
+            return False
+        except MultipleSearchResults:
+            return True
+
+    def search(self, base_dn, scope=Scope.SUBTREE, filter=None, attrs=None, search_timeout=None, limit=0,
+               deref_aliases=None, attrs_only=False, fetch_result_refs=None, follow_referrals=None,
+               filter_syntax=None, result_format=None, value_decoding=None, **kwds):
+        """Send a search request and return an asynchronous iterator over results. All parameters are the same as
+        :meth:`.LDAP.search`.
+
+        This is not a coroutine; the request is sent immediately.
+
+        :rtype: AsyncSearchResultHandle
+
+        Example::
+
+            async with ldap.search('ou=people,dc=example,dc=org', filter='(uid=a*)') as search:
+                async for result in search:
+                    print(result.dn)
+        """
+        req, ctrls, fetch_result_refs, follow_referrals, result_format, value_decoding = self._prep_search(
+            base_dn, scope, filter, attrs, search_timeout, limit, deref_aliases, attrs_only, fetch_result_refs,
+            follow_referrals, filter_syntax, result_format, value_decoding, kwds)
+        mid = self.sock.send_message('searchRequest', req, ctrls)
+        logger.info('Sent search request (ID {0}): base_dn={1}, scope={2}, filter={3}'.format(
+                    mid, base_dn, scope, filter))
+        return AsyncSearchResultHandle(self, mid, fetch_result_refs, follow_referrals, kwds,
+                                       result_format=result_format, value_decoding=value_decoding)
+
+    async def compare(self, dn, attr, value, **ctrl_kwds):
+        """Perform a compare operation. See :meth:`.LDAP.compare`."""
+        cr, req_ctrls = self._prep_compare(dn, attr, value, ctrl_kwds)
+        message_id = await self._send('compareRequest', cr, req_ctrls)
+        logger.info('Sent compare request (ID {0}): {1} ({2} = {3})'.format(message_id, dn, attr, value))
+        return self._compare_result(await self._recv_one(message_id))
+
+    async def add(self, dn, attrs_dict, **kwds):
+        """Add new object and return corresponding LDAPObject on success. See :meth:`.LDAP.add`."""
+        obj, ar, req_ctrls = self._prep_add(dn, attrs_dict, kwds)
+        mid = await self._send('addRequest', ar, req_ctrls)
+        logger.info('Sent add request (ID {0}) for DN {1}'.format(mid, dn))
+        try:
+            return self._add_result(await self._recv_one(mid), obj)
+        finally:
+            self._invalidate_cached(dn)
+
+    async def add_or_mod_add_if_exists(self, dn, attrs_dict):
+        """Add object if it doesn't exist, otherwise add_attrs. See :meth:`.LDAP.add_or_mod_add_if_exists`."""
+        try:
+            cur = await self.get(dn)
+        except NoSearchResults:
+            return await self.add(dn, attrs_dict)
+        modlist = AddModlist(cur, attrs_dict)
+        await self.modify(dn, modlist, cur)
+        cur._local_modify(modlist)
+        return cur
+
+    async def add_or_mod_replace_if_exists(self, dn, attrs_dict):
+        """Add object if it doesn't exist, otherwise replace_attrs. See :meth:`.LDAP.add_or_mod_replace_if_exists`."""
+        try:
+            cur = await self.get(dn)
+        except NoSearchResults:
+            return await self.add(dn, attrs_dict)
+        modlist = Modlist(Mod.REPLACE, attrs_dict)
+        await self.modify(dn, modlist, cur)
+        cur._local_modify(modlist)
+        return cur
+
+    async def add_if_not_exists(self, dn, attrs_dict):
+        """Add object if it doesn't exist. See :meth:`.LDAP.add_if_not_exists`."""
+        try:
+            cur = await self.get(dn)
+            logger.debug('Object {0} already exists on addIfNotExists'.format(dn))
+            return cur
+        except NoSearchResults:
+            return await self.add(dn, attrs_dict)
+
+    async def delete(self, dn, **ctrl_kwds):
+        """Delete an object. See :meth:`.LDAP.delete`."""
+        dr, ctrls = self._prep_delete(dn, ctrl_kwds)
+        mid = await self._send('delRequest', dr, ctrls)
+        logger.info('Sent delete request (ID {0}) for DN {1}'.format(mid, dn))
+        try:
+            return await self._success_result(mid, 'delResponse')
+        finally:
+            self._invalidate_cached(dn)
+
+    async def mod_dn(self, dn, new_rdn, clean_attr=True, new_parent=None, **ctrl_kwds):
+        """Change the DN and possibly the location of an object. See :meth:`.LDAP.mod_dn`."""
+        mdr, ctrls = self._prep_mod_dn(dn, new_rdn, clean_attr, new_parent, ctrl_kwds)
+        mid = await self._send('modDNRequest', mdr, ctrls)
+        logger.info('Sent modDN request (ID {0}) for DN {1} newRDN="{2}" newParent="{3}"'.format(
+                    mid, dn, new_rdn, new_parent))
+        try:
+            return await self._success_result(mid, 'modDNResponse')
+        finally:
+            self._invalidate_mod_dn(dn, new_rdn, new_parent)
+
+    async def rename(self, dn, new_rdn, clean_attr=True, **ctrl_kwds):
+        """Specify a new RDN for an object. See :meth:`.LDAP.rename`."""
+        return await self.mod_dn(dn, new_rdn, clean_attr, **ctrl_kwds)
+
+    async def move(self, dn, new_dn, clean_attr=True, **ctrl_kwds):
+        """Specify a new absolute DN for an object. See :meth:`.LDAP.move`."""
+        rdn, parent = _split_new_dn(new_dn)
+        return await self.mod_dn(dn, rdn, clean_attr, parent, **ctrl_kwds)
+
+    async def modify(self, dn, modlist, current=None, **ctrl_kwds):
+        """Perform a series of modify operations on an object atomically. See :meth:`.LDAP.modify`."""
+        prepared = self._prep_modify(dn, modlist, current, ctrl_kwds)
+        if prepared is None:
+            return LDAPResponse()
+        mr, ctrls = prepared
+        mid = await self._send('modifyRequest', mr, ctrls)
+        logger.info('Sent modify request (ID {0}) for DN {1}'.format(mid, dn))
+        try:
+            return await self._success_result(mid, 'modifyResponse')
+        finally:
+            self._invalidate_cached(dn)
+
+    async def add_attrs(self, dn, attrs_dict, current=None, **ctrl_kwds):
+        """Add new attribute values to existing object. See :meth:`.LDAP.add_attrs`."""
+        if current is not None:
+            modlist = AddModlist(current, attrs_dict)
+        elif not self.strict_modify:
+            current = await self.get(dn, list(attrs_dict.keys()))
+            modlist = AddModlist(current, attrs_dict)
+        else:
+            modlist = Modlist(Mod.ADD, attrs_dict)
+        return await self.modify(dn, modlist, current, **ctrl_kwds)
+
+    async def delete_attrs(self, dn, attrs_dict, current=None, **ctrl_kwds):
+        """Delete specific attribute values. See :meth:`.LDAP.delete_attrs`."""
+        if current is not None:
+            modlist = DeleteModlist(current, attrs_dict)
+        elif not self.strict_modify:
+            current = await self.get(dn, list(attrs_dict.keys()))
+            modlist = DeleteModlist(current, attrs_dict)
+        else:
+            modlist = Modlist(Mod.DELETE, attrs_dict)
+        return await self.modify(dn, modlist, current, **ctrl_kwds)
+
+    async def replace_attrs(self, dn, attrs_dict, current=None, **ctrl_kwds):
+        """Replace all values on given attributes with the passed values. See :meth:`.LDAP.replace_attrs`."""
+        if current is None and self.validators and not self.strict_modify:
+            current = await self.get(dn, list(attrs_dict.keys()))
+
+        return await self.modify(dn, Modlist(Mod.REPLACE, attrs_dict), current, **ctrl_kwds)
+
+    def send_extended_request(self, oid, value=None, **kwds):
+        """Send an extended request. See :meth:`.LDAP.send_extended_request`.
+
+        This is not a coroutine; the request is sent immediately.
+
+        :rtype: AsyncExtendedResponseHandle
+        """
+        xr, req_ctrls = self._prep_extended_request(oid, value, kwds)
+        mid = self.sock.send_message('extendedReq', xr, req_ctrls)
+        logger.info('Sent extended request ID={0} OID={1}'.format(mid, oid))
+        return AsyncExtendedResponseHandle(mid=mid, ldap_conn=self, **kwds)
+
+    async def who_am_i(self, **ctrl_kwds):
+        """Perform the "Who Am I?" extended operation. See :meth:`.LDAP.who_am_i`."""
+        handle = self.send_extended_request(LDAP.OID_WHOAMI, require_success=True, **ctrl_kwds)
+        xr, res_ctrls = await handle.recv_response()
+        return get_string_component(xr, 'responseValue')
+
+    async def start_tls(self, verify=None, ca_file=None, ca_path=None, ca_data=None):
+        """Perform the StartTLS extended operation. See :meth:`.LDAP.start_tls`."""
+        tls_params = self._tls_params(verify, ca_file, ca_path, ca_data)
+        handle = self.send_extended_request(LDAP.OID_STARTTLS, require_success=True)
+        await handle.recv_response()
+        await self.sock.start_tls(*tls_params)
+        await self.refresh_root_dse()
+        logger.info('StartTLS complete')
+
+    async def process_ldif(self, ldif_str):
+        """Process a basic LDIF, performing each operation in turn. See :meth:`.LDAP.process_ldif`."""
+        ldap_responses = []
+        for method, args, kwds in self._parse_ldif(ldif_str):
+            ldap_responses.append(await getattr(self, method)(*args, **kwds))
+        return ldap_responses
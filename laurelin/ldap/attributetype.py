@@ -2,6 +2,7 @@ from __future__ import absolute_import
 from . import rfc4512
 from . import rules
 from . import utils
+from .constants import ValueDecoding
 from .exceptions import LDAPSchemaError, InvalidSyntaxError
 from .protoutils import parse_qdescrs
 from .utils import CaseIgnoreDict
@@ -33,6 +34,58 @@ def get_attribute_type(ident):
             return DefaultAttributeType(ident)
 
 
+def find_attribute_type(ident):
+    """Get the registered :class:`AttributeType` for a name or OID, if any. Unlike :func:`get_attribute_type`, does
+    not fall back to a default attribute type.
+
+    :param str ident: Either the numeric OID or any one of the names of the attribute type
+    :return: The AttributeType, or None if it is not defined
+    :rtype: AttributeType or None
+    """
+    if not ident:
+        return None
+    if ident[0].isdigit():
+        return _oid_attribute_types.get(ident)
+    else:
+        return _name_attribute_types.get(ident)
+
+
+def is_binary(ident):
+    """Check whether the values of an attribute type are binary, according to its registered syntax.
+
+    :param str ident: An attribute description, which may include options. Descriptions with the ``binary`` option,
+                      such as ``userCertificate;binary``, are always binary.
+    :return: True if the attribute type has a binary syntax, False if it has a text syntax, or None if the attribute
+             type or its syntax is not defined
+    :rtype: bool or None
+    """
+    options = ident.split(';')
+    if 'binary' in (option.lower() for option in options[1:]):
+        return True
+    attr_type = find_attribute_type(options[0])
+    if attr_type is None:
+        return None
+    try:
+        return attr_type.syntax.binary
+    except (KeyError, LDAPSchemaError):
+        return None
+
+
+def decode_as_bytes(attr, value_decoding):
+    """Check whether values of ``attr`` should be left as bytes in search results.
+
+    :param str attr: The attribute description, as returned by the server
+    :param str value_decoding: One of the :class:`.ValueDecoding` constants
+    :rtype: bool
+    """
+    if value_decoding == ValueDecoding.BYTES:
+        return True
+    elif value_decoding == ValueDecoding.SCHEMA or value_decoding == ValueDecoding.MEMORYVIEW:
+        return bool(is_binary(attr))
+    else:
+        return False
+
+
 class AttributeType(object):
     """Parses an LDAP attribute type specification and implements supertype inheritance.
 
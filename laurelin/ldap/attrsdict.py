@@ -95,7 +95,7 @@ class AttrsDict(CaseIgnoreDict):
     @staticmethod
     def validate_values(attr_val_list):
         """Validate that ``attr_val_list`` conforms to the required ``list[str or bytes]`` typing. Also allows the
-        DELETE_ALL constant.
+        DELETE_ALL constant, and memoryviews of binary values as returned by :attr:`.ValueDecoding.MEMORYVIEW`.
 
         :param list attr_val_list: The list to validate for use as an attribute value list.
         :rtype: None
@@ -106,5 +106,5 @@ class AttrsDict(CaseIgnoreDict):
         if not isinstance(attr_val_list, list):
             raise TypeError('must be list')
         for val in attr_val_list:
-            if not isinstance(val, six.string_types) and not isinstance(val, six.binary_type):
+            if not isinstance(val, (six.string_types, six.binary_type, memoryview)):
                 raise TypeError('attribute values must be string or bytes')
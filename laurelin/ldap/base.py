@@ -1,15 +1,17 @@
 """Contains base classes for laurelin.ldap"""
 from __future__ import absolute_import
 
+from . import ber
 from . import controls
 from . import rfc4511
 from . import utils
-from .constants import Scope, DerefAliases, DELETE_ALL, FilterSyntax
+from .attributetype import get_attribute_type, find_attribute_type, decode_as_bytes
+from .constants import Scope, DerefAliases, DELETE_ALL, FilterSyntax, ResultFormat, ServerStrategy, ValueDecoding
 from .exceptions import *
-from .extensible import add_extension
+from .extensible import add_extension, extensions
 from .extensible.ldap_extensions import LDAPExtensions
-from .filter import parse as parse_unified_filter, parse_standard_filter, parse_simple_filter
-from .ldapobject import LDAPObject
+from .filter import cache as filter_cache, F, split_or
+from .ldapobject import LDAPObject, LazyLDAPObject
 from .modify import (
     Mod,
     Modlist,
@@ -17,6 +19,7 @@ from .modify import (
     DeleteModlist,
 )
 from .net import LDAPSocket
+from .servers import ServerSet
 from .protoutils import (
     V3,
     EMPTY_DN,
@@ -32,12 +35,21 @@ from .protoutils import (
 )
 from .validation import Validator, DisabledValidationContext
 
+import functools
+import hashlib
 import logging
+import multiprocessing
+import random
 import re
 import six
+import threading
+import time
 import warnings
+from array import array
 from base64 import b64decode
-from collections import deque
+from collections import deque, namedtuple, OrderedDict
+from contextlib import contextmanager
+from socket import error as SocketError
 from six.moves import range
 from six.moves.urllib.parse import urlparse
 from six.moves.urllib.request import urlopen
@@ -66,10 +78,46 @@ def _showwarning_log(message, category, filename, lineno, file=None, line=None):
 # for storing reusable sockets
 _sockets = {}
 
+# guards _sockets and socket refcounts
+_sockets_lock = threading.Lock()
+
 # this gets automatically generated by the reserve_kwds.py script
 _obj_kwds = set(['attrs_dict', 'dn', 'ldap_conn', 'rdn_attr', 'relative_search_scope', 'self', 'tag'])
 
 
+def _split_new_dn(new_dn):
+    """Split an absolute DN into its RDN and parent DN"""
+    return re.split(r'(?<!\\),', new_dn, 1)
+
+
+_re_dn_escape = re.compile(r'\\([0-9A-Fa-f]{2}|.)')
+
+
+def _parse_rdn(rdn):
+    """Split a single-valued RDN into its attribute type and unescaped value.
+
+    :return: An ``(attr, value)`` tuple, or None if the RDN is multi-valued or not a simple string value
+    :rtype: tuple(str, str) or None
+    """
+    if re.search(r'(?<!\\)\+', rdn):
+        return None
+    attr, sep, value = rdn.partition('=')
+    attr = attr.strip()
+    value = value.strip()
+    if not sep or not attr or not value or value.startswith('#'):
+        return None
+    buf = bytearray()
+    for i, part in enumerate(_re_dn_escape.split(value)):
+        if i % 2 == 1 and len(part) == 2:
+            buf.append(int(part, 16))
+        else:
+            buf += part.encode('utf-8')
+    try:
+        return attr, buf.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+
+
 def _check_obj_kwds(kwds):
     bad_kwds = set()
     for kwd in kwds:
@@ -79,15 +127,82 @@ def _check_obj_kwds(kwds):
         raise TypeError('Unknown keyword arguments: {0}'.format(', '.join(bad_kwds)))
 
 
+# errors indicating the connection to the server has failed
+_connection_errors = (LDAPConnectionError, SocketError)
+
+# the innermost active deadline() of each thread
+_deadlines = threading.local()
+
+# OID of the INTEGER syntax, whose single-valued attributes are stored in compact arrays by to_columns()
+_INTEGER_SYNTAX = '1.3.6.1.4.1.1466.115.121.1.27'
+
+# number of search result entries sent to a decoding pool worker at once
+_DECODE_BATCH_SIZE = 200
+
+
+def deadline(timeout):
+    """Context manager placing a client-side time limit on every operation performed by the calling thread inside the
+    block, on any connection. The same budget covers all operations in the block, including connecting to and
+    searching servers named in referrals. A nested block can only shorten the limit of an enclosing one.
+
+    When the limit passes before a response arrives, the operation is abandoned, the connection is marked suspect, and
+    :exc:`.ResponseTimeout` is raised.
+
+    :param float timeout: The number of seconds from now that the block's operations must complete within
+    :return: A context manager
+
+    Example::
+
+        with deadline(5):
+            user = ldap.base.get_child('uid=alice,ou=people')
+            groups = list(ldap.base.search('(member={0})'.format(user.dn)))
+    """
+    return _deadline_at(time.time() + timeout)
+
+
+@contextmanager
+def _deadline_at(when):
+    """Apply an absolute :func:`time.time` deadline to the calling thread's operations inside the block"""
+    prev = getattr(_deadlines, 'current', None)
+    if when is not None and (prev is None or when < prev):
+        _deadlines.current = when
+    try:
+        yield
+    finally:
+        _deadlines.current = prev
+
+
+def _reconnect_on_error(retry):
+    """Decorate an :class:`LDAP` method to reconnect when it fails with a connection error, if ``auto_reconnect`` is
+    enabled. Idempotent operations (``retry=True``) are attempted once more on the new connection. Otherwise the error
+    is raised after reconnecting, since the server may or may not have applied the operation.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwds):
+            sock = self.sock
+            try:
+                return method(self, *args, **kwds)
+            except _connection_errors as e:
+                if not self._reconnect_after(sock, e) or not retry:
+                    raise
+            logger.info('Retrying {0} after reconnecting'.format(method.__name__))
+            return method(self, *args, **kwds)
+        return wrapper
+    return decorator
+
+
 class LDAP(LDAPExtensions):
     """Provides the connection to the LDAP DB. All constructor parameters have a matching global default as a class
     property on :class:`LDAP`
 
-    :param server: URI string to connect to or an :class:`LDAPSocket` to reuse
-    :type server: str or LDAPSocket
+    :param server: URI string to connect to, an :class:`LDAPSocket` to reuse, or a list of URIs or a
+                   :class:`.ServerSet` to connect to one of several equivalent servers
+    :type server: str or LDAPSocket or list[str] or ServerSet
     :param str base_dn: The DN of the base object
     :param bool reuse_connection: Allows the socket connection to be reused and reuse an existing socket if
-                                  possible.
+                                  possible. The socket is shared regardless of bind identity; see
+                                  :class:`.LDAPPool` for a bounded pool of separately bound connections.
     :param int connect_timeout: Number of seconds to wait for connection to be accepted.
     :param int search_timeout: Number of seconds to wait for a search to complete. Partial results will be returned
                                when the timeout is reached. Can be overridden on a per-search basis by setting the
@@ -127,6 +242,44 @@ class LDAP(LDAPExtensions):
                                        by setting the ``filter_syntax`` keyword on :meth:`LDAP.search`. Defaults
                                        to ``FilterSyntax.STANDARD`` for RFC4515-compliant filter string syntax.
     :param bool built_in_extensions_only: Set to True to raise an error when attempting to use a 3rd-party extension
+    :param int recv_buffer_size: Size in bytes of the preallocated socket receive buffer.
+    :param int max_recv_buffer_size: Set to allow the receive buffer to double in size each time a read fills it, up to
+                                     this many bytes. Useful for connections that receive sustained large results.
+                                     Default None keeps the buffer at a fixed ``recv_buffer_size``.
+    :param bool tcp_nodelay: Set to True to disable Nagle's algorithm (TCP_NODELAY) on TCP connections.
+    :param tcp_keepalive: Set to True to enable TCP keepalive, or supply an ``(idle, interval, count)`` tuple to also
+                          tune the keepalive timing where supported by the platform.
+    :type tcp_keepalive: bool or tuple(int, int, int)
+    :param int so_rcvbuf: Kernel socket receive buffer size (SO_RCVBUF). Default None uses the system default.
+    :param int so_sndbuf: Kernel socket send buffer size (SO_SNDBUF). Default None uses the system default.
+    :param bool multiplex: Set to True to start a background reader thread on new sockets that routes each response to
+                           the operation waiting for it. This allows one connection to be safely shared by any number
+                           of threads performing operations at the same time. Default False.
+    :param bool auto_reconnect: Set to True to automatically reconnect when the connection to the server fails,
+                                repeating StartTLS and the most recent bind. Searches and compares are retried on the
+                                new connection; other operations still raise the connection error after reconnecting
+                                since they may or may not have been applied. Default False.
+    :param int reconnect_attempts: The number of times to try connecting again before giving up.
+    :param float reconnect_backoff: The maximum delay in seconds before the first reconnection attempt. The maximum
+                                    doubles after each failed attempt, and the actual delay is chosen at random up to
+                                    the maximum so that many clients do not all reconnect at once.
+    :param float reconnect_max_backoff: The upper limit in seconds on the reconnection delay.
+    :param str server_strategy: One of the :class:`.ServerStrategy` constants. When ``server`` is a list of URIs,
+                                determines which server is used. ``reuse_connection`` does not apply to lists of
+                                servers.
+    :param float response_timeout: Client-side limit in seconds on waiting for the server to respond to each operation.
+                                   If it passes, the operation is abandoned, the socket is marked suspect, and
+                                   :exc:`.ResponseTimeout` is raised. For searches, applies to receiving all results.
+                                   Combined with any enclosing :func:`.deadline` block. Default 0 waits forever.
+    :param str result_format: The default format of search results. Must be one of the :class:`.ResultFormat`
+                              constants. Can be overridden on a per-search basis by setting the ``result_format``
+                              keyword on :meth:`LDAP.search`. Defaults to ``ResultFormat.OBJECTS``.
+    :param str value_decoding: Whether search results return attribute values as text or bytes. Must be one of the
+                               :class:`.ValueDecoding` constants. Can be overridden on a per-search basis by setting the
+                               ``value_decoding`` keyword on :meth:`LDAP.search`. Defaults to ``ValueDecoding.GUESS``.
+    :param EntryCache entry_cache: Keep the objects returned by :meth:`LDAP.get` in this cache and return them from it
+                                   until they expire or are changed through any connection sharing the cache. Default
+                                   None disables caching.
 
     The class can be used as a context manager, which will automatically unbind and close the connection when the
     context manager exits.
@@ -169,6 +322,25 @@ class LDAP(LDAPExtensions):
     DEFAULT_IGNORE_EMPTY_LIST = True
     DEFAULT_FILTER_SYNTAX = FilterSyntax.UNIFIED
     DEFAULT_BUILT_IN_EXTENSIONS_ONLY = False
+    DEFAULT_RECV_BUFFER_SIZE = LDAPSocket.RECV_BUFFER
+    DEFAULT_MAX_RECV_BUFFER_SIZE = None
+    DEFAULT_TCP_NODELAY = False
+    DEFAULT_TCP_KEEPALIVE = False
+    DEFAULT_SO_RCVBUF = None
+    DEFAULT_SO_SNDBUF = None
+    DEFAULT_MULTIPLEX = False
+    DEFAULT_PIPELINE_WINDOW = 64
+    DEFAULT_GET_MANY_BATCH_SIZE = 50
+    DEFAULT_MAX_OR_TERMS = 1000
+    DEFAULT_AUTO_RECONNECT = False
+    DEFAULT_RECONNECT_ATTEMPTS = 5
+    DEFAULT_RECONNECT_BACKOFF = 0.5
+    DEFAULT_RECONNECT_MAX_BACKOFF = 30
+    DEFAULT_SERVER_STRATEGY = ServerStrategy.FAILOVER
+    DEFAULT_RESPONSE_TIMEOUT = 0
+    DEFAULT_RESULT_FORMAT = ResultFormat.OBJECTS
+    DEFAULT_VALUE_DECODING = ValueDecoding.GUESS
+    DEFAULT_ENTRY_CACHE = None
 
     # spec constants
     NO_ATTRS = '1.1'
@@ -221,7 +393,11 @@ class LDAP(LDAPExtensions):
                  deref_aliases=None, strict_modify=None, ssl_verify=None, ssl_ca_file=None, ssl_ca_path=None,
                  ssl_ca_data=None, fetch_result_refs=None, default_sasl_mech=None, sasl_fatal_downgrade_check=None,
                  default_criticality=None, follow_referrals=None, validators=None, warn_empty_list=None,
-                 error_empty_list=None, ignore_empty_list=None, filter_syntax=None, built_in_extensions_only=None):
+                 error_empty_list=None, ignore_empty_list=None, filter_syntax=None, built_in_extensions_only=None,
+                 recv_buffer_size=None, max_recv_buffer_size=None, tcp_nodelay=None, tcp_keepalive=None,
+                 so_rcvbuf=None, so_sndbuf=None, multiplex=None, auto_reconnect=None, reconnect_attempts=None,
+                 reconnect_backoff=None, reconnect_max_backoff=None, server_strategy=None, response_timeout=None,
+                 result_format=None, value_decoding=None, entry_cache=None):
 
         LDAPExtensions.__init__(self)
 
@@ -270,6 +446,40 @@ class LDAP(LDAPExtensions):
             filter_syntax = LDAP.DEFAULT_FILTER_SYNTAX
         if built_in_extensions_only is None:
             built_in_extensions_only = LDAP.DEFAULT_BUILT_IN_EXTENSIONS_ONLY
+        if recv_buffer_size is None:
+            recv_buffer_size = LDAP.DEFAULT_RECV_BUFFER_SIZE
+        if max_recv_buffer_size is None:
+            max_recv_buffer_size = LDAP.DEFAULT_MAX_RECV_BUFFER_SIZE
+        if tcp_nodelay is None:
+            tcp_nodelay = LDAP.DEFAULT_TCP_NODELAY
+        if tcp_keepalive is None:
+            tcp_keepalive = LDAP.DEFAULT_TCP_KEEPALIVE
+        if so_rcvbuf is None:
+            so_rcvbuf = LDAP.DEFAULT_SO_RCVBUF
+        if so_sndbuf is None:
+            so_sndbuf = LDAP.DEFAULT_SO_SNDBUF
+        if multiplex is None:
+            multiplex = LDAP.DEFAULT_MULTIPLEX
+        if auto_reconnect is None:
+            auto_reconnect = LDAP.DEFAULT_AUTO_RECONNECT
+        if reconnect_attempts is None:
+            reconnect_attempts = LDAP.DEFAULT_RECONNECT_ATTEMPTS
+        if reconnect_backoff is None:
+            reconnect_backoff = LDAP.DEFAULT_RECONNECT_BACKOFF
+        if reconnect_max_backoff is None:
+            reconnect_max_backoff = LDAP.DEFAULT_RECONNECT_MAX_BACKOFF
+        if server_strategy is None:
+            server_strategy = LDAP.DEFAULT_SERVER_STRATEGY
+        if response_timeout is None:
+            response_timeout = LDAP.DEFAULT_RESPONSE_TIMEOUT
+        if result_format is None:
+            result_format = LDAP.DEFAULT_RESULT_FORMAT
+        if value_decoding is None:
+            value_decoding = LDAP.DEFAULT_VALUE_DECODING
+        if entry_cache is None:
+            entry_cache = LDAP.DEFAULT_ENTRY_CACHE
+        if isinstance(server, (list, tuple)):
+            server = ServerSet(server, server_strategy)
 
         self.default_search_timeout = search_timeout
         self.default_deref_aliases = deref_aliases
@@ -278,42 +488,39 @@ class LDAP(LDAPExtensions):
         self.default_sasl_mech = default_sasl_mech
         self.default_criticality = default_criticality
         self.default_filter_syntax = filter_syntax
+        self.default_result_format = result_format
+        self.default_value_decoding = value_decoding
 
         self.strict_modify = strict_modify
         self.sasl_fatal_downgrade_check = sasl_fatal_downgrade_check
         self.warn_empty_list = warn_empty_list
         self.error_empty_list = error_empty_list
         self.ignore_empty_list = ignore_empty_list
+        self.response_timeout = response_timeout
+        self.entry_cache = entry_cache
 
         self._tagged_objects = {}
         self._sasl_mechs = None
 
+        self.auto_reconnect = auto_reconnect
+        self.reconnect_attempts = reconnect_attempts
+        self.reconnect_backoff = reconnect_backoff
+        self.reconnect_max_backoff = reconnect_max_backoff
+        self._reuse_connection = reuse_connection
+        self._reconnecting = False
+        # StartTLS parameters and the most recent bind, repeated when reconnecting
+        self._tls_state = None
+        self._bind_state = None
+
         self._built_in_only = built_in_extensions_only
 
-        self.sock_params = (connect_timeout, ssl_verify, ssl_ca_file, ssl_ca_path, ssl_ca_data)
+        self.sock_params = (connect_timeout, ssl_verify, ssl_ca_file, ssl_ca_path, ssl_ca_data, recv_buffer_size,
+                            max_recv_buffer_size, tcp_nodelay, tcp_keepalive, so_rcvbuf, so_sndbuf, multiplex)
         self.ssl_verify = ssl_verify
         self.ssl_ca_file = ssl_ca_file
         self.ssl_ca_path = ssl_ca_path
         self.ssl_ca_data = ssl_ca_data
 
-        # connect
-        if isinstance(server, six.string_types):
-            self.host_uri = server
-            if reuse_connection:
-                if self.host_uri not in _sockets:
-                    _sockets[self.host_uri] = LDAPSocket(self.host_uri, *self.sock_params)
-                self.sock = _sockets[self.host_uri]
-            else:
-                self.sock = LDAPSocket(self.host_uri, *self.sock_params)
-            logger.info('Connected to {0} (#{1})'.format(self.host_uri, self.sock.ID))
-        elif isinstance(server, LDAPSocket):
-            self.sock = server
-            self.host_uri = server.uri
-            logger.info('Using existing socket {0} (#{1})'.format(self.host_uri, self.sock.ID))
-        else:
-            raise TypeError('Must supply URI string or LDAPSocket for server')
-        self.sock.refcount += 1
-
         # Validation setup
         self.validators = []
         if validators is None:
@@ -327,9 +534,122 @@ class LDAP(LDAPExtensions):
             validator.ldap_conn = self
             self.validators.append(validator)
 
+        self.server_set = None
+        self._connect(server, reuse_connection, base_dn)
+
+    def _connect(self, server, reuse_connection, base_dn):
+        """Open or acquire the socket, fetch the root DSE, and set up the base object"""
+        if isinstance(server, six.string_types):
+            self.host_uri = server
+            self._open_socket(reuse_connection)
+        elif isinstance(server, ServerSet):
+            self.server_set = server
+            self._open_socket(reuse_connection)
+        elif isinstance(server, LDAPSocket):
+            self.sock = server
+            self.host_uri = server.uri
+            with _sockets_lock:
+                self.sock.refcount += 1
+            logger.info('Using existing socket {0} (#{1})'.format(self.host_uri, self.sock.ID))
+        else:
+            raise TypeError('Must supply URI string, LDAPSocket, list of URIs, or ServerSet for server')
+
         # find base_dn
         self.root_dse = None
         self.refresh_root_dse()
+        self._init_base(base_dn)
+
+    def _open_socket(self, reuse_connection):
+        """Open a socket to ``host_uri``, or acquire the shared socket if ``reuse_connection`` is enabled. With a
+        :class:`.ServerSet`, open a socket to the server it selects instead."""
+        if self.server_set is not None:
+            self.sock = self.server_set.connect(*self.sock_params)
+            with _sockets_lock:
+                self.sock.refcount += 1
+            self.host_uri = self.sock.uri
+        elif reuse_connection:
+            with _sockets_lock:
+                if self.host_uri not in _sockets:
+                    _sockets[self.host_uri] = LDAPSocket(self.host_uri, *self.sock_params)
+                self.sock = _sockets[self.host_uri]
+                self.sock.refcount += 1
+        else:
+            self.sock = LDAPSocket(self.host_uri, *self.sock_params)
+            self.sock.refcount += 1
+        logger.info('Connected to {0} (#{1})'.format(self.host_uri, self.sock.ID))
+
+    def reconnect(self):
+        """Replace a failed connection with a new one, repeating StartTLS and the most recent bind. This happens
+        automatically when ``auto_reconnect`` is enabled.
+
+        Before each attempt, waits a random delay of up to ``reconnect_backoff`` seconds, doubling after each failure up
+        to ``reconnect_max_backoff``.
+
+        :raises ConnectionUnbound: if the connection has been unbound
+        :raises LDAPConnectionError: if no attempt succeeded within ``reconnect_attempts`` tries
+        """
+        if self.sock.unbound:
+            raise ConnectionUnbound()
+        self._discard_socket()
+        self._reconnecting = True
+        try:
+            attempt = 0
+            while True:
+                delay = random.uniform(0, min(self.reconnect_max_backoff, self.reconnect_backoff * 2 ** attempt))
+                logger.info('Reconnecting to {0} in {1:.2f}s'.format(self.host_uri, delay))
+                time.sleep(delay)
+                failed_sock = self.sock
+                try:
+                    self._open_socket(self._reuse_connection)
+                    self._restore_session()
+                    return
+                except _connection_errors as e:
+                    if self.sock is not failed_sock:
+                        self._discard_socket()
+                    attempt += 1
+                    if attempt >= self.reconnect_attempts:
+                        raise LDAPConnectionError('Failed to reconnect to {0} after {1} attempts: {2}'.format(
+                                                  self.host_uri, attempt, e))
+                    logger.info('Reconnection attempt {0} to {1} failed: {2}'.format(attempt, self.host_uri, e))
+        finally:
+            self._reconnecting = False
+
+    def _discard_socket(self):
+        """Close the current socket and stop sharing it, without unbinding"""
+        sock = self.sock
+        with _sockets_lock:
+            sock.refcount -= 1
+            if _sockets.get(sock.uri) is sock:
+                del _sockets[sock.uri]
+        try:
+            sock.close()
+        except Exception as e:
+            logger.debug('Error closing failed socket #{0}: {1}'.format(sock.ID, e))
+
+    def _restore_session(self):
+        """Repeat StartTLS and the most recent bind on a new connection"""
+        self.refresh_root_dse()
+        if self._tls_state is not None and not self.sock.started_tls:
+            self.start_tls(*self._tls_state)
+        if self._bind_state is not None and not self.sock.bound:
+            method, args, kwds = self._bind_state
+            getattr(self, method)(*args, **kwds)
+
+    def _reconnect_after(self, sock, e):
+        """Reconnect after a connection error on ``sock``, if enabled.
+
+        :return: True if the connection has been replaced, either now or since ``sock`` was used
+        :rtype: bool
+        """
+        if not self.auto_reconnect or self._reconnecting or self.sock.unbound:
+            return False
+        if self.sock is sock:
+            logger.warning('Connection #{0} to {1} failed: {2}'.format(sock.ID, self.host_uri, e))
+            self.reconnect()
+        return True
+
+    def _init_base(self, base_dn):
+        """Determine the base DN, from the root DSE if needed, and create the base object"""
         if base_dn is None:
             if 'defaultNamingContext' in self.root_dse:
                 base_dn = self.root_dse['defaultNamingContext'][0]
@@ -354,7 +674,7 @@ class LDAP(LDAPExtensions):
         """Update the local copy of the root DSE, containing metadata about the directory server. The root DSE is an
         :class:`LDAPObject` stored on the `root_dse` attribute.
         """
-        self.root_dse = self.get('', ['*', '+'])
+        self.root_dse = self.get('', ['*', '+'], use_cache=False)
         self._sasl_mechs = self.root_dse.get_attr('supportedSASLMechanisms')
 
     def _process_ctrl_kwds(self, method, kwds, final=False):
@@ -362,6 +682,35 @@ class LDAP(LDAPExtensions):
         default_crit = self.default_criticality
         return controls.process_kwds(method, kwds, supported_ctrls, default_crit, final)
 
+    def _deadline(self):
+        """Get the :func:`time.time` timestamp by which the response to an operation starting now must arrive, from
+        ``response_timeout`` and any enclosing :func:`deadline` block, or None if there is no limit"""
+        when = getattr(_deadlines, 'current', None)
+        if self.response_timeout:
+            op_deadline = time.time() + self.response_timeout
+            if when is None or op_deadline < when:
+                when = op_deadline
+        return when
+
+    @staticmethod
+    def _abandon_timed_out(sock, message_id):
+        """Abandon an operation whose response deadline has passed"""
+        logger.info('Abandoning ID={0} after timing out'.format(message_id))
+        sock.abandoned_mids.append(message_id)
+        try:
+            sock.send_message('abandonRequest', ber.AbandonRequest(message_id))
+        except _connection_errors as e:
+            logger.debug('Failed to send abandon request for ID={0}: {1}'.format(message_id, e))
+
+    def _recv_one(self, message_id):
+        """Receive the single response to an operation, abandoning the operation if the deadline passes first"""
+        sock = self.sock
+        try:
+            return sock.recv_one(message_id, self._deadline())
+        except ResponseTimeout:
+            self._abandon_timed_out(sock, message_id)
+            raise
+
     def _success_result(self, message_id, operation):
         """Receive an object from the socket and raise an LDAPError if its not a success result.
 
@@ -371,7 +720,12 @@ class LDAP(LDAPExtensions):
         :rtype: LDAPResponse
         :raises LDAPError: if the response recieved does not indicate a success
         """
-        mid, obj, res_ctrls = unpack(operation, self.sock.recv_one(message_id))
+        return self._check_success_result(self._recv_one(message_id), operation)
+
+    @staticmethod
+    def _check_success_result(lm, operation):
+        """Check a result message, raising an LDAPError if its not a success result"""
+        mid, obj, res_ctrls = unpack(operation, lm)
         res = obj.getComponentByName('resultCode')
         if res == RESULT_success:
             logger.debug('LDAP operation (ID {0}) was successful'.format(mid))
@@ -396,11 +750,25 @@ class LDAP(LDAPExtensions):
         :raises ConnectionUnbound: if the connection has been unbound/closed
         :raises ConnectionAlreadyBound: if the connection has already been bound
         """
+        bind_state = ('simple_bind', (username, password), dict(ctrl_kwds))
+        br, req_ctrls = self._prep_simple_bind(username, password, ctrl_kwds)
+        mid = self.sock.send_message('bindRequest', br, req_ctrls, self._deadline())
+        logger.debug('Sent bind request (ID {0}) on connection #{1} for {2}'.format(mid, self.sock.ID, username))
+        ret = self._success_result(mid, 'bindResponse')
+        self.sock.bound = True
+        self._bind_state = bind_state
+        logger.info('Simple bind successful')
+        return ret
+
+    def _check_bind_allowed(self):
         if self.sock.unbound:
             raise ConnectionUnbound()
         if self.sock.bound:
             raise ConnectionAlreadyBound()
 
+    def _prep_simple_bind(self, username, password, ctrl_kwds):
+        self._check_bind_allowed()
+
         br = rfc4511.BindRequest()
         br.setComponentByName('version', V3)
         br.setComponentByName('name', rfc4511.LDAPDN(username))
@@ -409,13 +777,7 @@ class LDAP(LDAPExtensions):
         br.setComponentByName('authentication', ac)
 
         req_ctrls = self._process_ctrl_kwds('bind', ctrl_kwds, final=True)
-
-        mid = self.sock.send_message('bindRequest', br, req_ctrls)
-        logger.debug('Sent bind request (ID {0}) on connection #{1} for {2}'.format(mid, self.sock.ID, username))
-        ret = self._success_result(mid, 'bindResponse')
-        self.sock.bound = True
-        logger.info('Simple bind successful')
-        return ret
+        return br, req_ctrls
 
     def get_sasl_mechs(self):
         """Query root DSE for supported SASL mechanisms.
@@ -443,14 +805,17 @@ class LDAP(LDAPExtensions):
             orig_mechs = set(self._sasl_mechs)
             self._sasl_mechs = None
             self.get_sasl_mechs()
-            if orig_mechs != set(self._sasl_mechs):
-                msg = 'Supported SASL mechs differ on recheck, possible downgrade attack'
-                if self.sasl_fatal_downgrade_check:
-                    raise LDAPError(msg)
-                else:
-                    warn(msg, LDAPWarning)
+            self._check_sasl_downgrade(orig_mechs)
+
+    def _check_sasl_downgrade(self, orig_mechs):
+        if orig_mechs != set(self._sasl_mechs):
+            msg = 'Supported SASL mechs differ on recheck, possible downgrade attack'
+            if self.sasl_fatal_downgrade_check:
+                raise LDAPError(msg)
             else:
-                logger.debug('No evidence of downgrade attack')
+                warn(msg, LDAPWarning)
+        else:
+            logger.debug('No evidence of downgrade attack')
 
     def sasl_bind(self, mech=None, **props):
         """Perform a SASL bind operation.
@@ -466,42 +831,19 @@ class LDAP(LDAPExtensions):
         :raises LDAPSupportError: if the given mech is not supported by the server
         :raises LDAPError: if an error occurs during the bind process
         """
-        if self.sock.unbound:
-            raise ConnectionUnbound()
-        if self.sock.bound:
-            raise ConnectionAlreadyBound()
+        self._check_bind_allowed()
 
+        bind_state = ('sasl_bind', (mech,), dict(props))
         req_ctrls = self._process_ctrl_kwds('bind', props)
-
-        mechs = self.get_sasl_mechs()
-        if mech is None:
-            mech = self.default_sasl_mech
-        if mech is not None:
-            if mech not in mechs:
-                raise LDAPSupportError('SASL mech "{0}" is not supported by the server'.format(mech))
-            else:
-                mechs = [mech]
-        self.sock.sasl_init(mechs, **props)
-        logger.debug('Selected SASL mech = {0}'.format(self.sock.sasl_mech))
+        self._sasl_init(self.get_sasl_mechs(), mech, props)
 
         challenge_response = None
         while True:
-            br = rfc4511.BindRequest()
-            br.setComponentByName('version', V3)
-            br.setComponentByName('name', EMPTY_DN)
-            ac = rfc4511.AuthenticationChoice()
-            sasl = rfc4511.SaslCredentials()
-            sasl.setComponentByName('mechanism', six.text_type(self.sock.sasl_mech))
-            if challenge_response is not None:
-                sasl.setComponentByName('credentials', rfc4511.Credentials(challenge_response))
-                challenge_response = None
-            ac.setComponentByName('sasl', sasl)
-            br.setComponentByName('authentication', ac)
-
-            mid = self.sock.send_message('bindRequest', br, req_ctrls)
+            br = self._sasl_bind_request(challenge_response)
+            mid = self.sock.send_message('bindRequest', br, req_ctrls, self._deadline())
             logger.debug('Sent SASL bind request (ID {0}) on connection #{1}'.format(mid, self.sock.ID))
 
-            mid, res, res_ctrls = unpack('bindResponse', self.sock.recv_one(mid))
+            mid, res, res_ctrls = unpack('bindResponse', self._recv_one(mid))
             status = res.getComponentByName('resultCode')
             if status == RESULT_saslBindInProgress:
                 challenge_response = self.sock.sasl_process_auth_challenge(res.getComponentByName('serverSaslCreds'))
@@ -510,6 +852,7 @@ class LDAP(LDAPExtensions):
                 logger.info('SASL bind successful')
                 logger.debug('Negotiated SASL QoP = {0}'.format(self.sock.sasl_qop))
                 self.sock.bound = True
+                self._bind_state = bind_state
                 self.recheck_sasl_mechs()
 
                 ret = LDAPResponse()
@@ -520,27 +863,52 @@ class LDAP(LDAPExtensions):
                 raise LDAPError('Got {0} during SASL bind ({1})'.format(repr(status), msg))
         raise LDAPError('Programming error - reached end of saslBind')
 
+    def _sasl_init(self, mechs, mech, props):
+        """Select the SASL mechanism and initialize the socket's SASL client"""
+        if mech is None:
+            mech = self.default_sasl_mech
+        if mech is not None:
+            if mech not in mechs:
+                raise LDAPSupportError('SASL mech "{0}" is not supported by the server'.format(mech))
+            else:
+                mechs = [mech]
+        self.sock.sasl_init(mechs, **props)
+        logger.debug('Selected SASL mech = {0}'.format(self.sock.sasl_mech))
+
+    def _sasl_bind_request(self, challenge_response):
+        br = rfc4511.BindRequest()
+        br.setComponentByName('version', V3)
+        br.setComponentByName('name', EMPTY_DN)
+        ac = rfc4511.AuthenticationChoice()
+        sasl = rfc4511.SaslCredentials()
+        sasl.setComponentByName('mechanism', six.text_type(self.sock.sasl_mech))
+        if challenge_response is not None:
+            sasl.setComponentByName('credentials', rfc4511.Credentials(challenge_response))
+        ac.setComponentByName('sasl', sasl)
+        br.setComponentByName('authentication', ac)
+        return br
+
     def unbind(self, force=False):
         """Send an unbind request and close the socket.
 
         :param bool force: Unbind and close the socket even if other objects still hold a reference to it.
         :raises ConnectionUnbound: if the connection has already been unbound
         """
-        if self.sock.unbound:
-            raise ConnectionUnbound()
+        with _sockets_lock:
+            if self.sock.unbound:
+                raise ConnectionUnbound()
 
-        self.sock.refcount -= 1
-        if force or self.sock.refcount == 0:
-            self.sock.send_message('unbindRequest', rfc4511.UnbindRequest())
-            self.sock.close()
-            self.sock.unbound = True
-            logger.info('Unbound on {0} (#{1})'.format(self.sock.uri, self.sock.ID))
-            try:
-                del _sockets[self.sock.uri]
-            except KeyError:
-                pass
-        else:
-            logger.debug('Socket still in use')
+            self.sock.refcount -= 1
+            if force or self.sock.refcount == 0:
+                self.sock.unbound = True
+                if _sockets.get(self.sock.uri) is self.sock:
+                    del _sockets[self.sock.uri]
+            else:
+                logger.debug('Socket still in use')
+                return
+        self.sock.send_message('unbindRequest', ber.UnbindRequest())
+        self.sock.close()
+        logger.info('Unbound on {0} (#{1})'.format(self.sock.uri, self.sock.ID))
 
     close = unbind
 
@@ -573,7 +941,13 @@ class LDAP(LDAPExtensions):
 
         Additional keywords are passed through into the :class:`LDAPObject` constructor.
         """
-        obj = LDAPObject(dn, attrs_dict=attrs_dict, ldap_conn=self, **kwds)
+        return self._tag_obj(LDAPObject(dn, attrs_dict=attrs_dict, ldap_conn=self, **kwds), tag)
+
+    def _lazy_obj(self, entry, value_decoding, tag=None, **kwds):
+        """Create a :class:`LazyLDAPObject` bound to this connection from a search result entry"""
+        return self._tag_obj(LazyLDAPObject(entry.dn, entry, value_decoding, ldap_conn=self, **kwds), tag)
+
+    def _tag_obj(self, obj, tag):
         if tag is not None:
             if tag in self._tagged_objects:
                 raise TagError('tag {0} already exists'.format(tag))
@@ -581,14 +955,18 @@ class LDAP(LDAPExtensions):
                 self._tagged_objects[tag] = obj
         return obj
 
-    def get(self, dn, attrs=None, **kwds):
+    def get(self, dn, attrs=None, use_cache=True, **kwds):
         """Get a specific object by DN.
 
-        Performs a search with :attr:`Scope.BASE` and ensures we get exactly one result.
+        Performs a search with :attr:`Scope.BASE` and ensures we get exactly one result. If the connection has an
+        ``entry_cache``, an object fetched earlier with the same attributes is returned from the cache instead, and
+        DNs the cache knows to be missing raise :exc:`.NoSearchResults` without a search.
 
         :param str dn: The DN of the object to query
         :param attrs: Optional. A list of attribute names to get, defaults to all user attributes
         :type attrs: list[str] or None
+        :param bool use_cache: Set to False to bypass the cache and query the server. Searches with keywords other
+                               than object keywords always bypass the cache.
         :return: The LDAP object
         :rtype: LDAPObject
         :raises ConnectionUnbound: if the connection has been unbound
@@ -599,8 +977,68 @@ class LDAP(LDAPExtensions):
         """
         if self.sock.unbound:
             raise ConnectionUnbound()
-        results = list(self.search(dn, Scope.BASE, attrs=attrs, limit=2, **kwds))
-        return utils.get_one_result(results)
+        cache = self.entry_cache
+        if cache is None or not use_cache or not _obj_kwds.issuperset(kwds):
+            self._object_result_format(kwds)
+            results = list(self.search(dn, Scope.BASE, attrs=attrs, limit=2, **kwds))
+            return utils.get_one_result(results)
+
+        identity = self._cache_identity()
+        key = cache._key(dn, attrs, self.default_value_decoding, identity)
+        if cache._is_absent(key[0], identity):
+            raise NoSearchResults()
+        cached = cache._get(key)
+        if cached is not None:
+            cached_dn, cached_attrs = cached
+            return self.obj(cached_dn, dict((attr, list(vals)) for attr, vals in six.iteritems(cached_attrs)), **kwds)
+        generation = cache._generation
+        self._object_result_format(kwds)
+        try:
+            obj = utils.get_one_result(list(self.search(dn, Scope.BASE, attrs=attrs, limit=2, **kwds)))
+        except NoSearchResults:
+            cache._put_absent(key[0], generation, identity)
+            raise
+        cache._put(key, obj.dn, obj, generation)
+        return obj
+
+    def _cache_identity(self):
+        """Identify the server and bind of this connection, since the entries returned, and whether a DN is found at
+        all, may depend on who is asking. Entries in a shared :class:`.EntryCache` are kept separately for each."""
+        bind = None
+        if self._bind_state is not None:
+            method, args, kwds = self._bind_state
+            # a digest, so that cache keys do not hold credentials
+            bind = hashlib.sha256(repr((method, args, sorted(kwds.items()))).encode('utf-8')).hexdigest()
+        return self.host_uri, bind
+
+    def _invalidate_cached(self, dn, subtree=False):
+        """Discard cached entries for an object being changed. This is done both before a write is sent and once its
+        response arrives, since a get answered before the server applied the change may have cached the old entry."""
+        if self.entry_cache is not None:
+            self.entry_cache.invalidate(dn, subtree)
+
+    def _invalidate_mod_dn(self, dn, new_rdn, new_parent):
+        """Discard cached entries below both the old and new DN of an object being moved"""
+        self._invalidate_cached(dn, subtree=True)
+        if new_parent is None:
+            new_parent = (_split_new_dn(dn) + [''])[1]
+        self._invalidate_cached('{0},{1}'.format(new_rdn, new_parent) if new_parent else new_rdn, subtree=True)
+
+    @staticmethod
+    def _invalidating(handler, invalidate, *args):
+        """Wrap a write response handler to call ``invalidate(*args)`` once the response has arrived"""
+        def handle(lm):
+            try:
+                return handler(lm)
+            finally:
+                invalidate(*args)
+        return handle
+
+    def _object_result_format(self, kwds):
+        """Request objects for methods that return :class:`LDAPObject`, even if the connection default result format
+        is :attr:`.ResultFormat.TUPLES`, unless a format is passed explicitly"""
+        if 'result_format' not in kwds and self.default_result_format == ResultFormat.TUPLES:
+            kwds['result_format'] = ResultFormat.OBJECTS
 
     def exists(self, dn):
         """Simply check if a DN exists.
@@ -619,16 +1057,219 @@ class LDAP(LDAPExtensions):
         except MultipleSearchResults:
             return True
 
+    def get_many(self, dns, attrs=None, batch_size=None, **kwds):
+        """Get many objects by DN.
+
+        Rather than waiting for each object in turn, all searches are pipelined on the connection. DNs that share a
+        parent are fetched together with one-level searches for ``(|(rdn1)(rdn2)...)``, up to ``batch_size`` RDNs per
+        search. Other DNs are fetched with individual :attr:`Scope.BASE` searches.
+
+        :param dns: The DNs of the objects to query
+        :type dns: list[str]
+        :param attrs: Optional. A list of attribute names to get, defaults to all user attributes
+        :type attrs: list[str] or None
+        :param int batch_size: The maximum number of RDNs to combine into a single search. Defaults to
+                               :attr:`DEFAULT_GET_MANY_BATCH_SIZE`. Set to 1 to always use base searches.
+        :return: The objects, in the order requested, with missing DNs and errors reported per DN
+        :rtype: GetManyResult
+        :raises ConnectionUnbound: if the connection has been unbound
+
+        Additional keyword arguments are passed through into :meth:`LDAP.search`. Objects are always returned;
+        :attr:`.ResultFormat.TUPLES` is treated as :attr:`.ResultFormat.OBJECTS`.
+        """
+        if self.sock.unbound:
+            raise ConnectionUnbound()
+        if batch_size is None:
+            batch_size = LDAP.DEFAULT_GET_MANY_BATCH_SIZE
+
+        dns = list(OrderedDict.fromkeys(dns))
+        searches = []
+        children = OrderedDict()
+        for dn in dns:
+            parts = _split_new_dn(dn)
+            if len(parts) == 2:
+                children.setdefault(parts[1], []).append((dn, parts[0]))
+            else:
+                searches.append((dn, Scope.BASE, None, dn, None))
+
+        for parent, members in six.iteritems(children):
+            searches.extend(self._plan_rdn_searches(parent, Scope.ONELEVEL, members, batch_size,
+                                                    lambda dn, rdn: (dn, Scope.BASE, None, dn, None)))
+
+        return self._get_many(dns, searches, attrs, kwds)
+
+    @staticmethod
+    def _plan_rdn_searches(base_dn, scope, members, batch_size, single_search):
+        """Plan searches for objects identified by RDN below ``base_dn``.
+
+        :param list members: ``(key, rdn)`` tuples identifying each object
+        :param single_search: Called with ``(key, rdn)`` to plan a search for an object that cannot be batched
+        :return: A list of ``(base_dn, scope, filter, key, avas)`` tuples for :meth:`_get_many`. ``key`` is set for a
+                 search expected to return a single object, otherwise ``avas`` is a list of ``(key, attr, value)``
+                 tuples identifying the objects expected in the results.
+        :rtype: list[tuple]
+        """
+        searches = []
+        batchable = []
+        for key, rdn in members:
+            ava = _parse_rdn(rdn)
+            if ava is None:
+                searches.append(single_search(key, rdn))
+            else:
+                batchable.append((key, rdn, ava[0], ava[1]))
+        for i in range(0, len(batchable), batch_size):
+            chunk = batchable[i:i + batch_size]
+            if len(chunk) == 1:
+                key, rdn, attr, value = chunk[0]
+                searches.append(single_search(key, rdn))
+            else:
+                filter = F.or_(*[F.eq(attr, value) for key, rdn, attr, value in chunk])
+                avas = [(key, attr, value) for key, rdn, attr, value in chunk]
+                searches.append((base_dn, scope, filter, None, avas))
+        return searches
+
+    def _get_many(self, keys, searches, attrs, kwds):
+        """Pipeline planned searches and collect their results for the requested keys"""
+        results = GetManyResult(keys)
+        pending = deque()
+        self._object_result_format(kwds)
+        if kwds.get('result_format') == ResultFormat.TUPLES:
+            # results are matched to keys by object
+            kwds['result_format'] = ResultFormat.OBJECTS
+        for base_dn, scope, filter, key, avas in searches:
+            if len(pending) >= LDAP.DEFAULT_PIPELINE_WINDOW:
+                self._collect_get_many(pending.popleft(), results)
+            handle = self.search(base_dn, scope, filter, attrs, filter_syntax=FilterSyntax.STANDARD, **kwds)
+            pending.append((handle, key, avas))
+        while pending:
+            self._collect_get_many(pending.popleft(), results)
+        return results
+
+    @staticmethod
+    def _collect_get_many(search, results):
+        handle, key, avas = search
+        keys = [key] if avas is None else [ava[0] for ava in avas]
+        try:
+            objs = [obj for obj in handle if isinstance(obj, LDAPObject)]
+        except LDAPError as e:
+            for key in keys:
+                results._set_error(key, e)
+            return
+
+        if avas is None:
+            if len(objs) > 1:
+                results._set_error(key, MultipleSearchResults())
+            elif objs:
+                results[key] = objs[0]
+            else:
+                results.missing.append(key)
+            return
+
+        exact = dict(((attr.lower(), value), key) for key, attr, value in avas)
+        found = set()
+        for obj in objs:
+            ava = _parse_rdn(_split_new_dn(obj.dn)[0])
+            if ava is None:
+                continue
+            attr, value = ava
+            key = exact.get((attr.lower(), value))
+            if key is None:
+                # fall back to the schema-defined equality matching rule
+                attr_type = get_attribute_type(attr)
+                for _key, _attr, _value in avas:
+                    if _attr.lower() != attr.lower():
+                        continue
+                    try:
+                        attr_type.index([value], _value)
+                    except (ValueError, LDAPError):
+                        continue
+                    key = _key
+                    break
+                else:
+                    # matched the filter by a value other than its RDN
+                    continue
+            if key in found:
+                results._set_error(key, MultipleSearchResults())
+            else:
+                found.add(key)
+                results[key] = obj
+        for key in keys:
+            if key not in found and key not in results.errors:
+                results.missing.append(key)
+
+    def search_split(self, base_dn, scope=Scope.SUBTREE, filter=None, attrs=None, max_or_terms=None,
+                     filter_syntax=None, **kwds):
+        """Search with a filter containing an or filter too large for the server to accept or handle efficiently.
+
+        The filter is optimized with :func:`.filter.optimize`, and an or filter with more than ``max_or_terms`` terms
+        is split into several searches as described for :func:`.filter.split_or`. The searches are pipelined on the
+        connection, and objects found by more than one of them are only yielded once.
+
+        :param str base_dn: The DN of the base object of the search
+        :param Scope scope: One of the :class:`Scope` constants, default :attr:`Scope.SUB`.
+        :param filter: A filter string, or a filter built with :class:`.F`
+        :type filter: str or F
+        :param list[str] attrs: A list of attribute names to include for each object
+        :param int max_or_terms: The maximum number of terms in the or filter of each search. Defaults to
+                                 :attr:`DEFAULT_MAX_OR_TERMS`.
+        :param FilterSyntax filter_syntax: Select which filter syntax to use to parse a filter string
+        :return: An iterator over the merged results. Yields the same types as :meth:`search`.
+        :raises ConnectionUnbound: if the connection has been unbound
+        :raises LDAPError: if the filter is invalid
+        :raises ValueError: if ``max_or_terms`` is less than 1
+
+        Additional keyword arguments are passed through into :meth:`LDAP.search` for each search. Note that ``limit``
+        applies to each search separately.
+        """
+        if self.sock.unbound:
+            raise ConnectionUnbound()
+        if max_or_terms is None:
+            max_or_terms = LDAP.DEFAULT_MAX_OR_TERMS
+        elif max_or_terms < 1:
+            raise ValueError('max_or_terms must be at least 1')
+        if filter is None:
+            filter = LDAP.DEFAULT_FILTER
+        if filter_syntax is None:
+            filter_syntax = self.default_filter_syntax
+        filters = split_or(filter, max_or_terms, filter_syntax)
+        logger.debug('Splitting search into {0} searches'.format(len(filters)))
+        return self._iter_split_search(base_dn, scope, filters, attrs, kwds)
+
+    def _iter_split_search(self, base_dn, scope, filters, attrs, kwds):
+        pending = deque()
+        filters = deque(filters)
+        seen = set()
+        try:
+            while pending or filters:
+                while filters and len(pending) < LDAP.DEFAULT_PIPELINE_WINDOW:
+                    pending.append(self.search(base_dn, scope, filters.popleft(), attrs, **kwds))
+                for obj in pending[0]:
+                    dn = getattr(obj, 'dn', None)
+                    if dn is not None:
+                        if dn in seen:
+                            continue
+                        seen.add(dn)
+                    yield obj
+                pending.popleft()
+        finally:
+            for handle in pending:
+                if not handle.done:
+                    handle.abandon()
+
+    @_reconnect_on_error(retry=True)
     def search(self, base_dn, scope=Scope.SUBTREE, filter=None, attrs=None, search_timeout=None, limit=0,
                deref_aliases=None, attrs_only=False, fetch_result_refs=None, follow_referrals=None,
-               filter_syntax=None, **kwds):
+               filter_syntax=None, result_format=None, value_decoding=None, decode_pool=None, decode_ordered=True,
+               **kwds):
         """Sends search and return an iterator over results.
 
         :param str base_dn: The DN of the base object of the search
         :param Scope scope: One of the :class:`Scope` constants, default :attr:`Scope.SUB`. Controls the maximum depth
                             of the search.
-        :param str filter: A filter string. Objects must match the filter to be included in results. Default includes
-                           all objects and can be overridden globally by defining :attr:`.LDAP.DEFAULT_FILTER`.
+        :param filter: A filter string, or a filter built with :class:`.F`. Objects must match the filter to be
+                       included in results. Default includes all objects and can be overridden globally by defining
+                       :attr:`.LDAP.DEFAULT_FILTER`.
+        :type filter: str or F
         :param list[str] attrs: A list of attribute names to include for each object. Default includes all user
                                 attributes. Use `['*', '+']` to get all user and all operational attributes.
         :param int search_timeout: The number of seconds the server should spend performing the search. Partial results
@@ -655,7 +1296,23 @@ class LDAP(LDAPExtensions):
                                            set per connection by passing the ``default_filter_syntax`` keyword to the
                                            :class:`LDAP` constructor, or set the global default by defining
                                            :attr:`LDAP.DEFAULT_FILTER_SYNTAX`.
-        :return: An iterator over the results of the search. May yield :class:`LDAPObject` or possibly
+        :param str result_format: One of the :class:`.ResultFormat` constants, selecting what to yield for each result.
+                                  The default can be set per connection by passing the ``result_format`` keyword to the
+                                  :class:`LDAP` constructor, or set the global default by defining
+                                  :attr:`LDAP.DEFAULT_RESULT_FORMAT`. Methods that return objects, such as
+                                  :meth:`LDAP.get`, use :attr:`.ResultFormat.OBJECTS` in place of a ``TUPLES``
+                                  default.
+        :param str value_decoding: One of the :class:`.ValueDecoding` constants, selecting whether attribute values are
+                                   returned as text or bytes. The default can be set per connection by passing the
+                                   ``value_decoding`` keyword to the :class:`LDAP` constructor, or set the global
+                                   default by defining :attr:`LDAP.DEFAULT_VALUE_DECODING`.
+        :param decode_pool: Optional :class:`multiprocessing.pool.Pool` used to decode result entries in worker
+                            processes while this thread keeps receiving. Cannot be combined with
+                            :attr:`.ResultFormat.LAZY`, and :attr:`.ValueDecoding.MEMORYVIEW` returns bytes instead.
+        :param bool decode_ordered: When using ``decode_pool``, set to False to yield entries as soon as they are
+                                    decoded rather than in the order they were received.
+        :return: An iterator over the results of the search. May yield :class:`LDAPObject` (or
+                 :class:`LazyLDAPObject` or :class:`ResultTuple`, depending on ``result_format``) or possibly
                  :class:`SearchReferenceHandle` if ``fetch_result_refs`` is False.
 
         Additional keywords are handled as :doc:`/controls` first and then passed through into :meth:`.LDAP.obj`.
@@ -673,6 +1330,29 @@ class LDAP(LDAPExtensions):
                     for result in search:
                         print(result.format_ldif())
         """
+        req, ctrls, fetch_result_refs, follow_referrals, result_format, value_decoding = self._prep_search(
+            base_dn, scope, filter, attrs, search_timeout, limit, deref_aliases, attrs_only, fetch_result_refs,
+            follow_referrals, filter_syntax, result_format, value_decoding, kwds)
+        if decode_pool is not None and result_format == ResultFormat.LAZY:
+            raise LDAPError('decode_pool cannot be used with ResultFormat.LAZY')
+        mid = self.sock.send_message('searchRequest', req, ctrls, self._deadline())
+        logger.info('Sent search request (ID {0}): base_dn={1}, scope={2}, filter={3}'.format(
+                    mid, base_dn, scope, filter))
+        return SearchResultHandle(self, mid, fetch_result_refs, follow_referrals, kwds,
+                                  request=('searchRequest', req, ctrls), result_format=result_format,
+                                  value_decoding=value_decoding, decode_pool=decode_pool,
+                                  decode_ordered=decode_ordered)
+
+    def _prep_search(self, base_dn, scope, filter, attrs, search_timeout, limit, deref_aliases, attrs_only,
+                     fetch_result_refs, follow_referrals, filter_syntax, result_format, value_decoding, kwds):
+        """Apply search defaults and build the protocol-level search request.
+
+        Control keywords are removed from ``kwds``, leaving only object keywords.
+
+        :return: A tuple of the search request, request controls, and the effective ``fetch_result_refs``,
+                 ``follow_referrals``, ``result_format``, and ``value_decoding`` settings
+        :rtype: tuple
+        """
         if self.sock.unbound:
             raise ConnectionUnbound()
 
@@ -689,25 +1369,21 @@ class LDAP(LDAPExtensions):
             follow_referrals = self.default_follow_referrals
         if filter_syntax is None:
             filter_syntax = self.default_filter_syntax
-        req = rfc4511.SearchRequest()
-        req.setComponentByName('baseObject', rfc4511.LDAPDN(base_dn))
-        req.setComponentByName('scope', scope)
-        req.setComponentByName('derefAliases', deref_aliases)
-        req.setComponentByName('sizeLimit', rfc4511.Integer0ToMax(limit))
-        req.setComponentByName('timeLimit', rfc4511.Integer0ToMax(search_timeout))
-        req.setComponentByName('typesOnly', rfc4511.TypesOnly(attrs_only))
-        if filter_syntax is FilterSyntax.UNIFIED:
-            rfc4511_filter = parse_unified_filter(filter)
-        elif filter_syntax is FilterSyntax.STANDARD:
-            rfc4511_filter = parse_standard_filter(filter)
-        elif filter_syntax is FilterSyntax.SIMPLE:
-            rfc4511_filter = parse_simple_filter(filter)
+        if result_format is None:
+            result_format = self.default_result_format
+        if result_format not in ResultFormat.ALL:
+            raise LDAPError('Invalid result_format')
+        if value_decoding is None:
+            value_decoding = self.default_value_decoding
+        if value_decoding == ValueDecoding.SCHEMA:
+            extensions.base_schema.require()
+        elif value_decoding not in ValueDecoding.ALL:
+            raise LDAPError('Invalid value_decoding')
+        if isinstance(filter, F):
+            encoded_filter = filter.encode()
         else:
-            raise LDAPError('Invalid filter_syntax')
-        req.setComponentByName('filter', rfc4511_filter)
+            encoded_filter = filter_cache.encode(filter, filter_syntax)
 
-        _attrs = rfc4511.AttributeSelection()
-        i = 0
         if attrs is None:
             attrs = ['*']
         if not isinstance(attrs, list):
@@ -716,9 +1392,8 @@ class LDAP(LDAPExtensions):
             if desc[0] == '@':
                 if LDAP.OID_OBJ_CLASS_ATTR not in self.root_dse.get_attr('supportedFeatures'):
                     raise LDAPSupportError('Server does not support RFC 4529 @objectClass attribute requests')
-            _attrs.setComponentByPosition(i, rfc4511.LDAPString(desc))
-            i += 1
-        req.setComponentByName('attributes', _attrs)
+
+        req = ber.SearchRequest(base_dn, scope, deref_aliases, limit, search_timeout, attrs_only, encoded_filter, attrs)
 
         # check here because we need to do a search to get the root DSE, which is required by
         # _process_ctrl_kwds, other methods don't need to check
@@ -730,11 +1405,9 @@ class LDAP(LDAPExtensions):
         # check for allowed object keywords now that any control keywords have been removed from the dict
         _check_obj_kwds(kwds)
 
-        mid = self.sock.send_message('searchRequest', req, ctrls)
-        logger.info('Sent search request (ID {0}): base_dn={1}, scope={2}, filter={3}'.format(
-                    mid, base_dn, scope, filter))
-        return SearchResultHandle(self, mid, fetch_result_refs, follow_referrals, kwds)
+        return req, ctrls, fetch_result_refs, follow_referrals, result_format, value_decoding
 
+    @_reconnect_on_error(retry=True)
     def compare(self, dn, attr, value, **ctrl_kwds):
         """Ask the server if a particular DN has a matching attribute value. The comparison will take place following
         the schema-defined matching rules and syntax rules.
@@ -749,21 +1422,22 @@ class LDAP(LDAPExtensions):
 
         Additional keyword arguments are handled as :doc:`/controls`.
         """
+        cr, req_ctrls = self._prep_compare(dn, attr, value, ctrl_kwds)
+        message_id = self.sock.send_message('compareRequest', cr, req_ctrls, self._deadline())
+        logger.info('Sent compare request (ID {0}): {1} ({2} = {3})'.format(message_id, dn, attr, value))
+        return self._compare_result(self._recv_one(message_id))
+
+    def _prep_compare(self, dn, attr, value, ctrl_kwds):
         if self.sock.unbound:
             raise ConnectionUnbound()
 
-        cr = rfc4511.CompareRequest()
-        cr.setComponentByName('entry', rfc4511.LDAPDN(six.text_type(dn)))
-        ava = rfc4511.AttributeValueAssertion()
-        ava.setComponentByName('attributeDesc', rfc4511.AttributeDescription(six.text_type(attr)))
-        ava.setComponentByName('assertionValue', rfc4511.AssertionValue(six.text_type(value)))
-        cr.setComponentByName('ava', ava)
+        cr = ber.CompareRequest(six.text_type(dn), six.text_type(attr), six.text_type(value))
 
         req_ctrls = self._process_ctrl_kwds('compare', ctrl_kwds, final=True)
+        return cr, req_ctrls
 
-        message_id = self.sock.send_message('compareRequest', cr, req_ctrls)
-        logger.info('Sent compare request (ID {0}): {1} ({2} = {3})'.format(message_id, dn, attr, value))
-        msg = self.sock.recv_one(message_id)
+    @staticmethod
+    def _compare_result(msg):
         mid, res, res_ctrls = unpack('compareResponse', msg)
         res = res.getComponentByName('resultCode')
         if res == RESULT_compareTrue:
@@ -778,6 +1452,7 @@ class LDAP(LDAPExtensions):
         controls.handle_response(ret, res_ctrls)
         return ret
 
+    @_reconnect_on_error(retry=False)
     def add(self, dn, attrs_dict, **kwds):
         """Add new object and return corresponding LDAPObject on success.
 
@@ -793,6 +1468,20 @@ class LDAP(LDAPExtensions):
 
         Additional keyword arguments are handled as :doc:`/controls` and then passed through into :meth:`.LDAP.obj`.
         """
+        obj, ar, req_ctrls = self._prep_add(dn, attrs_dict, kwds)
+        mid = self.sock.send_message('addRequest', ar, req_ctrls, self._deadline())
+        logger.info('Sent add request (ID {0}) for DN {1}'.format(mid, dn))
+        try:
+            return self._add_result(self._recv_one(mid), obj)
+        finally:
+            self._invalidate_cached(dn)
+
+    def _prep_add(self, dn, attrs_dict, kwds):
+        """Validate and build an add request
+
+        :return: A tuple of the new object, the protocol-level add request, and request controls
+        :rtype: tuple
+        """
         if self.sock.unbound:
             raise ConnectionUnbound()
 
@@ -805,28 +1494,13 @@ class LDAP(LDAPExtensions):
         obj = self.obj(dn, attrs_dict, **kwds)
 
         self.validate_object(obj)
+        self._invalidate_cached(dn)
 
-        ar = rfc4511.AddRequest()
-        ar.setComponentByName('entry', rfc4511.LDAPDN(dn))
-        al = rfc4511.AttributeList()
-        i = 0
-        for attr_type, attr_vals in six.iteritems(attrs_dict):
-            attr = rfc4511.Attribute()
-            attr.setComponentByName('type', rfc4511.AttributeDescription(attr_type))
-            vals = rfc4511.Vals()
-            j = 0
-            for val in attr_vals:
-                vals.setComponentByPosition(j, rfc4511.AttributeValue(val))
-                j += 1
-            attr.setComponentByName('vals', vals)
-            al.setComponentByPosition(i, attr)
-            i += 1
-        ar.setComponentByName('attributes', al)
-
-        mid = self.sock.send_message('addRequest', ar, req_ctrls)
-        logger.info('Sent add request (ID {0}) for DN {1}'.format(mid, dn))
+        ar = ber.AddRequest(dn, [(attr_type, list(attr_vals)) for attr_type, attr_vals in six.iteritems(attrs_dict)])
+        return obj, ar, req_ctrls
 
-        lm = self.sock.recv_one(mid)
+    @staticmethod
+    def _add_result(lm, obj):
         mid, res, res_ctrls = unpack('addResponse', lm)
         res = res.getComponentByName('resultCode')
         if res == RESULT_success:
@@ -904,6 +1578,7 @@ class LDAP(LDAPExtensions):
 
     ## delete an object
 
+    @_reconnect_on_error(retry=False)
     def delete(self, dn, **ctrl_kwds):
         """Delete an object.
 
@@ -914,15 +1589,24 @@ class LDAP(LDAPExtensions):
 
         Additional keyword arguments are handled as :doc:`/controls`.
         """
+        dr, controls = self._prep_delete(dn, ctrl_kwds)
+        mid = self.sock.send_message('delRequest', dr, controls, self._deadline())
+        logger.info('Sent delete request (ID {0}) for DN {1}'.format(mid, dn))
+        try:
+            return self._success_result(mid, 'delResponse')
+        finally:
+            self._invalidate_cached(dn)
+
+    def _prep_delete(self, dn, ctrl_kwds):
         if self.sock.unbound:
             raise ConnectionUnbound()
         controls = self._process_ctrl_kwds('delete', ctrl_kwds, final=True)
-        mid = self.sock.send_message('delRequest', rfc4511.DelRequest(dn), controls)
-        logger.info('Sent delete request (ID {0}) for DN {1}'.format(mid, dn))
-        return self._success_result(mid, 'delResponse')
+        self._invalidate_cached(dn)
+        return ber.DelRequest(dn), controls
 
     ## change object DN
 
+    @_reconnect_on_error(retry=False)
     def mod_dn(self, dn, new_rdn, clean_attr=True, new_parent=None, **ctrl_kwds):
         """Change the DN and possibly the location of an object in the tree. Exposes all options of the protocol-level
         rfc4511.ModifyDNRequest
@@ -938,6 +1622,16 @@ class LDAP(LDAPExtensions):
 
         Additional keyword arguments are handled as :doc:`/controls`.
         """
+        mdr, controls = self._prep_mod_dn(dn, new_rdn, clean_attr, new_parent, ctrl_kwds)
+        mid = self.sock.send_message('modDNRequest', mdr, controls, self._deadline())
+        logger.info('Sent modDN request (ID {0}) for DN {1} newRDN="{2}" newParent="{3}"'.format(
+                    mid, dn, new_rdn, new_parent))
+        try:
+            return self._success_result(mid, 'modDNResponse')
+        finally:
+            self._invalidate_mod_dn(dn, new_rdn, new_parent)
+
+    def _prep_mod_dn(self, dn, new_rdn, clean_attr, new_parent, ctrl_kwds):
         if self.sock.unbound:
             raise ConnectionUnbound()
         mdr = rfc4511.ModifyDNRequest()
@@ -947,10 +1641,8 @@ class LDAP(LDAPExtensions):
         if new_parent is not None:
             mdr.setComponentByName('newSuperior', rfc4511.NewSuperior(new_parent))
         controls = self._process_ctrl_kwds('mod_dn', ctrl_kwds, final=True)
-        mid = self.sock.send_message('modDNRequest', mdr, controls)
-        logger.info('Sent modDN request (ID {0}) for DN {1} newRDN="{2}" newParent="{3}"'.format(
-                    mid, dn, new_rdn, new_parent))
-        return self._success_result(mid, 'modDNResponse')
+        self._invalidate_mod_dn(dn, new_rdn, new_parent)
+        return mdr, controls
 
     def rename(self, dn, new_rdn, clean_attr=True, **ctrl_kwds):
         """Specify a new RDN for an object without changing its location in the tree.
@@ -976,11 +1668,12 @@ class LDAP(LDAPExtensions):
 
         Additional keyword arguments are handled as :doc:`/controls`.
         """
-        rdn, parent = re.split(r'(?<!\\),', new_dn, 1)
+        rdn, parent = _split_new_dn(new_dn)
         return self.mod_dn(dn, rdn, clean_attr, parent, **ctrl_kwds)
 
     ## change attributes on an object
 
+    @_reconnect_on_error(retry=False)
     def modify(self, dn, modlist, current=None, **ctrl_kwds):
         """Perform a series of modify operations on an object atomically
 
@@ -996,16 +1689,30 @@ class LDAP(LDAPExtensions):
 
         Additional keyword arguments are handled as :doc:`/controls`.
         """
+        prepared = self._prep_modify(dn, modlist, current, ctrl_kwds)
+        if prepared is None:
+            return LDAPResponse()
+        mr, controls = prepared
+        mid = self.sock.send_message('modifyRequest', mr, controls, self._deadline())
+        logger.info('Sent modify request (ID {0}) for DN {1}'.format(mid, dn))
+        try:
+            return self._success_result(mid, 'modifyResponse')
+        finally:
+            self._invalidate_cached(dn)
+
+    def _prep_modify(self, dn, modlist, current, ctrl_kwds):
+        """Validate and build a modify request
+
+        :return: A tuple of the protocol-level modify request and request controls, or None if there is nothing to send
+        :rtype: tuple or None
+        """
         if len(modlist) > 0:
             if self.sock.unbound:
                 raise ConnectionUnbound()
 
             self.validate_modify(dn, modlist, current)
 
-            mr = rfc4511.ModifyRequest()
-            mr.setComponentByName('object', rfc4511.LDAPDN(dn))
-            cl = rfc4511.Changes()
-            i = 0
+            changes = []
             logger.debug('Modifying DN {0}'.format(dn))
             for mod in modlist:
                 if mod.op in (Mod.REPLACE, Mod.DELETE):
@@ -1022,32 +1729,17 @@ class LDAP(LDAPExtensions):
                         mod.vals = []
                 logger.debug('> {0}'.format(mod))
 
-                c = rfc4511.Change()
-                c.setComponentByName('operation', mod.op)
-                pa = rfc4511.PartialAttribute()
-                pa.setComponentByName('type', rfc4511.AttributeDescription(mod.attr))
-                vals = rfc4511.Vals()
-                j = 0
-                for v in mod.vals:
-                    vals.setComponentByPosition(j, rfc4511.AttributeValue(v))
-                    j += 1
-                pa.setComponentByName('vals', vals)
-                c.setComponentByName('modification', pa)
-
-                cl.setComponentByPosition(i, c)
-                i += 1
-            if i > 0:
-                mr.setComponentByName('changes', cl)
+                changes.append((mod.op, mod.attr, list(mod.vals)))
+            if changes:
                 controls = self._process_ctrl_kwds('modify', ctrl_kwds, final=True)
-                mid = self.sock.send_message('modifyRequest', mr, controls)
-                logger.info('Sent modify request (ID {0}) for DN {1}'.format(mid, dn))
-                return self._success_result(mid, 'modifyResponse')
+                self._invalidate_cached(dn)
+                return ber.ModifyRequest(dn, changes), controls
             else:
                 logger.debug('All modlist items have been skipped for DN {0}'.format(dn))
-                return LDAPResponse()
+                return None
         else:
             logger.debug('Not sending 0-length modlist for DN {0}'.format(dn))
-            return LDAPResponse()
+            return None
 
     def add_attrs(self, dn, attrs_dict, current=None, **ctrl_kwds):
         """Add new attribute values to existing object.
@@ -1123,6 +1815,31 @@ class LDAP(LDAPExtensions):
 
         return self.modify(dn, Modlist(Mod.REPLACE, attrs_dict), current, **ctrl_kwds)
 
+    ## pipelined operations
+
+    def pipeline(self, window=None):
+        """Send write and compare operations without waiting for each response.
+
+        The methods of the returned :class:`Pipeline` send their request and immediately return an
+        :class:`OperationHandle`, so many operations can be in flight on the connection at once.
+
+        :param int window: The maximum number of operations awaiting a response. Once reached, sending another
+                           operation first waits for any one outstanding response. Defaults to
+                           :attr:`DEFAULT_PIPELINE_WINDOW`.
+        :return: A new pipeline on this connection
+        :rtype: Pipeline
+
+        Example::
+
+            with ldap.pipeline() as pipe:
+                for dn, attrs in new_entries:
+                    pipe.add(dn, attrs)
+            # all responses received; the first failure, if any, has been raised
+        """
+        if window is None:
+            window = LDAP.DEFAULT_PIPELINE_WINDOW
+        return Pipeline(self, window)
+
     ## Extension methods
 
     def send_extended_request(self, oid, value=None, **kwds):
@@ -1143,6 +1860,12 @@ class LDAP(LDAPExtensions):
         Additional keyword arguments are handled as :doc:`/controls` and then passed through into the
         :class:`ExtendedResponseHandle` constructor.
         """
+        xr, req_ctrls = self._prep_extended_request(oid, value, kwds)
+        mid = self.sock.send_message('extendedReq', xr, req_ctrls, self._deadline())
+        logger.info('Sent extended request ID={0} OID={1}'.format(mid, oid))
+        return ExtendedResponseHandle(mid=mid, ldap_conn=self, **kwds)
+
+    def _prep_extended_request(self, oid, value, kwds):
         if oid not in self.root_dse.get_attr('supportedExtension'):
             raise LDAPSupportError('Extended operation is not supported by the server')
         xr = rfc4511.ExtendedRequest()
@@ -1152,9 +1875,7 @@ class LDAP(LDAPExtensions):
                 raise TypeError('extendedRequest value must be string or bytes')
             xr.setComponentByName('requestValue', rfc4511.RequestValue(value))
         req_ctrls = self._process_ctrl_kwds('ext', kwds)
-        mid = self.sock.send_message('extendedReq', xr, req_ctrls)
-        logger.info('Sent extended request ID={0} OID={1}'.format(mid, oid))
-        return ExtendedResponseHandle(mid=mid, ldap_conn=self, **kwds)
+        return xr, req_ctrls
 
     def who_am_i(self, **ctrl_kwds):
         """Perform the "Who Am I?" extended operation. This will confirm the identity that the connection is bound to.
@@ -1191,6 +1912,16 @@ class LDAP(LDAPExtensions):
         :type ca_data: str or bytes
         :rtype: None
         """
+        tls_params = self._tls_params(verify, ca_file, ca_path, ca_data)
+        handle = self.send_extended_request(LDAP.OID_STARTTLS, require_success=True)
+        handle.recv_response()
+        self.sock.start_tls(*tls_params)
+        self._tls_state = tls_params
+        self.refresh_root_dse()
+        logger.info('StartTLS complete')
+
+    def _tls_params(self, verify, ca_file, ca_path, ca_data):
+        """Check StartTLS is allowed and apply the connection's TLS defaults"""
         if self.sock.started_tls:
             raise LDAPError('TLS layer already installed')
         if verify is None:
@@ -1201,11 +1932,7 @@ class LDAP(LDAPExtensions):
             ca_path = self.ssl_ca_path
         if ca_data is None:
             ca_data = self.ssl_ca_data
-        handle = self.send_extended_request(LDAP.OID_STARTTLS, require_success=True)
-        handle.recv_response()
-        self.sock.start_tls(verify, ca_file, ca_path, ca_data)
-        self.refresh_root_dse()
-        logger.info('StartTLS complete')
+        return verify, ca_file, ca_path, ca_data
 
     ## validation methods
 
@@ -1253,9 +1980,14 @@ class LDAP(LDAPExtensions):
         :raises LDAPError: if an unimplemented feature is used
         :raises LDAPSupportError: if a version other than 1 is specified or a critical control is undefined
         """
-        # stores returns of individual method calls in order for return
-        ldap_responses = []
+        return [getattr(self, method)(*args, **kwds) for method, args, kwds in self._parse_ldif(ldif_str)]
+
+    def _parse_ldif(self, ldif_str):
+        """Parse an LDIF into the operations it describes, as they are reached. See :meth:`process_ldif`.
 
+        :return: An iterator over ``(method name, positional arguments, keyword arguments)`` tuples
+        :rtype: iter[tuple]
+        """
         # unfold lines by removing newline followed by a space
         ldif_str = re.sub(r'(\n|\r\n) ', '', ldif_str)
 
@@ -1376,10 +2108,10 @@ class LDAP(LDAPExtensions):
                     if attr not in attrs:
                         attrs[attr] = []
                     attrs[attr].append(val.strip())
-                ldap_responses.append(self.add(dn, attrs, **ctrl_kwds))
+                yield 'add', (dn, attrs), ctrl_kwds
 
             elif changetype == 'delete':
-                ldap_responses.append(self.delete(dn, **ctrl_kwds))
+                yield 'delete', (dn,), ctrl_kwds
 
             elif changetype == 'modify':
                 mod_op = None
@@ -1428,7 +2160,7 @@ class LDAP(LDAPExtensions):
                     modlist += Modlist(mod_op, {mod_attr: vals})
 
                 # send modify operation
-                ldap_responses.append(self.modify(dn, modlist, **ctrl_kwds))
+                yield 'modify', (dn, modlist), ctrl_kwds
 
             elif changetype == 'modrdn' or changetype == 'moddn':
                 if len(ldif_lines) < 2:
@@ -1469,13 +2201,11 @@ class LDAP(LDAPExtensions):
                     new_parent = None
 
                 # send mod_dn
-                ldap_responses.append(self.mod_dn(dn, new_rdn, clean_attr, new_parent, **ctrl_kwds))
+                yield 'mod_dn', (dn, new_rdn, clean_attr, new_parent), ctrl_kwds
 
             else:
                 raise ValueError('changetype {0} unknown'.format(changetype))
 
-        return ldap_responses
-
     def disable_validation(self, disabled_validators=None):
         """Returns a context manager which temporarily disables validation. If any server errors are generated, they
         will still be propagated.
@@ -1515,6 +2245,25 @@ class LDAPResponse(object):
     pass
 
 
+class GetManyResult(OrderedDict):
+    """Returned by :meth:`LDAP.get_many` and :meth:`.LDAPObject.find_many`. Maps each requested DN or RDN, in the
+    order requested, to its :class:`.LDAPObject`, or to None if it could not be retrieved.
+
+    :var list missing: The requested DNs or RDNs that do not exist
+    :var dict errors: Maps requested DNs or RDNs to the :exc:`.LDAPError` that prevented retrieving them
+    """
+    def __init__(self, keys):
+        OrderedDict.__init__(self)
+        for key in keys:
+            self[key] = None
+        self.missing = []
+        self.errors = {}
+
+    def _set_error(self, key, e):
+        self.errors[key] = e
+        self[key] = None
+
+
 class CompareResponse(LDAPResponse):
     """Stores boolean compare result and any response control values. The :func:`bool` of this object gives the
     compare result.
@@ -1533,6 +2282,7 @@ class ResponseHandle(LDAPResponse):
     """Base for return from methods with multiple response messages."""
     def __init__(self, ldap_conn, mid):
         self.ldap_conn = ldap_conn
+        self.sock = ldap_conn.sock
         self.message_id = mid
         self.abandoned = False
         self.done = False
@@ -1550,75 +2300,477 @@ class ResponseHandle(LDAPResponse):
         """Request to abandon an operation in progress"""
         if not self.abandoned:
             logger.info('Abandoning ID={0}'.format(self.message_id))
-            self.ldap_conn.sock.send_message('abandonRequest', rfc4511.AbandonRequest(self.message_id))
+            self.sock.send_message('abandonRequest', ber.AbandonRequest(self.message_id))
             self.abandoned = True
-            self.ldap_conn.sock.abandonedMIDs.append(self.message_id)
+            self.sock.abandoned_mids.append(self.message_id)
         else:
             logger.debug('ID={0} already abandoned'.format(self.message_id))
 
 
+class ResultTuple(namedtuple('ResultTuple', ['dn', 'attrs'])):
+    """A search result yielded for :attr:`.ResultFormat.TUPLES`. Unpacks as a ``(dn, attrs)`` pair.
+
+    :var str dn: The DN of the object
+    :var dict attrs: Maps attribute types, exactly as returned by the server, to lists of values
+    """
+    __slots__ = ()
+
+
+class _Columns(object):
+    """Collects search results into the columns returned by :meth:`SearchResultHandle.to_columns`"""
+
+    def __init__(self, attrs, missing):
+        # integer columns depend on the attribute type definitions
+        extensions.base_schema.require()
+        self.attrs = list(attrs)
+        self.keys = [attr.lower() for attr in self.attrs]
+        self.missing = missing
+        self.size = 0
+        self.dns = []
+        self.columns = [_new_column(attr) for attr in self.attrs]
+
+    def add(self, dn, row):
+        """Add one result.
+
+        :param str dn: The DN of the result
+        :param dict row: Maps lowercase attribute types to lists of values
+        """
+        self.dns.append(dn)
+        for i, key in enumerate(self.keys):
+            vals = row.get(key)
+            if not vals:
+                cell = self.missing
+            elif len(vals) == 1:
+                cell = vals[0]
+            else:
+                cell = vals
+            column = self.columns[i]
+            if isinstance(column, array):
+                try:
+                    column.append(int(cell))
+                    continue
+                except (TypeError, ValueError, OverflowError):
+                    # not an integer after all, or missing
+                    column = self.columns[i] = column.tolist()
+            column.append(cell)
+        self.size += 1
+
+    def result(self):
+        ret = OrderedDict()
+        ret['dn'] = self.dns
+        for attr, column in zip(self.attrs, self.columns):
+            ret[attr] = column
+        return ret
+
+
+def _new_column(attr):
+    """Create an array for single-valued attributes with the INTEGER syntax, otherwise a list"""
+    attr_type = find_attribute_type(attr)
+    if attr_type is not None and attr_type.syntax_oid == _INTEGER_SYNTAX and attr_type.single_value:
+        return array('l')
+    return []
+
+
+class _DecodedBatch(object):
+    """Entries decoded in the calling thread, in the same form as the pending results of :func:`_decode_entry_pdus`"""
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    def ready(self):
+        return True
+
+    def get(self):
+        return self.entries
+
+
+def _decode_entry_pdus(pdus, value_decoding):
+    """Decode a batch of searchResEntry messages in a decoding pool worker process.
+
+    :param list[bytes] pdus: The raw messages
+    :param str value_decoding: One of the :class:`.ValueDecoding` constants
+    :return: A list of ``(dn, attrs, None)`` tuples
+    :rtype: list[tuple]
+    """
+    if value_decoding == ValueDecoding.SCHEMA:
+        # worker processes may not have loaded the schema yet
+        extensions.base_schema.require()
+    entries = []
+    for pdu in pdus:
+        msg = LDAPSocket._decode_pdu(pdu)
+        op, mid, (dn, attrs), res_ctrls = SearchResultHandle._unpack_search_message(msg, value_decoding)
+        entries.append((dn, attrs, None))
+    return entries
+
+
+def _result_row(obj):
+    """Get the DN and a dict of lowercase attribute types to values for a result obtained from a reference, or None
+    for an unfetched reference"""
+    if isinstance(obj, ResultTuple):
+        return obj.dn, dict((attr.lower(), vals) for attr, vals in six.iteritems(obj.attrs))
+    elif isinstance(obj, LDAPObject):
+        return obj.dn, dict((attr.lower(), vals) for attr, vals in obj.items())
+    return None
+
+
 class SearchResultHandle(ResponseHandle):
-    def __init__(self, ldap_conn, message_id, fetch_result_refs, follow_referrals, obj_kwds):
+    # kinds of processed search messages
+    ENTRY = 'entry'
+    REFERENCE = 'reference'
+    REFERRAL = 'referral'
+    DONE = 'done'
+
+    def __init__(self, ldap_conn, message_id, fetch_result_refs, follow_referrals, obj_kwds, request=None,
+                 result_format=ResultFormat.OBJECTS, value_decoding=ValueDecoding.GUESS, decode_pool=None,
+                 decode_ordered=True):
         ResponseHandle.__init__(self, ldap_conn, message_id)
         self.fetch_result_refs = fetch_result_refs
         self.follow_referrals = follow_referrals
         self.obj_kwds = obj_kwds
+        self.result_format = result_format
+        self.value_decoding = value_decoding
+        self.decode_pool = decode_pool
+        self.decode_ordered = decode_ordered
+        if decode_pool is not None:
+            # responses that arrive before this are simply decoded on receipt
+            self.sock.pool_decode_ids.add(message_id)
+        # the search request, to send again if the connection fails and is replaced before any results arrive
+        self._request = request
+        # all results, including those from referrals and references, must arrive by this time
+        self._deadline = ldap_conn._deadline()
 
     def __iter__(self):
         if self.abandoned:
             logger.debug('ID={0} has been abandoned'.format(self.message_id))
             return
-        for msg in self.ldap_conn.sock.recv_messages(self.message_id):
-            try:
-                mid, entry, res_ctrls = unpack('searchResEntry', msg)
-                dn = get_string_component(entry, 'objectName')
-                attrs = {}
-                _attrs = entry.getComponentByName('attributes')
-                for i in range(0, len(_attrs)):
-                    _attr = _attrs.getComponentByPosition(i)
-                    attr_type = six.text_type(_attr.getComponentByName('type'))
-                    vals = _attr.getComponentByName('vals')
-                    attrs[attr_type] = seq_to_list(vals)
-                logger.debug('Got search result entry (ID {0}) {1}'.format(mid, dn))
-                ret = self.ldap_conn.obj(dn, attrs, **self.obj_kwds)
-                controls.handle_response(ret, res_ctrls)
-                yield ret
-            except UnexpectedResponseType:
-                try:
-                    mid, resobj, res_ctrls = unpack('searchResDone', msg)
-                    self.done = True
-                    res = resobj.getComponentByName('resultCode')
-                    if res == RESULT_success or res == RESULT_noSuchObject:
-                        logger.debug('Got all search results for ID={0}, result is {1}'.format(
-                            mid, repr(res)
-                        ))
-                        controls.handle_response(self, res_ctrls)
-                        return
-                    elif res == RESULT_referral:
-                        if self.follow_referrals:
-                            logger.info('Following referral for ID={0}'.format(mid))
-                            ref = resobj.getComponentByName('referral')
-                            uris = seq_to_list(ref)
-                            for obj in SearchReferenceHandle(uris, self.obj_kwds).fetch():
-                                yield obj
-                        else:
-                            logger.debug('Ignoring referral for ID={0}'.format(mid))
-                            return
-                    else:
-                        raise LDAPError('Got {0} for search results (ID {1})'.format(repr(res), mid))
-                except UnexpectedResponseType:
-                    mid, resref, res_ctrls = unpack('searchResRef', msg)
-                    s = seq_to_list(resref)
-                    logger.debug('Got search result reference (ID {0}) to: {1}'.format(mid, ' | '.join(s)))
-                    ref = SearchReferenceHandle(s, self.obj_kwds)
+        if self.decode_pool is not None:
+            for obj in self._iter_pooled():
+                yield obj
+            return
+        for msg in self._recv_messages():
+            kind, value = self._process_message(msg)
+            if kind == SearchResultHandle.ENTRY:
+                yield value
+            elif kind == SearchResultHandle.REFERENCE:
+                if self.fetch_result_refs:
+                    for obj in value.fetch():
+                        yield obj
+                else:
+                    yield value
+            elif kind == SearchResultHandle.REFERRAL:
+                for obj in self._reference_handle(value).fetch():
+                    yield obj
+                return
+            else:
+                return
+
+    def _iter_pooled(self):
+        """Iterate results while batches of result entries are decoded by :attr:`decode_pool`. Messages are received
+        ahead of the consumer until up to two batches per CPU are waiting to be decoded."""
+        max_pending = 2 * multiprocessing.cpu_count()
+        value_decoding = self.value_decoding
+        if value_decoding == ValueDecoding.MEMORYVIEW:
+            # memoryviews cannot be returned from another process
+            value_decoding = ValueDecoding.SCHEMA
+        # batches being decoded, and lists of entries decoded here, in the order they were received
+        pending = deque()
+        batch = []
+        try:
+            for msg in self._recv_messages():
+                if isinstance(msg, ber.Response) and isinstance(msg.value, ber.RawEntry):
+                    batch.append(msg.value.pdu)
+                    if len(batch) >= _DECODE_BATCH_SIZE:
+                        pending.append(self.decode_pool.apply_async(_decode_entry_pdus, (batch, value_decoding)))
+                        batch = []
+                        for obj in self._pooled_results(pending, max_pending):
+                            yield obj
+                    continue
+                if batch:
+                    pending.append(self.decode_pool.apply_async(_decode_entry_pdus, (batch, value_decoding)))
+                    batch = []
+                if msg.getComponentByName('protocolOp').getName() == 'searchResEntry':
+                    op, mid, (dn, attrs), res_ctrls = self._unpack_search_message(msg, self.value_decoding)
+                    pending.append(_DecodedBatch([(dn, attrs, res_ctrls)]))
+                    for obj in self._pooled_results(pending, max_pending):
+                        yield obj
+                    continue
+                for obj in self._pooled_results(pending, 0):
+                    yield obj
+                kind, value = self._process_message(msg)
+                if kind == SearchResultHandle.REFERENCE:
                     if self.fetch_result_refs:
-                        if res_ctrls:
-                            warn('Unhandled response controls on searchResRef message', LDAPWarning)
-                        for obj in ref.fetch():
+                        for obj in value.fetch():
                             yield obj
                     else:
-                        controls.handle_response(ref, res_ctrls)
-                        yield ref
+                        yield value
+                elif kind == SearchResultHandle.REFERRAL:
+                    for obj in self._reference_handle(value).fetch():
+                        yield obj
+                    return
+                else:
+                    return
+        finally:
+            self.sock.pool_decode_ids.discard(self.message_id)
+
+    def _pooled_results(self, pending, keep):
+        """Yield the results of decoded batches until at most ``keep`` batches remain pending. Batches that are
+        already decoded are yielded as well: the first ones, or any ones if ``decode_ordered`` is False."""
+        while pending:
+            batch = None
+            if self.decode_ordered:
+                if len(pending) > keep or pending[0].ready():
+                    batch = pending.popleft()
+            else:
+                for candidate in pending:
+                    if candidate.ready():
+                        batch = candidate
+                        break
+                else:
+                    if len(pending) > keep:
+                        batch = pending[0]
+                if batch is not None:
+                    pending.remove(batch)
+            if batch is None:
+                return
+            for dn, attrs, res_ctrls in batch.get():
+                logger.debug('Got search result entry (ID {0}) {1}'.format(self.message_id, dn))
+                yield self._entry_result(dn, attrs, res_ctrls)
+
+    def _entry_result(self, dn, attrs, res_ctrls):
+        """Create the result to yield for a search result entry according to :attr:`result_format`"""
+        if self.result_format == ResultFormat.TUPLES:
+            if res_ctrls:
+                warn('Unhandled response controls on searchResEntry message', LDAPWarning)
+            return ResultTuple(dn, attrs)
+        ret = self.ldap_conn.obj(dn, attrs, **self.obj_kwds)
+        controls.handle_response(ret, res_ctrls)
+        return ret
+
+    def to_columns(self, attrs, missing=None):
+        """Read all remaining results into columns, decoding only the requested attributes. Each column is a list with
+        one item per result: the value if the result has exactly one value, the list of values if it has several, or
+        ``missing`` if it has none. Columns for single-valued attribute types defined with the INTEGER syntax are
+        instead an :class:`array.array` of ints while all their values are integers.
+
+        Unfetched search result references are skipped. Response controls on result entries are not handled.
+
+        :param list[str] attrs: The attribute types to include as columns
+        :param missing: The column item to use for results without a value
+        :return: An ordered dict with the list of DNs under ``'dn'``, followed by the column for each of ``attrs``
+        :rtype: collections.OrderedDict
+
+        Example::
+
+            columns = ldap.base.search('(objectClass=posixAccount)', attrs=['uid', 'uidNumber']).to_columns(
+                ['uid', 'uidNumber'])
+            for uid, uid_number in zip(columns['uid'], columns['uidNumber']):
+                print(uid, uid_number)
+        """
+        columns = _Columns(attrs, missing)
+        for dn, row in self._rows(frozenset(columns.keys)):
+            columns.add(dn, row)
+        return columns.result()
+
+    def iter_columns(self, attrs, chunk_size=1000, missing=None):
+        """Read the remaining results into columns like :meth:`to_columns`, one chunk at a time, to limit memory use.
+
+        :param list[str] attrs: The attribute types to include as columns
+        :param int chunk_size: The maximum number of results in each chunk
+        :param missing: The column item to use for results without a value
+        :return: An iterator over ordered dicts of columns, as returned by :meth:`to_columns`
+        """
+        columns = _Columns(attrs, missing)
+        keys = frozenset(columns.keys)
+        for dn, row in self._rows(keys):
+            columns.add(dn, row)
+            if columns.size >= chunk_size:
+                yield columns.result()
+                columns = _Columns(attrs, missing)
+        if columns.size:
+            yield columns.result()
+
+    def _rows(self, keys):
+        """Iterate the DN and a dict of lowercase attribute types to values for each remaining result, decoding only
+        the attributes in ``keys``"""
+        if self.abandoned:
+            logger.debug('ID={0} has been abandoned'.format(self.message_id))
+            return
+        for msg in self._recv_messages():
+            row = self._entry_row(msg, keys)
+            if row is not None:
+                yield row
+                continue
+            kind, value = self._process_message(msg)
+            if kind == SearchResultHandle.REFERENCE:
+                if self.fetch_result_refs:
+                    for obj in value.fetch():
+                        row = _result_row(obj)
+                        if row is not None:
+                            yield row
+            elif kind == SearchResultHandle.REFERRAL:
+                for obj in self._reference_handle(value).fetch():
+                    row = _result_row(obj)
+                    if row is not None:
+                        yield row
+                return
+            else:
+                return
+
+    def _entry_row(self, msg, keys):
+        """Decode the attributes in ``keys`` from a searchResEntry message, for :meth:`_rows`.
+
+        :return: The DN and a dict of lowercase attribute types to values, or None if the message is not a
+                 searchResEntry
+        :rtype: tuple or None
+        """
+        if isinstance(msg, ber.Response) and isinstance(msg.value, ber.RawEntry):
+            # left for a decoding pool, but columns are filled in this thread
+            msg = LDAPSocket._decode_pdu(msg.value.pdu)
+        if isinstance(msg, ber.Response):
+            if msg.op != 'searchResEntry':
+                return None
+            entry = msg.value
+            views = self.value_decoding == ValueDecoding.MEMORYVIEW
+            row = {}
+            for attr_type in entry.attr_types():
+                key = attr_type.lower()
+                if key in keys:
+                    row[key] = entry.decode(attr_type, decode_as_bytes(attr_type, self.value_decoding), views)
+            return entry.dn, row
+        if msg.getComponentByName('protocolOp').getName() != 'searchResEntry':
+            return None
+        op, mid, (dn, attrs), res_ctrls = self._unpack_search_message(msg, self.value_decoding)
+        if res_ctrls:
+            warn('Unhandled response controls on searchResEntry message', LDAPWarning)
+        return dn, dict((attr.lower(), vals) for attr, vals in six.iteritems(attrs))
+
+    def _recv_messages(self):
+        """Iterate the response messages for this search. If the connection fails before any have arrived and is
+        replaced by ``auto_reconnect``, the search is sent once more on the new connection. The search is abandoned if
+        its deadline passes."""
+        retry = self._request is not None
+        while True:
+            received = False
+            try:
+                for msg in self.sock.recv_messages(self.message_id, self._deadline):
+                    received = True
+                    yield msg
+                return
+            except ResponseTimeout:
+                self.abandon()
+                raise
+            except _connection_errors as e:
+                if not self.ldap_conn._reconnect_after(self.sock, e) or received or not retry:
+                    raise
+            retry = False
+            self.sock = self.ldap_conn.sock
+            self.message_id = self.sock.send_message(*self._request, deadline=self._deadline)
+            logger.info('Sent search request again (ID {0}) after reconnecting'.format(self.message_id))
+
+    def _reference_handle(self, uris):
+        return SearchReferenceHandle(uris, self.obj_kwds, self._deadline, self.result_format, self.value_decoding)
+
+    @staticmethod
+    def _unpack_search_message(msg, value_decoding=ValueDecoding.GUESS):
+        """Get the contents of a search response message as plain values.
+
+        :param msg: The message received for a search
+        :type msg: rfc4511.LDAPMessage or ber.Response
+        :param str value_decoding: One of the :class:`.ValueDecoding` constants, applied to attribute values
+        :return: A tuple of the protocol operation name, the message ID, the value, and any response controls. The value
+                 is a ``(dn, attrs)`` tuple for ``searchResEntry``, a ``(result code, referral URIs)`` tuple for
+                 ``searchResDone``, or a list of URIs for ``searchResRef``.
+        :rtype: tuple
+        :raises UnexpectedResponseType: if the message is not a search response
+        """
+        if isinstance(msg, ber.Response):
+            # already decoded to plain values by the fast path
+            if msg.op == 'searchResEntry':
+                if value_decoding == ValueDecoding.GUESS:
+                    attrs = msg.value.decode_all()
+                else:
+                    attrs = msg.value.decode_all(lambda attr: decode_as_bytes(attr, value_decoding),
+                                                 value_decoding == ValueDecoding.MEMORYVIEW)
+                return msg.op, msg.message_id, (msg.value.dn, attrs), None
+            elif msg.op == 'searchResDone':
+                return msg.op, msg.message_id, (msg.value.result_code, msg.value.referral), None
+            return msg.op, msg.message_id, msg.value, None
+
+        op = msg.getComponentByName('protocolOp').getName()
+        if op == 'searchResEntry':
+            mid, entry, res_ctrls = unpack(op, msg)
+            dn = get_string_component(entry, 'objectName')
+            attrs = {}
+            _attrs = entry.getComponentByName('attributes')
+            for i in range(0, len(_attrs)):
+                _attr = _attrs.getComponentByPosition(i)
+                attr_type = six.text_type(_attr.getComponentByName('type'))
+                vals = _attr.getComponentByName('vals')
+                attrs[attr_type] = seq_to_list(vals, decode_as_bytes(attr_type, value_decoding),
+                                               value_decoding == ValueDecoding.MEMORYVIEW)
+            return op, mid, (dn, attrs), res_ctrls
+        elif op == 'searchResDone':
+            mid, resobj, res_ctrls = unpack(op, msg)
+            res = resobj.getComponentByName('resultCode')
+            referral = None
+            if res == RESULT_referral:
+                referral = seq_to_list(resobj.getComponentByName('referral'))
+            return op, mid, (res, referral), res_ctrls
+        elif op == 'searchResRef':
+            mid, resref, res_ctrls = unpack(op, msg)
+            return op, mid, seq_to_list(resref), res_ctrls
+        else:
+            raise UnexpectedResponseType('Got {0} but expected a search response'.format(op))
+
+    def _process_message(self, msg):
+        """Process one search response message.
+
+        :param msg: The message received for this search
+        :type msg: rfc4511.LDAPMessage or ber.Response
+        :return: A tuple of the kind of message (one of the ``ENTRY``, ``REFERENCE``, ``REFERRAL``, or ``DONE``
+                 class attributes) and its value: the :class:`LDAPObject`, the :class:`SearchReferenceHandle`, the list
+                 of referral URIs to follow, or None, respectively.
+        :rtype: tuple
+        :raises LDAPError: if the search failed
+        """
+        if (self.result_format == ResultFormat.LAZY and isinstance(msg, ber.Response) and
+                msg.op == 'searchResEntry'):
+            # the fast path never decodes messages with response controls, so there are none to handle
+            logger.debug('Got search result entry (ID {0}) {1}'.format(msg.message_id, msg.value.dn))
+            return SearchResultHandle.ENTRY, self.ldap_conn._lazy_obj(msg.value, self.value_decoding, **self.obj_kwds)
+
+        op, mid, value, res_ctrls = self._unpack_search_message(msg, self.value_decoding)
+        if op == 'searchResEntry':
+            dn, attrs = value
+            logger.debug('Got search result entry (ID {0}) {1}'.format(mid, dn))
+            return SearchResultHandle.ENTRY, self._entry_result(dn, attrs, res_ctrls)
+        elif op == 'searchResDone':
+            self.done = True
+            res, referral = value
+            if res == RESULT_success or res == RESULT_noSuchObject:
+                logger.debug('Got all search results for ID={0}, result is {1}'.format(
+                    mid, repr(res)
+                ))
+                controls.handle_response(self, res_ctrls)
+                return SearchResultHandle.DONE, None
+            elif res == RESULT_referral:
+                if self.follow_referrals:
+                    logger.info('Following referral for ID={0}'.format(mid))
+                    return SearchResultHandle.REFERRAL, referral
+                else:
+                    logger.debug('Ignoring referral for ID={0}'.format(mid))
+                    return SearchResultHandle.DONE, None
+            else:
+                raise LDAPError('Got {0} for search results (ID {1})'.format(repr(res), mid))
+        else:
+            logger.debug('Got search result reference (ID {0}) to: {1}'.format(mid, ' | '.join(value)))
+            ref = self._reference_handle(value)
+            if self.fetch_result_refs:
+                if res_ctrls:
+                    warn('Unhandled response controls on searchResRef message', LDAPWarning)
+            else:
+                controls.handle_response(ref, res_ctrls)
+            return SearchResultHandle.REFERENCE, ref
 
 
 class ExtendedResponseHandle(ResponseHandle):
@@ -1629,7 +2781,7 @@ class ExtendedResponseHandle(ResponseHandle):
     def __init__(self, mid, ldap_conn, require_success=False):
         ResponseHandle.__init__(self, ldap_conn, mid)
         self.require_success = require_success
-        self._recvr = ldap_conn.sock.recv_messages(mid)
+        self._recvr = ldap_conn.sock.recv_messages(mid, ldap_conn._deadline())
 
     def _handle_msg(self, lm):
         try:
@@ -1649,13 +2801,266 @@ class ExtendedResponseHandle(ResponseHandle):
             return xr, res_ctrls
 
     def __iter__(self):
-        for lm in self._recvr:
+        while not self.done:
+            try:
+                lm = self._recv()
+            except StopIteration:
+                return
             yield self._handle_msg(lm)
-            if self.done:
-                break
 
     def recv_response(self):
-        return self._handle_msg(next(self._recvr))
+        return self._handle_msg(self._recv())
+
+    def _recv(self):
+        try:
+            return next(self._recvr)
+        except ResponseTimeout:
+            self.abandon()
+            raise
+
+
+class OperationHandle(ResponseHandle):
+    """A future-like handle for an operation sent through a :class:`Pipeline`.
+
+    :var bool done: True once the response has been received
+    """
+    def __init__(self, pipeline, mid, handler):
+        ResponseHandle.__init__(self, pipeline.ldap_conn, mid)
+        self._pipeline = pipeline
+        self._handler = handler
+        self._result = None
+        self._exception = None
+
+    def _set_response(self, lm):
+        try:
+            self._result = self._handler(lm)
+        except LDAPError as e:
+            self._exception = e
+        self.done = True
+
+    def _set_result(self, result):
+        self._result = result
+        self.done = True
+
+    def result(self):
+        """Wait for the response if needed, and return the same value as the corresponding :class:`LDAP` method.
+
+        :raises LDAPError: if the operation failed
+        """
+        if not self.done:
+            self._pipeline._wait(self)
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self):
+        """Wait for the response if needed, and return the exception the operation failed with, or None.
+
+        :rtype: LDAPError or None
+        """
+        if not self.done:
+            self._pipeline._wait(self)
+        return self._exception
+
+    def abandon(self):
+        """Pipelined operations cannot be abandoned while awaiting a response. Does nothing once the operation is
+        done, as for other handles.
+
+        :raises LDAPError: if the response has not been received yet
+        """
+        if self.done or self.abandoned:
+            logger.debug('ID={0} already done'.format(self.message_id))
+        else:
+            raise LDAPError('Pipelined operations cannot be abandoned')
+
+
+class Pipeline(object):
+    """Sends operations on an :class:`LDAP` connection without waiting for their responses. Obtain with
+    :meth:`LDAP.pipeline`.
+
+    The operation methods accept the same arguments as the :class:`LDAP` methods of the same name, but return an
+    :class:`OperationHandle` as soon as the request is sent. Responses may be collected in any order with
+    :meth:`OperationHandle.result`, :meth:`as_completed`, or :meth:`wait_all`.
+
+    When used as a context manager, all outstanding responses are received on exit, and the exception from the first
+    failed operation, if any, is raised.
+    """
+    def __init__(self, ldap_conn, window):
+        if window < 1:
+            raise ValueError('window must be at least 1')
+        self.ldap_conn = ldap_conn
+        self.window = window
+        # handles awaiting a response, by message ID
+        self._outstanding = {}
+        # handles sent since the last wait_all() or as_completed()
+        self._handles = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, etype, e, trace):
+        if etype is None:
+            for handle in self.wait_all():
+                handle.result()
+        else:
+            try:
+                self.wait_all()
+            except LDAPError:
+                pass
+
+    def _send(self, op, obj, ctrls, handler):
+        while len(self._outstanding) >= self.window:
+            self._collect_any()
+        mid = self.ldap_conn.sock.send_message(op, obj, ctrls, self.ldap_conn._deadline())
+        handle = OperationHandle(self, mid, handler)
+        self._outstanding[mid] = handle
+        self._handles.append(handle)
+        return handle
+
+    def _collect_any(self):
+        lm = self._recv_any(self._outstanding)
+        handle = self._outstanding.pop(lm.getComponentByName('messageID'))
+        handle._set_response(lm)
+        return handle
+
+    def _wait(self, handle):
+        lm = self._recv_any((handle.message_id,))
+        del self._outstanding[handle.message_id]
+        handle._set_response(lm)
+
+    def _recv_any(self, message_ids):
+        """Receive a response for any of ``message_ids``. If the deadline passes first, every outstanding operation
+        is abandoned and fails with the :exc:`.ResponseTimeout`."""
+        sock = self.ldap_conn.sock
+        try:
+            return sock.recv_any(message_ids, self.ldap_conn._deadline())
+        except ResponseTimeout as e:
+            for mid, handle in self._outstanding.items():
+                LDAP._abandon_timed_out(sock, mid)
+                handle._exception = e
+                handle.done = True
+            self._outstanding.clear()
+            raise
+
+    @property
+    def outstanding(self):
+        """The number of operations awaiting a response"""
+        return len(self._outstanding)
+
+    def wait_all(self):
+        """Wait for all outstanding operations to complete.
+
+        :return: Handles for every operation sent since the last call to :meth:`wait_all` or :meth:`as_completed`, in
+                 the order they were sent
+        :rtype: list[OperationHandle]
+        """
+        while self._outstanding:
+            self._collect_any()
+        handles = self._handles
+        self._handles = []
+        return handles
+
+    def as_completed(self):
+        """Iterate handles for every operation sent since the last call to :meth:`wait_all` or :meth:`as_completed`
+        as each one completes. Handles that have already completed are yielded first.
+
+        :rtype: iterable[OperationHandle]
+        """
+        handles = self._handles
+        self._handles = []
+        pending = set()
+        for handle in handles:
+            if handle.done:
+                yield handle
+            else:
+                pending.add(handle)
+        while pending:
+            handle = self._collect_any()
+            if handle in pending:
+                pending.remove(handle)
+                yield handle
+
+    def compare(self, dn, attr, value, **ctrl_kwds):
+        """Send a compare request. See :meth:`LDAP.compare`.
+
+        :rtype: OperationHandle
+        """
+        cr, req_ctrls = self.ldap_conn._prep_compare(dn, attr, value, ctrl_kwds)
+        handle = self._send('compareRequest', cr, req_ctrls, LDAP._compare_result)
+        logger.info('Sent pipelined compare request (ID {0}): {1} ({2} = {3})'.format(
+                    handle.message_id, dn, attr, value))
+        return handle
+
+    def add(self, dn, attrs_dict, **kwds):
+        """Send an add request. See :meth:`LDAP.add`.
+
+        :rtype: OperationHandle
+        """
+        obj, ar, req_ctrls = self.ldap_conn._prep_add(dn, attrs_dict, kwds)
+        handle = self._send('addRequest', ar, req_ctrls,
+                            LDAP._invalidating(lambda lm: LDAP._add_result(lm, obj),
+                                               self.ldap_conn._invalidate_cached, dn))
+        logger.info('Sent pipelined add request (ID {0}) for DN {1}'.format(handle.message_id, dn))
+        return handle
+
+    def delete(self, dn, **ctrl_kwds):
+        """Send a delete request. See :meth:`LDAP.delete`.
+
+        :rtype: OperationHandle
+        """
+        dr, ctrls = self.ldap_conn._prep_delete(dn, ctrl_kwds)
+        handle = self._send('delRequest', dr, ctrls,
+                            LDAP._invalidating(lambda lm: LDAP._check_success_result(lm, 'delResponse'),
+                                               self.ldap_conn._invalidate_cached, dn))
+        logger.info('Sent pipelined delete request (ID {0}) for DN {1}'.format(handle.message_id, dn))
+        return handle
+
+    def mod_dn(self, dn, new_rdn, clean_attr=True, new_parent=None, **ctrl_kwds):
+        """Send a modify DN request. See :meth:`LDAP.mod_dn`.
+
+        :rtype: OperationHandle
+        """
+        mdr, ctrls = self.ldap_conn._prep_mod_dn(dn, new_rdn, clean_attr, new_parent, ctrl_kwds)
+        handle = self._send('modDNRequest', mdr, ctrls,
+                            LDAP._invalidating(lambda lm: LDAP._check_success_result(lm, 'modDNResponse'),
+                                               self.ldap_conn._invalidate_mod_dn, dn, new_rdn, new_parent))
+        logger.info('Sent pipelined modDN request (ID {0}) for DN {1} newRDN="{2}" newParent="{3}"'.format(
+                    handle.message_id, dn, new_rdn, new_parent))
+        return handle
+
+    def rename(self, dn, new_rdn, clean_attr=True, **ctrl_kwds):
+        """Send a modify DN request with a new RDN. See :meth:`LDAP.rename`.
+
+        :rtype: OperationHandle
+        """
+        return self.mod_dn(dn, new_rdn, clean_attr, **ctrl_kwds)
+
+    def move(self, dn, new_dn, clean_attr=True, **ctrl_kwds):
+        """Send a modify DN request with a new absolute DN. See :meth:`LDAP.move`.
+
+        :rtype: OperationHandle
+        """
+        rdn, parent = _split_new_dn(new_dn)
+        return self.mod_dn(dn, rdn, clean_attr, parent, **ctrl_kwds)
+
+    def modify(self, dn, modlist, current=None, **ctrl_kwds):
+        """Send a modify request. See :meth:`LDAP.modify`.
+
+        :rtype: OperationHandle
+        """
+        prepared = self.ldap_conn._prep_modify(dn, modlist, current, ctrl_kwds)
+        if prepared is None:
+            # nothing to send
+            handle = OperationHandle(self, None, None)
+            handle._set_result(LDAPResponse())
+            self._handles.append(handle)
+            return handle
+        mr, ctrls = prepared
+        handle = self._send('modifyRequest', mr, ctrls,
+                            LDAP._invalidating(lambda lm: LDAP._check_success_result(lm, 'modifyResponse'),
+                                               self.ldap_conn._invalidate_cached, dn))
+        logger.info('Sent pipelined modify request (ID {0}) for DN {1}'.format(handle.message_id, dn))
+        return handle
 
 
 class LDAPURI(object):
@@ -1743,9 +3148,13 @@ class LDAPURI(object):
 
 class SearchReferenceHandle(object):
     """Returned when the server returns a SearchResultReference"""
-    def __init__(self, uris, obj_kwds):
+    def __init__(self, uris, obj_kwds, deadline=None, result_format=None, value_decoding=None):
         self.uris = []
         self.obj_kwds = obj_kwds
+        # deadline of the search that returned the reference, shared by the reference search
+        self.deadline = deadline
+        self.result_format = result_format
+        self.value_decoding = value_decoding
         for uri in uris:
             self.uris.append(LDAPURI(uri))
 
@@ -1756,7 +3165,9 @@ class SearchReferenceHandle(object):
         # may be used to progress the operation. ~ RFC4511 sec 4.5.3 p28
         for uri in self.uris:
             try:
-                return uri.search(**self.obj_kwds)
+                with _deadline_at(self.deadline):
+                    return uri.search(result_format=self.result_format, value_decoding=self.value_decoding,
+                                      **self.obj_kwds)
             except LDAPConnectionError as e:
                 warn('Error connecting to URI {0} ({1})'.format(uri, six.text_type(e)), LDAPWarning)
         raise LDAPError('Could not complete reference URI search with any supplied URIs')
@@ -0,0 +1,611 @@
+"""Fast encoding and decoding of the most frequent protocol messages straight to and from BER.
+
+Encoding or decoding with pyasn1 builds a complete tree of objects for every message, which dominates CPU time for
+high volumes of small operations. :func:`decode_response` instead reads search result entries, search result
+references, and result-only responses directly into plain python values. It returns None for any other message, or
+any message carrying controls, which must then be decoded with pyasn1 as before.
+
+In the other direction, the :class:`Request` classes hold the components of the most common requests as plain values,
+and :func:`encode_message` writes them out directly. The output is identical to encoding the equivalent
+:class:`.rfc4511.LDAPMessage` with pyasn1.
+"""
+
+from __future__ import absolute_import
+
+import six
+
+from .exceptions import LDAPError
+from .pyasn1.codec.ber.encoder import encode as ber_encode
+from .pyasn1.error import PyAsn1Error
+from .rfc4511 import AttributeValue, ResultCode
+
+# universal tags
+_BOOLEAN = 0x01
+_INTEGER = 0x02
+_OCTET_STRING = 0x04
+_ENUMERATED = 0x0a
+_SEQUENCE = 0x30
+_SET = 0x31
+
+# context-specific tags of the optional message controls and LDAPResult referral
+_CONTROLS = 0xa0
+_REFERRAL = 0xa3
+
+# application tags of the protocol operations decoded here
+_SEARCH_RES_ENTRY = 0x64
+_SEARCH_RES_REF = 0x73
+_RESULT_OPS = {
+    0x65: 'searchResDone',
+    0x67: 'modifyResponse',
+    0x69: 'addResponse',
+    0x6b: 'delResponse',
+    0x6d: 'modDNResponse',
+    0x6f: 'compareResponse',
+}
+
+# application tags of the requests encoded here
+_UNBIND_REQUEST = 0x42
+_SEARCH_REQUEST = 0x63
+_MODIFY_REQUEST = 0x66
+_ADD_REQUEST = 0x68
+_DEL_REQUEST = 0x4a
+_COMPARE_REQUEST = 0x6e
+_ABANDON_REQUEST = 0x50
+
+# pyasn1 always includes the controls component, even when empty
+_NO_CONTROLS = b'\xa0\x00'
+
+# enough octets of a message to read the headers of the message, its ID, and its protocol operation
+_PEEK_LENGTH = 32
+
+# shared ResultCode instances, by value
+_result_codes = {}
+
+
+class Response(object):
+    """An LDAPMessage decoded by :func:`decode_response`. Provides the same ``getComponentByName`` access to the message
+    ID and protocol operation as :class:`.rfc4511.LDAPMessage`, and is accepted by :func:`.protoutils.unpack`.
+
+    :var int message_id: The message ID
+    :var str op: The protocol operation name, e.g. ``searchResEntry``
+    :var value: An :class:`Entry` for ``searchResEntry``, a list of URIs for ``searchResRef``, or a :class:`Result`
+                for all other operations.
+    """
+    __slots__ = ('message_id', 'op', 'value')
+
+    def __init__(self, message_id, op, value):
+        self.message_id = message_id
+        self.op = op
+        self.value = value
+
+    def getComponentByName(self, name):
+        if name == 'messageID':
+            return self.message_id
+        elif name == 'protocolOp':
+            return self
+        elif name == 'controls':
+            # messages with controls are always decoded with pyasn1
+            return None
+        raise KeyError(name)
+
+    def getName(self):
+        return self.op
+
+    def getComponent(self):
+        return self.value
+
+    def __repr__(self):
+        return 'Response({0!r}, {1!r}, {2!r})'.format(self.message_id, self.op, self.value)
+
+
+class Entry(object):
+    """A searchResEntry decoded by :func:`decode_response`. Only the DN and the position of each attribute within the
+    received message are decoded up front; attribute values are decoded when requested. Binary values may also be
+    returned as :class:`memoryview` slices of the received message, which keep it alive as long as they are referenced.
+
+    :var str dn: The DN of the entry
+    """
+    __slots__ = ('dn', '_buf', '_index')
+
+    def __init__(self, dn, buf, index):
+        self.dn = dn
+        self._buf = buf
+        # maps attribute type to the start and end offsets of its encoded values
+        self._index = index
+
+    def attr_types(self):
+        """Get the attribute types present in the entry, as sent by the server.
+
+        :rtype: list[str]
+        """
+        return list(self._index)
+
+    def decode(self, attr_type, binary=False, views=False):
+        """Decode the values of one attribute. Values are text if valid UTF-8, otherwise bytes.
+
+        :param str attr_type: The attribute type exactly as returned by :meth:`attr_types`
+        :param bool binary: Leave all values as bytes
+        :param bool views: With ``binary``, return read-only memoryview slices of the received message instead of
+                           copying each value
+        :rtype: list[str or bytes or memoryview]
+        :raises KeyError: if the attribute is not present
+        :raises LDAPError: if the values are malformed
+        """
+        start, end = self._index[attr_type]
+        try:
+            if binary and views:
+                return _decode_views(self._buf, start, end)
+            return _decode_values(self._buf, start, end, bytes if binary else _value)
+        except (ValueError, IndexError) as e:
+            raise LDAPError('Malformed values for attribute {0} in search result {1} ({2})'.format(
+                attr_type, self.dn, e))
+
+    def decode_all(self, binary=None, views=False):
+        """Decode all attribute values.
+
+        :param binary: Optional function of the attribute type returning True to leave its values as bytes
+        :param bool views: Return read-only memoryview slices for attributes left as bytes, as in :meth:`decode`
+        :return: A dict mapping attribute types to lists of values
+        :rtype: dict
+        """
+        if binary is None:
+            return dict((attr_type, self.decode(attr_type)) for attr_type in self._index)
+        return dict((attr_type, self.decode(attr_type, binary(attr_type), views)) for attr_type in self._index)
+
+    def __repr__(self):
+        return 'Entry({0!r}, {1!r})'.format(self.dn, self.attr_types())
+
+
+class RawEntry(object):
+    """A searchResEntry left undecoded by :func:`peek_search_entry`, to be decoded later, possibly in another process.
+
+    :var bytes pdu: The complete received message
+    """
+    __slots__ = ('pdu',)
+
+    def __init__(self, pdu):
+        self.pdu = pdu
+
+    def __repr__(self):
+        return 'RawEntry(<{0} bytes>)'.format(len(self.pdu))
+
+
+class Result(object):
+    """The components of an LDAPResult. Provides the same ``getComponentByName`` access as
+    :class:`.rfc4511.LDAPResult`.
+
+    :var ResultCode result_code: The result code
+    :var str matched_dn: The matched DN
+    :var str diagnostic_message: The diagnostic message
+    :var list[str] referral: The referral URIs, or None
+    """
+    __slots__ = ('result_code', 'matched_dn', 'diagnostic_message', 'referral')
+
+    _components = {
+        'resultCode': 'result_code',
+        'matchedDN': 'matched_dn',
+        'diagnosticMessage': 'diagnostic_message',
+        'referral': 'referral',
+    }
+
+    def __init__(self, result_code, matched_dn, diagnostic_message, referral=None):
+        self.result_code = result_code
+        self.matched_dn = matched_dn
+        self.diagnostic_message = diagnostic_message
+        self.referral = referral
+
+    def getComponentByName(self, name):
+        return getattr(self, Result._components[name])
+
+    def __repr__(self):
+        return 'Result({0!r}, {1!r}, {2!r}, {3!r})'.format(self.result_code, self.matched_dn,
+                                                           self.diagnostic_message, self.referral)
+
+
+def decode_response(pdu):
+    """Decode a response message if it is of a type handled by the fast path.
+
+    :param bytes pdu: Exactly one complete BER-encoded LDAPMessage
+    :return: The decoded message, or None if it must be decoded with pyasn1
+    :rtype: Response or None
+    """
+    if six.PY2:
+        # indexing must give integers
+        pdu = bytearray(pdu)
+    elif not isinstance(pdu, bytes):
+        # memoryview slices of values must be read-only
+        pdu = bytes(pdu)
+    try:
+        return _decode_message(pdu)
+    except (ValueError, IndexError, UnicodeError, PyAsn1Error):
+        # malformed or unusual; let pyasn1 decode it or produce a meaningful error
+        return None
+
+
+def peek_search_entry(pdu, message_ids):
+    """Check whether a received message is a searchResEntry without controls for one of ``message_ids``, reading only
+    the message headers.
+
+    :param bytes pdu: Exactly one complete BER-encoded LDAPMessage
+    :param message_ids: The message IDs of searches whose entries should not be decoded yet
+    :return: A :class:`Response` holding a :class:`RawEntry`, or None if the message must be decoded as usual
+    :rtype: Response or None
+    """
+    head = bytearray(pdu[:_PEEK_LENGTH]) if six.PY2 else pdu
+    end = len(pdu)
+    try:
+        i, msg_end = _expect(head, 0, end, _SEQUENCE)
+        i, j = _expect(head, i, end, _INTEGER)
+        message_id = _integer(head, i, j)
+        if message_id not in message_ids:
+            return None
+        op_tag, i, op_end = _header(head, j, end)
+    except (ValueError, IndexError):
+        return None
+    if op_tag != _SEARCH_RES_ENTRY or msg_end != end:
+        return None
+    if op_end != end and pdu[op_end:] != _NO_CONTROLS:
+        # response controls are handled when decoding as usual
+        return None
+    return Response(message_id, 'searchResEntry', RawEntry(pdu))
+
+
+def _header(buf, i, end):
+    """Read the tag and length of the element at ``buf[i]``.
+
+    :return: The tag, the start of the contents, and the end of the contents
+    :rtype: tuple(int, int, int)
+    :raises ValueError: if the element is not within ``end`` or uses an encoding not handled here
+    """
+    tag = buf[i]
+    if tag & 0x1f == 0x1f:
+        raise ValueError('high tag number form')
+    length = buf[i + 1]
+    i += 2
+    if length & 0x80:
+        num_octets = length & 0x7f
+        if not num_octets or num_octets > 4:
+            raise ValueError('unsupported length encoding')
+        length = 0
+        for j in range(i, i + num_octets):
+            length = (length << 8) | buf[j]
+        i += num_octets
+    content_end = i + length
+    if content_end > end:
+        raise ValueError('element overruns its container')
+    return tag, i, content_end
+
+
+def _expect(buf, i, end, expected_tag):
+    """Read the header of the element at ``buf[i]``, which must have ``expected_tag``"""
+    tag, start, content_end = _header(buf, i, end)
+    if tag != expected_tag:
+        raise ValueError('unexpected tag')
+    return start, content_end
+
+
+def _integer(buf, i, end):
+    value = 0
+    for j in range(i, end):
+        value = (value << 8) | buf[j]
+    if end > i and buf[i] & 0x80:
+        value -= 1 << (8 * (end - i))
+    return value
+
+
+def _value(raw):
+    """Convert an attribute value to text if possible, like :func:`.protoutils.seq_to_list`"""
+    try:
+        return raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return bytes(raw)
+
+
+def _decode_message(buf):
+    end = len(buf)
+    i, msg_end = _expect(buf, 0, end, _SEQUENCE)
+    if msg_end != end:
+        raise ValueError('trailing data')
+    i, j = _expect(buf, i, end, _INTEGER)
+    message_id = _integer(buf, i, j)
+    op_tag, i, op_end = _header(buf, j, end)
+    if op_end != end:
+        ctrls_start, ctrls_end = _expect(buf, op_end, end, _CONTROLS)
+        if ctrls_start != ctrls_end or ctrls_end != end:
+            # response controls are handled by pyasn1
+            return None
+    if op_tag == _SEARCH_RES_ENTRY:
+        return Response(message_id, 'searchResEntry', _decode_entry(buf, i, op_end))
+    elif op_tag == _SEARCH_RES_REF:
+        return Response(message_id, 'searchResRef', _decode_strings(buf, i, op_end))
+    op = _RESULT_OPS.get(op_tag)
+    if op is None:
+        return None
+    return Response(message_id, op, _decode_result(buf, i, op_end))
+
+
+def _decode_entry(buf, i, end):
+    i, j = _expect(buf, i, end, _OCTET_STRING)
+    dn = buf[i:j].decode('utf-8')
+    i, attrs_end = _expect(buf, j, end, _SEQUENCE)
+    if attrs_end != end:
+        raise ValueError('trailing data')
+    index = {}
+    while i < attrs_end:
+        i, attr_end = _expect(buf, i, attrs_end, _SEQUENCE)
+        i, j = _expect(buf, i, attr_end, _OCTET_STRING)
+        attr_type = buf[i:j].decode('utf-8')
+        i, vals_end = _expect(buf, j, attr_end, _SET)
+        if vals_end != attr_end:
+            raise ValueError('trailing data')
+        index[attr_type] = (i, vals_end)
+        i = vals_end
+    return Entry(dn, buf, index)
+
+
+def _decode_values(buf, i, end, convert):
+    vals = []
+    while i < end:
+        i, j = _expect(buf, i, end, _OCTET_STRING)
+        vals.append(convert(buf[i:j]))
+        i = j
+    return vals
+
+
+def _decode_views(buf, i, end):
+    if isinstance(buf, bytes):
+        view = memoryview(buf)
+    else:
+        # python 2 decodes a mutable bytearray
+        view = memoryview(bytes(buf))
+    vals = []
+    while i < end:
+        i, j = _expect(buf, i, end, _OCTET_STRING)
+        vals.append(view[i:j])
+        i = j
+    return vals
+
+
+def _decode_strings(buf, i, end):
+    strings = []
+    while i < end:
+        i, j = _expect(buf, i, end, _OCTET_STRING)
+        strings.append(buf[i:j].decode('utf-8'))
+        i = j
+    return strings
+
+
+def _decode_result(buf, i, end):
+    i, j = _expect(buf, i, end, _ENUMERATED)
+    value = _integer(buf, i, j)
+    result_code = _result_codes.get(value)
+    if result_code is None:
+        result_code = _result_codes.setdefault(value, ResultCode(value))
+    i, j = _expect(buf, j, end, _OCTET_STRING)
+    matched_dn = buf[i:j].decode('utf-8')
+    i, j = _expect(buf, j, end, _OCTET_STRING)
+    diagnostic_message = buf[i:j].decode('utf-8')
+    referral = None
+    if j < end:
+        i, j = _expect(buf, j, end, _REFERRAL)
+        referral = _decode_strings(buf, i, j)
+    if j != end:
+        raise ValueError('trailing data')
+    return Result(result_code, matched_dn, diagnostic_message, referral)
+
+
+## encoding
+
+
+class Request(object):
+    """Base class for requests encoded directly by :func:`encode_message`. Instances may be passed to
+    :meth:`.LDAPSocket.send_message` in place of the corresponding :mod:`.rfc4511` object.
+    """
+    __slots__ = ()
+
+    def encode(self):
+        """Encode the protocol operation.
+
+        :rtype: bytes
+        """
+        raise NotImplementedError()
+
+
+class SearchRequest(Request):
+    """A searchRequest
+
+    :param str base_dn: The base DN of the search
+    :param scope: One of the :class:`.Scope` constants
+    :param deref_aliases: One of the :class:`.DerefAliases` constants
+    :param int size_limit: The maximum number of entries to return, or 0 for no limit
+    :param int time_limit: The maximum number of seconds for the server to spend on the search, or 0 for no limit
+    :param bool types_only: Request attribute types only, without values
+    :param filter: The parsed search filter, or its BER encoding
+    :type filter: rfc4511.Filter or bytes
+    :param list[str] attrs: The attributes to return
+    """
+    __slots__ = ('base_dn', 'scope', 'deref_aliases', 'size_limit', 'time_limit', 'types_only', 'filter', 'attrs')
+
+    def __init__(self, base_dn, scope, deref_aliases, size_limit, time_limit, types_only, filter, attrs):
+        self.base_dn = base_dn
+        self.scope = scope
+        self.deref_aliases = deref_aliases
+        self.size_limit = size_limit
+        self.time_limit = time_limit
+        self.types_only = types_only
+        self.filter = filter
+        self.attrs = attrs
+
+    def encode(self):
+        return _tlv(_SEARCH_REQUEST, b''.join((
+            _tlv(_OCTET_STRING, _octets(self.base_dn)),
+            _encode_integer(_ENUMERATED, int(self.scope)),
+            _encode_integer(_ENUMERATED, int(self.deref_aliases)),
+            _encode_integer(_INTEGER, self.size_limit),
+            _encode_integer(_INTEGER, self.time_limit),
+            _TRUE if self.types_only else _FALSE,
+            self.filter if isinstance(self.filter, bytes) else ber_encode(self.filter),
+            _tlv(_SEQUENCE, b''.join(_tlv(_OCTET_STRING, _octets(attr)) for attr in self.attrs)),
+        )))
+
+
+class ModifyRequest(Request):
+    """A modifyRequest
+
+    :param str dn: The DN of the object to modify
+    :param list[tuple] changes: A list of ``(operation, attr, vals)`` tuples, where ``operation`` is one of the
+                                :class:`.Mod` operation constants
+    """
+    __slots__ = ('dn', 'changes')
+
+    def __init__(self, dn, changes):
+        self.dn = dn
+        self.changes = changes
+
+    def encode(self):
+        return _tlv(_MODIFY_REQUEST, _tlv(_OCTET_STRING, _octets(self.dn)) + _tlv(_SEQUENCE, b''.join(
+            _tlv(_SEQUENCE, _encode_integer(_ENUMERATED, int(operation)) + _attribute(attr, vals))
+            for operation, attr, vals in self.changes
+        )))
+
+
+class AddRequest(Request):
+    """An addRequest
+
+    :param str dn: The DN of the new object
+    :param list[tuple] attrs: A list of ``(attr, vals)`` tuples
+    """
+    __slots__ = ('dn', 'attrs')
+
+    def __init__(self, dn, attrs):
+        self.dn = dn
+        self.attrs = attrs
+
+    def encode(self):
+        return _tlv(_ADD_REQUEST, _tlv(_OCTET_STRING, _octets(self.dn)) + _tlv(_SEQUENCE, b''.join(
+            _attribute(attr, vals) for attr, vals in self.attrs
+        )))
+
+
+class DelRequest(Request):
+    """A delRequest
+
+    :param str dn: The DN of the object to delete
+    """
+    __slots__ = ('dn',)
+
+    def __init__(self, dn):
+        self.dn = dn
+
+    def encode(self):
+        return _tlv(_DEL_REQUEST, _octets(self.dn))
+
+
+class CompareRequest(Request):
+    """A compareRequest
+
+    :param str dn: The DN of the object
+    :param str attr: The attribute description
+    :param str value: The assertion value
+    """
+    __slots__ = ('dn', 'attr', 'value')
+
+    def __init__(self, dn, attr, value):
+        self.dn = dn
+        self.attr = attr
+        self.value = value
+
+    def encode(self):
+        return _tlv(_COMPARE_REQUEST, _tlv(_OCTET_STRING, _octets(self.dn)) + _tlv(_SEQUENCE, (
+            _tlv(_OCTET_STRING, _octets(self.attr)) + _tlv(_OCTET_STRING, _octets(self.value))
+        )))
+
+
+class AbandonRequest(Request):
+    """An abandonRequest. Like :class:`.rfc4511.AbandonRequest`, converts to the abandoned message ID with
+    :func:`int`.
+
+    :param int message_id: The message ID of the operation to abandon
+    """
+    __slots__ = ('message_id',)
+
+    def __init__(self, message_id):
+        self.message_id = message_id
+
+    def __int__(self):
+        return self.message_id
+
+    def encode(self):
+        return _encode_integer(_ABANDON_REQUEST, self.message_id)
+
+
+class UnbindRequest(Request):
+    """An unbindRequest"""
+    __slots__ = ()
+
+    def encode(self):
+        return _UNBIND
+
+
+def encode_message(message_id, request, controls=None):
+    """Encode a complete LDAPMessage.
+
+    :param int message_id: The message ID
+    :param Request request: The protocol operation
+    :param controls: Any request controls for the message
+    :type controls: rfc4511.Controls or None
+    :rtype: bytes
+    """
+    if controls:
+        ctrls = ber_encode(controls)
+    else:
+        ctrls = _NO_CONTROLS
+    return _tlv(_SEQUENCE, _encode_integer(_INTEGER, message_id) + request.encode() + ctrls)
+
+
+def _tlv(tag, content):
+    """Encode an element with the given tag and contents"""
+    length = len(content)
+    if length < 0x80:
+        header = bytearray((tag, length))
+    else:
+        octets = bytearray()
+        while length:
+            octets.insert(0, length & 0xff)
+            length >>= 8
+        header = bytearray((tag, 0x80 | len(octets))) + octets
+    return bytes(header) + content
+
+
+def _encode_integer(tag, value):
+    """Encode an integer in the fewest two's complement octets"""
+    octets = bytearray((value & 0xff,))
+    value >>= 8
+    while not ((value == 0 and octets[0] < 0x80) or (value == -1 and octets[0] >= 0x80)):
+        octets.insert(0, value & 0xff)
+        value >>= 8
+    return _tlv(tag, bytes(octets))
+
+
+def _octets(value):
+    """Get the contents of an OCTET STRING, encoding text as UTF-8"""
+    if isinstance(value, six.text_type):
+        return value.encode('utf-8')
+    elif isinstance(value, bytes):
+        return value
+    elif isinstance(value, memoryview):
+        return value.tobytes()
+    else:
+        return AttributeValue(value).asOctets()
+
+
+def _attribute(attr, vals):
+    """Encode an Attribute or PartialAttribute"""
+    return _tlv(_SEQUENCE, _tlv(_OCTET_STRING, _octets(attr)) + _tlv(_SET, b''.join(
+        _tlv(_OCTET_STRING, _octets(val)) for val in vals
+    )))
+
+
+_TRUE = _tlv(_BOOLEAN, b'\x01')
+_FALSE = _tlv(_BOOLEAN, b'\x00')
+_UNBIND = _tlv(_UNBIND_REQUEST, b'')
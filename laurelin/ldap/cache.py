@@ -0,0 +1,341 @@
+"""Provides a cache of entries fetched by DN, shared by any number of connections"""
+
+from __future__ import absolute_import
+
+from .base import ResultTuple
+from .constants import ResultFormat, Scope
+
+from collections import namedtuple, OrderedDict
+import hashlib
+import logging
+import math
+import re
+import six
+import struct
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+EntryCacheInfo = namedtuple('EntryCacheInfo', ['hits', 'misses', 'evictions', 'invalidations', 'maxsize', 'size',
+                                               'bytes', 'negative_hits', 'negative_size'])
+"""Statistics returned by :meth:`EntryCache.info`"""
+
+_re_rdn_sep = re.compile(r'(?<!\\),')
+_re_ava_sep = re.compile(r'(?<!\\)\+')
+
+
+def _normalize_dn(dn):
+    """Normalize a DN for use as a cache key. Spacing around separators is removed, attribute types and values are
+    lowercased, and the attribute value assertions of multi-valued RDNs are sorted."""
+    rdns = []
+    for rdn in _re_rdn_sep.split(dn):
+        avas = []
+        for ava in _re_ava_sep.split(rdn):
+            attr, sep, value = ava.partition('=')
+            avas.append('{0}={1}'.format(attr.strip().lower(), value.strip().lower()))
+        rdns.append('+'.join(sorted(avas)))
+    return ','.join(rdns)
+
+
+def _entry_size(dn, attrs):
+    """Estimate the memory used by a cached entry from the length of its DN, attribute types, and values"""
+    size = len(dn)
+    for attr, vals in six.iteritems(attrs):
+        size += len(attr)
+        for val in vals:
+            size += len(val)
+    return size
+
+
+def _in_subtree(ndn, nbase):
+    return ndn == nbase or ndn.endswith(',' + nbase)
+
+
+class _BloomFilter(object):
+    """A set of strings that may report false positives at about ``error_rate`` once it holds ``capacity`` items, but
+    never false negatives"""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, int(round(float(self.size) / capacity * math.log(2))))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _indexes(self, item):
+        if isinstance(item, six.text_type):
+            item = item.encode('utf-8')
+        # double hashing with two 64-bit halves of one digest
+        h1, h2 = struct.unpack('<QQ', hashlib.sha256(item).digest()[:16])
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item):
+        for i in self._indexes(item):
+            self._bits[i >> 3] |= 1 << (i & 7)
+
+    def __contains__(self, item):
+        for i in self._indexes(item):
+            if not self._bits[i >> 3] & (1 << (i & 7)):
+                return False
+        return True
+
+
+class EntryCache(object):
+    """A bounded, thread-safe cache of objects fetched with :meth:`.LDAP.get`, keyed by normalized DN and the requested
+    attributes. Pass an instance to the :class:`.LDAP` or :class:`.LDAPPool` constructor as ``entry_cache``; the same
+    instance may be shared by any number of connections.
+
+    Entries expire ``ttl`` seconds after being fetched, and the least recently used entries are discarded when the
+    cache holds more than ``maxsize`` entries or the estimated size of their DNs, attribute types, and values exceeds
+    ``maxbytes``. Adding, modifying, deleting, or renaming an object through any connection using the cache discards
+    its cached entries, along with those of all objects below it when it is renamed or moved. Changes made through
+    other connections or by other clients are only seen once the entry expires.
+
+    DNs that were not found are remembered for ``negative_ttl`` seconds, so that :meth:`.LDAP.get` raises
+    :exc:`.NoSearchResults` and :meth:`.LDAP.exists` returns False for them without another search. Adding the object
+    through a connection using the cache discards this. Up to ``maxsize`` missing DNs are kept in addition to the
+    entries. See also :meth:`load_subtree`.
+
+    Entries, missing DNs, and subtree listings are kept separately for each server URI and bind, since what an object
+    looks like, and whether it is found at all, depends on the access rights of the connection. Connections only reuse
+    each other's entries when they are bound the same way to the same server, but changes through any of them discard
+    the entries of all.
+
+    DNs are compared case-insensitively.
+
+    :param int maxsize: The maximum number of entries to keep. 0 disables caching.
+    :param float ttl: Seconds to keep each entry.
+    :param int maxbytes: The maximum estimated size of all entries, in bytes.
+    :param float negative_ttl: Seconds to remember that a DN was not found. 0 disables negative caching.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60, maxbytes=16 * 1024 * 1024, negative_ttl=5):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.negative_hits = 0
+        self._entries = OrderedDict()
+        # expiry times of (normalized DN, identity) that were not found
+        self._absent = OrderedDict()
+        # (normalized base DN, identity, expiry time, bloom filter of the normalized DNs below it) from load_subtree()
+        self._subtrees = []
+        # DNs invalidated during each load_subtree() in progress
+        self._loading = []
+        # cache keys for each normalized DN
+        self._keys = {}
+        self._bytes = 0
+        # incremented by each invalidation, so that entries fetched while an object was being changed are not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return 'EntryCache(maxsize={0!r}, ttl={1!r}, maxbytes={2!r}, negative_ttl={3!r})'.format(
+            self.maxsize, self.ttl, self.maxbytes, self.negative_ttl)
+
+    @staticmethod
+    def _key(dn, attrs, value_decoding, identity=None):
+        """Get the key for an entry. ``identity`` identifies the server and bind it was fetched with."""
+        if attrs is None:
+            attrs_key = None
+        else:
+            if not isinstance(attrs, list):
+                attrs = [attrs]
+            attrs_key = frozenset(attr.lower() for attr in attrs)
+        return _normalize_dn(dn), attrs_key, value_decoding, identity
+
+    def _get(self, key):
+        """Get the DN and attributes of a cached entry, or None if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                expires, size, dn, attrs = entry
+                if expires > time.time():
+                    # re-insert as the most recently used
+                    self._entries[key] = entry
+                    self.hits += 1
+                    return dn, attrs
+                self._discard(key, size)
+            self.misses += 1
+            return None
+
+    def _put(self, key, dn, attrs, generation):
+        """Store an entry fetched by a search that started at ``generation``"""
+        attrs = dict((attr, tuple(vals)) for attr, vals in attrs.items())
+        size = _entry_size(dn, attrs)
+        with self._lock:
+            if self.maxsize <= 0 or size > self.maxbytes or generation != self._generation:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._discard(key, old[1])
+            self._entries[key] = (time.time() + self.ttl, size, dn, attrs)
+            self._keys.setdefault(key[0], set()).add(key)
+            self._bytes += size
+            while len(self._entries) > self.maxsize or self._bytes > self.maxbytes:
+                old_key, old = self._entries.popitem(last=False)
+                self._discard(old_key, old[1])
+                self.evictions += 1
+
+    def _is_absent(self, ndn, identity=None):
+        """Check if a normalized DN is known not to exist for ``identity``"""
+        now = time.time()
+        with self._lock:
+            expires = self._absent.get((ndn, identity))
+            if expires is not None:
+                if expires > now:
+                    self.negative_hits += 1
+                    return True
+                del self._absent[(ndn, identity)]
+            for subtree in list(self._subtrees):
+                nbase, _identity, expires, bloom = subtree
+                if expires <= now:
+                    self._subtrees.remove(subtree)
+                elif _identity == identity and _in_subtree(ndn, nbase) and ndn not in bloom:
+                    self.negative_hits += 1
+                    return True
+            return False
+
+    def _put_absent(self, ndn, generation, identity=None):
+        """Remember a normalized DN that a search by ``identity`` starting at ``generation`` did not find"""
+        with self._lock:
+            if self.maxsize <= 0 or self.negative_ttl <= 0 or generation != self._generation:
+                return
+            self._absent.pop((ndn, identity), None)
+            self._absent[(ndn, identity)] = time.time() + self.negative_ttl
+            while len(self._absent) > self.maxsize:
+                self._absent.popitem(last=False)
+
+    def _discard(self, key, size):
+        """Remove the index and size of an entry already removed from ``_entries``. Caller must hold the lock."""
+        self._bytes -= size
+        keys = self._keys[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._keys[key[0]]
+
+    def invalidate(self, dn, subtree=False):
+        """Discard the cached entries for an object. This happens automatically for objects changed through a connection
+        using the cache.
+
+        :param str dn: The DN of the object
+        :param bool subtree: Also discard entries for all objects below it
+        """
+        ndn = _normalize_dn(dn)
+        with self._lock:
+            self._generation += 1
+            if subtree:
+                dns = [_dn for _dn in self._keys if _in_subtree(_dn, ndn)]
+                absent = [key for key in self._absent if _in_subtree(key[0], ndn)]
+            else:
+                dns = [ndn] if ndn in self._keys else []
+                absent = [key for key in self._absent if key[0] == ndn]
+            for _dn in dns:
+                for key in self._keys.pop(_dn):
+                    self._bytes -= self._entries.pop(key)[1]
+                    self.invalidations += 1
+            for key in absent:
+                del self._absent[key]
+                self.invalidations += 1
+            for subtree_info in list(self._subtrees):
+                nbase, identity, expires, bloom = subtree_info
+                if _in_subtree(ndn, nbase):
+                    if subtree:
+                        # the new DNs of any objects below this one are unknown
+                        self._subtrees.remove(subtree_info)
+                    else:
+                        bloom.add(ndn)
+                elif subtree and _in_subtree(nbase, ndn):
+                    self._subtrees.remove(subtree_info)
+            for loading in self._loading:
+                loading.append((ndn, subtree))
+        if dns or absent:
+            logger.debug('Invalidated cached entries for {0}'.format(dn))
+
+    def load_subtree(self, ldap_conn, base_dn, ttl=None, error_rate=0.001):
+        """List every object in a subtree, so that any other DN within it is known not to exist for the next ``ttl``
+        seconds. The DNs found are kept in a Bloom filter, which takes a little over 14 bits per object at the
+        default ``error_rate``; a DN that is not in the filter is answered as missing without a search, while the
+        ``error_rate`` fraction of other missing DNs are still searched for.
+
+        Objects added through a connection using the cache are added to the filter. Renaming or moving an object into
+        or within the subtree discards the listing, since the new DNs of the objects below it are not known. The
+        listing is only used for connections bound the same way to the same server as ``ldap_conn``, and not at all if
+        the server returns any search result references, since objects may then exist elsewhere.
+
+        :param LDAP ldap_conn: The connection used to list the subtree
+        :param str base_dn: The DN of the base object of the subtree
+        :param float ttl: Seconds to use the listing. Defaults to the cache's ``ttl``.
+        :param float error_rate: The approximate fraction of missing DNs that are not recognized as missing
+        :return: The number of objects found
+        :rtype: int
+        """
+        if ttl is None:
+            ttl = self.ttl
+        nbase = _normalize_dn(base_dn)
+        identity = ldap_conn._cache_identity()
+        invalidated = []
+        with self._lock:
+            self._loading.append(invalidated)
+        dns = []
+        complete = True
+        try:
+            for result in ldap_conn.search(base_dn, Scope.SUBTREE, attrs=[ldap_conn.NO_ATTRS],
+                                           fetch_result_refs=False, result_format=ResultFormat.TUPLES):
+                if isinstance(result, ResultTuple):
+                    dns.append(result.dn)
+                else:
+                    # a reference to objects that may exist elsewhere
+                    complete = False
+        finally:
+            with self._lock:
+                self._loading.remove(invalidated)
+        if not complete:
+            logger.info('Not using listing of {0} since it contains search result references'.format(base_dn))
+            return len(dns)
+        bloom = _BloomFilter(len(dns) + len(dns) // 4, error_rate)
+        for dn in dns:
+            bloom.add(_normalize_dn(dn))
+        with self._lock:
+            for ndn, subtree in invalidated:
+                if subtree and (_in_subtree(ndn, nbase) or _in_subtree(nbase, ndn)):
+                    logger.info('Not using listing of {0} since objects were renamed while listing'.format(base_dn))
+                    return len(dns)
+                bloom.add(ndn)
+            self._subtrees = [subtree for subtree in self._subtrees if subtree[:2] != (nbase, identity)]
+            self._subtrees.append((nbase, identity, time.time() + ttl, bloom))
+        logger.debug('Loaded {0} DNs below {1}'.format(len(dns), base_dn))
+        return len(dns)
+
+    def info(self):
+        """Get cache statistics.
+
+        :return: A named tuple of the number of hits, misses, evictions to stay within the limits, and invalidations
+                 since the cache was created or cleared, the maximum size, the current number of entries, and their
+                 estimated size in bytes, followed by the number of lookups answered as missing and the current number
+                 of DNs remembered as missing
+        :rtype: EntryCacheInfo
+        """
+        with self._lock:
+            return EntryCacheInfo(self.hits, self.misses, self.evictions, self.invalidations, self.maxsize,
+                                  len(self._entries), self._bytes, self.negative_hits, len(self._absent))
+
+    def clear(self):
+        """Discard all cached entries and reset the statistics"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._keys.clear()
+            self._absent.clear()
+            del self._subtrees[:]
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.invalidations = 0
+            self.negative_hits = 0
@@ -2,7 +2,8 @@
 
 
 from .base import LDAP
-from .constants import Scope, FilterSyntax
+from .cache import EntryCache
+from .constants import Scope, FilterSyntax, ResultFormat, ServerStrategy, ValueDecoding
 from .validation import Validator
 import json
 import six
@@ -30,13 +31,33 @@ def _validator_mapper(val):
     return instances
 
 
+def _entry_cache_mapper(val):
+    if isinstance(val, EntryCache) or val is None:
+        return val
+    elif isinstance(val, dict):
+        return EntryCache(**val)
+    elif val is True:
+        return EntryCache()
+    elif val is False:
+        return None
+    else:
+        raise TypeError('"entry_cache" must be a bool, a dict of EntryCache parameters, or an EntryCache')
+
+
 _connection_mappers = {
     'validators': _validator_mapper,
     'default_filter_syntax': FilterSyntax.string,
+    'server_strategy': ServerStrategy.string,
+    'result_format': ResultFormat.string,
+    'value_decoding': ValueDecoding.string,
+    'entry_cache': _entry_cache_mapper,
 }
 
 _global_mappers = {
     'DEFAULT_FILTER_SYNTAX': FilterSyntax.string,
+    'DEFAULT_SERVER_STRATEGY': ServerStrategy.string,
+    'DEFAULT_RESULT_FORMAT': ResultFormat.string,
+    'DEFAULT_VALUE_DECODING': ValueDecoding.string,
 }
 
 
@@ -146,6 +167,9 @@ def create_connection(config_dict):
 
     For ``default_filter_syntax`` give one of the strings "STANDARD" or "SIMPLE" (case-insensitive).
 
+    For ``server`` you can give a list of URIs to connect to one of several equivalent servers, selected according to
+    ``server_strategy``, one of the strings "FAILOVER", "ROUND_ROBIN", or "LEAST_LOADED" (case-insensitive).
+
     For objects (optional):
 
     * If the ``dn`` parameter is specified, it is taken as an absolute DN.
@@ -39,6 +39,75 @@ class FilterSyntax:
         return getattr(FilterSyntax, str)
 
 
+class ServerStrategy:
+    """Server selection constants. These determine which server a :class:`.ServerSet` connects to."""
+
+    FAILOVER = 'failover'
+    """Always use the first server that can be reached, in the order given"""
+
+    ROUND_ROBIN = 'round_robin'
+    """Rotate through the servers for each new connection"""
+
+    LEAST_LOADED = 'least_loaded'
+    """Prefer the server with the fewest outstanding operations, weighted by its observed response time"""
+
+    ALL = (FAILOVER, ROUND_ROBIN, LEAST_LOADED)
+
+    @staticmethod
+    def string(str):
+        """Convert server strategy string to constant"""
+        str = str.upper()
+        return getattr(ServerStrategy, str)
+
+
+class ResultFormat:
+    """Search result format constants. These determine what :meth:`.LDAP.search` yields for each result entry."""
+
+    OBJECTS = 'objects'
+    """:class:`.LDAPObject` instances with all attribute values decoded"""
+
+    LAZY = 'lazy'
+    """:class:`.LazyLDAPObject` instances, which decode each attribute's values when it is first accessed"""
+
+    TUPLES = 'tuples'
+    """:class:`.ResultTuple` ``(dn, attrs)`` pairs, where ``attrs`` is a plain dict of value lists"""
+
+    ALL = (OBJECTS, LAZY, TUPLES)
+
+    @staticmethod
+    def string(str):
+        """Convert result format string to constant"""
+        str = str.upper()
+        return getattr(ResultFormat, str)
+
+
+class ValueDecoding:
+    """Attribute value decoding constants. These determine whether :meth:`.LDAP.search` returns each attribute's
+    values as text or bytes."""
+
+    GUESS = 'guess'
+    """Decode every value as UTF-8 text if it is valid UTF-8, otherwise leave it as bytes"""
+
+    SCHEMA = 'schema'
+    """Leave values as bytes for attribute types defined with a binary syntax, such as Octet String, Certificate, or
+    JPEG, and decode values of all other attribute types like ``GUESS``"""
+
+    BYTES = 'bytes'
+    """Leave all values as bytes"""
+
+    MEMORYVIEW = 'memoryview'
+    """Like ``SCHEMA``, but values of binary attribute types are read-only :class:`memoryview` slices of the received
+    message rather than copies"""
+
+    ALL = (GUESS, SCHEMA, BYTES, MEMORYVIEW)
+
+    @staticmethod
+    def string(str):
+        """Convert value decoding string to constant"""
+        str = str.upper()
+        return getattr(ValueDecoding, str)
+
+
 class _DeleteAllAttrs(object):
     """Sentinel object used to delete all attributes in replace or delete"""
     def __bool__(self):
@@ -15,7 +15,7 @@ _request_controls_oid = {}
 _response_controls = {}
 
 # this gets automatically generated by the reserve_kwds.py script
-_reserved_kwds = set(['attr', 'attrs', 'attrs_dict', 'attrs_only', 'base_dn', 'clean_attr', 'current', 'deref_aliases', 'dn', 'fetch_result_refs', 'filter', 'filter_syntax', 'follow_referrals', 'ldap_conn', 'limit', 'mech', 'mid', 'modlist', 'new_parent', 'new_rdn', 'oid', 'password', 'rdn_attr', 'relative_search_scope', 'require_success', 'scope', 'search_timeout', 'self', 'tag', 'username', 'value'])
+_reserved_kwds = set(['attr', 'attrs', 'attrs_dict', 'attrs_only', 'base_dn', 'batch_size', 'clean_attr', 'current', 'decode_ordered', 'decode_pool', 'deref_aliases', 'dn', 'dns', 'fetch_result_refs', 'filter', 'filter_syntax', 'follow_referrals', 'ldap_conn', 'limit', 'mech', 'mid', 'modlist', 'new_parent', 'new_rdn', 'oid', 'password', 'rdn_attr', 'rdns', 'relative_search_scope', 'require_success', 'result_format', 'scope', 'search_timeout', 'self', 'tag', 'username', 'value', 'value_decoding'])
 
 
 def get_control(oid):
@@ -49,6 +49,22 @@ class LDAPConnectionError(LDAPError):
     pass
 
 
+class NoticeOfDisconnection(LDAPUnsolicitedMessage, LDAPConnectionError):
+    """Raised when the server sends a Notice of Disconnection, after which the connection can no longer be used"""
+    pass
+
+
+class ResponseTimeout(LDAPError):
+    """Timed out waiting for the server to respond to an operation. The operation is abandoned and the connection is
+    marked suspect."""
+    pass
+
+
+class PoolTimeout(LDAPError):
+    """Timed out waiting for a connection to become available in an :class:`.LDAPPool`"""
+    pass
+
+
 class TagError(LDAPError):
     """Error with an object tag"""
     pass
@@ -6,11 +6,20 @@ See RFC4515 String Representation of Search Filters
 from __future__ import absolute_import
 from parsimonious.grammar import Grammar
 from parsimonious.exceptions import ParseError
+import re
 import six
+import threading
+from collections import namedtuple, OrderedDict
 from six.moves import range
 
 from . import rfc4511
-from .exceptions import LDAPError
+from .attributetype import find_attribute_type
+from .constants import FilterSyntax
+from .ber import _tlv, _octets, _OCTET_STRING, _SEQUENCE
+from .exceptions import LDAPError, LDAPSchemaError, LDAPSupportError, InvalidSyntaxError
+from .extensible import extensions
+from .pyasn1.codec.ber.encoder import encode as ber_encode
+from .rules import get_syntax_rule
 
 escape_map = [
     ('(', '\\28'),
@@ -107,8 +116,8 @@ rfc4515_filter_grammar = '''
 _rfc4515_filter_grammar = Grammar(rfc4515_filter_grammar)
 
 
-def parse_standard_filter(filter_str):
-    """Parse an RFC 4515 filter string to an rfc4511.Filter"""
+def grammar_parse_standard_filter(filter_str):
+    """Reference implementation of :func:`parse_standard_filter` using the grammar"""
 
     try:
         filter_node = _rfc4515_filter_grammar.parse(filter_str)
@@ -248,12 +257,8 @@ laurelin_filter_grammar = laurelin_logic_grammar + '''
 _laurelin_filter_grammar = Grammar(laurelin_filter_grammar)
 
 
-def parse_simple_filter(simple_filter_str):
-    """Laurelin defines its own, simpler format for filter strings. It uses the
-    RFC 4515 standard format for the various comparison expressions, but with
-    SQL-style logic operations. (Fully standard RFC 4515 filters are fully
-    supported and used by default)
-    """
+def grammar_parse_simple_filter(simple_filter_str):
+    """Reference implementation of :func:`parse_simple_filter` using the grammar"""
 
     try:
         filter_node = _laurelin_filter_grammar.parse(simple_filter_str)
@@ -333,10 +338,8 @@ unified_filter_grammar = laurelin_logic_grammar + '''
 _unified_filter_grammar = Grammar(unified_filter_grammar)
 
 
-def parse(filter_str):
-    """Parse unified filter syntax. Fully compatible with standard filters, laurelin simple filters, and any
-    intermingling of the two.
-    """
+def grammar_parse(filter_str):
+    """Reference implementation of :func:`parse` using the grammar"""
 
     try:
         filter_node = _unified_filter_grammar.parse(filter_str)
@@ -345,6 +348,365 @@ def parse(filter_str):
         raise LDAPError(str(e))
 
 
+# The grammars above are the reference definition of the filter languages. The parser below accepts exactly the same
+# languages in a single pass without building a parse tree, which matters for long generated filters. It follows the
+# ordered choice semantics of the grammars, including their quirks: for example ``number = DIGIT / ...`` always
+# matches a single digit, so numeric OIDs may only have single-digit arcs.
+
+_oid_re = re.compile(r'[A-Za-z][A-Za-z0-9-]*|[0-9](?:\.[0-9])+')
+_attr_re = re.compile(r'(?:[A-Za-z][A-Za-z0-9-]*|[0-9](?:\.[0-9])+)(?:;[A-Za-z0-9-]+)*')
+_value_re = re.compile(r'(?:[^\0()*\\]+|\\[0-9A-Fa-f]{2})*')
+_space_re = re.compile(r'[ \t]*')
+
+_ava_types = (
+    ('~=', 'approxMatch', rfc4511.ApproxMatch),
+    ('>=', 'greaterOrEqual', rfc4511.GreaterOrEqual),
+    ('<=', 'lessOrEqual', rfc4511.LessOrEqual),
+    ('=', 'equalityMatch', rfc4511.EqualityMatch),
+)
+
+
+class _FilterParser(object):
+    """Recursive descent parser for one filter string.
+
+    Each rule method takes the position to start matching at and returns the position after the match (and the parsed
+    filter, if any), or None if the rule did not match.
+    """
+
+    def __init__(self, filter_str, syntax):
+        self.text = filter_str
+        self.syntax = syntax
+        # farthest position a match failed at, for the error message
+        self.error_pos = 0
+
+    def parse(self):
+        try:
+            if self.syntax is FilterSyntax.STANDARD:
+                result = self.standard_filter(0)
+            else:
+                result = self.filter(0)
+        except RuntimeError:
+            # RecursionError on Python 3
+            raise LDAPError('Invalid filter: nested too deeply')
+        if result is not None:
+            fil, pos = result
+            if pos == len(self.text):
+                return fil
+            self.fail(pos)
+        pos = self.error_pos
+        if pos < len(self.text):
+            raise LDAPError("Invalid filter: unexpected '{0}' at position {1}".format(self.text[pos], pos))
+        else:
+            raise LDAPError('Invalid filter: unexpected end of filter')
+
+    def fail(self, pos):
+        if pos > self.error_pos:
+            self.error_pos = pos
+        return None
+
+    def standard_filter(self, pos):
+        text = self.text
+        if not text.startswith('(', pos):
+            return self.fail(pos)
+        pos += 1
+        fil = rfc4511.Filter()
+        op = text[pos:pos + 1]
+        if op == '&' or op == '|':
+            if op == '&':
+                component = 'and'
+                filter_set = rfc4511.And()
+            else:
+                component = 'or'
+                filter_set = rfc4511.Or()
+            pos += 1
+            i = 0
+            while True:
+                result = self.standard_filter(pos)
+                if result is None:
+                    break
+                filter_set.setComponentByPosition(i, result[0])
+                pos = result[1]
+                i += 1
+            if i == 0:
+                return None
+            fil.setComponentByName(component, filter_set)
+        elif op == '!':
+            result = self.standard_filter(pos + 1)
+            if result is None:
+                return None
+            not_filter = rfc4511.Not()
+            not_filter.setComponentByName('innerNotFilter', result[0])
+            fil.setComponentByName('not', not_filter)
+            pos = result[1]
+        else:
+            pos = self.ava(fil, pos)
+            if pos is None:
+                return None
+        if not text.startswith(')', pos):
+            return self.fail(pos)
+        return fil, pos + 1
+
+    def ava(self, fil, pos):
+        """Match an RFC 4515 attribute value assertion and set it on ``fil``"""
+        text = self.text
+        m = _attr_re.match(text, pos)
+        if m is not None:
+            attr = m.group()
+            pos = m.end()
+            if text.startswith('=', pos):
+                end = _value_re.match(text, pos + 1).end()
+                if text.startswith('*', end):
+                    return self._substrings(fil, attr, text[pos + 1:end], end + 1)
+            for op, component, ava_type in _ava_types:
+                if text.startswith(op, pos):
+                    end = _value_re.match(text, pos + len(op)).end()
+                    ava = ava_type()
+                    ava.setComponentByName('attributeDesc', rfc4511.AttributeDescription(attr))
+                    ava.setComponentByName('assertionValue', rfc4511.AssertionValue(text[pos + len(op):end]))
+                    fil.setComponentByName(component, ava)
+                    return end
+            dnattrs = text.startswith(':dn', pos)
+            if dnattrs:
+                pos += 3
+            rule, pos = self._matching_rule(pos)
+        else:
+            attr = None
+            dnattrs = text.startswith(':dn', pos)
+            if dnattrs:
+                pos += 3
+            rule, pos = self._matching_rule(pos)
+            if rule is None:
+                return self.fail(pos)
+        if not text.startswith(':=', pos):
+            return self.fail(pos)
+        end = _value_re.match(text, pos + 2).end()
+
+        xm = rfc4511.ExtensibleMatch()
+        xm.setComponentByName('matchValue', rfc4511.MatchValue(text[pos + 2:end]))
+        xm.setComponentByName('dnAttributes', rfc4511.DnAttributes(dnattrs))
+        if attr:
+            xm.setComponentByName('type', rfc4511.Type(attr))
+        if rule:
+            xm.setComponentByName('matchingRule', rfc4511.MatchingRule(rule))
+        fil.setComponentByName('extensibleMatch', xm)
+        return end
+
+    def _matching_rule(self, pos):
+        if self.text.startswith(':', pos):
+            m = _oid_re.match(self.text, pos + 1)
+            if m is not None:
+                return m.group(), m.end()
+            self.fail(pos + 1)
+        return None, pos
+
+    def _substrings(self, fil, attr, initial, pos):
+        """Match the remainder of a substring assertion following its first asterisk"""
+        text = self.text
+        anys = []
+        while True:
+            end = _value_re.match(text, pos).end()
+            if not text.startswith('*', end):
+                break
+            anys.append(text[pos:end])
+            pos = end + 1
+        final = text[pos:end]
+
+        if not initial and not anys and not final:
+            fil.setComponentByName('present', rfc4511.Present(attr))
+            return end
+
+        subf = rfc4511.SubstringFilter()
+        subf.setComponentByName('type', rfc4511.AttributeDescription(attr))
+        subs = rfc4511.Substrings()
+        i = 0
+        if initial:
+            c = rfc4511.Substring()
+            c.setComponentByName('initial', rfc4511.Initial(initial))
+            subs.setComponentByPosition(i, c)
+            i += 1
+        for any_sub in anys:
+            c = rfc4511.Substring()
+            c.setComponentByName('any', rfc4511.Any(any_sub))
+            subs.setComponentByPosition(i, c)
+            i += 1
+        if final:
+            c = rfc4511.Substring()
+            c.setComponentByName('final', rfc4511.Final(final))
+            subs.setComponentByPosition(i, c)
+        subf.setComponentByName('substrings', subs)
+        fil.setComponentByName('substrings', subf)
+        return end
+
+    def space(self, pos):
+        return _space_re.match(self.text, pos).end()
+
+    def filter(self, pos):
+        """Match the simple or unified syntax"""
+        return self._logic(pos, self.component, 'OR', 'or', rfc4511.Or)
+
+    def component(self, pos):
+        return self._logic(pos, self.term, 'AND', 'and', rfc4511.And)
+
+    def _logic(self, pos, operand, keyword, component, set_type):
+        """Match one or more ``operand`` separated by ``keyword``"""
+        result = operand(pos)
+        if result is None:
+            return None
+        fil, pos = result
+        operands = [fil]
+        while True:
+            op_pos = self.space(pos)
+            if not self.text.startswith(keyword, op_pos):
+                self.fail(op_pos)
+                break
+            result = operand(self.space(op_pos + len(keyword)))
+            if result is None:
+                break
+            operands.append(result[0])
+            pos = result[1]
+        if len(operands) == 1:
+            return fil, pos
+        fil = rfc4511.Filter()
+        filter_set = set_type()
+        for i, operand_fil in enumerate(operands):
+            filter_set.setComponentByPosition(i, operand_fil)
+        fil.setComponentByName(component, filter_set)
+        return fil, pos
+
+    def term(self, pos):
+        text = self.text
+        if text.startswith('NOT', pos):
+            result = self.term(self.space(pos + 3))
+            if result is not None:
+                fil = rfc4511.Filter()
+                not_filter = rfc4511.Not()
+                not_filter.setComponentByName('innerNotFilter', result[0])
+                fil.setComponentByName('not', not_filter)
+                return fil, result[1]
+        if text.startswith('(', pos):
+            result = self.filter(self.space(pos + 1))
+            if result is not None:
+                end = self.space(result[1])
+                if text.startswith(')', end):
+                    return result[0], end + 1
+                self.fail(end)
+        if self.syntax is FilterSyntax.SIMPLE:
+            if not text.startswith('(', pos):
+                return self.fail(pos)
+            fil = rfc4511.Filter()
+            end = self.ava(fil, pos + 1)
+            if end is None:
+                return None
+            if not text.startswith(')', end):
+                return self.fail(end)
+            return fil, end + 1
+        return self.standard_filter(pos)
+
+
+def parse_standard_filter(filter_str):
+    """Parse an RFC 4515 filter string to an rfc4511.Filter"""
+    return _FilterParser(filter_str, FilterSyntax.STANDARD).parse()
+
+
+def parse_simple_filter(simple_filter_str):
+    """Laurelin defines its own, simpler format for filter strings. It uses the
+    RFC 4515 standard format for the various comparison expressions, but with
+    SQL-style logic operations. (Fully standard RFC 4515 filters are fully
+    supported and used by default)
+    """
+    return _FilterParser(simple_filter_str, FilterSyntax.SIMPLE).parse()
+
+
+def parse(filter_str):
+    """Parse unified filter syntax. Fully compatible with standard filters, laurelin simple filters, and any
+    intermingling of the two.
+    """
+    return _FilterParser(filter_str, FilterSyntax.UNIFIED).parse()
+
+
+def parse_syntax(filter_str, syntax):
+    """Parse a filter string with the given syntax.
+
+    :param str filter_str: The filter string
+    :param syntax: One of the :class:`.FilterSyntax` constants
+    :rtype: rfc4511.Filter
+    :raises LDAPError: if the filter or syntax is invalid
+    """
+    if syntax is FilterSyntax.UNIFIED:
+        return parse(filter_str)
+    elif syntax is FilterSyntax.STANDARD:
+        return parse_standard_filter(filter_str)
+    elif syntax is FilterSyntax.SIMPLE:
+        return parse_simple_filter(filter_str)
+    else:
+        raise LDAPError('Invalid filter_syntax')
+
+
+FilterCacheInfo = namedtuple('FilterCacheInfo', ['hits', 'misses', 'maxsize', 'size'])
+
+
+class FilterCache(object):
+    """A bounded, thread-safe cache of filter strings parsed and encoded to BER, discarding the least recently used
+    filters when full. :meth:`.LDAP.search` uses the module-level instance :data:`cache`.
+
+    :param int maxsize: The maximum number of filters to keep. 0 disables caching.
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._filters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encode(self, filter_str, syntax):
+        """Get the BER encoding of a filter, parsing it only if it is not cached.
+
+        :param str filter_str: The filter string
+        :param syntax: One of the :class:`.FilterSyntax` constants
+        :return: The encoded :class:`.rfc4511.Filter`
+        :rtype: bytes
+        :raises LDAPError: if the filter or syntax is invalid
+        """
+        key = (filter_str, syntax)
+        with self._lock:
+            encoded = self._filters.pop(key, None)
+            if encoded is not None:
+                # re-insert as the most recently used
+                self._filters[key] = encoded
+                self.hits += 1
+                return encoded
+            self.misses += 1
+        encoded = ber_encode(parse_syntax(filter_str, syntax))
+        with self._lock:
+            if self.maxsize > 0:
+                self._filters[key] = encoded
+                while len(self._filters) > self.maxsize:
+                    self._filters.popitem(last=False)
+        return encoded
+
+    def info(self):
+        """Get cache statistics.
+
+        :return: A named tuple of the number of hits and misses since the cache was created or cleared, the maximum
+                 size, and the current size
+        :rtype: FilterCacheInfo
+        """
+        with self._lock:
+            return FilterCacheInfo(self.hits, self.misses, self.maxsize, len(self._filters))
+
+    def clear(self):
+        """Discard all cached filters and reset the statistics"""
+        with self._lock:
+            self._filters.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+cache = FilterCache()
+"""The :class:`FilterCache` used for all searches"""
+
+
 def rfc4511_filter_to_rfc4515_string(fil):
     """Reverse :func:`parse_standard_filter`, mainly used for testing
 
@@ -429,3 +791,638 @@ def _reverse_filterset(filterset):
     for i in range(n):
         ret += rfc4511_filter_to_rfc4515_string(filterset.getComponentByPosition(i))
     return ret
+
+
+# context-specific tags of the rfc4511.Filter choice
+_AND = 0xa0
+_OR = 0xa1
+_NOT = 0xa2
+_EQUALITY_MATCH = 0xa3
+_SUBSTRINGS = 0xa4
+_GREATER_OR_EQUAL = 0xa5
+_LESS_OR_EQUAL = 0xa6
+_PRESENT = 0x87
+_APPROX_MATCH = 0xa8
+_EXTENSIBLE_MATCH = 0xa9
+
+_ava_operators = {
+    _EQUALITY_MATCH: '=',
+    _GREATER_OR_EQUAL: '>=',
+    _LESS_OR_EQUAL: '<=',
+    _APPROX_MATCH: '~=',
+}
+
+_DN_ATTRIBUTES = _tlv(0x84, b'\x01')
+
+_escape_value_re = re.compile(r'[\0()*\\]')
+
+
+def _escape_value(value):
+    """Escape an assertion value for the RFC 4515 string representation"""
+    if isinstance(value, bytes):
+        try:
+            value = value.decode('utf-8')
+        except UnicodeDecodeError:
+            return ''.join('\\{0:02x}'.format(octet) for octet in bytearray(value))
+    return _escape_value_re.sub(lambda m: '\\{0:02x}'.format(ord(m.group())), value)
+
+
+def _assertion_value(value):
+    if isinstance(value, (six.text_type, bytes)):
+        return value
+    else:
+        return six.text_type(value)
+
+
+class F(object):
+    """A search filter built from its components in code, without formatting and parsing a filter string. Create filters
+    with the class methods, combine them with ``&`` (and), ``|`` (or), and ``~`` (not), and pass the result as the
+    ``filter`` for :meth:`.LDAP.search` or :meth:`.LDAPObject.search`.
+
+    Values are sent as given. They are only escaped when the filter is rendered with :func:`str`. Values other than text
+    or bytes are converted to text.
+
+    Example::
+
+        fil = F.any_of('uid', uids) & ~F.present('nsAccountLock')
+        for user in ldap.base.search(filter=fil):
+            print(user.dn)
+    """
+    __slots__ = ('_tag', '_args', '_encoded')
+
+    def __init__(self, tag, args):
+        self._tag = tag
+        self._args = args
+        self._encoded = None
+
+    @classmethod
+    def eq(cls, attr, value):
+        """Create an equality filter ``(attr=value)``"""
+        return cls(_EQUALITY_MATCH, (attr, _assertion_value(value)))
+
+    @classmethod
+    def ge(cls, attr, value):
+        """Create a greater-or-equal filter ``(attr>=value)``"""
+        return cls(_GREATER_OR_EQUAL, (attr, _assertion_value(value)))
+
+    @classmethod
+    def le(cls, attr, value):
+        """Create a less-or-equal filter ``(attr<=value)``"""
+        return cls(_LESS_OR_EQUAL, (attr, _assertion_value(value)))
+
+    @classmethod
+    def approx(cls, attr, value):
+        """Create an approximate match filter ``(attr~=value)``"""
+        return cls(_APPROX_MATCH, (attr, _assertion_value(value)))
+
+    @classmethod
+    def present(cls, attr):
+        """Create a presence filter ``(attr=*)``"""
+        return cls(_PRESENT, (attr,))
+
+    @classmethod
+    def substring(cls, attr, initial=None, any=(), final=None):
+        """Create a substring filter ``(attr=initial*any*...*final)``
+
+        :param str attr: The attribute type
+        :param str initial: The value must start with this
+        :param list[str] any: The value must contain these, in order
+        :param str final: The value must end with this
+        :raises ValueError: if no substrings are given
+        """
+        any = tuple(_assertion_value(value) for value in any)
+        if not initial and not any and not final:
+            raise ValueError('At least one substring is required, use F.present() to match any value')
+        if initial:
+            initial = _assertion_value(initial)
+        if final:
+            final = _assertion_value(final)
+        return cls(_SUBSTRINGS, (attr, initial, any, final))
+
+    @classmethod
+    def extensible(cls, value, attr=None, rule=None, dn_attrs=False):
+        """Create an extensible match filter ``(attr:dn:rule:=value)``
+
+        :param str value: The assertion value
+        :param str attr: The attribute type
+        :param str rule: The matching rule OID or name
+        :param bool dn_attrs: Also match the attributes of the entry's DN
+        :raises ValueError: if neither ``attr`` nor ``rule`` is given
+        """
+        if not attr and not rule:
+            raise ValueError('An attribute or matching rule is required')
+        return cls(_EXTENSIBLE_MATCH, (_assertion_value(value), attr, rule, bool(dn_attrs)))
+
+    @classmethod
+    def and_(cls, *filters):
+        """Create a filter matching all of ``filters``
+
+        :raises ValueError: if no filters are given
+        """
+        if not filters:
+            raise ValueError('At least one filter is required')
+        return cls(_AND, filters)
+
+    @classmethod
+    def or_(cls, *filters):
+        """Create a filter matching any of ``filters``
+
+        :raises ValueError: if no filters are given
+        """
+        if not filters:
+            raise ValueError('At least one filter is required')
+        return cls(_OR, filters)
+
+    @classmethod
+    def not_(cls, fil):
+        """Create a filter matching anything ``fil`` does not match"""
+        return cls(_NOT, (fil,))
+
+    @classmethod
+    def any_of(cls, attr, values):
+        """Create a filter matching an attribute equal to any of ``values``
+
+        :param str attr: The attribute type
+        :param values: The values to match
+        :raises ValueError: if no values are given
+        """
+        filters = tuple(cls.eq(attr, value) for value in values)
+        if len(filters) == 1:
+            return filters[0]
+        return cls.or_(*filters)
+
+    def _combine(self, tag, other):
+        if not isinstance(other, F):
+            return NotImplemented
+        filters = []
+        for fil in (self, other):
+            if fil._tag == tag:
+                filters.extend(fil._args)
+            else:
+                filters.append(fil)
+        return F(tag, tuple(filters))
+
+    def __and__(self, other):
+        return self._combine(_AND, other)
+
+    def __or__(self, other):
+        return self._combine(_OR, other)
+
+    def __invert__(self):
+        return F.not_(self)
+
+    def encode(self):
+        """Get the BER encoding of the filter
+
+        :return: The encoded :class:`.rfc4511.Filter`
+        :rtype: bytes
+        """
+        if self._encoded is None:
+            tag = self._tag
+            args = self._args
+            if tag == _AND or tag == _OR:
+                content = b''.join(fil.encode() for fil in args)
+            elif tag == _NOT:
+                content = args[0].encode()
+            elif tag == _PRESENT:
+                content = _octets(args[0])
+            elif tag == _SUBSTRINGS:
+                attr, initial, anys, final = args
+                subs = []
+                if initial:
+                    subs.append(_tlv(0x80, _octets(initial)))
+                for value in anys:
+                    subs.append(_tlv(0x81, _octets(value)))
+                if final:
+                    subs.append(_tlv(0x82, _octets(final)))
+                content = _tlv(_OCTET_STRING, _octets(attr)) + _tlv(_SEQUENCE, b''.join(subs))
+            elif tag == _EXTENSIBLE_MATCH:
+                value, attr, rule, dn_attrs = args
+                content = b''
+                if rule:
+                    content += _tlv(0x81, _octets(rule))
+                if attr:
+                    content += _tlv(0x82, _octets(attr))
+                content += _tlv(0x83, _octets(value))
+                if dn_attrs:
+                    content += _DN_ATTRIBUTES
+            else:
+                attr, value = args
+                content = _tlv(_OCTET_STRING, _octets(attr)) + _tlv(_OCTET_STRING, _octets(value))
+            self._encoded = _tlv(tag, content)
+        return self._encoded
+
+    def __str__(self):
+        tag = self._tag
+        args = self._args
+        if tag == _AND:
+            return '(&{0})'.format(''.join(str(fil) for fil in args))
+        elif tag == _OR:
+            return '(|{0})'.format(''.join(str(fil) for fil in args))
+        elif tag == _NOT:
+            return '(!{0})'.format(args[0])
+        elif tag == _PRESENT:
+            return '({0}=*)'.format(args[0])
+        elif tag == _SUBSTRINGS:
+            attr, initial, anys, final = args
+            subs = [initial or ''] + list(anys) + [final or '']
+            return '({0}={1})'.format(attr, '*'.join(_escape_value(sub) for sub in subs))
+        elif tag == _EXTENSIBLE_MATCH:
+            value, attr, rule, dn_attrs = args
+            return '({0}{1}{2}:={3})'.format(attr or '', ':dn' if dn_attrs else '',
+                                             ':' + rule if rule else '', _escape_value(value))
+        else:
+            attr, value = args
+            return '({0}{1}{2})'.format(attr, _ava_operators[tag], _escape_value(value))
+
+    def __repr__(self):
+        return 'F({0!r})'.format(str(self))
+
+    def __eq__(self, other):
+        if not isinstance(other, F):
+            return NotImplemented
+        return self.encode() == other.encode()
+
+    def __ne__(self, other):
+        if not isinstance(other, F):
+            return NotImplemented
+        return self.encode() != other.encode()
+
+    def __hash__(self):
+        return hash(self.encode())
+
+
+_filter_tags = {
+    'and': _AND,
+    'or': _OR,
+    'equalityMatch': _EQUALITY_MATCH,
+    'greaterOrEqual': _GREATER_OR_EQUAL,
+    'lessOrEqual': _LESS_OR_EQUAL,
+    'approxMatch': _APPROX_MATCH,
+}
+
+
+def _filter_from_rfc4511(fil):
+    """Convert an rfc4511.Filter to the equivalent :class:`F`"""
+    filter_type = fil.getName()
+    component = fil.getComponent()
+    if filter_type == 'and' or filter_type == 'or':
+        filters = tuple(_filter_from_rfc4511(component.getComponentByPosition(i)) for i in range(len(component)))
+        return F(_filter_tags[filter_type], filters)
+    elif filter_type == 'not':
+        return F.not_(_filter_from_rfc4511(component.getComponentByName('innerNotFilter')))
+    elif filter_type == 'present':
+        return F.present(six.text_type(component))
+    elif filter_type == 'substrings':
+        initial = None
+        anys = []
+        final = None
+        subs = component.getComponentByName('substrings')
+        for i in range(len(subs)):
+            sub = subs.getComponentByPosition(i)
+            sub_type = sub.getName()
+            if sub_type == 'initial':
+                initial = six.text_type(sub.getComponent())
+            elif sub_type == 'any':
+                anys.append(six.text_type(sub.getComponent()))
+            else:
+                final = six.text_type(sub.getComponent())
+        return F(_SUBSTRINGS, (six.text_type(component.getComponentByName('type')), initial, tuple(anys), final))
+    elif filter_type == 'extensibleMatch':
+        rule = component.getComponentByName('matchingRule')
+        attr = component.getComponentByName('type')
+        return F(_EXTENSIBLE_MATCH, (six.text_type(component.getComponentByName('matchValue')),
+                                     six.text_type(attr) if attr.isValue else None,
+                                     six.text_type(rule) if rule.isValue else None,
+                                     bool(component.getComponentByName('dnAttributes'))))
+    elif filter_type in _filter_tags:
+        return F(_filter_tags[filter_type], (six.text_type(component.getComponentByName('attributeDesc')),
+                                             six.text_type(component.getComponentByName('assertionValue'))))
+    else:
+        raise LDAPError('Unhandled condition while converting filter')
+
+
+def compile_filter(fil, filter_syntax=FilterSyntax.UNIFIED):
+    """Compile a filter into a function that tests whether an object matches it, to filter objects that have already
+    been fetched without sending another search.
+
+    Equality assertions use the equality matching rule of the attribute type, and substring assertions prepare values
+    the same way. Approximate matches are evaluated as equality matches. Assertions that cannot be evaluated, such as an
+    attribute type that is not defined in the schema or has no equality matching rule, or an assertion value of invalid
+    syntax, are Undefined as described in RFC 4511 section 4.5.1.7, and the object does not match unless the result is
+    decided regardless of them. Only the attributes present on the object are considered.
+
+    Values may be text, bytes, or memoryviews, as returned with any :class:`.ValueDecoding`. Rules for binary syntaxes
+    compare octets, with assertion values encoded as UTF-8. Rules for text syntaxes decode bytes values as UTF-8, and
+    comparisons with values that are not valid UTF-8 are Undefined.
+
+    :param fil: A filter string, :class:`F`, or rfc4511.Filter
+    :param filter_syntax: One of the :class:`.FilterSyntax` constants, used to parse a filter string
+    :return: A function accepting an :class:`.AttrsDict` (such as an :class:`.LDAPObject`) and returning True if it
+             matches the filter
+    :rtype: callable
+    :raises LDAPError: if a filter string is invalid
+    :raises LDAPSupportError: if the filter contains ordering or extensible match assertions, which cannot be evaluated
+                              locally
+
+    Example::
+
+        is_admin = compile_filter('(&(objectClass=posixAccount)(memberOf=cn=admins,ou=groups,dc=example,dc=org))')
+        admins = [user for user in users if is_admin(user)]
+    """
+    extensions.base_schema.require()
+    if isinstance(fil, six.string_types):
+        fil = parse_syntax(fil, filter_syntax)
+    if not isinstance(fil, F):
+        fil = _filter_from_rfc4511(fil)
+    predicate = _compile(fil)
+
+    def matches(attrs):
+        return predicate(attrs) is True
+
+    return matches
+
+
+def _compile(fil):
+    """Compile an :class:`F` into a function returning True, False, or None for Undefined"""
+    tag = fil._tag
+    args = fil._args
+    if tag == _AND:
+        return _compile_and([_compile(sub) for sub in args])
+    elif tag == _OR:
+        return _compile_or([_compile(sub) for sub in args])
+    elif tag == _NOT:
+        return _compile_not(_compile(args[0]))
+    elif tag == _PRESENT:
+        return _compile_present(args[0])
+    elif tag == _EQUALITY_MATCH or tag == _APPROX_MATCH:
+        return _compile_equality(*args)
+    elif tag == _SUBSTRINGS:
+        return _compile_substrings(*args)
+    else:
+        raise LDAPSupportError('Cannot evaluate {0} locally'.format(fil))
+
+
+def _undefined(attrs):
+    return None
+
+
+def _compile_and(predicates):
+    def match_and(attrs):
+        result = True
+        for predicate in predicates:
+            sub_result = predicate(attrs)
+            if sub_result is False:
+                return False
+            elif sub_result is None:
+                result = None
+        return result
+    return match_and
+
+
+def _compile_or(predicates):
+    def match_or(attrs):
+        result = False
+        for predicate in predicates:
+            sub_result = predicate(attrs)
+            if sub_result is True:
+                return True
+            elif sub_result is None:
+                result = None
+        return result
+    return match_or
+
+
+def _compile_not(predicate):
+    def match_not(attrs):
+        result = predicate(attrs)
+        if result is None:
+            return None
+        return not result
+    return match_not
+
+
+def _compile_present(attr):
+    def match_present(attrs):
+        return bool(attrs.get(attr))
+    return match_present
+
+
+def _matching_rule(attr, assertion_values):
+    """Get the equality matching rule for an attribute description and validate assertion values against it
+
+    :return: A tuple of the matching rule, True if the rule compares octets rather than text, and the assertion values
+             converted to match; or None if the assertion is Undefined
+    """
+    attr_type = find_attribute_type(attr.split(';', 1)[0])
+    if attr_type is None:
+        return None
+    try:
+        rule = attr_type.equality
+        binary = get_syntax_rule(rule.SYNTAX).binary
+        if binary:
+            assertion_values = [_to_bytes(value) for value in assertion_values]
+        for value in assertion_values:
+            rule.validate(value)
+    except (KeyError, LDAPSchemaError, InvalidSyntaxError):
+        return None
+    return rule, binary, assertion_values
+
+
+def _to_bytes(value):
+    if isinstance(value, memoryview):
+        return value.tobytes()
+    if isinstance(value, six.text_type):
+        return value.encode('utf-8')
+    return value
+
+
+def _to_text(value):
+    """Decode a bytes or memoryview value as UTF-8
+
+    :return: The text value, or None if it is not valid UTF-8
+    """
+    if isinstance(value, memoryview):
+        value = value.tobytes()
+    if isinstance(value, six.binary_type):
+        try:
+            return value.decode('utf-8')
+        except UnicodeDecodeError:
+            return None
+    return value
+
+
+def _compile_equality(attr, assertion_value):
+    compiled = _matching_rule(attr, [assertion_value])
+    if compiled is None:
+        return _undefined
+    rule, binary, (assertion_value,) = compiled
+    convert = _to_bytes if binary else _to_text
+    assertion_value = rule.prepare(assertion_value)
+
+    def match_equality(attrs):
+        result = False
+        for value in attrs.get(attr, ()):
+            value = convert(value)
+            if value is None:
+                result = None
+            elif rule.do_match(rule.prepare(value), assertion_value):
+                return True
+        return result
+    return match_equality
+
+
+def _compile_substrings(attr, initial, anys, final):
+    compiled = _matching_rule(attr, [])
+    if compiled is None:
+        return _undefined
+    rule, binary, _ = compiled
+
+    if binary:
+        def prepare(value):
+            return rule.prepare(_to_bytes(value))
+    else:
+        def prepare(value):
+            value = _to_text(value)
+            if value is None:
+                return None
+            # insignificant space handling pads prepared values with spaces, which does not apply within a value
+            return rule.prepare(value).strip()
+
+    empty = b'' if binary else ''
+    initial = prepare(initial) if initial else empty
+    anys = [prepare(value) for value in anys]
+    final = prepare(final) if final else empty
+
+    def match_substrings(attrs):
+        result = False
+        for value in attrs.get(attr, ()):
+            value = prepare(value)
+            if value is None:
+                result = None
+                continue
+            if not value.startswith(initial):
+                continue
+            pos = len(initial)
+            end = len(value) - len(final)
+            for sub in anys:
+                i = value.find(sub, pos, end)
+                if i < 0:
+                    break
+                pos = i + len(sub)
+            else:
+                if pos <= end and value.endswith(final):
+                    return True
+        return result
+    return match_substrings
+
+
+def _to_filter(fil, filter_syntax):
+    """Get the :class:`F` for a filter string, :class:`F`, or rfc4511.Filter"""
+    if isinstance(fil, six.string_types):
+        fil = parse_syntax(fil, filter_syntax)
+    if isinstance(fil, F):
+        return fil
+    return _filter_from_rfc4511(fil)
+
+
+def _is_true(fil):
+    """Check for ``(objectClass=*)``, which every entry matches"""
+    return fil._tag == _PRESENT and fil._args[0].lower() == 'objectclass'
+
+
+def _is_false(fil):
+    return fil._tag == _NOT and _is_true(fil._args[0])
+
+
+def optimize(fil, filter_syntax=FilterSyntax.UNIFIED):
+    """Simplify a filter without changing which entries it matches. Nested and/or filters of the same type are
+    flattened, duplicate terms are removed, double negation is removed, and single-term and/or filters are replaced by
+    their term. ``(objectClass=*)`` matches every entry, so it is removed from and filters and makes an or filter
+    always true. Likewise, ``(!(objectClass=*))`` is removed from or filters and makes an and filter always false.
+
+    :param fil: A filter string, :class:`F`, or rfc4511.Filter
+    :param filter_syntax: One of the :class:`.FilterSyntax` constants, used to parse a filter string
+    :return: The optimized filter
+    :rtype: F
+    :raises LDAPError: if a filter string is invalid
+    """
+    return _optimize(_to_filter(fil, filter_syntax))
+
+
+def _optimize(fil):
+    tag = fil._tag
+    if tag == _NOT:
+        inner = _optimize(fil._args[0])
+        if inner._tag == _NOT:
+            return inner._args[0]
+        return F(_NOT, (inner,))
+    elif tag == _AND or tag == _OR:
+        if tag == _AND:
+            is_identity, is_absorbing = _is_true, _is_false
+        else:
+            is_identity, is_absorbing = _is_false, _is_true
+        terms = []
+        seen = set()
+        for sub in fil._args:
+            sub = _optimize(sub)
+            if sub._tag == tag:
+                subs = sub._args
+            else:
+                subs = (sub,)
+            for term in subs:
+                if is_absorbing(term):
+                    return term
+                if is_identity(term) or term in seen:
+                    continue
+                seen.add(term)
+                terms.append(term)
+        if not terms:
+            # every term was the identity
+            return F.present('objectClass') if tag == _AND else ~F.present('objectClass')
+        elif len(terms) == 1:
+            return terms[0]
+        return F(tag, tuple(terms))
+    else:
+        return fil
+
+
+def split_or(fil, max_terms, filter_syntax=FilterSyntax.UNIFIED):
+    """Optimize a filter and split it into several filters that together match the same entries, so that none contains
+    an or filter of more than ``max_terms`` terms. Only an or filter at the top level, or the largest or filter directly
+    within an and filter at the top level, is split.
+
+    :param fil: A filter string, :class:`F`, or rfc4511.Filter
+    :param int max_terms: The maximum number of terms in an or filter
+    :param filter_syntax: One of the :class:`.FilterSyntax` constants, used to parse a filter string
+    :return: The filters
+    :rtype: list[F]
+    :raises LDAPError: if a filter string is invalid
+    :raises ValueError: if ``max_terms`` is less than 1
+    """
+    if max_terms < 1:
+        raise ValueError('max_terms must be at least 1')
+    fil = optimize(fil, filter_syntax)
+    if fil._tag == _OR:
+        return _or_chunks(fil._args, max_terms)
+    elif fil._tag == _AND:
+        ors = [i for i, sub in enumerate(fil._args) if sub._tag == _OR]
+        if ors:
+            i = max(ors, key=lambda i: len(fil._args[i]._args))
+            before = fil._args[:i]
+            after = fil._args[i + 1:]
+            return [F(_AND, before + (chunk,) + after) for chunk in _or_chunks(fil._args[i]._args, max_terms)]
+    return [fil]
+
+
+def _or_chunks(terms, max_terms):
+    if len(terms) <= max_terms:
+        return [F(_OR, terms)]
+    chunks = []
+    for i in range(0, len(terms), max_terms):
+        chunk = terms[i:i + max_terms]
+        if len(chunk) == 1:
+            chunks.append(chunk[0])
+        else:
+            chunks.append(F(_OR, chunk))
+    return chunks
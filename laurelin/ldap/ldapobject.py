@@ -1,8 +1,9 @@
 from __future__ import absolute_import
 from . import utils
 from .attrsdict import AttrsDict
+from .attributetype import decode_as_bytes
 from .attrvaluelist import AttrValueList
-from .constants import Scope, FilterSyntax
+from .constants import Scope, FilterSyntax, ValueDecoding
 from .exceptions import (
     LDAPError,
     Abandon,
@@ -16,8 +17,12 @@ from .modify import (
     DeleteModlist,
 )
 import re
+from collections import OrderedDict
 from base64 import b64encode
 
+# placeholder for the values of a LazyLDAPObject attribute that have not been decoded yet
+_UNDECODED = object()
+
 
 class LDAPObject(AttrsDict, LDAPObjectExtensions):
     """Represents a single object with optional server affinity.
@@ -179,7 +184,9 @@ class LDAPObject(AttrsDict, LDAPObjectExtensions):
     def search(self, filter=None, attrs=None, **kwds):
         """Perform a search below this object.
 
-        :param str filter: Optional. The filter string to use to filter returned objects.
+        :param filter: Optional. The filter string, or filter built with :class:`.F`, to use to filter returned
+                       objects.
+        :type filter: str or F
         :param list[str] attrs: Optional. The list of attribute names to retrieve.
         :return: An iterator over :class:`.LDAPObject` and possibly :class:`.SearchReferenceHandle`. See
                  :meth:`.LDAP.search` for more details.
@@ -222,11 +229,52 @@ class LDAPObject(AttrsDict, LDAPObjectExtensions):
             return self.get_child(rdn, attrs, **kwds)
         elif self.relative_search_scope == Scope.SUBTREE:
             filter = '({0})'.format(self._rdn_attr(rdn))
+            self.ldap_conn._object_result_format(kwds)
             res = list(self.search(filter=filter, filter_syntax=FilterSyntax.STANDARD, attrs=attrs, limit=2, **kwds))
             return utils.get_one_result(res)
         else:
             raise ValueError('Unknown relative_search_scope')
 
+    def find_many(self, rdns, attrs=None, batch_size=None, **kwds):
+        """Obtain many objects below this one, following the same strategy as :meth:`find`. All searches are pipelined
+        on the connection, and up to ``batch_size`` RDNs are combined into each search with a filter like
+        ``(|(rdn1)(rdn2)...)``. See :meth:`.LDAP.get_many`.
+
+        :param rdns: The RDNs, or RDN values if ``rdn_attr`` is defined for this object
+        :type rdns: list[str]
+        :param list[str] attrs: Optional. The list of attribute names to obtain.
+        :param int batch_size: The maximum number of RDNs to combine into a single search. Defaults to
+                               :attr:`.LDAP.DEFAULT_GET_MANY_BATCH_SIZE`.
+        :return: The objects keyed by RDN as given, in the order requested, with missing RDNs and errors reported per
+                 RDN
+        :rtype: GetManyResult
+        :raises LDAPError: if this object's ``relative_search_scope`` is :attr:`.Scope.BASE`.
+        :raises RuntimeError: if this object is not bound to an LDAP connection
+        :raises ValueError: if the ``relative_search_scope`` is set to an invalid value.
+
+        Additional keywords are passed through into :meth:`.LDAP.search`. Objects are always returned, as for
+        :meth:`.LDAP.get_many`.
+        """
+        self._require_ldap()
+        self._set_obj_kwd_defaults(kwds)
+        if batch_size is None:
+            batch_size = self.ldap_conn.DEFAULT_GET_MANY_BATCH_SIZE
+        rdns = list(OrderedDict.fromkeys(rdns))
+        members = [(rdn, self._rdn_attr(rdn)) for rdn in rdns]
+        if self.relative_search_scope == Scope.BASE:
+            raise LDAPError('Object has no children')
+        elif self.relative_search_scope == Scope.ONELEVEL:
+            def single_search(key, rdn):
+                return '{0},{1}'.format(rdn, self.dn), Scope.BASE, None, key, None
+        elif self.relative_search_scope == Scope.SUBTREE:
+            def single_search(key, rdn):
+                return self.dn, Scope.SUBTREE, '({0})'.format(rdn), key, None
+        else:
+            raise ValueError('Unknown relative_search_scope')
+        searches = self.ldap_conn._plan_rdn_searches(self.dn, self.relative_search_scope, members, batch_size,
+                                                     single_search)
+        return self.ldap_conn._get_many(rdns, searches, attrs, kwds)
+
     def compare(self, attr, value):
         """Ask the server if this object has a matching attribute value. The comparison will take place following the
         schema-defined matching rules and syntax rules.
@@ -312,7 +360,7 @@ class LDAPObject(AttrsDict, LDAPObjectExtensions):
         :raises RuntimeError: if this object is not bound to an LDAP connection
         """
         self._require_ldap()
-        self.update(self.ldap_conn.get(self.dn, attrs))
+        self.update(self.ldap_conn.get(self.dn, attrs, use_cache=False))
 
     def refresh_all(self):
         """Query the server to update all user and operational attributes on this object.
@@ -520,6 +568,93 @@ class LDAPObject(AttrsDict, LDAPObjectExtensions):
         return ModTransactionObject(self)
 
 
+class LazyLDAPObject(LDAPObject):
+    """An :class:`LDAPObject` created from a search result, which decodes the values of each attribute from the
+    received message when the attribute is first accessed. Obtain these by passing
+    ``result_format=ResultFormat.LAZY`` to :meth:`.LDAP.search`; otherwise they behave exactly like
+    :class:`LDAPObject`.
+
+    Operations on the whole object, such as comparison, iterating values, or copying, decode all remaining attributes
+    first.
+
+    :param str dn: The DN of the object
+    :param ber.Entry entry: The search result entry with the object's attributes
+    :param str value_decoding: One of the :class:`.ValueDecoding` constants, applied when decoding values
+
+    Additional keywords are passed through into the :class:`LDAPObject` constructor.
+    """
+
+    def __init__(self, dn, entry, value_decoding=ValueDecoding.GUESS, **kwds):
+        LDAPObject.__init__(self, dn, **kwds)
+        self._entry = entry
+        self._value_decoding = value_decoding
+        for attr in entry.attr_types():
+            self._keys[attr.lower()] = attr
+            dict.__setitem__(self, attr, _UNDECODED)
+
+    def _decode(self, attr):
+        """Decode and store the values of an attribute if needed. ``attr`` must have the stored key casing."""
+        vals = dict.__getitem__(self, attr)
+        if vals is _UNDECODED:
+            vals = AttrValueList(attr, self._entry.decode(attr, decode_as_bytes(attr, self._value_decoding),
+                                                          self._value_decoding == ValueDecoding.MEMORYVIEW))
+            dict.__setitem__(self, attr, vals)
+        return vals
+
+    def _decode_all(self):
+        for attr in dict.keys(self):
+            self._decode(attr)
+
+    def __getitem__(self, attr):
+        return self._decode(self._keys[attr.lower()])
+
+    def __iter__(self):
+        # defining this stops dict() and dict.update() from copying stored values directly
+        return dict.__iter__(self)
+
+    def __repr__(self):
+        self._decode_all()
+        return LDAPObject.__repr__(self)
+
+    def __eq__(self, other):
+        self._decode_all()
+        if isinstance(other, LazyLDAPObject):
+            other._decode_all()
+        return LDAPObject.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def items(self):
+        self._decode_all()
+        return dict.items(self)
+
+    def values(self):
+        self._decode_all()
+        return dict.values(self)
+
+    def iteritems(self):
+        self._decode_all()
+        return dict.iteritems(self)
+
+    def itervalues(self):
+        self._decode_all()
+        return dict.itervalues(self)
+
+    def pop(self, attr, *args):
+        if dict.__contains__(self, attr):
+            self._decode(attr)
+        return dict.pop(self, attr, *args)
+
+    def popitem(self):
+        self._decode_all()
+        return dict.popitem(self)
+
+    def copy(self):
+        self._decode_all()
+        return dict.copy(self)
+
+
 class ModTransactionObject(LDAPObject):
     """Provides a transaction-like construct for building up a single modify operation. Users should use
     :meth:`.LDAPObject.mod_transaction` rather than instantiating this directly.
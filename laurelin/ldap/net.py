@@ -4,18 +4,43 @@ from __future__ import absolute_import
 import six
 import ssl
 import logging
+import threading
+import time
 from glob import glob
-from socket import create_connection, socket, error as SocketError
+from select import select
+from socket import (
+    getaddrinfo,
+    socket,
+    error as SocketError,
+    timeout as SocketTimeout,
+    IPPROTO_TCP,
+    SOCK_STREAM,
+    SOL_SOCKET,
+    SO_KEEPALIVE,
+    SO_RCVBUF,
+    SO_SNDBUF,
+    SHUT_RDWR,
+    TCP_NODELAY,
+)
+from six.moves import queue
 from six.moves.urllib.parse import unquote
 from collections import deque
 from puresasl.client import SASLClient
 
 from .rfc4511 import LDAPMessage, ResultCode
-from .exceptions import LDAPError, LDAPSASLError, LDAPConnectionError, LDAPUnsolicitedMessage, UnexpectedResponseType
+from .exceptions import (
+    LDAPError,
+    LDAPSASLError,
+    LDAPConnectionError,
+    LDAPUnsolicitedMessage,
+    NoticeOfDisconnection,
+    ResponseTimeout,
+    UnexpectedResponseType,
+)
+from .ber import Request, decode_response, encode_message, peek_search_entry
 from .protoutils import pack, unpack
 from .pyasn1.codec.ber.encoder import encode as ber_encode
 from .pyasn1.codec.ber.decoder import decode as ber_decode
-from .pyasn1.error import SubstrateUnderrunError
 
 try:
     from socket import AF_UNIX
@@ -24,9 +49,136 @@ except ImportError:
     AF_UNIX = None
     _have_unix_socket = False
 
+# TCP keepalive tuning options are platform-specific; macOS calls the idle option TCP_KEEPALIVE
+try:
+    from socket import TCP_KEEPIDLE
+except ImportError:
+    try:
+        from socket import TCP_KEEPALIVE as TCP_KEEPIDLE
+    except ImportError:
+        TCP_KEEPIDLE = None
+try:
+    from socket import TCP_KEEPINTVL
+except ImportError:
+    TCP_KEEPINTVL = None
+try:
+    from socket import TCP_KEEPCNT
+except ImportError:
+    TCP_KEEPCNT = None
+
 _next_sock_id = 0
 logger = logging.getLogger(__name__)
 
+# operations that never receive a response
+_NO_RESPONSE_OPS = ('abandonRequest', 'unbindRequest')
+
+# response types that are followed by further responses to the same request
+_INTERMEDIATE_RESPONSE_OPS = ('searchResEntry', 'searchResRef', 'intermediateResponse')
+
+# placed on a multiplexing queue when it is unregistered, ending the responses for its message ID
+_MUX_CLOSED = object()
+
+
+class PDUFramer(object):
+    """Splits an incoming byte stream into complete BER-encoded PDUs.
+
+    Received data is accumulated into a single reusable buffer with :meth:`feed`. Only the tag and length header of
+    each PDU is inspected, so no decode is ever attempted until the entire PDU is available. Consumed data is discarded
+    lazily to avoid re-copying the buffer for every PDU.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._pos = 0
+
+    def feed(self, data):
+        """Append newly received data to the buffer
+
+        :param data: Raw bytes received from the server
+        :type data: bytes or bytearray or memoryview
+        """
+        if self._pos and self._pos == len(self._buf):
+            # everything has been consumed, reuse the buffer from the start
+            del self._buf[:]
+            self._pos = 0
+        self._buf += data
+
+    def __len__(self):
+        """The number of buffered bytes not yet returned as part of a PDU"""
+        return len(self._buf) - self._pos
+
+    def _pdu_length(self):
+        """Get the total length of the PDU at the current position, or None if the header is incomplete"""
+        buf = self._buf
+        end = len(buf)
+        i = self._pos
+        if i >= end:
+            return None
+
+        # identifier octets
+        if buf[i] & 0x1f == 0x1f:
+            # high tag number form
+            i += 1
+            while True:
+                if i >= end:
+                    return None
+                if not buf[i] & 0x80:
+                    break
+                i += 1
+        i += 1
+
+        # length octets
+        if i >= end:
+            return None
+        first = buf[i]
+        i += 1
+        if first < 0x80:
+            length = first
+        elif first == 0x80:
+            raise LDAPError('Indefinite-length BER encoding is not permitted in LDAP (RFC 4511 sec 5.1)')
+        else:
+            num_octets = first & 0x7f
+            if i + num_octets > end:
+                return None
+            length = 0
+            for j in range(i, i + num_octets):
+                length = (length << 8) | buf[j]
+            i += num_octets
+        return i - self._pos + length
+
+    def next_pdu(self):
+        """Remove and return the next complete PDU from the buffer
+
+        :return: The complete encoded PDU, or None if not enough data has been received yet
+        :rtype: bytes or None
+        :raises LDAPError: if an unsupported encoding is detected
+        """
+        length = self._pdu_length()
+        if length is None:
+            return None
+        start = self._pos
+        end = start + length
+        if end > len(self._buf):
+            return None
+        pdu = memoryview(self._buf)[start:end].tobytes()
+        self._pos = end
+        if self._pos == len(self._buf):
+            del self._buf[:]
+            self._pos = 0
+        elif self._pos > len(self._buf) // 2:
+            # compact once the consumed prefix dominates the buffer
+            del self._buf[:self._pos]
+            self._pos = 0
+        return pdu
+
+    def __iter__(self):
+        """Iterate all complete PDUs currently in the buffer"""
+        while True:
+            pdu = self.next_pdu()
+            if pdu is None:
+                return
+            yield pdu
+
 
 class LDAPSocket(object):
     """Holds a connection to an LDAP server.
@@ -41,10 +193,29 @@ class LDAPSocket(object):
     :param ssl_ca_data: An ASCII string of one or more PEM-encoded certs or a bytes object containing DER-encoded
                         certificates.
     :type ssl_ca_data: str or bytes
+    :param int recv_buffer_size: Size in bytes of the preallocated buffer that data is received into. Defaults to
+                                 :attr:`RECV_BUFFER`.
+    :param int max_recv_buffer_size: Enables adaptive receive buffer sizing. Each time a read fills the entire buffer,
+                                     its size is doubled up to this limit. Leave as None to keep the buffer at a fixed
+                                     ``recv_buffer_size``.
+    :param bool tcp_nodelay: Set TCP_NODELAY to disable Nagle's algorithm on TCP connections
+    :param tcp_keepalive: Set to True to enable SO_KEEPALIVE on TCP connections with the system default timing, or
+                          supply an ``(idle, interval, count)`` tuple to also set TCP_KEEPIDLE, TCP_KEEPINTVL, and
+                          TCP_KEEPCNT where supported by the platform.
+    :type tcp_keepalive: bool or tuple(int, int, int)
+    :param int so_rcvbuf: Kernel receive buffer size to request with SO_RCVBUF before connecting. Leave as None to use
+                          the system default.
+    :param int so_sndbuf: Kernel send buffer size to request with SO_SNDBUF before connecting. Leave as None to use the
+                          system default.
+    :param bool multiplex: Start a background reader thread that routes each response to the operation waiting for its
+                           message ID. Allows any number of threads to perform operations concurrently on this socket.
     """
 
     RECV_BUFFER = 4096
 
+    READER_POLL_INTERVAL = 0.5
+    """Seconds the multiplexing reader thread waits for data before checking whether it has been asked to stop"""
+
     # For ldapi:/// try to connect to these socket files in order
     # Globs must match exactly one result
     LDAPI_SOCKET_PATHS = ['/var/run/ldapi', '/var/run/slapd/ldapi', '/var/run/slapd-*.socket']
@@ -54,10 +225,14 @@ class LDAPSocket(object):
     OID_DISCONNECTION_NOTICE = '1.3.6.1.4.1.1466.20036'  # RFC 4511 sec 4.4.1 Notice of Disconnection
 
     def __init__(self, host_uri, connect_timeout=5, ssl_verify=True, ssl_ca_file=None, ssl_ca_path=None,
-                 ssl_ca_data=None):
+                 ssl_ca_data=None, recv_buffer_size=None, max_recv_buffer_size=None, tcp_nodelay=False,
+                 tcp_keepalive=False, so_rcvbuf=None, so_sndbuf=None, multiplex=False):
 
         self._prop_init(connect_timeout)
+        self._io_init(recv_buffer_size, max_recv_buffer_size, tcp_nodelay, tcp_keepalive, so_rcvbuf, so_sndbuf)
         self._uri_connect(host_uri, ssl_verify, ssl_ca_file, ssl_ca_path, ssl_ca_data)
+        if multiplex:
+            self._enable_multiplex()
 
     def _prop_init(self, connect_timeout=5):
         # get socket ID number
@@ -68,6 +243,7 @@ class LDAPSocket(object):
         # misc init
         self._message_queues = {}
         self._next_message_id = 1
+        self._framer = PDUFramer()
         self._sasl_client = None
 
         self.refcount = 0
@@ -76,6 +252,55 @@ class LDAPSocket(object):
         self.abandoned_mids = []
         self.started_tls = False
         self.connect_timeout = connect_timeout
+        # set when a response deadline passes; the server or the network path to it may be hung
+        self.suspect = False
+
+        # load reporting for a ServerSet; send times of operations awaiting their final response, by message ID
+        self.server_stats = None
+        self._op_started = {}
+
+        # message IDs of searches whose result entries are decoded by a pool of worker processes, not on receipt
+        self.pool_decode_ids = set()
+
+        # guards message ID allocation and ensures messages are written whole and in message ID order
+        self._send_lock = threading.RLock()
+
+        # multiplexing state
+        self.multiplex = False
+        self._mux_queues = {}
+        self._mux_lock = threading.Lock()
+        # notified whenever a message or error is routed to any queue
+        self._mux_arrived = threading.Condition(self._mux_lock)
+        self._reader = None
+        self._reader_stop = threading.Event()
+        self._reader_error = None
+
+    def _io_init(self, recv_buffer_size=None, max_recv_buffer_size=None, tcp_nodelay=False, tcp_keepalive=False,
+                 so_rcvbuf=None, so_sndbuf=None):
+        """Validate and store the socket I/O profile and preallocate the receive buffer"""
+        if not recv_buffer_size:
+            recv_buffer_size = LDAPSocket.RECV_BUFFER
+        if recv_buffer_size < 1:
+            raise ValueError('recv_buffer_size must be a positive integer')
+        if max_recv_buffer_size is not None and max_recv_buffer_size < recv_buffer_size:
+            raise ValueError('max_recv_buffer_size must not be less than recv_buffer_size')
+        if isinstance(tcp_keepalive, (tuple, list)):
+            if len(tcp_keepalive) != 3:
+                raise ValueError('tcp_keepalive must be a bool or a tuple of (idle, interval, count)')
+            tcp_keepalive = tuple(tcp_keepalive)
+
+        self.recv_buffer_size = recv_buffer_size
+        self.max_recv_buffer_size = max_recv_buffer_size
+        self.tcp_nodelay = tcp_nodelay
+        self.tcp_keepalive = tcp_keepalive
+        self.so_rcvbuf = so_rcvbuf
+        self.so_sndbuf = so_sndbuf
+
+        self._alloc_recv_buffer(recv_buffer_size)
+
+    def _alloc_recv_buffer(self, size):
+        self._recv_buf = bytearray(size)
+        self._recv_view = memoryview(self._recv_buf)
 
     def _parse_uri(self, host_uri):
         # parse host_uri
@@ -110,17 +335,11 @@ class LDAPSocket(object):
                                 'than ldapi')
             self.sock_path = None
             self._sock = socket(AF_UNIX)
+            self._set_buffer_options(self._sock)
             self.host = 'localhost'
 
             if netloc == '/':
-                for sockGlob in LDAPSocket.LDAPI_SOCKET_PATHS:
-                    fn = glob(sockGlob)
-                    if not fn:
-                        continue
-                    if len(fn) > 1:
-                        logger.debug('Multiple results for glob {0}'.format(sockGlob))
-                        continue
-                    fn = fn[0]
+                for fn in self._find_ldapi_sockets():
                     try:
                         self._connect(fn)
                         self.sock_path = fn
@@ -143,24 +362,82 @@ class LDAPSocket(object):
         else:
             raise LDAPError('Unsupported scheme "{0}"'.format(scheme))
 
+    @staticmethod
+    def _find_ldapi_sockets():
+        """Iterate candidate local LDAPI socket paths"""
+        for sockGlob in LDAPSocket.LDAPI_SOCKET_PATHS:
+            fn = glob(sockGlob)
+            if not fn:
+                continue
+            if len(fn) > 1:
+                logger.debug('Multiple results for glob {0}'.format(sockGlob))
+                continue
+            yield fn[0]
+
     def _connect(self, addr):
         self._sock.settimeout(self.connect_timeout)
         self._sock.connect(addr)
         self._sock.settimeout(None)
 
-    def _inet_connect(self, netloc, default_port):
+    def _parse_netloc(self, netloc, default_port):
+        """Set ``self.host`` and return the port number"""
         ap = netloc.rsplit(':', 1)
         self.host = ap[0]
         if len(ap) == 1:
-            port = default_port
+            return default_port
         else:
-            port = int(ap[1])
+            return int(ap[1])
+
+    def _inet_connect(self, netloc, default_port):
+        port = self._parse_netloc(netloc, default_port)
         try:
-            self._sock = create_connection((self.host, port), self.connect_timeout)
+            self._sock = self._create_connection(self.host, port)
             logger.debug('Connected to {0}:{1} on #{2}'.format(self.host, port, self.ID))
         except SocketError as e:
             raise LDAPConnectionError('failed connect to {0}:{1} - {2} ({3})'.format(
                                       self.host, port, e.strerror, e.errno))
+        self._set_tcp_options(self._sock)
+
+    def _create_connection(self, host, port):
+        """Like :func:`socket.create_connection`, but kernel buffer sizes are set before connecting so that they are
+        taken into account for the TCP window negotiated with the server"""
+        err = None
+        for af, socktype, proto, canonname, sa in getaddrinfo(host, port, 0, SOCK_STREAM):
+            sock = None
+            try:
+                sock = socket(af, socktype, proto)
+                self._set_buffer_options(sock)
+                sock.settimeout(self.connect_timeout)
+                sock.connect(sa)
+                return sock
+            except SocketError as e:
+                err = e
+                if sock is not None:
+                    sock.close()
+        if err is not None:
+            raise err
+        raise SocketError('getaddrinfo returned an empty list')
+
+    def _set_buffer_options(self, sock):
+        if self.so_rcvbuf:
+            sock.setsockopt(SOL_SOCKET, SO_RCVBUF, self.so_rcvbuf)
+        if self.so_sndbuf:
+            sock.setsockopt(SOL_SOCKET, SO_SNDBUF, self.so_sndbuf)
+
+    def _set_tcp_options(self, sock):
+        if self.tcp_nodelay:
+            sock.setsockopt(IPPROTO_TCP, TCP_NODELAY, 1)
+        if self.tcp_keepalive:
+            sock.setsockopt(SOL_SOCKET, SO_KEEPALIVE, 1)
+            if isinstance(self.tcp_keepalive, tuple):
+                idle, interval, count = self.tcp_keepalive
+                for opt, name, value in ((TCP_KEEPIDLE, 'TCP_KEEPIDLE', idle),
+                                         (TCP_KEEPINTVL, 'TCP_KEEPINTVL', interval),
+                                         (TCP_KEEPCNT, 'TCP_KEEPCNT', count)):
+                    if opt is None:
+                        logger.debug('{0} is not supported on this platform, skipping'.format(name))
+                    elif value is not None:
+                        sock.setsockopt(IPPROTO_TCP, opt, value)
 
     def start_tls(self, verify=True, ca_file=None, ca_path=None, ca_data=None):
         """Install TLS layer on this socket connection.
@@ -177,40 +454,64 @@ class LDAPSocket(object):
         if self.started_tls:
             raise LDAPError('TLS layer already installed')
 
-        if verify:
-            verify_mode = ssl.CERT_REQUIRED
-        else:
-            verify_mode = ssl.CERT_NONE
+        # the reader must not touch the socket while it is being wrapped
+        restart_reader = self._reader is not None
+        self._stop_reader()
 
         try:
-            proto = ssl.PROTOCOL_TLS
-        except AttributeError:
-            proto = ssl.PROTOCOL_SSLv23
-
-        try:
-            ctx = ssl.SSLContext(proto)
-            ctx.verify_mode = verify_mode
-            ctx.check_hostname = False  # we do this ourselves
-            if verify:
-                ctx.load_default_certs()
-            if ca_file or ca_path or ca_data:
-                ctx.load_verify_locations(cafile=ca_file, capath=ca_path, cadata=ca_data)
+            ctx = self._ssl_context(verify, ca_file, ca_path, ca_data)
             self._sock = ctx.wrap_socket(self._sock)
         except AttributeError:
             # SSLContext wasn't added until 2.7.9
             if ca_path or ca_data:
                 raise RuntimeError('python version >= 2.7.9 required for SSL ca_path/ca_data')
 
-            self._sock = ssl.wrap_socket(self._sock, ca_certs=ca_file, cert_reqs=verify_mode, ssl_version=proto)
+            self._sock = ssl.wrap_socket(self._sock, ca_certs=ca_file, cert_reqs=self._ssl_verify_mode(verify),
+                                         ssl_version=self._ssl_protocol())
+
+        self._verify_peer(verify, self._sock.getpeercert)
+        self.started_tls = True
+        logger.debug('Installed TLS layer on #{0}'.format(self.ID))
+        if restart_reader:
+            self._start_reader()
+
+    @staticmethod
+    def _ssl_protocol():
+        try:
+            return ssl.PROTOCOL_TLS
+        except AttributeError:
+            return ssl.PROTOCOL_SSLv23
+
+    @staticmethod
+    def _ssl_verify_mode(verify):
+        if verify:
+            return ssl.CERT_REQUIRED
+        else:
+            return ssl.CERT_NONE
+
+    @classmethod
+    def _ssl_context(cls, verify, ca_file, ca_path, ca_data):
+        """Create an :class:`ssl.SSLContext` for the given settings. Hostname checking is disabled in the context since
+        it is performed by :meth:`check_hostname`.
+
+        :raises AttributeError: if SSLContext is not available (python < 2.7.9)
+        """
+        ctx = ssl.SSLContext(cls._ssl_protocol())
+        ctx.verify_mode = cls._ssl_verify_mode(verify)
+        ctx.check_hostname = False  # we do this ourselves
+        if verify:
+            ctx.load_default_certs()
+        if ca_file or ca_path or ca_data:
+            ctx.load_verify_locations(cafile=ca_file, capath=ca_path, cadata=ca_data)
+        return ctx
 
+    def _verify_peer(self, verify, get_peer_cert):
         if verify:
-            cert = self._sock.getpeercert()
+            cert = get_peer_cert()
             cert_cn = dict([e[0] for e in cert['subject']])['commonName']
             self.check_hostname(cert_cn, cert)
         else:
             logger.debug('Skipping hostname validation')
-        self.started_tls = True
-        logger.debug('Installed TLS layer on #{0}'.format(self.ID))
 
     def check_hostname(self, cert_cn, cert):
         """SSL check_hostname according to RFC 4513 sec 3.1.3. Compares supplied values against ``self.host`` to
@@ -275,104 +576,439 @@ class LDAPSocket(object):
 
     def _prep_message(self, op, obj, controls=None):
         """Prepare a message for transmission"""
-        mid = self._next_message_id
-        self._next_message_id += 1
-        lm = pack(mid, op, obj, controls)
-        raw = ber_encode(lm)
-        if self._has_sasl_client():
-            raw = self._sasl_client.wrap(raw)
-        return mid, raw
-
-    def send_message(self, op, obj, controls=None):
+        with self._send_lock:
+            mid = self._next_message_id
+            self._next_message_id += 1
+            if isinstance(obj, Request):
+                raw = encode_message(mid, obj, controls)
+            else:
+                raw = ber_encode(pack(mid, op, obj, controls))
+            if self._has_sasl_client():
+                raw = self._sasl_client.wrap(raw)
+            return mid, raw
+
+    def send_message(self, op, obj, controls=None, deadline=None):
         """Create and send an LDAPMessage given an operation name and a corresponding object.
 
         Operation names must be defined as component names in laurelin.ldap.rfc4511.ProtocolOp and
-        the object must be of the corresponding type.
+        the object must be of the corresponding type, or the corresponding :class:`.ber.Request` subclass.
 
         :param str op: The protocol operation name
         :param object obj: The associated protocol object (see :class:`.rfc4511.ProtocolOp` for mapping.
         :param controls: Any request controls for the message
         :type controls: rfc4511.Controls or None
+        :param float deadline: Optional :func:`time.time` timestamp by which the message must be sent. If it passes
+                               first, the connection is marked ``suspect`` and :exc:`.ResponseTimeout` is raised.
         :return: The message ID for this message
         :rtype: int
         """
-        mid, raw = self._prep_message(op, obj, controls)
-        self._sock.sendall(raw)
+        with self._send_lock:
+            mid, raw = self._prep_message(op, obj, controls)
+            if self.server_stats is not None:
+                self._track_request(mid, op, obj)
+            if self.multiplex:
+                if op not in _NO_RESPONSE_OPS:
+                    # register before sending so the reader can never see a response without somewhere to put it
+                    self._register_mux_queue(mid)
+                elif op == 'abandonRequest':
+                    # drop any further responses to the abandoned operation
+                    self._unregister_mux_queue(int(obj))
+            self._send_raw(raw, deadline)
         return mid
 
-    def recv_one(self, want_message_id):
+    def _track_request(self, mid, op, obj):
+        if op not in _NO_RESPONSE_OPS:
+            self._op_started[mid] = time.time()
+            self.server_stats.op_started()
+        elif op == 'abandonRequest' and self._op_started.pop(int(obj), None) is not None:
+            self.server_stats.op_finished()
+
+    def _track_response(self, response):
+        """Report the latency of an operation to the server stats once its final response arrives"""
+        mid = response.getComponentByName('messageID')
+        if mid in self._op_started:
+            if response.getComponentByName('protocolOp').getName() not in _INTERMEDIATE_RESPONSE_OPS:
+                started = self._op_started.pop(mid, None)
+                if started is not None:
+                    self.server_stats.op_finished(time.time() - started)
+
+    def _send_raw(self, raw, deadline=None):
+        self._before_deadline(deadline, self._sock.sendall, raw)
+
+    def recv_one(self, want_message_id, deadline=None):
         """Get the next message with ``want_message_id`` being sent by the server
 
         :param int want_message_id: The desired message ID.
+        :param float deadline: Optional :func:`time.time` timestamp by which the message must arrive.
         :return: The LDAP message
         :rtype: rfc4511.LDAPMessage
+        :raises ResponseTimeout: if the deadline passes first
         """
-        return next(self.recv_messages(want_message_id))
+        return next(self.recv_messages(want_message_id, deadline))
 
-    def recv_messages(self, want_message_id):
+    def recv_messages(self, want_message_id, deadline=None):
         """Iterate all messages with ``want_message_id`` being sent by the server.
 
         :param int want_message_id: The desired message ID.
+        :param float deadline: Optional :func:`time.time` timestamp by which all messages must arrive. If it passes
+                               first, the connection is marked ``suspect`` and :exc:`.ResponseTimeout` is raised.
         :return: An iterator over :class:`.rfc4511.LDAPMessage`.
         """
-        flush_queue = True
-        raw = b''
+        if self.multiplex:
+            return self._mux_recv_messages(want_message_id, deadline)
+        else:
+            return self._recv_messages(want_message_id, deadline)
+
+    def _recv_messages(self, want_message_id, deadline):
+        """Read from the socket in the calling thread, queueing messages for other message IDs"""
         while True:
-            if flush_queue:
-                if want_message_id in self._message_queues:
-                    q = self._message_queues[want_message_id]
-                    while True:
-                        if len(q) == 0:
-                            break
-                        obj = q.popleft()
-                        if len(q) == 0:
-                            del self._message_queues[want_message_id]
-                        yield obj
-            else:
-                flush_queue = True
+            if want_message_id in self._message_queues:
+                q = self._message_queues[want_message_id]
+                while True:
+                    if len(q) == 0:
+                        break
+                    obj = q.popleft()
+                    if len(q) == 0:
+                        del self._message_queues[want_message_id]
+                    yield obj
             if want_message_id in self.abandoned_mids:
                 return
-            try:
-                newraw = self._sock.recv(LDAPSocket.RECV_BUFFER)
+            response = self._read_message(deadline)
+            have_message_id = response.getComponentByName('messageID')
+            if want_message_id == have_message_id:
+                yield response
+            elif have_message_id == 0:
+                self._handle_unsolicited(response)
+            else:
+                self._queue_message(have_message_id, response)
+
+    def recv_any(self, message_ids, deadline=None):
+        """Get the next message sent by the server for any one of several outstanding requests. Each request must
+        expect exactly one response message.
+
+        :param message_ids: The message IDs of the outstanding requests
+        :type message_ids: set[int] or dict
+        :param float deadline: Optional :func:`time.time` timestamp by which a message must arrive.
+        :return: The LDAP message
+        :rtype: rfc4511.LDAPMessage
+        :raises ResponseTimeout: if the deadline passes first
+        """
+        if self.multiplex:
+            return self._mux_recv_any(message_ids, deadline)
+        for mid in message_ids:
+            q = self._message_queues.get(mid)
+            if q:
+                response = q.popleft()
+                if not q:
+                    del self._message_queues[mid]
+                return response
+        while True:
+            response = self._read_message(deadline)
+            have_message_id = response.getComponentByName('messageID')
+            if have_message_id in message_ids:
+                return response
+            elif have_message_id == 0:
+                self._handle_unsolicited(response)
+            else:
+                self._queue_message(have_message_id, response)
+
+    def _read_message(self, deadline=None):
+        """Read from the socket in the calling thread until the next complete message is available"""
+        while True:
+            # complete PDUs may remain buffered from an earlier read if iteration stopped part-way through
+            pdu = self._framer.next_pdu()
+            if pdu is not None:
+                response = self._decode_incoming(pdu)
+                if self.server_stats is not None:
+                    self._track_response(response)
+                return response
+            if deadline is not None and not self._wait_readable(deadline - time.time()):
+                raise self._response_timeout()
+            newraw = self._recv(deadline)
+            if not newraw:
+                raise LDAPConnectionError('Connection closed by server on #{0}'.format(self.ID))
+            if self._has_sasl_client():
+                newraw = self._sasl_client.unwrap(newraw.tobytes())
+            self._framer.feed(newraw)
+
+    def _queue_message(self, message_id, response):
+        if message_id in self.abandoned_mids:
+            logger.debug('Dropping message for abandoned ID={0} on #{1}'.format(message_id, self.ID))
+            return
+        if message_id not in self._message_queues:
+            self._message_queues[message_id] = deque()
+        self._message_queues[message_id].append(response)
+
+    def _recv(self, deadline=None):
+        """Receive the next chunk of data into the preallocated receive buffer.
+
+        :param float deadline: Optional :func:`time.time` timestamp after which to stop waiting for data
+        :return: A view of the received data. It is only valid until the next call.
+        :rtype: memoryview
+        :raises ResponseTimeout: if the deadline passes first
+        """
+        return self._received(self._before_deadline(deadline, self._sock.recv_into, self._recv_buf))
+
+    def _before_deadline(self, deadline, method, *args):
+        """Call a blocking socket method, giving up when ``deadline`` passes. Even when :func:`select` reports the
+        socket ready, ``sendall()`` may block on a full send buffer, and an SSL receive on an incomplete record."""
+        if deadline is None:
+            return method(*args)
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            raise self._response_timeout()
+        self._sock.settimeout(remaining)
+        try:
+            return method(*args)
+        except SocketTimeout:
+            raise self._response_timeout()
+        finally:
+            self._sock.settimeout(None)
+
+    def _received(self, n):
+        """Get a view of ``n`` bytes just received into the receive buffer and grow the buffer if warranted"""
+        buf_size = len(self._recv_buf)
+        data = self._recv_view[:n]
+        if n == buf_size and self.max_recv_buffer_size and buf_size < self.max_recv_buffer_size:
+            # the buffer was filled, more data is probably waiting; the old buffer stays alive behind the view
+            new_size = min(buf_size * 2, self.max_recv_buffer_size)
+            logger.debug('Growing receive buffer to {0} bytes on #{1}'.format(new_size, self.ID))
+            self._alloc_recv_buffer(new_size)
+        return data
+
+    def _response_timeout(self):
+        """Mark the connection suspect and create the exception for a missed response deadline"""
+        self.suspect = True
+        logger.info('Timed out waiting for a response on #{0}'.format(self.ID))
+        return ResponseTimeout('Timed out waiting for a response on #{0}'.format(self.ID))
+
+    def _decode_incoming(self, pdu):
+        """Decode a received PDU, except that search result entries for message IDs in ``pool_decode_ids`` are left as
+        :class:`.ber.RawEntry`"""
+        if self.pool_decode_ids:
+            response = peek_search_entry(pdu, self.pool_decode_ids)
+            if response is not None:
+                return response
+        return self._decode_pdu(pdu)
+
+    @staticmethod
+    def _decode_pdu(pdu):
+        """Decode exactly one complete PDU into an LDAPMessage, or into a :class:`.ber.Response` for the response types
+        handled by the fast path"""
+        response = decode_response(pdu)
+        if response is not None:
+            return response
+        response, leftover = ber_decode(pdu, asn1Spec=LDAPMessage())
+        if leftover:
+            raise LDAPError('Unexpected leftover bytes after decoding PDU')
+        return response
+
+    def _handle_unsolicited(self, response):
+        """Raise an appropriate exception for an unsolicited message (message ID 0)"""
+        msg = 'Received unsolicited message (default message - should never be seen)'
+        exc_class = LDAPUnsolicitedMessage
+        try:
+            mid, xr, ctrls = unpack('extendedResp', response)
+            res_code = xr.getComponentByName('resultCode')
+            xr_oid = six.text_type(xr.getComponentByName('responseName'))
+            if xr_oid == LDAPSocket.OID_DISCONNECTION_NOTICE:
+                mtype = 'Notice of Disconnection'
+                exc_class = NoticeOfDisconnection
+            else:
+                mtype = 'Unhandled ({0})'.format(xr_oid)
+            diag = xr.getComponentByName('diagnosticMessage')
+            msg = 'Got unsolicited message: {0}: {1}: {2}'.format(mtype, res_code, diag)
+            if res_code == ResultCode('protocolError'):
+                msg += (' (This may indicate an incompatability between laurelin-ldap and your server '
+                        'distribution)')
+            elif res_code == ResultCode('strongerAuthRequired'):
+                # this is a direct quote from RFC 4511 sec 4.4.1
+                msg += (' (The server has detected that an established security association between the'
+                        ' client and server has unexpectedly failed or been compromised)')
+        except UnexpectedResponseType:
+            msg = 'Unhandled unsolicited message from server'
+        finally:
+            raise exc_class(response, msg)
+
+    ## multiplexing
+
+    def _enable_multiplex(self):
+        self.multiplex = True
+        self._start_reader()
+
+    def _start_reader(self):
+        self._reader_stop.clear()
+        self._reader = threading.Thread(target=self._reader_loop, name='laurelin-reader-{0}'.format(self.ID))
+        self._reader.daemon = True
+        self._reader.start()
+        logger.debug('Started multiplexing reader thread on #{0}'.format(self.ID))
+
+    def _stop_reader(self):
+        reader = self._reader
+        if reader is None:
+            return
+        self._reader_stop.set()
+        if reader is not threading.current_thread():
+            reader.join()
+        self._reader = None
+        logger.debug('Stopped multiplexing reader thread on #{0}'.format(self.ID))
+
+    def _register_mux_queue(self, mid):
+        with self._mux_lock:
+            if self._reader_error is not None:
+                raise self._reader_error
+            self._mux_queues[mid] = queue.Queue()
+
+    def _unregister_mux_queue(self, mid):
+        with self._mux_arrived:
+            q = self._mux_queues.pop(mid, None)
+            if q is not None:
+                # wake any thread still waiting for responses, e.g. when another thread abandons the operation
+                q.put_nowait(_MUX_CLOSED)
+                self._mux_arrived.notify_all()
+
+    def _wait_readable(self, timeout):
+        # SSL sockets may hold already-decrypted data that select() cannot see
+        pending = getattr(self._sock, 'pending', None)
+        if pending is not None and pending():
+            return True
+        readable, _, _ = select([self._sock], [], [], max(timeout, 0))
+        return bool(readable)
+
+    def _reader_loop(self):
+        """Body of the multiplexing reader thread. Routes every received message to the queue for its message ID."""
+        try:
+            while not self._reader_stop.is_set():
+                if not self._wait_readable(LDAPSocket.READER_POLL_INTERVAL):
+                    continue
+                try:
+                    newraw = self._recv()
+                except SocketTimeout:
+                    # a send deadline applied a timeout to the shared socket; keep waiting for data
+                    continue
+                if not newraw:
+                    if self._reader_stop.is_set():
+                        break
+                    raise LDAPConnectionError('Connection closed by server on #{0}'.format(self.ID))
                 if self._has_sasl_client():
-                    newraw = self._sasl_client.unwrap(newraw)
-                raw += newraw
-                while len(raw) > 0:
-                    response, raw = ber_decode(raw, asn1Spec=LDAPMessage())
-                    have_message_id = response.getComponentByName('messageID')
-                    if want_message_id == have_message_id:
-                        yield response
-                    elif have_message_id == 0:
-                        msg = 'Received unsolicited message (default message - should never be seen)'
-                        try:
-                            mid, xr, ctrls = unpack('extendedResp', response)
-                            res_code = xr.getComponentByName('resultCode')
-                            xr_oid = six.text_type(xr.getComponentByName('responseName'))
-                            if xr_oid == LDAPSocket.OID_DISCONNECTION_NOTICE:
-                                mtype = 'Notice of Disconnection'
-                            else:
-                                mtype = 'Unhandled ({0})'.format(xr_oid)
-                            diag = xr.getComponentByName('diagnosticMessage')
-                            msg = 'Got unsolicited message: {0}: {1}: {2}'.format(mtype, res_code, diag)
-                            if res_code == ResultCode('protocolError'):
-                                msg += (' (This may indicate an incompatability between laurelin-ldap and your server '
-                                        'distribution)')
-                            elif res_code == ResultCode('strongerAuthRequired'):
-                                # this is a direct quote from RFC 4511 sec 4.4.1
-                                msg += (' (The server has detected that an established security association between the'
-                                        ' client and server has unexpectedly failed or been compromised)')
-                        except UnexpectedResponseType:
-                            msg = 'Unhandled unsolicited message from server'
-                        finally:
-                            raise LDAPUnsolicitedMessage(response, msg)
-                    else:
-                        if have_message_id not in self._message_queues:
-                            self._message_queues[have_message_id] = deque()
-                        self._message_queues[have_message_id].append(response)
-            except SubstrateUnderrunError:
-                flush_queue = False
-                continue
+                    newraw = self._sasl_client.unwrap(newraw.tobytes())
+                self._framer.feed(newraw)
+                for pdu in self._framer:
+                    self._route_pdu(pdu)
+        except Exception as e:
+            if self._reader_stop.is_set():
+                # the socket was closed out from under a blocking call
+                return
+            logger.debug('Multiplexing reader on #{0} failed: {1}'.format(self.ID, e))
+            self._fail_waiters(e)
+
+    def _route_pdu(self, pdu):
+        response = self._decode_incoming(pdu)
+        if self.server_stats is not None:
+            self._track_response(response)
+        have_message_id = response.getComponentByName('messageID')
+        if have_message_id == 0:
+            self._handle_unsolicited(response)
+        with self._mux_arrived:
+            q = self._mux_queues.get(have_message_id)
+            if q is not None:
+                q.put_nowait(response)
+                self._mux_arrived.notify_all()
+        if q is None:
+            logger.debug('Dropping message for unknown or abandoned ID={0} on #{1}'.format(have_message_id, self.ID))
+
+    def _fail_waiters(self, e):
+        """Deliver a fatal reader error to every waiting operation and any future ones"""
+        with self._mux_arrived:
+            self._reader_error = e
+            queues = list(self._mux_queues.values())
+            self._mux_queues.clear()
+            self._mux_arrived.notify_all()
+        for q in queues:
+            q.put_nowait(e)
+
+    def _mux_recv_messages(self, want_message_id, deadline):
+        """Iterate messages routed to ``want_message_id`` by the reader thread"""
+        with self._mux_lock:
+            q = self._mux_queues.get(want_message_id)
+            if q is None:
+                if self._reader_error is not None:
+                    raise self._reader_error
+                raise LDAPError('No outstanding request with ID={0} on #{1}'.format(want_message_id, self.ID))
+        while True:
+            if want_message_id in self.abandoned_mids:
+                self._unregister_mux_queue(want_message_id)
+                return
+            if deadline is None:
+                response = q.get()
+            else:
+                try:
+                    response = q.get(timeout=max(deadline - time.time(), 0))
+                except queue.Empty:
+                    raise self._response_timeout()
+            if response is _MUX_CLOSED:
+                return
+            if isinstance(response, Exception):
+                raise response
+            if response.getComponentByName('protocolOp').getName() not in _INTERMEDIATE_RESPONSE_OPS:
+                self._unregister_mux_queue(want_message_id)
+            yield response
+
+    def _mux_recv_any(self, message_ids, deadline):
+        """Wait for the reader thread to route a message to any of ``message_ids``"""
+        with self._mux_arrived:
+            while True:
+                if self._reader_error is not None:
+                    raise self._reader_error
+                for mid in message_ids:
+                    q = self._mux_queues.get(mid)
+                    if q is None:
+                        raise LDAPError('No outstanding request with ID={0} on #{1}'.format(mid, self.ID))
+                    try:
+                        response = q.get_nowait()
+                    except queue.Empty:
+                        continue
+                    del self._mux_queues[mid]
+                    return response
+                if deadline is None:
+                    self._mux_arrived.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise self._response_timeout()
+                    self._mux_arrived.wait(remaining)
+
+    def is_alive(self):
+        """Check, without blocking, whether an idle connection still appears usable.
+
+        Only meaningful while no operations are outstanding: anything readable on an idle connection is either the
+        server closing it or an unsolicited notice of disconnection.
+
+        :return: False if the connection has been unbound, closed, has failed, or is ``suspect``
+        :rtype: bool
+        """
+        if self.unbound or self.suspect:
+            return False
+        if self.multiplex:
+            return self._reader_error is None and self._reader is not None and self._reader.is_alive()
+        try:
+            readable, _, _ = select([self._sock], [], [], 0)
+        except (SocketError, ValueError):
+            return False
+        return not readable
 
     def close(self):
         """Close the low-level socket connection."""
+        if self.server_stats is not None:
+            self.server_stats.detach(len(self._op_started))
+            self.server_stats = None
+            self._op_started.clear()
+        if self._reader is not None:
+            self._reader_stop.set()
+            try:
+                # wake the reader immediately rather than waiting out its poll interval
+                self._sock.shutdown(SHUT_RDWR)
+            except SocketError:
+                pass
+            self._stop_reader()
         return self._sock.close()
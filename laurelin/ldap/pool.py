@@ -0,0 +1,314 @@
+"""Provides a bounded pool of ready, bound :class:`.LDAP` connections"""
+
+from __future__ import absolute_import
+
+from .base import LDAP
+from .servers import ServerSet
+from .exceptions import LDAPError, LDAPConnectionError, PoolTimeout, ConnectionUnbound
+
+from collections import deque
+from contextlib import contextmanager
+import logging
+import six
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# shared pools, keyed by server URI, bind identity, and TLS settings
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _freeze(params):
+    if not params:
+        return None
+    return tuple(sorted(six.iteritems(params)))
+
+
+def get_pool(server=None, start_tls=False, simple_bind=None, sasl_bind=None, **kwds):
+    """Get the shared :class:`LDAPPool` for a server URI, bind identity, and TLS settings, creating it if needed.
+
+    All parameters are the same as :class:`LDAPPool`. Parameters other than the server, bind, and TLS settings are
+    only used when the pool is first created.
+
+    :return: The shared pool
+    :rtype: LDAPPool
+    """
+    if server is None:
+        server = LDAP.DEFAULT_SERVER
+    if isinstance(server, list):
+        server = tuple(server)
+    key = (server, start_tls, _freeze(simple_bind), _freeze(sasl_bind), kwds.get('ssl_verify'),
+           kwds.get('ssl_ca_file'), kwds.get('ssl_ca_path'), kwds.get('ssl_ca_data'), kwds.get('server_strategy'))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool.closed:
+            pool = LDAPPool(server, start_tls, simple_bind, sasl_bind, **kwds)
+            _pools[key] = pool
+        return pool
+
+
+class LDAPPool(object):
+    """A thread-safe pool of :class:`.LDAP` connections that have already been set up with StartTLS and bound as
+    configured, so that the connection, TLS handshake, bind, and root DSE query are only paid once per connection
+    rather than once per use.
+
+    :param server: URI of the server, or a list of URIs or a :class:`.ServerSet` to spread connections over several
+                   equivalent servers. A list is converted to a single :class:`.ServerSet` shared by all of the pool's
+                   connections, using the ``server_strategy`` keyword. Defaults to :attr:`.LDAP.DEFAULT_SERVER`.
+    :type server: str or list[str] or ServerSet
+    :param bool start_tls: Set to True to perform StartTLS on each new connection.
+    :param dict simple_bind: Keyword arguments for :meth:`.LDAP.simple_bind`, performed on each new connection. Mutually
+                             exclusive with ``sasl_bind``. Default no bind.
+    :param dict sasl_bind: Keyword arguments for :meth:`.LDAP.sasl_bind`, performed on each new connection. Mutually
+                           exclusive with ``simple_bind``. Default no bind.
+    :param int min_size: Number of connections to open immediately and keep open even when idle.
+    :param int max_size: Maximum number of connections open at once, including those checked out.
+    :param float checkout_timeout: Seconds to wait for a connection to be returned to a full pool before raising
+                                   :exc:`.PoolTimeout`. Set to 0 to wait forever.
+    :param float idle_timeout: Seconds a connection may sit unused in the pool before it is closed, unless that would
+                               leave fewer than ``min_size`` connections. Set to 0 to never close idle connections.
+    :param kwds: Any other :class:`.LDAP` constructor keywords, applied to every connection. ``reuse_connection`` is
+                 always False for pooled connections.
+    :raises TypeError: if both ``simple_bind`` and ``sasl_bind`` are given
+    :raises ValueError: if the size parameters are invalid
+
+    Example::
+
+        pool = LDAPPool('ldaps://dir.example.org', simple_bind={'username': 'cn=app,dc=example,dc=org',
+                                                                'password': 'secret'})
+        with pool.connection() as ldap:
+            user = ldap.base.get_child('uid=alice,ou=people')
+    """
+
+    # global defaults
+    DEFAULT_MIN_SIZE = 0
+    DEFAULT_MAX_SIZE = 10
+    DEFAULT_CHECKOUT_TIMEOUT = 30
+    DEFAULT_IDLE_TIMEOUT = 300
+
+    def __init__(self, server=None, start_tls=False, simple_bind=None, sasl_bind=None, min_size=None, max_size=None,
+                 checkout_timeout=None, idle_timeout=None, **kwds):
+        if server is None:
+            server = LDAP.DEFAULT_SERVER
+        if isinstance(server, (list, tuple)):
+            server_strategy = kwds.pop('server_strategy', None)
+            if server_strategy is None:
+                server_strategy = LDAP.DEFAULT_SERVER_STRATEGY
+            server = ServerSet(server, server_strategy)
+        if min_size is None:
+            min_size = LDAPPool.DEFAULT_MIN_SIZE
+        if max_size is None:
+            max_size = LDAPPool.DEFAULT_MAX_SIZE
+        if checkout_timeout is None:
+            checkout_timeout = LDAPPool.DEFAULT_CHECKOUT_TIMEOUT
+        if idle_timeout is None:
+            idle_timeout = LDAPPool.DEFAULT_IDLE_TIMEOUT
+
+        if simple_bind and sasl_bind:
+            raise TypeError('choose only one of simple_bind or sasl_bind')
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1')
+        if min_size < 0 or min_size > max_size:
+            raise ValueError('min_size must be between 0 and max_size')
+
+        self.server = server
+        self.start_tls = start_tls
+        self.simple_bind = simple_bind
+        self.sasl_bind = sasl_bind
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.closed = False
+
+        kwds['reuse_connection'] = False
+        self._ldap_kwds = kwds
+
+        # idle connections as (ldap, checkin time) tuples, most recently used on the right
+        self._idle = deque()
+        # number of open connections, both idle and checked out
+        self._size = 0
+        self._cond = threading.Condition(threading.Lock())
+
+        try:
+            for i in range(min_size):
+                self._idle.append((self._new_connection(), time.time()))
+                self._size += 1
+        except Exception:
+            self.close()
+            raise
+
+    def _new_connection(self):
+        """Open, secure, and bind a new connection"""
+        ldap = LDAP(self.server, **self._ldap_kwds)
+        try:
+            if self.start_tls:
+                ldap.start_tls()
+            if self.simple_bind:
+                ldap.simple_bind(**self.simple_bind)
+            if self.sasl_bind:
+                ldap.sasl_bind(**self.sasl_bind)
+        except Exception:
+            self._close_connection(ldap)
+            raise
+        logger.debug('Opened pooled connection #{0} to {1}'.format(ldap.sock.ID, self.server))
+        return ldap
+
+    @staticmethod
+    def _close_connection(ldap):
+        try:
+            ldap.close()
+        except ConnectionUnbound:
+            pass
+        except Exception as e:
+            logger.debug('Error closing pooled connection #{0}: {1}'.format(ldap.sock.ID, e))
+
+    def _take_expired(self):
+        """Remove and return idle connections past the idle timeout beyond min_size. Caller must hold the lock."""
+        expired = []
+        if not self.idle_timeout:
+            return expired
+        cutoff = time.time() - self.idle_timeout
+        while self._idle and self._size > self.min_size and self._idle[0][1] < cutoff:
+            ldap, t = self._idle.popleft()
+            self._size -= 1
+            expired.append(ldap)
+        return expired
+
+    def _close_all(self, connections):
+        for ldap in connections:
+            logger.debug('Closing pooled connection #{0}'.format(ldap.sock.ID))
+            self._close_connection(ldap)
+
+    def checkout(self, timeout=None):
+        """Obtain a ready, bound connection from the pool, opening a new one if none are idle and the pool is not full.
+
+        Every connection obtained this way must be returned with :meth:`checkin`. Prefer :meth:`connection`.
+
+        :param float timeout: Override ``checkout_timeout`` for this call. Set to 0 to wait forever.
+        :return: A ready connection
+        :rtype: LDAP
+        :raises PoolTimeout: if no connection became available before the timeout
+        :raises LDAPError: if the pool has been closed
+        """
+        if timeout is None:
+            timeout = self.checkout_timeout
+        if timeout:
+            deadline = time.time() + timeout
+        discard = []
+        try:
+            with self._cond:
+                while True:
+                    if self.closed:
+                        raise LDAPError('The pool has been closed')
+                    discard.extend(self._take_expired())
+                    while self._idle:
+                        ldap, t = self._idle.pop()
+                        if ldap.sock.is_alive():
+                            return ldap
+                        logger.debug('Discarding dead pooled connection #{0}'.format(ldap.sock.ID))
+                        self._size -= 1
+                        discard.append(ldap)
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    if not timeout:
+                        self._cond.wait()
+                    else:
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            raise PoolTimeout('Timed out waiting for a connection to {0}'.format(self.server))
+                        self._cond.wait(remaining)
+        finally:
+            self._close_all(discard)
+
+        try:
+            return self._new_connection()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def checkin(self, ldap, discard=False):
+        """Return a connection obtained from :meth:`checkout` to the pool.
+
+        :param LDAP ldap: The connection to return.
+        :param bool discard: Set to True to close the connection rather than returning it for reuse, e.g. after a
+                             connection error. Connections that have timed out waiting for a response are always
+                             discarded.
+        """
+        discard = discard or self.closed or ldap.sock.unbound or ldap.sock.suspect
+        with self._cond:
+            if discard:
+                self._size -= 1
+                expired = []
+            else:
+                self._idle.append((ldap, time.time()))
+                expired = self._take_expired()
+            self._cond.notify()
+        if discard:
+            expired.append(ldap)
+        self._close_all(expired)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager to check out a connection and automatically check it back in. The connection is discarded
+        rather than reused if a connection error escapes the block.
+
+        :param float timeout: Override ``checkout_timeout`` for this checkout.
+        :return: A ready connection
+        :rtype: LDAP
+
+        Example::
+
+            with pool.connection() as ldap:
+                for obj in ldap.base.search('(uid=a*)'):
+                    print(obj.dn)
+        """
+        ldap = self.checkout(timeout)
+        try:
+            yield ldap
+        except LDAPConnectionError:
+            self.checkin(ldap, discard=True)
+            raise
+        except BaseException:
+            self.checkin(ldap)
+            raise
+        self.checkin(ldap)
+
+    def evict_idle(self):
+        """Close idle connections that have passed the idle timeout. This also happens automatically on every checkout
+        and checkin."""
+        with self._cond:
+            expired = self._take_expired()
+        self._close_all(expired)
+
+    @property
+    def size(self):
+        """The number of open connections, including those checked out"""
+        return self._size
+
+    @property
+    def idle(self):
+        """The number of open connections waiting in the pool"""
+        return len(self._idle)
+
+    def close(self):
+        """Close all idle connections and prevent further checkouts. Checked out connections are closed when they are
+        checked in."""
+        with self._cond:
+            self.closed = True
+            idle = [ldap for ldap, t in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        self._close_all(idle)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, etype, e, trace):
+        self.close()
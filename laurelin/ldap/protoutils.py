@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 from . import rfc4511
+from .ber import Response
 from .exceptions import UnexpectedResponseType
 from .pyasn1.error import PyAsn1Error
 import logging
@@ -32,7 +33,11 @@ def pack(mid, op, obj, controls=None):
 
 
 def unpack(op, ldap_message):
-    """Unpack an object from an LDAPMessage envelope"""
+    """Unpack an object from an LDAPMessage envelope, or from a :class:`.ber.Response`"""
+    if isinstance(ldap_message, Response):
+        if ldap_message.op == op:
+            return ldap_message.message_id, ldap_message.value, None
+        raise UnexpectedResponseType('Got {0} but expected {1}'.format(ldap_message.op, op))
     mid = ldap_message.getComponentByName('messageID')
     po = ldap_message.getComponentByName('protocolOp')
     controls = ldap_message.getComponentByName('controls')
@@ -44,8 +49,13 @@ def unpack(op, ldap_message):
     raise UnexpectedResponseType('Got {0} but expected {1}'.format(got_op, op))
 
 
-def seq_to_list(seq):
-    """Convert a pyasn1 sequence to a list of strings"""
+def seq_to_list(seq, binary=False, views=False):
+    """Convert a pyasn1 sequence to a list of strings, or bytes if ``binary`` is True, or read-only memoryviews if
+    ``views`` is also True"""
+    if binary:
+        if views:
+            return [memoryview(six.binary_type(seq.getComponentByPosition(i))) for i in range(len(seq))]
+        return [six.binary_type(seq.getComponentByPosition(i)) for i in range(len(seq))]
     ret = []
     for i in range(len(seq)):
         try:
@@ -28,6 +28,10 @@ class SyntaxRule(object):
     DESC = ''
     """Short text description of the rule. Must be defined by subclasses."""
 
+    binary = False
+    """True if values of this syntax are arbitrary octets rather than text. Such values are left as bytes in search
+    results with :attr:`.ValueDecoding.SCHEMA`."""
+
     def __init__(self):
         if self.OID:
             if self.OID in _oid_syntax_rule_objects:
@@ -0,0 +1,241 @@
+"""Provides failover and load balancing across several directory servers"""
+
+from __future__ import absolute_import
+
+from .constants import ServerStrategy
+from .exceptions import LDAPConnectionError
+from .net import LDAPSocket
+
+import logging
+import threading
+import time
+from socket import error as SocketError
+
+logger = logging.getLogger(__name__)
+
+# errors indicating a server could not be reached
+_connection_errors = (LDAPConnectionError, SocketError)
+
+# weight given to each new observation in the moving average of operation latency
+_LATENCY_WEIGHT = 0.2
+
+
+class ServerStats(object):
+    """Load and health information for one server in a :class:`ServerSet`. Sockets connected through the set report
+    their operations here.
+
+    :var str uri: The server URI
+    :var int connections: The number of open sockets to this server
+    :var int outstanding: The number of operations awaiting a response from this server
+    :var float latency: Moving average of seconds from sending a request to receiving its final response, or None if no
+                        operations have completed yet
+    :var float quarantined_until: Timestamp until which the server is excluded from selection after a failure
+    """
+    def __init__(self, uri, lock):
+        self.uri = uri
+        self.connections = 0
+        self.outstanding = 0
+        self.latency = None
+        self.quarantined_until = 0
+        self._lock = lock
+
+    def op_started(self):
+        with self._lock:
+            self.outstanding += 1
+
+    def op_finished(self, elapsed=None):
+        """Record the end of an operation, with its latency if it completed rather than being abandoned"""
+        with self._lock:
+            self.outstanding -= 1
+            if elapsed is not None:
+                if self.latency is None:
+                    self.latency = elapsed
+                else:
+                    self.latency += _LATENCY_WEIGHT * (elapsed - self.latency)
+
+    def detach(self, outstanding):
+        """Record a socket to this server being closed with ``outstanding`` operations still awaiting a response"""
+        with self._lock:
+            self.connections -= 1
+            self.outstanding -= outstanding
+
+    @property
+    def load(self):
+        """Sort key for the least loaded strategy"""
+        return (self.outstanding + 1) * (self.latency or 0), self.connections
+
+
+class ServerSet(object):
+    """A group of equivalent directory servers, such as a set of replicas, to connect to according to a
+    :class:`.ServerStrategy`. Pass to the :class:`.LDAP` or :class:`.LDAPPool` constructor in place of a single URI.
+    Passing a list of URIs to either constructor creates a ServerSet with the ``server_strategy`` given there.
+
+    The same instance may be shared by any number of connections and pools, so that load information is shared too.
+
+    When a server cannot be reached, it is quarantined: it is only tried after all other servers for the next
+    ``quarantine`` seconds. If ``health_check_interval`` is set, a background thread also checks quarantined servers
+    whose quarantine has ended, and quarantines them again if they still cannot be reached.
+
+    :param list[str] uris: The server URIs, in order of preference for :attr:`.ServerStrategy.FAILOVER`.
+    :param str strategy: One of the :class:`.ServerStrategy` constants. Defaults to :attr:`DEFAULT_STRATEGY`.
+    :param float quarantine: Seconds to avoid a server after failing to connect to it.
+    :param float health_check_interval: Seconds between background checks of quarantined servers. Set to 0 to only
+                                        check servers when connecting.
+    :raises ValueError: if no URIs are given or the strategy is unknown
+
+    Example::
+
+        replicas = ServerSet(['ldap://dir01.example.org', 'ldap://dir02.example.org'], ServerStrategy.LEAST_LOADED)
+        pool = LDAPPool(replicas, max_size=20)
+    """
+
+    # global defaults
+    DEFAULT_STRATEGY = ServerStrategy.FAILOVER
+    DEFAULT_QUARANTINE = 30
+    DEFAULT_HEALTH_CHECK_INTERVAL = 10
+
+    def __init__(self, uris, strategy=None, quarantine=None, health_check_interval=None):
+        if strategy is None:
+            strategy = ServerSet.DEFAULT_STRATEGY
+        if quarantine is None:
+            quarantine = ServerSet.DEFAULT_QUARANTINE
+        if health_check_interval is None:
+            health_check_interval = ServerSet.DEFAULT_HEALTH_CHECK_INTERVAL
+
+        uris = list(uris)
+        if not uris:
+            raise ValueError('At least one server URI is required')
+        if strategy not in ServerStrategy.ALL:
+            raise ValueError('Unknown server strategy {0}'.format(strategy))
+
+        self.uris = uris
+        self.strategy = strategy
+        self.quarantine = quarantine
+        self.health_check_interval = health_check_interval
+
+        self._lock = threading.Lock()
+        self._stats = [ServerStats(uri, self._lock) for uri in uris]
+        self._next = 0
+        self._health_checker = None
+        # connection parameters used to check server health
+        self._check_params = ()
+
+    def __repr__(self):
+        return 'ServerSet({0!r}, {1!r})'.format(self.uris, self.strategy)
+
+    def stats(self, uri):
+        """Get the load and health information for a server.
+
+        :param str uri: The server URI
+        :rtype: ServerStats
+        """
+        for stats in self._stats:
+            if stats.uri == uri:
+                return stats
+        raise KeyError(uri)
+
+    def _ordered(self):
+        """Order the servers by the selection strategy. Caller must hold the lock."""
+        if self.strategy == ServerStrategy.ROUND_ROBIN:
+            i = self._next % len(self._stats)
+            self._next += 1
+            return self._stats[i:] + self._stats[:i]
+        elif self.strategy == ServerStrategy.LEAST_LOADED:
+            return sorted(self._stats, key=lambda stats: stats.load)
+        else:
+            return list(self._stats)
+
+    def candidates(self):
+        """Get the server URIs in the order they should be tried for a new connection. Quarantined servers come last, in
+        the order their quarantine ends.
+
+        :rtype: list[str]
+        """
+        now = time.time()
+        with self._lock:
+            ordered = self._ordered()
+        available = [stats for stats in ordered if stats.quarantined_until <= now]
+        quarantined = sorted((stats for stats in ordered if stats.quarantined_until > now),
+                             key=lambda stats: stats.quarantined_until)
+        return [stats.uri for stats in available + quarantined]
+
+    @property
+    def quarantined(self):
+        """The URIs of servers currently in quarantine"""
+        now = time.time()
+        return [stats.uri for stats in self._stats if stats.quarantined_until > now]
+
+    def connect(self, *sock_params):
+        """Open a socket to the first server that accepts a connection, in the order given by :meth:`candidates`.
+
+        :param sock_params: Additional :class:`.LDAPSocket` constructor arguments
+        :return: The connected socket, reporting its load to this set
+        :rtype: LDAPSocket
+        :raises LDAPConnectionError: if no server could be reached
+        """
+        self._check_params = sock_params[:5]
+        errors = []
+        for uri in self.candidates():
+            try:
+                sock = LDAPSocket(uri, *sock_params)
+            except _connection_errors as e:
+                logger.info('Failed to connect to {0}: {1}'.format(uri, e))
+                self.mark_failed(uri)
+                errors.append('{0}: {1}'.format(uri, e))
+                continue
+            stats = self.stats(uri)
+            with self._lock:
+                stats.quarantined_until = 0
+                stats.connections += 1
+            sock.server_stats = stats
+            return sock
+        raise LDAPConnectionError('Could not connect to any server ({0})'.format('; '.join(errors)))
+
+    def mark_failed(self, uri):
+        """Quarantine a server.
+
+        :param str uri: The server URI
+        """
+        stats = self.stats(uri)
+        with self._lock:
+            stats.quarantined_until = time.time() + self.quarantine
+            if self.health_check_interval and self._health_checker is None:
+                self._health_checker = threading.Thread(target=self._health_check_loop,
+                                                        name='laurelin-health-check')
+                self._health_checker.daemon = True
+                self._health_checker.start()
+        logger.info('Quarantined {0} for {1}s'.format(uri, self.quarantine))
+
+    def check_health(self):
+        """Try connecting to each quarantined server whose quarantine has ended, quarantining it again if it still
+        cannot be reached. This happens automatically every ``health_check_interval`` seconds while any servers are
+        quarantined.
+
+        :return: The URIs of servers that passed the check
+        :rtype: list[str]
+        """
+        now = time.time()
+        healthy = []
+        for stats in self._stats:
+            if not stats.quarantined_until or stats.quarantined_until > now:
+                continue
+            try:
+                LDAPSocket(stats.uri, *self._check_params).close()
+            except _connection_errors as e:
+                logger.info('Health check failed for {0}: {1}'.format(stats.uri, e))
+                self.mark_failed(stats.uri)
+                continue
+            logger.info('Health check passed for {0}'.format(stats.uri))
+            with self._lock:
+                stats.quarantined_until = 0
+            healthy.append(stats.uri)
+        return healthy
+
+    def _health_check_loop(self):
+        while True:
+            time.sleep(self.health_check_interval)
+            self.check_health()
+            with self._lock:
+                if not any(stats.quarantined_until for stats in self._stats):
+                    self._health_checker = None
+                    return
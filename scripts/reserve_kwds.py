@@ -28,6 +28,8 @@ def find_kwds_list(reserve_from):
     reserved_kwds = set()
 
     for f in reserve_from:
+        # look through decorators to the original signature
+        f = getattr(f, '__wrapped__', f)
         reserved_kwds.update(getargspec(f).args)
 
     # convert to list so that we can sort it and generate the code in deterministic order
@@ -108,6 +110,8 @@ def update_control_keywords():
         LDAP.simple_bind,
         LDAP.sasl_bind,
         LDAP.search,
+        LDAP.get_many,
+        LDAPObject.find_many,
         LDAP.compare,
         LDAP.add,
         LDAP.delete,
@@ -0,0 +1,219 @@
+"""AsyncLDAP test cases. Imported by test_aio on Python 3.7 and later only."""
+
+from laurelin.ldap import rfc4511, protoutils, LazyLDAPObject, ResultFormat
+from laurelin.ldap.aio import AsyncLDAP, AsyncLDAPSocket
+from laurelin.ldap.exceptions import LDAPConnectionError, LDAPError, NoSearchResults
+from laurelin.ldap.net import PDUFramer, LDAPSocket
+from laurelin.ldap.pyasn1.codec.ber.encoder import encode as ber_encode
+import asyncio
+import unittest
+
+BASE_DN = 'dc=example,dc=org'
+
+
+def encode_result(mid, cls, op, result_code=protoutils.RESULT_success):
+    res = cls()
+    res.setComponentByName('resultCode', result_code)
+    res.setComponentByName('matchedDN', rfc4511.LDAPDN(''))
+    res.setComponentByName('diagnosticMessage', rfc4511.LDAPString(''))
+    return ber_encode(protoutils.pack(mid, op, res))
+
+
+def encode_entry(mid, dn, attrs):
+    sre = rfc4511.SearchResultEntry()
+    sre.setComponentByName('objectName', rfc4511.LDAPDN(dn))
+    pal = rfc4511.PartialAttributeList()
+    for i, (attr, vals) in enumerate(attrs.items()):
+        pa = rfc4511.PartialAttribute()
+        pa.setComponentByName('type', rfc4511.AttributeDescription(attr))
+        _vals = rfc4511.Vals()
+        for j, val in enumerate(vals):
+            _vals.setComponentByPosition(j, rfc4511.AttributeValue(val))
+        pa.setComponentByName('vals', _vals)
+        pal.setComponentByPosition(i, pa)
+    sre.setComponentByName('attributes', pal)
+    return ber_encode(protoutils.pack(mid, 'searchResEntry', sre))
+
+
+class MockServer(object):
+    """Minimal LDAP server answering requests with canned responses.
+
+    Search requests with a base DN of ``ou=N,...`` get N entries in response. Searches take ``delay`` seconds for
+    entries to be sent, and are answered in the order they complete rather than the order they arrive.
+    """
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.requests = []
+        self.writers = []
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return 'ldap://127.0.0.1:{0}'.format(port)
+
+    async def stop(self):
+        for writer in self.writers:
+            writer.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        self.writers.append(writer)
+        framer = PDUFramer()
+        while True:
+            data = await reader.read(4096)
+            if not data:
+                break
+            framer.feed(data)
+            for pdu in framer:
+                msg = LDAPSocket._decode_pdu(pdu)
+                op = msg.getComponentByName('protocolOp').getName()
+                self.requests.append(op)
+                if op == 'unbindRequest':
+                    writer.close()
+                    return
+                asyncio.ensure_future(self.respond(writer, msg, op))
+
+    async def respond(self, writer, msg, op):
+        mid = msg.getComponentByName('messageID')
+        if op == 'searchRequest':
+            req = msg.getComponentByName('protocolOp').getComponent()
+            base = str(req.getComponentByName('baseObject'))
+            if base == '':
+                writer.write(encode_entry(mid, '', {'namingContexts': [BASE_DN]}))
+            elif base.startswith('ou='):
+                await asyncio.sleep(self.delay)
+                for i in range(int(base.split(',')[0][3:])):
+                    writer.write(encode_entry(mid, 'cn={0},{1}'.format(i, base), {'cn': [str(i)]}))
+            writer.write(encode_result(mid, rfc4511.SearchResultDone, 'searchResDone'))
+        elif op == 'bindRequest':
+            writer.write(encode_result(mid, rfc4511.BindResponse, 'bindResponse'))
+        elif op == 'compareRequest':
+            writer.write(encode_result(mid, rfc4511.CompareResponse, 'compareResponse',
+                                       protoutils.RESULT_compareTrue))
+        elif op == 'delRequest':
+            writer.write(encode_result(mid, rfc4511.DelResponse, 'delResponse', protoutils.RESULT_noSuchObject))
+        elif op == 'modifyRequest':
+            writer.write(encode_result(mid, rfc4511.ModifyResponse, 'modifyResponse'))
+
+
+class AsyncTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(self._with_timeout(coro))
+
+    async def _with_timeout(self, coro):
+        return await asyncio.wait_for(coro, 10)
+
+
+class TestAsyncLDAP(AsyncTestCase):
+    def test_operations(self):
+        """Ensure basic operations work end to end"""
+        async def run():
+            server = MockServer()
+            uri = await server.start()
+            try:
+                async with AsyncLDAP(uri) as ldap:
+                    self.assertEqual(ldap.base_dn, BASE_DN)
+                    await ldap.simple_bind(username='cn=admin,' + BASE_DN, password='secret')
+                    self.assertTrue(ldap.sock.bound)
+
+                    dns = []
+                    async for obj in ldap.search('ou=3,' + BASE_DN):
+                        dns.append(obj.dn)
+                    self.assertEqual(dns, ['cn=0,ou=3,' + BASE_DN, 'cn=1,ou=3,' + BASE_DN, 'cn=2,ou=3,' + BASE_DN])
+
+                    obj = await ldap.get('ou=1,' + BASE_DN)
+                    self.assertEqual(obj.get_attr('cn'), ['0'])
+                    columns = await ldap.search('ou=3,' + BASE_DN).to_columns(['cn'])
+                    self.assertEqual(columns['cn'], ['0', '1', '2'])
+                    chunks = [chunk async for chunk in ldap.search('ou=3,' + BASE_DN).iter_columns(['cn'], 2)]
+                    self.assertEqual([chunk['cn'] for chunk in chunks], [['0', '1'], ['2']])
+                    obj = await ldap.get('ou=1,' + BASE_DN, result_format=ResultFormat.LAZY)
+                    self.assertIsInstance(obj, LazyLDAPObject)
+                    self.assertIsNone(obj.ldap_conn)
+                    self.assertEqual(obj.get_attr('cn'), ['0'])
+                    with self.assertRaises(NoSearchResults):
+                        await ldap.get('ou=0,' + BASE_DN)
+
+                    self.assertTrue(await ldap.compare('cn=0,' + BASE_DN, 'cn', '0'))
+                    with self.assertRaises(LDAPError):
+                        await ldap.delete('cn=missing,' + BASE_DN)
+
+                    ldif = ('dn: cn=0,ou=1,{0}\n'
+                            'changetype: modify\n'
+                            'replace: cn\n'
+                            'cn: zero\n'
+                            '-\n'
+                            '\n'.format(BASE_DN))
+                    results = await ldap.process_ldif(ldif)
+                    self.assertEqual(len(results), 1)
+                    self.assertEqual(server.requests[-1], 'modifyRequest')
+                self.assertTrue(ldap.sock.unbound)
+                for i in range(100):
+                    if server.requests[-1] == 'unbindRequest':
+                        break
+                    await asyncio.sleep(0.01)
+                self.assertEqual(server.requests[-1], 'unbindRequest')
+            finally:
+                await server.stop()
+        self.run_async(run())
+
+    def test_concurrent_searches(self):
+        """Ensure concurrent tasks sharing a connection each receive only their own results"""
+        async def run():
+            server = MockServer(delay=0.05)
+            uri = await server.start()
+            try:
+                async with AsyncLDAP(uri) as ldap:
+                    async def count(n):
+                        return len([obj async for obj in ldap.search('ou={0},{1}'.format(n, BASE_DN))])
+
+                    counts = await asyncio.gather(*[count(n) for n in range(1, 9)])
+                    self.assertEqual(counts, list(range(1, 9)))
+            finally:
+                await server.stop()
+        self.run_async(run())
+
+    def test_connection_closed(self):
+        """Ensure pending operations fail when the server closes the connection"""
+        async def run():
+            server = MockServer(delay=1)
+            uri = await server.start()
+            try:
+                ldap = await AsyncLDAP(uri).open()
+                search = ldap.search('ou=1,' + BASE_DN)
+                await asyncio.sleep(0.05)
+                for writer in server.writers:
+                    writer.close()
+                with self.assertRaises(LDAPConnectionError):
+                    async for obj in search:
+                        pass
+                with self.assertRaises(LDAPConnectionError):
+                    await ldap.get('ou=1,' + BASE_DN)
+                ldap.sock.close()
+            finally:
+                await server.stop()
+        self.run_async(run())
+
+    def test_connect_failure(self):
+        """Ensure a refused connection raises LDAPConnectionError"""
+        async def run():
+            server = MockServer()
+            uri = await server.start()
+            await server.stop()
+            with self.assertRaises(LDAPConnectionError):
+                await AsyncLDAPSocket(uri).connect()
+        self.run_async(run())
+
+    def test_sync_use_rejected(self):
+        """Ensure AsyncLDAP cannot be used as a synchronous context manager"""
+        with self.assertRaises(TypeError):
+            with AsyncLDAP('ldap://127.0.0.1:1'):
+                pass
@@ -13,6 +13,7 @@ from .mock_saslclient import MockSASLClient
 class MockLDAPSocket(LDAPSocket):
     def __init__(self, *args, **kwds):
         self._prop_init()
+        self._io_init()
         self._outgoing_queue = deque()
         self._sock = None
         self._incoming_queue = deque()
@@ -98,7 +99,7 @@ class MockLDAPSocket(LDAPSocket):
         }),
         self.add_search_res_done('')
 
-    def send_message(self, op, obj, controls=None):
+    def send_message(self, op, obj, controls=None, deadline=None):
         """Pack and send a message"""
         mid, raw = self._prep_message(op, obj, controls)
         self._incoming_queue.append(raw)
@@ -119,12 +120,9 @@ class MockLDAPSocket(LDAPSocket):
         """Obtain the number of sent messages"""
         return len(self._incoming_queue)
 
-    def recv_messages(self, want_message_id):
+    def recv_messages(self, want_message_id, deadline=None):
         while self._outgoing_queue:
-            raw = self._outgoing_queue.popleft()
-            lm, raw = ber_decode(raw, asn1Spec=rfc4511.LDAPMessage())
-            if raw:
-                raise Exception('Unexpected leftover bits')
+            lm = self._decode_incoming(self._outgoing_queue.popleft())
             have_message_id = lm.getComponentByName('messageID')
             if have_message_id != want_message_id:
                 raise Exception('Unexpected message ID in mock queue (have={0} want={1})'.format(
@@ -132,6 +130,16 @@ class MockLDAPSocket(LDAPSocket):
             yield lm
         raise Exception('No messages in mock queue')
 
+    def recv_any(self, message_ids, deadline=None):
+        if not self._outgoing_queue:
+            raise Exception('No messages in mock queue')
+        lm = self._decode_pdu(self._outgoing_queue.popleft())
+        have_message_id = lm.getComponentByName('messageID')
+        if have_message_id not in message_ids:
+            raise Exception('Unexpected message ID in mock queue (have={0} want one of {1})'.format(
+                            have_message_id, list(message_ids)))
+        return lm
+
     def close(self):
         pass
 
@@ -0,0 +1,4 @@
+import sys
+
+if sys.version_info >= (3, 7):
+    from .aio_cases import TestAsyncLDAP
@@ -2,6 +2,7 @@ from laurelin.ldap.attributetype import (
     AttributeType,
     DefaultAttributeType,
     get_attribute_type,
+    is_binary,
 )
 from laurelin.ldap.exceptions import LDAPSchemaError
 from .utils import clear_attribute_types, load_schema
@@ -179,6 +180,28 @@ def test_getAttributeType():
         clear_attribute_types()
 
 
+def test_is_binary():
+    load_schema()
+    AttributeType('''
+      ( 1.2.3.4 NAME 'testPhoto'
+        SYNTAX 1.3.6.1.4.1.1466.115.121.1.28 )
+    ''').register()
+    AttributeType('''
+      ( 1.2.3.5 NAME 'testName'
+        SYNTAX 1.3.6.1.4.1.1466.115.121.1.15 )
+    ''').register()
+
+    try:
+        assert is_binary('testPhoto') is True
+        assert is_binary('TESTPHOTO;x-option') is True
+        assert is_binary('1.2.3.4') is True
+        assert is_binary('testName') is False
+        assert is_binary('testName;binary') is True
+        assert is_binary('undefined') is None
+    finally:
+        clear_attribute_types()
+
+
 def test_default():
     test = get_attribute_type('foo')
     try:
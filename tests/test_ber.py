@@ -0,0 +1,196 @@
+from .mock_ldapsocket import MockLDAPSocket
+from laurelin.ldap import ber, rfc4511, protoutils, Scope, DerefAliases, Mod
+from laurelin.ldap.filter import parse as parse_filter
+from laurelin.ldap.base import SearchResultHandle
+from laurelin.ldap.net import LDAPSocket
+from laurelin.ldap.pyasn1.codec.ber.decoder import decode as ber_decode
+from laurelin.ldap.pyasn1.codec.ber.encoder import encode as ber_encode
+import unittest
+
+
+def encoded_messages(mock_sock):
+    """Remove and return the encoded messages queued on a mock socket"""
+    raws = list(mock_sock._outgoing_queue)
+    mock_sock._outgoing_queue.clear()
+    return raws
+
+
+class TestDecodeResponse(unittest.TestCase):
+    def test_search_messages(self):
+        """Ensure search responses decode to the same values as the pyasn1 path"""
+        mock_sock = MockLDAPSocket()
+        mock_sock.add_search_res_entry('cn=foo,o=testing', {
+            'cn': ['foo', u'föö'],
+            'description': ['x' * 300],
+        })
+        mock_sock.add_search_res_entry('cn=empty,o=testing', {})
+        mock_sock.add_search_res_ref(['ldap://ref.example.org/o=testing'])
+        mock_sock.add_search_res_done('', referral=['ldap://a.example.org/o=testing', 'ldap://b.example.org'])
+        for raw in encoded_messages(mock_sock):
+            fast = ber.decode_response(raw)
+            self.assertIsInstance(fast, ber.Response)
+            slow, leftover = ber_decode(raw, asn1Spec=rfc4511.LDAPMessage())
+            op, mid, value, ctrls = SearchResultHandle._unpack_search_message(slow)
+            self.assertEqual(SearchResultHandle._unpack_search_message(fast), (op, int(mid), value, None))
+
+    def test_binary_value(self):
+        """Ensure values that are not valid UTF-8 are returned as bytes"""
+        mock_sock = MockLDAPSocket()
+        mock_sock.add_search_res_entry('cn=foo,o=testing', {'jpegPhoto': [b'\xff\xd8\xff\xe0']})
+        raw, = encoded_messages(mock_sock)
+        entry = ber.decode_response(raw).value
+        self.assertEqual(entry.decode_all(), {'jpegPhoto': [b'\xff\xd8\xff\xe0']})
+
+    def test_views(self):
+        """Ensure binary values can be read as read-only views of the received message"""
+        mock_sock = MockLDAPSocket()
+        mock_sock.add_search_res_entry('cn=foo,o=testing', {'jpegPhoto': [b'\xff\xd8' * 100, b'text'], 'cn': ['foo']})
+        raw, = encoded_messages(mock_sock)
+        entry = ber.decode_response(raw).value
+        views = entry.decode('jpegPhoto', binary=True, views=True)
+        self.assertEqual([bytes(view) for view in views], [b'\xff\xd8' * 100, b'text'])
+        for view in views:
+            self.assertIsInstance(view, memoryview)
+            self.assertTrue(view.readonly)
+        self.assertEqual(entry.decode_all(lambda attr: attr == 'jpegPhoto', views=True)['cn'], ['foo'])
+
+    def test_peek_search_entry(self):
+        """Ensure only search result entries for the given message IDs are left undecoded"""
+        mock_sock = MockLDAPSocket()
+        mock_sock.add_search_res_entry('cn=foo,o=testing', {'cn': ['foo']})
+        mock_sock.add_search_res_done('o=testing')
+        entry, done = encoded_messages(mock_sock)
+        peeked = ber.peek_search_entry(entry, {1})
+        self.assertEqual(peeked.message_id, 1)
+        self.assertEqual(peeked.value.pdu, entry)
+        self.assertIsNone(ber.peek_search_entry(entry, {2}))
+        self.assertIsNone(ber.peek_search_entry(done, {1}))
+        self.assertIsNone(ber.peek_search_entry(entry[:-1], {1}))
+
+    def test_results(self):
+        """Ensure result-only responses decode with their result code, matched DN, and diagnostic message"""
+        mock_sock = MockLDAPSocket()
+        mock_sock.add_ldap_result(rfc4511.ModifyResponse, 'modifyResponse', dn='o=testing',
+                                  result_code=rfc4511.ResultCode('noSuchObject'), msg='no such object')
+        raw, = encoded_messages(mock_sock)
+        mid, res, ctrls = protoutils.unpack('modifyResponse', ber.decode_response(raw))
+        self.assertEqual(mid, 1)
+        self.assertEqual(res.getComponentByName('resultCode'), protoutils.RESULT_noSuchObject)
+        self.assertEqual(res.getComponentByName('matchedDN'), 'o=testing')
+        self.assertEqual(res.getComponentByName('diagnosticMessage'), 'no such object')
+        self.assertIsNone(ctrls)
+
+    def test_fallback(self):
+        """Ensure messages not handled by the fast path are left to pyasn1"""
+        mock_sock = MockLDAPSocket()
+        ctrls = rfc4511.Controls()
+        ctrl = rfc4511.Control()
+        ctrl.setComponentByName('controlType', rfc4511.LDAPOID('1.2.3.4'))
+        ctrls.setComponentByPosition(0, ctrl)
+        mock_sock.add_search_res_done('', controls=ctrls)
+        mock_sock.add_bind_success()
+        mock_sock.add_ldap_result(rfc4511.ExtendedResponse, 'extendedResp')
+        for raw in encoded_messages(mock_sock):
+            self.assertIsNone(ber.decode_response(raw))
+            self.assertIsInstance(LDAPSocket._decode_pdu(raw), rfc4511.LDAPMessage)
+
+        mock_sock.add_search_res_entry('cn=foo,o=testing', {'cn': ['foo']})
+        raw, = encoded_messages(mock_sock)
+        self.assertIsInstance(LDAPSocket._decode_pdu(raw), ber.Response)
+        for bad in (raw[:-1], raw[:2] + b'\x05' + raw[3:], b'\x30\x80' + raw[2:]):
+            self.assertIsNone(ber.decode_response(bad))
+
+
+def attribute(cls, attr, vals):
+    """Create a pyasn1 Attribute or PartialAttribute"""
+    a = cls()
+    a.setComponentByName('type', rfc4511.AttributeDescription(attr))
+    _vals = rfc4511.Vals()
+    for i, val in enumerate(vals):
+        _vals.setComponentByPosition(i, rfc4511.AttributeValue(val))
+    a.setComponentByName('vals', _vals)
+    return a
+
+
+class TestEncodeMessage(unittest.TestCase):
+    def assertEncodesLike(self, request, op, obj, controls=None):
+        for mid in (1, 127, 128, 300, 2 ** 31 - 1):
+            self.assertEqual(ber.encode_message(mid, request, controls),
+                             ber_encode(protoutils.pack(mid, op, obj, controls)))
+
+    def test_search(self):
+        """Ensure search requests encode identically to pyasn1"""
+        for scope, deref, limit, timeout, types_only, filter, attrs in (
+            (Scope.BASE, DerefAliases.NEVER, 0, 0, False, '(objectClass=*)', ['*']),
+            (Scope.ONELEVEL, DerefAliases.ALWAYS, 1, 128, True, '(&(cn=f\\2a*)(!(uid=x)))', ['cn', '+']),
+            (Scope.SUBTREE, DerefAliases.SEARCH, 100000, 30, False, u'(cn=f\u00f6\u00f6)', []),
+        ):
+            base_dn = 'ou=' + 'x' * 300 + ',o=testing'
+            req = rfc4511.SearchRequest()
+            req.setComponentByName('baseObject', rfc4511.LDAPDN(base_dn))
+            req.setComponentByName('scope', scope)
+            req.setComponentByName('derefAliases', deref)
+            req.setComponentByName('sizeLimit', rfc4511.Integer0ToMax(limit))
+            req.setComponentByName('timeLimit', rfc4511.Integer0ToMax(timeout))
+            req.setComponentByName('typesOnly', rfc4511.TypesOnly(types_only))
+            req.setComponentByName('filter', parse_filter(filter))
+            _attrs = rfc4511.AttributeSelection()
+            for i, attr in enumerate(attrs):
+                _attrs.setComponentByPosition(i, rfc4511.LDAPString(attr))
+            req.setComponentByName('attributes', _attrs)
+            self.assertEncodesLike(ber.SearchRequest(base_dn, scope, deref, limit, timeout, types_only,
+                                                     parse_filter(filter), attrs),
+                                   'searchRequest', req)
+
+    def test_modify(self):
+        """Ensure modify requests encode identically to pyasn1"""
+        changes = [(Mod.ADD, 'cn', ['foo', u'f\u00f6\u00f6']),
+                   (Mod.REPLACE, 'jpegPhoto', [b'\xff\xd8' * 200]),
+                   (Mod.DELETE, 'description', [])]
+        mr = rfc4511.ModifyRequest()
+        mr.setComponentByName('object', rfc4511.LDAPDN('cn=foo,o=testing'))
+        cl = rfc4511.Changes()
+        for i, (op, attr, vals) in enumerate(changes):
+            c = rfc4511.Change()
+            c.setComponentByName('operation', op)
+            c.setComponentByName('modification', attribute(rfc4511.PartialAttribute, attr, vals))
+            cl.setComponentByPosition(i, c)
+        mr.setComponentByName('changes', cl)
+        self.assertEncodesLike(ber.ModifyRequest('cn=foo,o=testing', changes), 'modifyRequest', mr)
+
+    def test_add(self):
+        """Ensure add requests encode identically to pyasn1"""
+        attrs = [('objectClass', ['top', 'person']), ('cn', [u'f\u00f6\u00f6']), ('userPassword', [b'\x00\xff'])]
+        ar = rfc4511.AddRequest()
+        ar.setComponentByName('entry', rfc4511.LDAPDN('cn=foo,o=testing'))
+        al = rfc4511.AttributeList()
+        for i, (attr, vals) in enumerate(attrs):
+            al.setComponentByPosition(i, attribute(rfc4511.Attribute, attr, vals))
+        ar.setComponentByName('attributes', al)
+        self.assertEncodesLike(ber.AddRequest('cn=foo,o=testing', attrs), 'addRequest', ar)
+
+    def test_compare(self):
+        """Ensure compare requests encode identically to pyasn1"""
+        cr = rfc4511.CompareRequest()
+        cr.setComponentByName('entry', rfc4511.LDAPDN('cn=foo,o=testing'))
+        ava = rfc4511.AttributeValueAssertion()
+        ava.setComponentByName('attributeDesc', rfc4511.AttributeDescription('cn'))
+        ava.setComponentByName('assertionValue', rfc4511.AssertionValue(u'f\u00f6\u00f6'))
+        cr.setComponentByName('ava', ava)
+        self.assertEncodesLike(ber.CompareRequest('cn=foo,o=testing', 'cn', u'f\u00f6\u00f6'), 'compareRequest', cr)
+
+    def test_simple_requests(self):
+        """Ensure delete, abandon, and unbind requests, and request controls, encode identically to pyasn1"""
+        ctrls = rfc4511.Controls()
+        ctrl = rfc4511.Control()
+        ctrl.setComponentByName('controlType', rfc4511.LDAPOID('1.2.3.4'))
+        ctrl.setComponentByName('criticality', True)
+        ctrls.setComponentByPosition(0, ctrl)
+
+        self.assertEncodesLike(ber.DelRequest('cn=foo,o=testing'), 'delRequest', rfc4511.DelRequest('cn=foo,o=testing'))
+        self.assertEncodesLike(ber.DelRequest('cn=foo,o=testing'), 'delRequest', rfc4511.DelRequest('cn=foo,o=testing'),
+                               ctrls)
+        for mid in (0, 1, 128, 70000):
+            self.assertEncodesLike(ber.AbandonRequest(mid), 'abandonRequest', rfc4511.AbandonRequest(mid))
+            self.assertEqual(int(ber.AbandonRequest(mid)), mid)
+        self.assertEncodesLike(ber.UnbindRequest(), 'unbindRequest', rfc4511.UnbindRequest())
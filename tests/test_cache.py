@@ -0,0 +1,263 @@
+from .mock_ldapsocket import MockLDAPSocket
+from laurelin.ldap import LDAP, EntryCache, Mod, NoSearchResults
+from laurelin.ldap.config import create_connection
+import laurelin.ldap.cache
+import unittest
+from . import utils
+
+mock = utils.get_mock()
+
+
+class TestEntryCache(unittest.TestCase):
+    def test_lru(self):
+        """Ensure the least recently used entries are evicted to stay within the size limits"""
+        cache = EntryCache(maxsize=2, maxbytes=100)
+        for dn in ('cn=a,o=testing', 'cn=b,o=testing', 'cn=c,o=testing'):
+            cache._put(cache._key(dn, None, None), dn, {'cn': ['x']}, 0)
+            cache._get(cache._key('cn=a,o=testing', None, None))
+        self.assertIsNotNone(cache._get(cache._key('CN=A, O=Testing', None, None)))
+        self.assertIsNone(cache._get(cache._key('cn=b,o=testing', None, None)))
+        self.assertEqual(cache.info().evictions, 1)
+
+        cache._put(cache._key('cn=big,o=testing', None, None), 'cn=big,o=testing', {'cn': ['x' * 70]}, 0)
+        info = cache.info()
+        self.assertEqual(info.size, 1)
+        self.assertEqual(info.bytes, len('cn=big,o=testing') + 2 + 70)
+
+    def test_ttl(self):
+        """Ensure entries expire"""
+        cache = EntryCache(ttl=10)
+        key = cache._key('cn=a,o=testing', ['cn'], None)
+        with mock.patch.object(laurelin.ldap.cache.time, 'time', return_value=100):
+            cache._put(key, 'cn=a,o=testing', {'cn': ['a']}, 0)
+        with mock.patch.object(laurelin.ldap.cache.time, 'time', return_value=105):
+            self.assertEqual(cache._get(key), ('cn=a,o=testing', {'cn': ('a',)}))
+        with mock.patch.object(laurelin.ldap.cache.time, 'time', return_value=111):
+            self.assertIsNone(cache._get(key))
+        self.assertEqual(cache.info()[:2], (1, 1))
+        self.assertEqual(cache.info().size, 0)
+
+    def test_invalidate(self):
+        """Ensure invalidation discards every attribute selection for a DN, and optionally its subtree"""
+        cache = EntryCache()
+        for dn, attrs in (('ou=a,o=testing', None), ('ou=a,o=testing', ['cn']), ('cn=x,ou=a,o=testing', None),
+                          ('ou=ab,o=testing', None)):
+            cache._put(cache._key(dn, attrs, None), dn, {}, 0)
+        cache.invalidate('OU=A,O=TESTING')
+        self.assertEqual(cache.info().size, 2)
+        cache.invalidate('ou=a,o=testing', subtree=True)
+        self.assertEqual(cache.info().size, 1)
+        self.assertEqual(cache.info().invalidations, 3)
+
+        # entries fetched while an invalidation happened are not stored
+        generation = cache._generation
+        cache.invalidate('cn=y,o=testing')
+        cache._put(cache._key('cn=y,o=testing', None, None), 'cn=y,o=testing', {}, generation)
+        self.assertEqual(cache.info().size, 1)
+
+    def test_negative(self):
+        """Ensure missing DNs are remembered until they expire or are invalidated"""
+        cache = EntryCache(negative_ttl=5)
+        with mock.patch.object(laurelin.ldap.cache.time, 'time', return_value=100):
+            cache._put_absent('cn=a,o=testing', 0)
+            cache._put_absent('cn=b,o=testing', 0)
+            cache._put_absent('cn=x,cn=b,o=testing', 0)
+            self.assertTrue(cache._is_absent('cn=a,o=testing'))
+            self.assertFalse(cache._is_absent('cn=c,o=testing'))
+        with mock.patch.object(laurelin.ldap.cache.time, 'time', return_value=106):
+            self.assertFalse(cache._is_absent('cn=a,o=testing'))
+        self.assertEqual(cache.info().negative_size, 2)
+        cache.invalidate('cn=b,o=testing', subtree=True)
+        self.assertEqual(cache.info().negative_size, 0)
+        self.assertEqual(cache.info().negative_hits, 1)
+
+        generation = cache._generation
+        cache.invalidate('cn=a,o=testing')
+        cache._put_absent('cn=a,o=testing', generation)
+        self.assertFalse(cache._is_absent('cn=a,o=testing'))
+
+    def test_bloom_filter(self):
+        """Ensure the Bloom filter has no false negatives and about the expected false positive rate"""
+        bloom = laurelin.ldap.cache._BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(u'cn=user{0},o=testing'.format(i))
+        for i in range(1000):
+            self.assertIn(u'cn=user{0},o=testing'.format(i), bloom)
+        false_positives = sum(u'cn=other{0},o=testing'.format(i) in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class TestLDAPEntryCache(unittest.TestCase):
+    def setUp(self):
+        self.mock_sock = MockLDAPSocket()
+        self.mock_sock.add_root_dse()
+        self.cache = EntryCache()
+        self.ldap = LDAP(self.mock_sock, entry_cache=self.cache)
+        self.mock_sock.clear_sent()
+
+    def test_get(self):
+        """Ensure repeated gets are answered from the cache until the object is changed"""
+        self.mock_sock.add_search_res_entry('cn=foo,o=testing', {'cn': ['foo']})
+        self.mock_sock.add_search_res_done('cn=foo,o=testing')
+
+        obj = self.ldap.get('cn=foo,o=testing')
+        obj['cn'].append('bar')
+        cached = self.ldap.get('CN=foo, o=testing')
+        self.assertEqual(self.mock_sock.num_sent(), 1)
+        self.assertEqual(cached.dn, 'cn=foo,o=testing')
+        self.assertEqual(cached['cn'], ['foo'])
+        self.assertIs(cached.ldap_conn, self.ldap)
+        self.assertEqual(self.cache.info()[:2], (1, 1))
+
+        # a different attribute selection is cached separately
+        self.mock_sock.add_search_res_entry('cn=foo,o=testing', {'cn': ['foo']})
+        self.mock_sock.add_search_res_done('cn=foo,o=testing')
+        self.ldap.get('cn=foo,o=testing', ['cn'])
+        self.assertEqual(self.mock_sock.num_sent(), 2)
+
+        self.mock_sock.add_ldap_result(laurelin.ldap.rfc4511.ModifyResponse, 'modifyResponse')
+        self.ldap.modify('cn=foo,o=testing', [Mod(Mod.ADD, 'cn', ['bar'])])
+        self.assertEqual(self.cache.info().size, 0)
+
+        self.mock_sock.add_search_res_entry('cn=foo,o=testing', {'cn': ['foo', 'bar']})
+        self.mock_sock.add_search_res_done('cn=foo,o=testing')
+        self.assertEqual(self.ldap.get('cn=foo,o=testing')['cn'], ['foo', 'bar'])
+        self.assertEqual(self.mock_sock.num_sent(), 4)
+
+    def test_write_response(self):
+        """Ensure entries fetched while a write is outstanding are discarded once its response arrives"""
+        # the search sent after the modify request is answered first
+        modify_mid = self.mock_sock._next_add_message_id
+        self.mock_sock._next_add_message_id = modify_mid + 1
+        self.mock_sock.add_search_res_entry('cn=foo,o=testing', {'cn': ['foo']})
+        self.mock_sock.add_search_res_done('cn=foo,o=testing')
+        self.mock_sock._next_add_message_id = modify_mid
+        self.mock_sock.add_ldap_result(laurelin.ldap.rfc4511.ModifyResponse, 'modifyResponse')
+
+        pipe = self.ldap.pipeline()
+        pipe.modify('cn=foo,o=testing', [Mod(Mod.ADD, 'cn', ['bar'])])
+        # the server may answer before applying the change
+        self.ldap.get('cn=foo,o=testing')
+        self.assertEqual(self.cache.info().size, 1)
+        pipe.wait_all()
+        self.assertEqual(self.cache.info().size, 0)
+
+    def test_bypass(self):
+        """Ensure the cache can be bypassed per call, and writes through another connection invalidate it"""
+        for i in range(2):
+            self.mock_sock.add_search_res_entry('cn=foo,o=testing', {'cn': ['foo']})
+            self.mock_sock.add_search_res_done('cn=foo,o=testing')
+        self.ldap.get('cn=foo,o=testing')
+        self.ldap.get('cn=foo,o=testing', use_cache=False)
+        self.assertEqual(self.mock_sock.num_sent(), 2)
+        self.assertEqual(self.cache.info()[:2], (0, 1))
+        self.assertEqual(self.cache.info().size, 1)
+
+        other_sock = MockLDAPSocket()
+        other_sock.add_root_dse()
+        other = LDAP(other_sock, entry_cache=self.cache)
+        other_sock.add_ldap_result(laurelin.ldap.rfc4511.DelResponse, 'delResponse')
+        other.delete('cn=foo,o=testing')
+        self.assertEqual(self.cache.info().size, 0)
+
+    def test_identity(self):
+        """Ensure entries are only shared by connections bound the same way"""
+        other_sock = MockLDAPSocket()
+        other_sock.add_root_dse()
+        other = LDAP(other_sock, entry_cache=self.cache)
+        other_sock.add_bind_success()
+        other.simple_bind(username='cn=admin,o=testing', password='secret')
+        other_sock.clear_sent()
+
+        # hidden from the anonymous connection
+        self.mock_sock.add_search_res_done('cn=foo,o=testing', result_code=laurelin.ldap.protoutils.RESULT_noSuchObject)
+        self.assertFalse(self.ldap.exists('cn=foo,o=testing'))
+        other_sock.add_search_res_entry('cn=foo,o=testing', {'cn': ['foo']})
+        other_sock.add_search_res_done('cn=foo,o=testing')
+        self.assertTrue(other.exists('cn=foo,o=testing'))
+        self.assertTrue(other.exists('cn=foo,o=testing'))
+        self.assertFalse(self.ldap.exists('cn=foo,o=testing'))
+        self.assertEqual(self.mock_sock.num_sent(), 1)
+        self.assertEqual(other_sock.num_sent(), 1)
+
+        # a different password may be a different user
+        third_sock = MockLDAPSocket()
+        third_sock.add_root_dse()
+        third = LDAP(third_sock, entry_cache=self.cache)
+        third_sock.add_bind_success()
+        third.simple_bind(username='cn=admin,o=testing', password='other')
+        self.assertNotEqual(third._cache_identity(), other._cache_identity())
+        self.assertNotIn('secret', repr(other._cache_identity()))
+
+    def test_exists(self):
+        """Ensure missing DNs are not searched for again until they are added"""
+        self.mock_sock.add_search_res_done('cn=foo,o=testing', result_code=laurelin.ldap.protoutils.RESULT_noSuchObject)
+        self.assertFalse(self.ldap.exists('cn=foo,o=testing'))
+        self.assertFalse(self.ldap.exists('cn=foo,o=testing'))
+        with self.assertRaises(NoSearchResults):
+            self.ldap.get('cn=foo,o=testing')
+        self.assertEqual(self.mock_sock.num_sent(), 1)
+        self.assertEqual(self.cache.info().negative_hits, 2)
+
+        self.mock_sock.add_ldap_result(laurelin.ldap.rfc4511.AddResponse, 'addResponse')
+        self.ldap.add_if_not_exists('cn=foo,o=testing', {'cn': ['foo']})
+        self.assertEqual(self.mock_sock.num_sent(), 2)
+        self.mock_sock.add_search_res_entry('cn=foo,o=testing', {})
+        self.mock_sock.add_search_res_done('cn=foo,o=testing')
+        self.assertTrue(self.ldap.exists('cn=foo,o=testing'))
+        self.assertEqual(self.mock_sock.num_sent(), 3)
+
+    def test_load_subtree(self):
+        """Ensure DNs missing from a subtree listing are answered as missing, until objects are renamed"""
+        self.mock_sock.add_search_res_entry('o=testing', {})
+        self.mock_sock.add_search_res_entry('cn=a,o=testing', {})
+        self.mock_sock.add_search_res_done('o=testing')
+        self.assertEqual(self.cache.load_subtree(self.ldap, 'o=testing'), 2)
+        self.mock_sock.clear_sent()
+
+        self.assertFalse(self.ldap.exists('cn=b,o=testing'))
+        self.assertEqual(self.mock_sock.num_sent(), 0)
+
+        self.mock_sock.add_search_res_entry('cn=a,o=testing', {})
+        self.mock_sock.add_search_res_done('cn=a,o=testing')
+        self.assertTrue(self.ldap.exists('CN=A,O=TESTING'))
+        self.mock_sock.add_search_res_entry('o=other', {})
+        self.mock_sock.add_search_res_done('o=other')
+        self.assertTrue(self.ldap.exists('o=other'))
+        self.assertEqual(self.mock_sock.num_sent(), 2)
+
+        self.mock_sock.add_ldap_result(laurelin.ldap.rfc4511.AddResponse, 'addResponse')
+        self.ldap.add('cn=b,o=testing', {'cn': ['b']})
+        self.mock_sock.add_search_res_entry('cn=b,o=testing', {})
+        self.mock_sock.add_search_res_done('cn=b,o=testing')
+        self.assertTrue(self.ldap.exists('cn=b,o=testing'))
+
+        self.mock_sock.add_ldap_result(laurelin.ldap.rfc4511.ModifyDNResponse, 'modDNResponse')
+        self.ldap.move('cn=x,o=other', 'cn=x,o=testing')
+        self.mock_sock.add_search_res_entry('cn=y,cn=x,o=testing', {})
+        self.mock_sock.add_search_res_done('cn=y,cn=x,o=testing')
+        self.assertTrue(self.ldap.exists('cn=y,cn=x,o=testing'))
+
+    def test_load_subtree_references(self):
+        """Ensure a listing with search result references is not used to answer DNs as missing"""
+        self.mock_sock.add_search_res_entry('o=testing', {})
+        self.mock_sock.add_search_res_ref(['ldap://other.example.org/ou=remote,o=testing'])
+        self.mock_sock.add_search_res_done('o=testing')
+        self.assertEqual(self.cache.load_subtree(self.ldap, 'o=testing'), 1)
+        self.mock_sock.clear_sent()
+
+        self.mock_sock.add_search_res_entry('cn=x,ou=remote,o=testing', {})
+        self.mock_sock.add_search_res_done('cn=x,ou=remote,o=testing')
+        self.assertTrue(self.ldap.exists('cn=x,ou=remote,o=testing'))
+        self.assertEqual(self.mock_sock.num_sent(), 1)
+
+    def test_config(self):
+        """Ensure an entry cache can be configured"""
+        with mock.patch('laurelin.ldap.base.LDAP._connect'):
+            ldap = create_connection({'connection': {'entry_cache': {'maxsize': 10, 'ttl': 5}}})
+        self.assertEqual(ldap.entry_cache.maxsize, 10)
+        self.assertEqual(ldap.entry_cache.ttl, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -124,3 +124,23 @@ class TestConfig(unittest.TestCase):
         with self.assertRaises(TypeError):
             config.create_connection({'connection': conn})
         del conn['validators']
+
+    @mock.patch.object(laurelin.ldap.base, 'LDAPSocket', MockSockRootDSE)
+    def test_global_socket_io_config(self):
+        """Ensure socket I/O settings from the global config reach the socket parameters"""
+        reset_config = {'global': {
+            'DEFAULT_TCP_NODELAY': LDAP.DEFAULT_TCP_NODELAY,
+            'DEFAULT_TCP_KEEPALIVE': LDAP.DEFAULT_TCP_KEEPALIVE,
+            'DEFAULT_MAX_RECV_BUFFER_SIZE': LDAP.DEFAULT_MAX_RECV_BUFFER_SIZE,
+        }}
+
+        try:
+            config.set_global_config({'global': {
+                'tcp_nodelay': True,
+                'tcp_keepalive': [60, 10, 5],
+                'max_recv_buffer_size': 65536,
+            }})
+            ldap = LDAP('ldap://dir01.example.org', reuse_connection=False)
+            self.assertEqual(ldap.sock_params[6:9], (65536, True, [60, 10, 5]))
+        finally:
+            config.set_global_config(reset_config)
@@ -1,5 +1,11 @@
-from laurelin.ldap import filter, LDAPError
+from laurelin.ldap import filter, F, FilterSyntax, LDAP, LDAPError, LDAPObject, ValueDecoding
+from laurelin.ldap.exceptions import LDAPSupportError
+from laurelin.ldap.pyasn1.codec.ber.encoder import encode as ber_encode
+import random
+import six
 import unittest
+from . import utils
+from .mock_ldapsocket import MockLDAPSocket
 
 
 class TestFilter(unittest.TestCase):
@@ -139,3 +145,249 @@ class TestFilter(unittest.TestCase):
         with self.assertRaises(LDAPError):
             filter.parse_simple_filter(standard)
         filter.parse_simple_filter(simple)
+
+
+class TestFilterParser(unittest.TestCase):
+    tokens = ['(', ')', '&', '|', '!', 'a', '1', '.', '=', '*', '~', '>', '<', ':', ':dn', 'NOT', 'AND', 'OR', ' ',
+              ';', '\\', '2a', '(a=1)', '1.2.3']
+    parsers = [
+        (filter.parse_standard_filter, filter.grammar_parse_standard_filter),
+        (filter.parse_simple_filter, filter.grammar_parse_simple_filter),
+        (filter.parse, filter.grammar_parse),
+    ]
+
+    @staticmethod
+    def encoded(parse, filter_str):
+        try:
+            return ber_encode(parse(filter_str))
+        except LDAPError:
+            return None
+
+    def test_differential(self):
+        """Ensure the single-pass parsers accept the same filters as the grammars and produce the same result"""
+        filters = TestFilter.good_filters + TestFilter.bad_filters + TestFilter.bad_simple_filters
+        for standard, simple in TestFilter.good_standard_and_simple_filters:
+            filters += [standard, simple]
+        rand = random.Random(4515)
+        mutated = []
+        for _ in range(300):
+            filter_str = rand.choice(filters)
+            for _ in range(rand.randint(1, 3)):
+                i = rand.randint(0, len(filter_str))
+                filter_str = filter_str[:i] + rand.choice(self.tokens) + filter_str[i + rand.randint(0, 1):]
+            mutated.append(filter_str)
+        for filter_str in filters + mutated:
+            for parse, reference in self.parsers:
+                self.assertEqual(self.encoded(parse, filter_str), self.encoded(reference, filter_str),
+                                 msg='{0}({1!r})'.format(parse.__name__, filter_str))
+
+    def test_large(self):
+        """Ensure long and deeply nested filters can be parsed"""
+        fil = filter.parse_standard_filter('(|{0})'.format(''.join('(uid=u{0})'.format(i) for i in range(2000))))
+        self.assertEqual(len(fil.getComponent()), 2000)
+
+        fil = filter.parse('(!' * 300 + '(a=1)' + ')' * 300)
+        for _ in range(300):
+            fil = fil.getComponent().getComponentByName('innerNotFilter')
+        self.assertEqual(fil.getName(), 'equalityMatch')
+
+        for filter_str in ('(!' * 1000 + '(a=1)' + ')' * 1000, 'NOT ' * 1000 + '(a=1)'):
+            with six.assertRaisesRegex(self, LDAPError, 'nested too deeply'):
+                filter.parse(filter_str)
+        with six.assertRaisesRegex(self, LDAPError, 'nested too deeply'):
+            filter.parse_standard_filter('(!' * 1000 + '(a=1)' + ')' * 1000)
+
+
+class TestFilterCache(unittest.TestCase):
+    def test_encode(self):
+        """Ensure cached filters encode identically to freshly parsed filters and statistics are kept"""
+        cache = filter.FilterCache()
+        for _ in range(2):
+            self.assertEqual(cache.encode('(foo=bar)', FilterSyntax.STANDARD),
+                             ber_encode(filter.parse_standard_filter('(foo=bar)')))
+            self.assertEqual(cache.encode('(foo=bar) AND (baz=1)', FilterSyntax.SIMPLE),
+                             ber_encode(filter.parse_simple_filter('(foo=bar) AND (baz=1)')))
+        self.assertEqual(cache.info(), filter.FilterCacheInfo(hits=2, misses=2, maxsize=512, size=2))
+
+        with self.assertRaises(LDAPError):
+            cache.encode('(foo=bar', FilterSyntax.STANDARD)
+        with self.assertRaises(LDAPError):
+            cache.encode('(foo=bar)', 'bogus')
+        self.assertEqual(cache.info().size, 2)
+
+        cache.clear()
+        self.assertEqual(cache.info(), filter.FilterCacheInfo(hits=0, misses=0, maxsize=512, size=0))
+
+    def test_eviction(self):
+        """Ensure the least recently used filter is discarded when the cache is full"""
+        cache = filter.FilterCache(maxsize=2)
+        cache.encode('(a=1)', FilterSyntax.STANDARD)
+        cache.encode('(b=1)', FilterSyntax.STANDARD)
+        cache.encode('(a=1)', FilterSyntax.STANDARD)
+        cache.encode('(c=1)', FilterSyntax.STANDARD)
+        self.assertEqual(cache.info().size, 2)
+        cache.encode('(a=1)', FilterSyntax.STANDARD)
+        self.assertEqual(cache.info().hits, 2)
+        cache.encode('(b=1)', FilterSyntax.STANDARD)
+        self.assertEqual(cache.info().misses, 4)
+
+
+class TestF(unittest.TestCase):
+    def test_encode(self):
+        """Ensure built filters encode identically to the equivalent parsed filter string"""
+        tests = [
+            (F.eq('cn', 'foo'), '(cn=foo)'),
+            (F.ge('uidNumber', 1000), '(uidNumber>=1000)'),
+            (F.le('uidNumber', '1000'), '(uidNumber<=1000)'),
+            (F.approx('cn', 'foo'), '(cn~=foo)'),
+            (F.present('mail'), '(mail=*)'),
+            (F.substring('cn', 'a', ['b', 'c'], 'd'), '(cn=a*b*c*d)'),
+            (F.substring('cn', final='d'), '(cn=*d)'),
+            (F.extensible('foo', 'cn', '1.2.3', dn_attrs=True), '(cn:dn:1.2.3:=foo)'),
+            (F.extensible('foo', rule='1.2.3'), '(:1.2.3:=foo)'),
+            (F.eq('a', '1') | F.eq('b', '2') | ~F.present('c'), '(|(a=1)(b=2)(!(c=*)))'),
+            (F.eq('a', '1') & (F.eq('b', '2') | F.eq('c', '3')), '(&(a=1)(|(b=2)(c=3)))'),
+            (F.and_(F.eq('a', '1')), '(&(a=1))'),
+            (F.any_of('uid', ['alice', 'bob']), '(|(uid=alice)(uid=bob))'),
+            (F.any_of('uid', ['alice']), '(uid=alice)'),
+        ]
+        for fil, filter_str in tests:
+            self.assertEqual(str(fil), filter_str)
+            self.assertEqual(fil.encode(), ber_encode(filter.parse_standard_filter(filter_str)))
+        self.assertEqual(F.eq('a', 1), F.eq('a', '1'))
+        self.assertNotEqual(F.eq('a', 1), F.ge('a', 1))
+
+    def test_escape(self):
+        """Ensure values are sent as given and only escaped when rendering the filter"""
+        fil = F.eq('cn', u'a*(b)\\ f\u00f6\u00f6')
+        self.assertEqual(str(fil), u'(cn=a\\2a\\28b\\29\\5c f\u00f6\u00f6)')
+        self.assertIn(u'a*(b)\\ f\u00f6\u00f6'.encode('utf-8'), fil.encode())
+        self.assertEqual(str(F.eq('jpegPhoto', b'\xff\x00')), '(jpegPhoto=\\ff\\00)')
+
+    def test_invalid(self):
+        """Ensure incomplete filters are rejected"""
+        with self.assertRaises(ValueError):
+            F.substring('cn')
+        with self.assertRaises(ValueError):
+            F.extensible('foo')
+        with self.assertRaises(ValueError):
+            F.any_of('uid', [])
+
+
+class TestCompileFilter(unittest.TestCase):
+    def test_match(self):
+        """Ensure compiled filters match objects according to the schema"""
+        utils.clear_schema_registrations()
+        utils.load_schema()
+        obj = LDAPObject('cn=foo,o=testing', {
+            'objectClass': ['person'],
+            'cn': ['Foo  Bar', 'fb'],
+            'jpegPhoto': [b'\xff\xd8'],
+        })
+        tests = [
+            ('(cn=foo bar)', True),
+            ('(CN=FOO BAR)', True),
+            ('(cn=foo)', False),
+            ('(cn~=FB)', True),
+            ('(cn=foo*)', True),
+            ('(cn=*o b*)', True),
+            ('(cn=f*o*bar)', True),
+            ('(cn=*baz)', False),
+            ('(cn=fb*b)', False),
+            ('(mail=*)', False),
+            ('(&(objectClass=person)(cn=fb))', True),
+            ('(|(mail=*)(cn=x))', False),
+            ('(!(cn=x))', True),
+            ('(objectClass=person) AND NOT (mail=*)', True),
+            # jpegPhoto has no equality matching rule, so these are Undefined
+            ('(jpegPhoto=x)', False),
+            ('(!(jpegPhoto=x))', False),
+            ('(|(jpegPhoto=x)(cn=fb))', True),
+            ('(&(jpegPhoto=x)(cn=x))', False),
+            ('(!(&(jpegPhoto=x)(cn=x)))', True),
+        ]
+        for filter_str, expected in tests:
+            self.assertIs(filter.compile_filter(filter_str)(obj), expected, msg=filter_str)
+        self.assertTrue(filter.compile_filter(F.eq('cn', 'FB') & F.present('jpegPhoto'))(obj))
+        self.assertTrue(filter.compile_filter(filter.parse_standard_filter('(cn=fb)'))(obj))
+
+        # object identifier descriptors are case-insensitive
+        is_person = filter.compile_filter('(objectClass=person)')
+        self.assertTrue(is_person(LDAPObject('cn=foo,o=testing', {'objectClass': ['Person']})))
+        self.assertTrue(filter.compile_filter('(objectClass=PERSON)')(obj))
+        self.assertFalse(filter.compile_filter('(objectClass=personal)')(obj))
+
+    def test_value_decoding(self):
+        """Ensure compiled filters match objects fetched with any value decoding"""
+        utils.clear_schema_registrations()
+        utils.load_schema()
+        mock_sock = MockLDAPSocket()
+        mock_sock.add_root_dse()
+        ldap = LDAP(mock_sock)
+        attrs = {'cn': [b'Foo'], 'userPassword': [b'secret'], 'description': [b'\xff']}
+        tests = [
+            ('(cn=foo)', True),
+            ('(cn=fo*)', True),
+            ('(cn=bar)', False),
+            ('(userPassword=secret)', True),
+            ('(userPassword=SECRET)', False),
+            ('(userPassword=sec*)', True),
+            ('(userPassword=*cre*)', True),
+            ('(userPassword=*x)', False),
+            # description is not valid UTF-8, so these are Undefined
+            ('(description=x)', False),
+            ('(!(description=x))', False),
+            ('(description=*)', True),
+            # attribute types missing from the schema are Undefined
+            ('(x-unknown=foo)', False),
+            ('(!(x-unknown=foo))', False),
+        ]
+        for value_decoding in (ValueDecoding.SCHEMA, ValueDecoding.BYTES, ValueDecoding.MEMORYVIEW):
+            mock_sock.add_search_res_entry('cn=foo,o=testing', attrs)
+            mock_sock.add_search_res_done('o=testing')
+            obj, = ldap.search('o=testing', value_decoding=value_decoding)
+            obj['x-unknown'] = ['foo']
+            for filter_str, expected in tests:
+                self.assertIs(filter.compile_filter(filter_str)(obj), expected,
+                              msg='{0} with {1}'.format(filter_str, value_decoding))
+
+    def test_unsupported(self):
+        """Ensure assertions that cannot be evaluated locally are rejected"""
+        for filter_str in ('(cn>=a)', '(|(cn=a)(cn<=a))', '(cn:caseExactMatch:=a)'):
+            with self.assertRaises(LDAPSupportError):
+                filter.compile_filter(filter_str)
+
+
+class TestOptimize(unittest.TestCase):
+    def test_optimize(self):
+        """Ensure filters are simplified without changing their meaning"""
+        tests = [
+            ('(&(&(a=1)(b=2))(a=1)(objectClass=*))', '(&(a=1)(b=2))'),
+            ('(|(a=1)(|(b=2)(|(c=3)(a=1))))', '(|(a=1)(b=2)(c=3))'),
+            ('(!(!(a=1)))', '(a=1)'),
+            ('(&(a=1)(a=1))', '(a=1)'),
+            ('(|(a=1)(OBJECTCLASS=*))', '(OBJECTCLASS=*)'),
+            ('(&(a=1)(!(objectClass=*)))', '(!(objectClass=*))'),
+            ('(|(a=1)(!(objectClass=*)))', '(a=1)'),
+            ('(&(objectClass=*)(objectClass=*))', '(objectClass=*)'),
+            ('(!(|(a=1)(&(b=2))))', '(!(|(a=1)(b=2)))'),
+        ]
+        for filter_str, expected in tests:
+            self.assertEqual(str(filter.optimize(filter_str)), expected, msg=filter_str)
+        self.assertEqual(filter.optimize(F.eq('a', '1') | (F.eq('b', '2') | F.eq('a', '1'))),
+                         F.eq('a', '1') | F.eq('b', '2'))
+
+    def test_split_or(self):
+        """Ensure oversized or filters are split into chunks"""
+        split = filter.split_or('(|(a=1)(a=2)(a=3)(a=4)(a=5))', 2)
+        self.assertEqual([str(f) for f in split], ['(|(a=1)(a=2))', '(|(a=3)(a=4))', '(a=5)'])
+
+        split = filter.split_or('(&(x=1)(|(b=1)(b=2))(|(a=1)(a=2)(a=3))(y=1))', 2)
+        self.assertEqual([str(f) for f in split], ['(&(x=1)(|(b=1)(b=2))(|(a=1)(a=2))(y=1))',
+                                                   '(&(x=1)(|(b=1)(b=2))(a=3)(y=1))'])
+
+        self.assertEqual([str(f) for f in filter.split_or('(|(a=1)(a=2))', 2)], ['(|(a=1)(a=2))'])
+        self.assertEqual([str(f) for f in filter.split_or('(a=1)', 2)], ['(a=1)'])
+
+        with six.assertRaisesRegex(self, ValueError, 'max_terms must be at least 1'):
+            filter.split_or('(a=1)', 0)
@@ -1,17 +1,27 @@
 from laurelin.ldap import (
     LDAP,
     LDAPObject,
+    LazyLDAPObject,
+    ResultFormat,
+    ResultTuple,
+    ValueDecoding,
     rfc4511,
     protoutils,
     exceptions,
     Mod,
     controls,
+    AttributeType,
+    F,
 )
+from laurelin.ldap import attributetype
 import laurelin.ldap.base
 import inspect
+import multiprocessing
 import six
 import unittest
+from . import utils
 from .mock_ldapsocket import MockLDAPSocket, MockSockRootDSE
+from array import array
 from base64 import b64encode
 from laurelin.ldap.validation import Validator
 
@@ -242,6 +252,184 @@ class TestLDAP(unittest.TestCase):
         # TODO: verify we get a warning when response controls are returned with a searchResultRef
         # TODO: test with fetch_result_refs set True, will need to mock SearchReferenceHandle
 
+    def test_search_lazy(self):
+        """Ensure lazy search results decode values on access and otherwise behave like LDAPObject"""
+        mock_sock = MockLDAPSocket()
+        mock_sock.add_root_dse()
+        ldap = LDAP(mock_sock)
+
+        attrs = {'cn': ['foo'], 'objectClass': ['top', 'person'], 'description': ['a', 'b']}
+        mock_sock.add_search_res_entry('cn=foo,o=testing', attrs)
+        mock_sock.add_search_res_done('o=testing')
+        obj, = ldap.search('o=testing', result_format=ResultFormat.LAZY)
+        self.assertIsInstance(obj, LazyLDAPObject)
+        self.assertEqual(obj.dn, 'cn=foo,o=testing')
+        self.assertEqual(len(obj), 3)
+        self.assertEqual(obj['CN'], ['foo'])
+        self.assertIsInstance(obj['cn'], laurelin.ldap.attrvaluelist.AttrValueList)
+        self.assertNotIsInstance(dict.__getitem__(obj, 'description'), list)
+        self.assertIn('objectclass', obj)
+        self.assertEqual(obj.get_attr('description'), ['a', 'b'])
+        self.assertEqual(obj.get_attr('mail'), [])
+
+        obj['mail'] = ['foo@example.org']
+        expected = LDAPObject('cn=foo,o=testing', dict(attrs, mail=['foo@example.org']))
+        self.assertEqual(obj, expected)
+        self.assertEqual(expected, obj)
+        self.assertEqual(dict(obj), dict(expected))
+
+        ldap.default_result_format = ResultFormat.LAZY
+        mock_sock.add_search_res_entry('cn=foo,o=testing', attrs)
+        mock_sock.add_search_res_done('o=testing')
+        obj = ldap.get('cn=foo,o=testing')
+        self.assertIsInstance(obj, LazyLDAPObject)
+        self.assertEqual(sorted(obj.iterattrs()), sorted(LDAPObject(obj.dn, attrs).iterattrs()))
+
+        with self.assertRaises(exceptions.LDAPError):
+            ldap.search('o=testing', result_format='columns')
+
+    def test_search_tuples(self):
+        """Ensure tuple search results are plain (dn, dict) pairs, and methods returning objects still do so"""
+        mock_sock = MockLDAPSocket()
+        mock_sock.add_root_dse()
+        ldap = LDAP(mock_sock, result_format=ResultFormat.TUPLES)
+
+        attrs = {'cn': ['foo'], 'objectClass': ['top', 'person']}
+        mock_sock.add_search_res_entry('cn=foo,o=testing', attrs)
+        mock_sock.add_search_res_entry('cn=bar,o=testing', {})
+        mock_sock.add_search_res_done('o=testing')
+        results = list(ldap.search('o=testing'))
+        self.assertEqual(results, [('cn=foo,o=testing', attrs), ('cn=bar,o=testing', {})])
+        self.assertIsInstance(results[0], ResultTuple)
+        self.assertIs(type(results[0].attrs), dict)
+        dn, entry_attrs = results[0]
+        self.assertEqual(dn, results[0].dn)
+
+        mock_sock.add_search_res_entry('cn=foo,o=testing', attrs)
+        mock_sock.add_search_res_done('o=testing')
+        obj = ldap.get('cn=foo,o=testing')
+        self.assertIsInstance(obj, LDAPObject)
+
+        mock_sock.add_search_res_entry('cn=foo,o=testing', attrs)
+        mock_sock.add_search_res_done('o=testing')
+        result = ldap.get('cn=foo,o=testing', result_format=ResultFormat.TUPLES)
+        self.assertEqual(result, ('cn=foo,o=testing', attrs))
+
+    def test_search_value_decoding(self):
+        """Ensure attribute values are returned as text or bytes according to the value decoding setting"""
+        utils.clear_schema_registrations()
+        utils.load_schema()
+        mock_sock = MockLDAPSocket()
+        mock_sock.add_root_dse()
+        ldap = LDAP(mock_sock)
+
+        attrs = {'cn': ['foo'], 'jpegPhoto': [b'text'], 'userCertificate;binary': [b'0\x82'], 'x-unknown': [b'\xff']}
+
+        def search(**kwds):
+            mock_sock.add_search_res_entry('cn=foo,o=testing', attrs)
+            mock_sock.add_search_res_done('o=testing')
+            obj, = ldap.search('o=testing', **kwds)
+            return obj
+
+        self.assertEqual(dict(search()), {'cn': ['foo'], 'jpegPhoto': ['text'], 'userCertificate;binary': [b'0\x82'],
+                                    'x-unknown': [b'\xff']})
+        expected = {'cn': ['foo'], 'jpegPhoto': [b'text'], 'userCertificate;binary': [b'0\x82'], 'x-unknown': [b'\xff']}
+        self.assertEqual(dict(search(value_decoding=ValueDecoding.SCHEMA)), expected)
+        self.assertEqual(dict(search(value_decoding=ValueDecoding.SCHEMA, result_format=ResultFormat.LAZY)), expected)
+        self.assertEqual(search(value_decoding=ValueDecoding.BYTES, result_format=ResultFormat.TUPLES).attrs,
+                         {'cn': [b'foo'], 'jpegPhoto': [b'text'], 'userCertificate;binary': [b'0\x82'],
+                          'x-unknown': [b'\xff']})
+
+        ldap.default_value_decoding = ValueDecoding.SCHEMA
+        self.assertEqual(dict(search()), expected)
+
+        for result_format in (ResultFormat.OBJECTS, ResultFormat.LAZY):
+            obj = search(value_decoding=ValueDecoding.MEMORYVIEW, result_format=result_format)
+            self.assertEqual(obj['cn'], ['foo'])
+            view, = obj['jpegPhoto']
+            self.assertIsInstance(view, memoryview)
+            self.assertEqual(view.tobytes(), b'text')
+
+        with self.assertRaises(exceptions.LDAPError):
+            ldap.search('o=testing', value_decoding='latin-1')
+
+    def test_to_columns(self):
+        """Ensure search results can be read into columns, including integer arrays and chunks"""
+        utils.load_schema()
+        mock_sock = MockLDAPSocket()
+        mock_sock.add_root_dse()
+        ldap = LDAP(mock_sock)
+
+        count_type = AttributeType('''
+          ( 1.2.3.4.5 NAME 'testCount'
+            EQUALITY integerMatch
+            SYNTAX 1.3.6.1.4.1.1466.115.121.1.27
+            SINGLE-VALUE )
+        ''')
+        count_type.register()
+        try:
+            def add_results():
+                mock_sock.add_search_res_entry('cn=a,o=testing', {'CN': ['a'], 'testCount': ['1'], 'x': ['1', '2']})
+                mock_sock.add_search_res_entry('cn=b,o=testing', {'cn': ['b'], 'testCount': ['-2']})
+                mock_sock.add_search_res_entry('cn=c,o=testing', {'cn': ['c'], 'testCount': ['3']})
+                mock_sock.add_search_res_done('o=testing')
+
+            add_results()
+            columns = ldap.search('o=testing').to_columns(['cn', 'testCount', 'x'], missing='')
+            self.assertEqual(list(columns), ['dn', 'cn', 'testCount', 'x'])
+            self.assertEqual(columns['dn'], ['cn=a,o=testing', 'cn=b,o=testing', 'cn=c,o=testing'])
+            self.assertEqual(columns['cn'], ['a', 'b', 'c'])
+            self.assertIsInstance(columns['testCount'], array)
+            self.assertEqual(list(columns['testCount']), [1, -2, 3])
+            self.assertEqual(columns['x'], [['1', '2'], '', ''])
+
+            add_results()
+            chunks = list(ldap.search('o=testing').iter_columns(['testCount', 'missing'], chunk_size=2))
+            self.assertEqual([chunk['dn'] for chunk in chunks],
+                             [['cn=a,o=testing', 'cn=b,o=testing'], ['cn=c,o=testing']])
+            self.assertEqual(chunks[0]['missing'], [None, None])
+
+            mock_sock.add_search_res_entry('cn=a,o=testing', {'testCount': ['1']})
+            mock_sock.add_search_res_entry('cn=b,o=testing', {})
+            mock_sock.add_search_res_done('o=testing')
+            columns = ldap.search('o=testing').to_columns(['testCount'])
+            self.assertEqual(columns['testCount'], [1, None])
+        finally:
+            del attributetype._oid_attribute_types[count_type.oid]
+            del attributetype._name_attribute_types['testCount']
+
+    def test_search_decode_pool(self):
+        """Ensure result entries can be decoded by a pool of worker processes, in order or not"""
+        mock_sock = MockLDAPSocket()
+        mock_sock.add_root_dse()
+        ldap = LDAP(mock_sock)
+        dns = ['cn={0},o=testing'.format(i) for i in range(450)]
+
+        def add_results():
+            for i, dn in enumerate(dns):
+                mock_sock.add_search_res_entry(dn, {'cn': [str(i)], 'jpegPhoto': [b'\xff\xd8']})
+            mock_sock.add_search_res_done('o=testing')
+
+        pool = multiprocessing.Pool(2)
+        try:
+            add_results()
+            results = list(ldap.search('o=testing', decode_pool=pool))
+            self.assertEqual([obj.dn for obj in results], dns)
+            self.assertIsInstance(results[0], LDAPObject)
+            self.assertEqual(results[-1].get_attr('cn'), ['449'])
+            self.assertEqual(results[-1].get_attr('jpegPhoto'), [b'\xff\xd8'])
+            self.assertFalse(mock_sock.pool_decode_ids)
+
+            add_results()
+            results = list(ldap.search('o=testing', decode_pool=pool, decode_ordered=False,
+                                       result_format=ResultFormat.TUPLES))
+            self.assertEqual(sorted(dn for dn, attrs in results), sorted(dns))
+
+            with self.assertRaises(exceptions.LDAPError):
+                ldap.search('o=testing', decode_pool=pool, result_format=ResultFormat.LAZY)
+        finally:
+            pool.terminate()
+
     def test_binary_data(self):
         """Ensure binary data doesn't cause explosions"""
         mock_sock = MockSockRootDSE()
@@ -753,5 +941,347 @@ class TestLDAP(unittest.TestCase):
             ldap.sasl_bind(mech, username='foo', password='foo')
 
 
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.mock_sock = MockLDAPSocket()
+        self.mock_sock.add_root_dse()
+        self.ldap = LDAP(self.mock_sock)
+        self.mock_sock.clear_sent()
+
+    def test_window(self):
+        """Ensure requests are sent without waiting until the window is full"""
+        for i in range(3):
+            self.mock_sock.add_ldap_result(rfc4511.AddResponse, 'addResponse')
+        pipe = self.ldap.pipeline(window=2)
+        handles = [pipe.add('cn={0},o=testing'.format(i), {'cn': [str(i)]}) for i in range(2)]
+        self.assertEqual(self.mock_sock.num_sent(), 2)
+        self.assertEqual(pipe.outstanding, 2)
+        self.assertFalse(any(handle.done for handle in handles))
+
+        # the window is full, so the first response must be collected before sending
+        handles.append(pipe.add('cn=2,o=testing', {'cn': ['2']}))
+        self.assertEqual(self.mock_sock.num_sent(), 3)
+        self.assertEqual(pipe.outstanding, 2)
+        self.assertTrue(handles[0].done)
+
+        self.assertEqual(pipe.wait_all(), handles)
+        self.assertEqual(pipe.outstanding, 0)
+        obj = handles[2].result()
+        self.assertIsInstance(obj, LDAPObject)
+        self.assertEqual(obj.dn, 'cn=2,o=testing')
+
+    def test_results(self):
+        """Ensure each operation's result or error is delivered to its handle"""
+        self.mock_sock.add_ldap_result(rfc4511.CompareResponse, 'compareResponse',
+                                       result_code=protoutils.RESULT_compareTrue)
+        self.mock_sock.add_ldap_result(rfc4511.DelResponse, 'delResponse', result_code=protoutils.RESULT_noSuchObject)
+        self.mock_sock.add_ldap_result(rfc4511.ModifyResponse, 'modifyResponse')
+
+        pipe = self.ldap.pipeline()
+        compare = pipe.compare('o=testing', 'o', 'testing')
+        delete = pipe.delete('cn=missing,o=testing')
+        modify = pipe.modify('o=testing', [Mod(Mod.ADD, 'description', ['foo'])])
+        empty = pipe.modify('o=testing', [])
+        self.assertTrue(empty.done)
+
+        completed = list(pipe.as_completed())
+        self.assertEqual(completed, [empty, compare, delete, modify])
+        self.assertTrue(compare.result())
+        self.assertIsInstance(delete.exception(), exceptions.LDAPError)
+        with self.assertRaises(exceptions.LDAPError):
+            delete.result()
+        self.assertIsNone(modify.exception())
+
+    def test_abandon(self):
+        """Ensure abandoning is refused while awaiting a response, and does nothing once done"""
+        self.mock_sock.add_ldap_result(rfc4511.DelResponse, 'delResponse')
+        pipe = self.ldap.pipeline()
+        handle = pipe.delete('cn=foo,o=testing')
+        with self.assertRaises(exceptions.LDAPError):
+            handle.abandon()
+        handle.result()
+        handle.abandon()
+        self.assertEqual(self.mock_sock.num_sent(), 1)
+
+    def test_context_manager(self):
+        """Ensure the context manager collects all responses and raises the first failure"""
+        self.mock_sock.add_ldap_result(rfc4511.DelResponse, 'delResponse')
+        self.mock_sock.add_ldap_result(rfc4511.DelResponse, 'delResponse', result_code=protoutils.RESULT_noSuchObject)
+        self.mock_sock.add_ldap_result(rfc4511.DelResponse, 'delResponse')
+        with self.assertRaises(exceptions.LDAPError):
+            with self.ldap.pipeline() as pipe:
+                for i in range(3):
+                    pipe.delete('cn={0},o=testing'.format(i))
+        self.assertEqual(pipe.outstanding, 0)
+
+
+class TestGetMany(unittest.TestCase):
+    def setUp(self):
+        self.mock_sock = MockLDAPSocket()
+        self.mock_sock.add_root_dse()
+        self.ldap = LDAP(self.mock_sock)
+        self.mock_sock.clear_sent()
+
+    def test_get_many(self):
+        """Ensure objects sharing a parent are fetched with a single batched search"""
+        dns = ['cn=a,o=testing', 'cn=b,o=testing', 'cn=c,o=testing', 'o=other', 'cn=a,o=testing']
+
+        # base search for o=other
+        self.mock_sock.add_search_res_done('o=other', result_code=protoutils.RESULT_noSuchObject)
+        # one-level search for the children of o=testing
+        self.mock_sock.add_search_res_entry('cn=a,o=testing', {'cn': ['a']})
+        self.mock_sock.add_search_res_entry('cn=x,o=testing', {'cn': ['x', 'b']})
+        self.mock_sock.add_search_res_entry('cn=b,o=testing', {'cn': ['b']})
+        self.mock_sock.add_search_res_done('o=testing')
+
+        results = self.ldap.get_many(dns)
+        self.assertEqual(self.mock_sock.num_sent(), 2)
+        self.assertIn(F.any_of('cn', ['a', 'b', 'c']).encode(), self.mock_sock._incoming_queue[1])
+        base_search = protoutils.unpack('searchRequest', self.mock_sock.read_sent())[1]
+        self.assertEqual(six.text_type(base_search.getComponentByName('baseObject')), 'o=other')
+        batch_search = protoutils.unpack('searchRequest', self.mock_sock.read_sent())[1]
+        self.assertEqual(six.text_type(batch_search.getComponentByName('baseObject')), 'o=testing')
+
+        self.assertEqual(list(results.keys()), dns[:4])
+        self.assertEqual(results['cn=a,o=testing'].dn, 'cn=a,o=testing')
+        self.assertEqual(results['cn=b,o=testing'].dn, 'cn=b,o=testing')
+        self.assertIsNone(results['cn=c,o=testing'])
+        self.assertIsNone(results['o=other'])
+        self.assertEqual(results.missing, ['o=other', 'cn=c,o=testing'])
+        self.assertEqual(results.errors, {})
+
+    def test_get_many_errors(self):
+        """Ensure failed searches are reported per DN without losing other results"""
+        self.mock_sock.add_search_res_entry('cn=a,o=testing', {'cn': ['a']})
+        self.mock_sock.add_search_res_done('cn=a,o=testing')
+        self.mock_sock.add_search_res_done('cn=b,o=testing',
+                                           result_code=rfc4511.ResultCode('insufficientAccessRights'))
+
+        results = self.ldap.get_many(['cn=a,o=testing', 'cn=b,o=testing'], batch_size=1)
+        self.assertEqual(self.mock_sock.num_sent(), 2)
+        self.assertEqual(results['cn=a,o=testing'].dn, 'cn=a,o=testing')
+        self.assertIsNone(results['cn=b,o=testing'])
+        self.assertEqual(results.missing, [])
+        self.assertIsInstance(results.errors['cn=b,o=testing'], exceptions.LDAPError)
+
+    def test_get_many_tuples(self):
+        """Ensure objects are returned even if tuples are requested"""
+        self.mock_sock.add_search_res_entry('cn=a,o=testing', {'cn': ['a']})
+        self.mock_sock.add_search_res_done('cn=a,o=testing')
+        results = self.ldap.get_many(['cn=a,o=testing'], result_format=ResultFormat.TUPLES)
+        self.assertIsInstance(results['cn=a,o=testing'], LDAPObject)
+        self.assertEqual(results.missing, [])
+
+    def test_search_split(self):
+        """Ensure oversized or filters are searched in chunks with duplicate results removed"""
+        self.mock_sock.add_search_res_entry('cn=a,o=testing', {'cn': ['a']})
+        self.mock_sock.add_search_res_entry('cn=b,o=testing', {'cn': ['b']})
+        self.mock_sock.add_search_res_done('o=testing')
+        self.mock_sock.add_search_res_entry('cn=b,o=testing', {'cn': ['b', 'c']})
+        self.mock_sock.add_search_res_done('o=testing')
+        self.mock_sock.add_search_res_entry('cn=e,o=testing', {'cn': ['e']})
+        self.mock_sock.add_search_res_done('o=testing')
+
+        results = list(self.ldap.search_split('o=testing', filter=F.any_of('cn', 'abcde'), max_or_terms=2))
+        self.assertEqual(self.mock_sock.num_sent(), 3)
+        self.assertIn((F.eq('cn', 'c') | F.eq('cn', 'd')).encode(), self.mock_sock._incoming_queue[1])
+        self.assertIn(F.eq('cn', 'e').encode(), self.mock_sock._incoming_queue[2])
+        self.assertEqual([obj.dn for obj in results], ['cn=a,o=testing', 'cn=b,o=testing', 'cn=e,o=testing'])
+
+        with six.assertRaisesRegex(self, ValueError, 'max_or_terms must be at least 1'):
+            self.ldap.search_split('o=testing', filter=F.any_of('cn', 'ab'), max_or_terms=0)
+        self.assertEqual(self.mock_sock.num_sent(), 3)
+
+
+mock = utils.get_mock()
+
+
+class MockDroppedSocket(MockSockRootDSE):
+    """Mock socket that fails with a connection error once ``dropped`` is set"""
+    def __init__(self, *args, **kwds):
+        MockSockRootDSE.__init__(self, *args, **kwds)
+        self.dropped = False
+
+    def send_message(self, op, obj, controls=None, deadline=None):
+        if op != 'unbindRequest' and self.dropped == 'send':
+            raise exceptions.LDAPConnectionError('mock connection dropped')
+        return MockSockRootDSE.send_message(self, op, obj, controls, deadline)
+
+    def recv_messages(self, want_message_id, deadline=None):
+        messages = MockSockRootDSE.recv_messages(self, want_message_id)
+        while True:
+            if self.dropped:
+                raise exceptions.LDAPConnectionError('mock connection dropped')
+            yield next(messages)
+
+
+class TestReconnect(unittest.TestCase):
+    def connect(self, *socks):
+        """Create a connection that obtains each of ``socks`` in turn when opening a new socket"""
+        socks = iter(socks)
+        patcher = mock.patch.object(laurelin.ldap.base, 'LDAPSocket', lambda *args: next(socks))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return LDAP('mock:///', reuse_connection=False, auto_reconnect=True, reconnect_backoff=0)
+
+    def test_retry_search(self):
+        """Ensure searches are retried after reconnecting and the bind is repeated"""
+        first = MockDroppedSocket()
+        first.add_bind_success()
+        second = MockDroppedSocket()
+        second.add_bind_success()
+        second.add_search_res_entry('cn=foo,o=testing', {'cn': ['foo']})
+        second.add_search_res_done('cn=foo,o=testing')
+
+        ldap = self.connect(first, second)
+        ldap.simple_bind(username='cn=admin,o=testing', password='secret')
+        first.dropped = True
+        obj = ldap.get('cn=foo,o=testing')
+        self.assertEqual(obj.dn, 'cn=foo,o=testing')
+        self.assertIs(ldap.sock, second)
+        self.assertTrue(second.bound)
+
+        protoutils.unpack('searchRequest', second.read_sent())
+        mid, br, ctrls = protoutils.unpack('bindRequest', second.read_sent())
+        self.assertEqual(six.text_type(br.getComponentByName('name')), 'cn=admin,o=testing')
+        protoutils.unpack('searchRequest', second.read_sent())
+
+    def test_retry_send(self):
+        """Ensure compares are retried when the request cannot be sent"""
+        first = MockDroppedSocket()
+        second = MockDroppedSocket()
+        second.add_ldap_result(rfc4511.CompareResponse, 'compareResponse', result_code=protoutils.RESULT_compareTrue)
+
+        ldap = self.connect(first, second)
+        first.dropped = 'send'
+        self.assertTrue(ldap.compare('o=testing', 'o', 'testing'))
+        self.assertIs(ldap.sock, second)
+
+    def test_no_retry_write(self):
+        """Ensure write operations reconnect but still raise the connection error"""
+        first = MockDroppedSocket()
+        second = MockDroppedSocket()
+        second.add_ldap_result(rfc4511.DelResponse, 'delResponse')
+
+        ldap = self.connect(first, second)
+        first.dropped = True
+        with self.assertRaises(exceptions.LDAPConnectionError):
+            ldap.delete('cn=foo,o=testing')
+        self.assertIs(ldap.sock, second)
+        ldap.delete('cn=foo,o=testing')
+
+    def test_no_retry_after_results(self):
+        """Ensure searches are not retried once results have been received"""
+        first = MockDroppedSocket()
+        first.add_search_res_entry('cn=foo,o=testing', {'cn': ['foo']})
+        second = MockDroppedSocket()
+
+        ldap = self.connect(first, second)
+        search = iter(ldap.search('o=testing'))
+        next(search)
+        first.dropped = True
+        with self.assertRaises(exceptions.LDAPConnectionError):
+            next(search)
+        self.assertIs(ldap.sock, second)
+
+    def test_attempts(self):
+        """Ensure reconnection gives up after the configured number of attempts"""
+        first = MockDroppedSocket()
+        attempts = []
+
+        def fail(*args):
+            attempts.append(args)
+            raise exceptions.LDAPConnectionError('mock connection refused')
+
+        ldap = LDAP(first, auto_reconnect=True, reconnect_attempts=3, reconnect_backoff=0)
+        first.dropped = True
+        with mock.patch.object(laurelin.ldap.base, 'LDAPSocket', fail):
+            with self.assertRaises(exceptions.LDAPConnectionError):
+                ldap.get('cn=foo,o=testing')
+        self.assertEqual(len(attempts), 3)
+
+    def test_disabled(self):
+        """Ensure connection errors are raised as usual without auto_reconnect"""
+        first = MockDroppedSocket()
+        ldap = LDAP(first)
+        first.dropped = True
+        with self.assertRaises(exceptions.LDAPConnectionError):
+            ldap.get('cn=foo,o=testing')
+        self.assertIs(ldap.sock, first)
+
+
+class MockHungSocket(MockSockRootDSE):
+    """Mock socket on which a deadline passes whenever no queued response is left"""
+    def recv_messages(self, want_message_id, deadline=None):
+        messages = MockSockRootDSE.recv_messages(self, want_message_id)
+        while True:
+            if not self._outgoing_queue and deadline is not None:
+                raise self._response_timeout()
+            yield next(messages)
+
+    def recv_any(self, message_ids, deadline=None):
+        if not self._outgoing_queue and deadline is not None:
+            raise self._response_timeout()
+        return MockSockRootDSE.recv_any(self, message_ids)
+
+
+class TestDeadline(unittest.TestCase):
+    def assertAbandoned(self, mock_sock, mids):
+        abandoned = []
+        while mock_sock.num_sent():
+            lm = mock_sock.read_sent()
+            op = lm.getComponentByName('protocolOp')
+            if op.getName() == 'abandonRequest':
+                abandoned.append(int(op.getComponent()))
+        self.assertEqual(abandoned, mids)
+        self.assertTrue(mock_sock.suspect)
+
+    def test_response_timeout(self):
+        """Ensure operations are abandoned when the response timeout passes"""
+        mock_sock = MockHungSocket()
+        ldap = LDAP(mock_sock, response_timeout=5)
+        mock_sock.clear_sent()
+        mock_sock.add_search_res_entry('cn=one,o=testing', {})
+        results = ldap.search('o=testing')
+        with self.assertRaises(exceptions.ResponseTimeout):
+            list(results)
+        self.assertTrue(results.abandoned)
+        self.assertAbandoned(mock_sock, [2])
+
+        with self.assertRaises(exceptions.ResponseTimeout):
+            ldap.compare('o=testing', 'o', 'testing')
+        self.assertAbandoned(mock_sock, [4])
+
+    def test_pipeline_timeout(self):
+        """Ensure all outstanding pipelined operations fail when the deadline passes"""
+        mock_sock = MockHungSocket()
+        ldap = LDAP(mock_sock, response_timeout=5)
+        mock_sock.clear_sent()
+        pipe = ldap.pipeline()
+        handles = [pipe.delete('cn=one,o=testing'), pipe.delete('cn=two,o=testing')]
+        with self.assertRaises(exceptions.ResponseTimeout):
+            pipe.wait_all()
+        self.assertEqual(pipe.outstanding, 0)
+        for handle in handles:
+            self.assertIsInstance(handle.exception(), exceptions.ResponseTimeout)
+        self.assertAbandoned(mock_sock, [2, 3])
+
+    def test_deadline_block(self):
+        """Ensure deadline blocks apply to every connection and nested blocks only shorten the limit"""
+        ldap = LDAP(MockSockRootDSE())
+        other = LDAP(MockSockRootDSE(), response_timeout=1)
+        self.assertIsNone(ldap._deadline())
+        with laurelin.ldap.deadline(60):
+            outer = ldap._deadline()
+            self.assertIsNotNone(outer)
+            self.assertLess(other._deadline(), outer)
+            with laurelin.ldap.deadline(120):
+                self.assertEqual(ldap._deadline(), outer)
+            with laurelin.ldap.deadline(30):
+                self.assertLess(ldap._deadline(), outer)
+            self.assertEqual(ldap._deadline(), outer)
+        self.assertIsNone(ldap._deadline())
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,7 @@
-from laurelin.ldap import LDAP, rfc4511, protoutils, LDAPObject
+from laurelin.ldap import LDAP, rfc4511, protoutils, LDAPObject, Scope
+from laurelin.ldap.exceptions import LDAPError
 from .mock_ldapsocket import MockLDAPSocket
+import six
 import unittest
 
 
@@ -192,3 +194,28 @@ class TestLDAPObject(unittest.TestCase):
                          'pqrstuvwxyzabcdefghijklmnopqrstuvwxyzabcdefghijklmnopqrstuvwxyzabcdefghijklmnopqrstuvwxyzab'],
         })
         o.format_ldif()
+
+    def test_find_many(self):
+        """Ensure find_many batches RDNs into a single search following the relative search scope"""
+        mock_sock = MockLDAPSocket()
+        mock_sock.add_root_dse()
+        ldap = LDAP(mock_sock)
+        mock_sock.clear_sent()
+
+        obj = ldap.obj('ou=people,o=test', relative_search_scope=Scope.SUBTREE, rdn_attr='uid')
+        mock_sock.add_search_res_entry('uid=bob,ou=sales,ou=people,o=test', {'uid': ['bob']})
+        mock_sock.add_search_res_entry('uid=alice,ou=people,o=test', {'uid': ['alice']})
+        mock_sock.add_search_res_done('ou=people,o=test')
+
+        results = obj.find_many(['alice', 'bob', 'eve'])
+        self.assertEqual(mock_sock.num_sent(), 1)
+        req = protoutils.unpack('searchRequest', mock_sock.read_sent())[1]
+        self.assertEqual(six.text_type(req.getComponentByName('baseObject')), 'ou=people,o=test')
+        self.assertEqual(list(results.keys()), ['alice', 'bob', 'eve'])
+        self.assertEqual(results['alice'].dn, 'uid=alice,ou=people,o=test')
+        self.assertEqual(results['bob'].dn, 'uid=bob,ou=sales,ou=people,o=test')
+        self.assertEqual(results.missing, ['eve'])
+
+        obj = ldap.obj('cn=leaf,o=test', relative_search_scope=Scope.BASE)
+        with self.assertRaises(LDAPError):
+            obj.find_many(['cn=foo'])
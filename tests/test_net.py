@@ -1,5 +1,18 @@
 from .mock_ldapsocket import MockLDAPSocket
-from laurelin.ldap.exceptions import LDAPConnectionError
+from laurelin.ldap import net, rfc4511, protoutils
+from laurelin.ldap.exceptions import (
+    LDAPConnectionError,
+    LDAPError,
+    LDAPUnsolicitedMessage,
+    NoticeOfDisconnection,
+    ResponseTimeout,
+)
+from laurelin.ldap.net import LDAPSocket, PDUFramer
+from laurelin.ldap.pyasn1.codec.ber.encoder import encode as ber_encode
+from collections import deque
+from socket import socketpair
+import threading
+import time
 import unittest
 
 
@@ -35,4 +48,390 @@ class TestNet(unittest.TestCase):
                 'subjectAltName': [
                     ('DNS', bad_cn)
                 ]
-            })
\ No newline at end of file
+            })
+
+    def test_notice_of_disconnection(self):
+        """Ensure a notice of disconnection is raised as a connection error"""
+        mock_sock = MockLDAPSocket()
+
+        xr = rfc4511.ExtendedResponse()
+        xr.setComponentByName('resultCode', rfc4511.ResultCode('unavailable'))
+        xr.setComponentByName('matchedDN', rfc4511.LDAPDN(''))
+        xr.setComponentByName('diagnosticMessage', rfc4511.LDAPString('shutting down'))
+        xr.setComponentByName('responseName', rfc4511.ResponseName(LDAPSocket.OID_DISCONNECTION_NOTICE))
+        with self.assertRaises(NoticeOfDisconnection) as cm:
+            mock_sock._handle_unsolicited(protoutils.pack(0, 'extendedResp', xr))
+        self.assertIsInstance(cm.exception, LDAPConnectionError)
+        self.assertIsInstance(cm.exception, LDAPUnsolicitedMessage)
+
+        xr.setComponentByName('responseName', rfc4511.ResponseName('1.2.3.4'))
+        with self.assertRaises(LDAPUnsolicitedMessage) as cm:
+            mock_sock._handle_unsolicited(protoutils.pack(0, 'extendedResp', xr))
+        self.assertNotIsInstance(cm.exception, LDAPConnectionError)
+
+
+class MockRawSocket(object):
+    """Stands in for a connected socket, returning canned chunks from recv_into()"""
+    def __init__(self, chunks):
+        self._chunks = deque(chunks)
+        self.sockopts = {}
+
+    def recv_into(self, buf):
+        if not self._chunks:
+            return 0
+        chunk = self._chunks.popleft()
+        n = min(len(chunk), len(buf))
+        buf[:n] = chunk[:n]
+        if n < len(chunk):
+            self._chunks.appendleft(chunk[n:])
+        return n
+
+    def setsockopt(self, level, opt, value):
+        self.sockopts[(level, opt)] = value
+
+
+def make_socket(chunks, **io_params):
+    sock = LDAPSocket.__new__(LDAPSocket)
+    sock._prop_init()
+    sock._io_init(**io_params)
+    sock._sock = MockRawSocket(chunks)
+    return sock
+
+
+def encode_search_res_done(mid):
+    return encode_result(mid, rfc4511.SearchResultDone, 'searchResDone')
+
+
+def encode_result(mid, cls, op):
+    res = cls()
+    res.setComponentByName('resultCode', protoutils.RESULT_success)
+    res.setComponentByName('matchedDN', rfc4511.LDAPDN(''))
+    res.setComponentByName('diagnosticMessage', rfc4511.LDAPString(''))
+    return ber_encode(protoutils.pack(mid, op, res))
+
+
+def encode_search_res_entry(mid, dn):
+    sre = rfc4511.SearchResultEntry()
+    sre.setComponentByName('objectName', rfc4511.LDAPDN(dn))
+    sre.setComponentByName('attributes', rfc4511.PartialAttributeList())
+    return ber_encode(protoutils.pack(mid, 'searchResEntry', sre))
+
+
+def make_mux_socket():
+    """Create a multiplexed LDAPSocket connected to the returned server-side socket"""
+    server, client = socketpair()
+    sock = LDAPSocket.__new__(LDAPSocket)
+    sock._prop_init()
+    sock._io_init()
+    sock._sock = client
+    sock._enable_multiplex()
+    return sock, server
+
+
+def read_requests(server, count):
+    """Read count complete requests from the server side of a socket pair, returning their message IDs"""
+    framer = PDUFramer()
+    mids = []
+    while len(mids) < count:
+        framer.feed(server.recv(4096))
+        for pdu in framer:
+            mids.append(LDAPSocket._decode_pdu(pdu).getComponentByName('messageID'))
+    return mids
+
+
+class TestPDUFramer(unittest.TestCase):
+    def test_byte_at_a_time(self):
+        """Ensure a PDU is only returned once it is complete"""
+        raw = encode_search_res_done(1)
+        framer = PDUFramer()
+        for i in range(len(raw) - 1):
+            framer.feed(raw[i:i+1])
+            self.assertIsNone(framer.next_pdu())
+        framer.feed(raw[-1:])
+        self.assertEqual(framer.next_pdu(), raw)
+        self.assertEqual(len(framer), 0)
+
+    def test_multiple_pdus(self):
+        """Ensure multiple PDUs in a single chunk are split correctly"""
+        pdus = [encode_search_res_done(mid) for mid in range(1, 4)]
+        framer = PDUFramer()
+        framer.feed(b''.join(pdus) + pdus[0][:3])
+        self.assertEqual(list(framer), pdus)
+        self.assertEqual(len(framer), 3)
+
+    def test_long_form_length(self):
+        """Ensure long-form length octets are handled"""
+        payload = b'\x04\x82\x01\x2c' + b'a' * 300
+        raw = b'\x30\x82' + bytearray([len(payload) >> 8, len(payload) & 0xff]) + payload
+        raw = bytes(raw)
+        framer = PDUFramer()
+        framer.feed(raw[:2])
+        self.assertIsNone(framer.next_pdu())
+        framer.feed(raw[2:10])
+        self.assertIsNone(framer.next_pdu())
+        framer.feed(raw[10:])
+        self.assertEqual(framer.next_pdu(), raw)
+
+    def test_indefinite_length(self):
+        """Ensure indefinite-length encoding is rejected"""
+        framer = PDUFramer()
+        framer.feed(b'\x30\x80\x00\x00')
+        with self.assertRaises(LDAPError):
+            framer.next_pdu()
+
+    def test_recv_messages(self):
+        """Ensure recv_messages frames split and coalesced reads and queues other message IDs"""
+        raw1 = encode_search_res_done(1)
+        raw2 = encode_search_res_done(2)
+        stream = raw2 + raw1
+        chunks = [stream[:5], stream[5:len(raw2) + 3], stream[len(raw2) + 3:]]
+        sock = make_socket(chunks)
+        lm = sock.recv_one(1)
+        self.assertEqual(lm.getComponentByName('messageID'), 1)
+        lm = sock.recv_one(2)
+        self.assertEqual(lm.getComponentByName('messageID'), 2)
+
+    def test_recv_messages_closed(self):
+        """Ensure a closed connection raises rather than looping forever"""
+        sock = make_socket([encode_search_res_done(1)[:4]])
+        with self.assertRaises(LDAPConnectionError):
+            sock.recv_one(1)
+
+
+class TestSocketIOProfile(unittest.TestCase):
+    def test_fixed_recv_buffer(self):
+        """Ensure a fixed-size receive buffer never grows and still receives large PDUs"""
+        raw = b''.join(encode_search_res_done(mid) for mid in range(1, 6))
+        sock = make_socket([raw], recv_buffer_size=8)
+        for mid in range(1, 6):
+            lm = sock.recv_one(mid)
+            self.assertEqual(lm.getComponentByName('messageID'), mid)
+        self.assertEqual(len(sock._recv_buf), 8)
+
+    def test_adaptive_recv_buffer(self):
+        """Ensure the receive buffer doubles on full reads up to the maximum"""
+        raw = b''.join(encode_search_res_done(mid) for mid in range(1, 11))
+        sock = make_socket([raw], recv_buffer_size=8, max_recv_buffer_size=40)
+        for mid in range(1, 11):
+            lm = sock.recv_one(mid)
+            self.assertEqual(lm.getComponentByName('messageID'), mid)
+        self.assertEqual(len(sock._recv_buf), 40)
+
+    def test_io_params_validation(self):
+        """Ensure invalid I/O profile parameters are rejected"""
+        with self.assertRaises(ValueError):
+            make_socket([], recv_buffer_size=1024, max_recv_buffer_size=512)
+        with self.assertRaises(ValueError):
+            make_socket([], tcp_keepalive=(60, 10))
+
+    def test_tcp_options(self):
+        """Ensure TCP and kernel buffer options are applied to the socket"""
+        sock = make_socket([], tcp_nodelay=True, tcp_keepalive=[60, 10, 5], so_rcvbuf=65536, so_sndbuf=32768)
+        raw_sock = sock._sock
+        sock._set_buffer_options(raw_sock)
+        sock._set_tcp_options(raw_sock)
+        opts = raw_sock.sockopts
+        self.assertEqual(opts[(net.SOL_SOCKET, net.SO_RCVBUF)], 65536)
+        self.assertEqual(opts[(net.SOL_SOCKET, net.SO_SNDBUF)], 32768)
+        self.assertEqual(opts[(net.IPPROTO_TCP, net.TCP_NODELAY)], 1)
+        self.assertEqual(opts[(net.SOL_SOCKET, net.SO_KEEPALIVE)], 1)
+        if net.TCP_KEEPIDLE is not None:
+            self.assertEqual(opts[(net.IPPROTO_TCP, net.TCP_KEEPIDLE)], 60)
+        if net.TCP_KEEPCNT is not None:
+            self.assertEqual(opts[(net.IPPROTO_TCP, net.TCP_KEEPCNT)], 5)
+
+    def test_default_tcp_options(self):
+        """Ensure no options are set by default"""
+        sock = make_socket([])
+        sock._set_buffer_options(sock._sock)
+        sock._set_tcp_options(sock._sock)
+        self.assertEqual(sock._sock.sockopts, {})
+
+
+class TestRecvAny(unittest.TestCase):
+    def test_recv_any(self):
+        """Ensure recv_any returns responses for any wanted ID in arrival order and queues others"""
+        raw = b''.join(encode_result(mid, rfc4511.DelResponse, 'delResponse') for mid in (3, 1, 2))
+        sock = make_socket([raw])
+        self.assertEqual(sock.recv_any(set([1, 2])).getComponentByName('messageID'), 1)
+        self.assertEqual(sock.recv_one(3).getComponentByName('messageID'), 3)
+        self.assertEqual(sock.recv_any(set([2])).getComponentByName('messageID'), 2)
+
+    def test_mux_recv_any(self):
+        """Ensure recv_any works with the multiplexing reader"""
+        sock, server = make_mux_socket()
+        mids = set(sock.send_message('delRequest', rfc4511.DelRequest('cn=test{0}'.format(i))) for i in range(3))
+        read_requests(server, 3)
+        server.sendall(b''.join(encode_result(mid, rfc4511.DelResponse, 'delResponse')
+                                for mid in sorted(mids, reverse=True)))
+        received = []
+        while mids:
+            mid = sock.recv_any(mids).getComponentByName('messageID')
+            received.append(mid)
+            mids.remove(mid)
+        self.assertEqual(sorted(received), [1, 2, 3])
+        self.assertEqual(sock._mux_queues, {})
+        sock.close()
+        server.close()
+
+
+class TestMultiplex(unittest.TestCase):
+    def test_concurrent_operations(self):
+        """Ensure responses are routed to the correct thread regardless of arrival order"""
+        sock, server = make_mux_socket()
+        num_threads = 8
+        results = {}
+        errors = []
+
+        def worker(i):
+            try:
+                mid = sock.send_message('delRequest', rfc4511.DelRequest('cn=test{0}'.format(i)))
+                lm = sock.recv_one(mid)
+                results[mid] = lm.getComponentByName('messageID')
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(num_threads)]
+        for t in threads:
+            t.start()
+        mids = read_requests(server, num_threads)
+        self.assertEqual(sorted(mids), list(range(1, num_threads + 1)))
+        server.sendall(b''.join(encode_result(mid, rfc4511.DelResponse, 'delResponse') for mid in reversed(mids)))
+        for t in threads:
+            t.join(5)
+        self.assertEqual(errors, [])
+        self.assertEqual(results, dict((mid, mid) for mid in mids))
+        self.assertEqual(sock._mux_queues, {})
+        sock.close()
+        server.close()
+
+    def test_interleaved_search(self):
+        """Ensure multi-response operations receive all of their messages with interleaved traffic"""
+        sock, server = make_mux_socket()
+        search_mid = sock.send_message('delRequest', rfc4511.DelRequest('cn=a'))
+        other_mid = sock.send_message('delRequest', rfc4511.DelRequest('cn=b'))
+        read_requests(server, 2)
+        server.sendall(encode_search_res_entry(search_mid, 'cn=one') +
+                       encode_result(other_mid, rfc4511.DelResponse, 'delResponse') +
+                       encode_search_res_entry(search_mid, 'cn=two') +
+                       encode_search_res_done(search_mid))
+        ops = []
+        for lm in sock.recv_messages(search_mid):
+            ops.append(lm.getComponentByName('protocolOp').getName())
+            if ops[-1] == 'searchResDone':
+                break
+        self.assertEqual(ops, ['searchResEntry', 'searchResEntry', 'searchResDone'])
+        lm = sock.recv_one(other_mid)
+        self.assertEqual(lm.getComponentByName('protocolOp').getName(), 'delResponse')
+        sock.close()
+        server.close()
+
+    def test_abandon_waiting(self):
+        """Ensure abandoning an operation from another thread ends iteration for a thread waiting without a deadline"""
+        sock, server = make_mux_socket()
+        mid = sock.send_message('delRequest', rfc4511.DelRequest('cn=a'))
+        read_requests(server, 1)
+        server.sendall(encode_search_res_entry(mid, 'cn=one'))
+        received = []
+
+        def waiter():
+            for lm in sock.recv_messages(mid):
+                received.append(lm)
+
+        t = threading.Thread(target=waiter)
+        t.daemon = True
+        t.start()
+        while not received:
+            time.sleep(0.01)
+        sock.abandoned_mids.append(mid)
+        sock.send_message('abandonRequest', rfc4511.AbandonRequest(mid))
+        t.join(5)
+        self.assertFalse(t.is_alive())
+        self.assertEqual(len(received), 1)
+        self.assertEqual(sock._mux_queues, {})
+        sock.close()
+        server.close()
+
+    def test_connection_closed(self):
+        """Ensure a connection failure is raised in every waiting and future operation"""
+        sock, server = make_mux_socket()
+        mid = sock.send_message('delRequest', rfc4511.DelRequest('cn=a'))
+        read_requests(server, 1)
+        server.close()
+        with self.assertRaises(LDAPConnectionError):
+            sock.recv_one(mid)
+        with self.assertRaises(LDAPConnectionError):
+            sock.send_message('delRequest', rfc4511.DelRequest('cn=b'))
+        sock.close()
+
+    def test_close(self):
+        """Ensure closing the socket stops the reader thread"""
+        sock, server = make_mux_socket()
+        reader = sock._reader
+        sock.close()
+        self.assertFalse(reader.is_alive())
+        self.assertIsNone(sock._reader)
+        server.close()
+
+
+class TestDeadline(unittest.TestCase):
+    def test_deadline(self):
+        """Ensure a missed response deadline raises and marks the socket suspect"""
+        server, client = socketpair()
+        sock = LDAPSocket.__new__(LDAPSocket)
+        sock._prop_init()
+        sock._io_init()
+        sock._sock = client
+        mid = sock.send_message('delRequest', rfc4511.DelRequest('cn=a'))
+        read_requests(server, 1)
+        self.assertTrue(sock.is_alive())
+        with self.assertRaises(ResponseTimeout):
+            sock.recv_one(mid, time.time() + 0.01)
+        self.assertTrue(sock.suspect)
+        self.assertFalse(sock.is_alive())
+
+        # late responses to abandoned operations are dropped
+        other_mid = sock.send_message('delRequest', rfc4511.DelRequest('cn=b'))
+        sock.abandoned_mids.append(mid)
+        server.sendall(encode_result(mid, rfc4511.DelResponse, 'delResponse') +
+                       encode_result(other_mid, rfc4511.DelResponse, 'delResponse'))
+        self.assertEqual(sock.recv_one(other_mid, time.time() + 5).getComponentByName('messageID'), other_mid)
+        self.assertEqual(sock._message_queues, {})
+        client.close()
+        server.close()
+
+    def test_blocked_io_deadline(self):
+        """Ensure deadlines also apply to sends and receives that block after the socket appears ready"""
+        server, client = socketpair()
+        sock = LDAPSocket.__new__(LDAPSocket)
+        sock._prop_init()
+        sock._io_init()
+        sock._sock = client
+
+        # the server never reads, so the send buffers fill up
+        with self.assertRaises(ResponseTimeout):
+            sock.send_message('delRequest', rfc4511.DelRequest('cn=' + 'a' * 2 ** 24), deadline=time.time() + 0.05)
+        self.assertTrue(sock.suspect)
+        self.assertIsNone(client.gettimeout())
+
+        # e.g. an SSL socket with only part of a record received
+        sock._wait_readable = lambda timeout: True
+        with self.assertRaises(ResponseTimeout):
+            sock.recv_one(1, time.time() + 0.05)
+        self.assertIsNone(client.gettimeout())
+        client.close()
+        server.close()
+
+    def test_mux_deadline(self):
+        """Ensure response deadlines apply with the multiplexing reader"""
+        sock, server = make_mux_socket()
+        mid = sock.send_message('delRequest', rfc4511.DelRequest('cn=a'))
+        read_requests(server, 1)
+        with self.assertRaises(ResponseTimeout):
+            sock.recv_one(mid, time.time() + 0.01)
+        with self.assertRaises(ResponseTimeout):
+            sock.recv_any(set([mid]), time.time() + 0.01)
+        self.assertTrue(sock.suspect)
+        self.assertFalse(sock.is_alive())
+        sock.close()
+        server.close()
@@ -0,0 +1,111 @@
+from . import utils
+from .mock_ldapsocket import MockSockRootDSE
+from laurelin.ldap import LDAP, LDAPPool, get_pool
+from laurelin.ldap.base import LDAPResponse
+from laurelin.ldap.exceptions import LDAPConnectionError, PoolTimeout
+import laurelin.ldap.base
+import laurelin.ldap.pool
+import threading
+import time
+import unittest
+
+mock = utils.get_mock()
+
+
+class MockPoolSocket(MockSockRootDSE):
+    def __init__(self, *args, **kwds):
+        MockSockRootDSE.__init__(self, *args, **kwds)
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive and not self.unbound
+
+
+@mock.patch.object(laurelin.ldap.base, 'LDAPSocket', MockPoolSocket)
+@mock.patch('laurelin.ldap.LDAP.simple_bind', return_value=LDAPResponse())
+class TestLDAPPool(unittest.TestCase):
+    def test_reuse(self, simple_bind):
+        """Ensure connections are bound once and reused"""
+        bind = {'username': 'cn=app,o=testing', 'password': 'secret'}
+        pool = LDAPPool('mock:///', simple_bind=bind)
+        with pool.connection() as ldap:
+            self.assertIsInstance(ldap, LDAP)
+            first = ldap
+        with pool.connection() as ldap:
+            self.assertIs(ldap, first)
+        self.assertEqual(pool.size, 1)
+        self.assertEqual(pool.idle, 1)
+        simple_bind.assert_called_once_with(**bind)
+
+        pool.close()
+        self.assertEqual(pool.size, 0)
+        self.assertTrue(first.sock.unbound)
+
+    def test_max_size(self, simple_bind):
+        """Ensure checkout waits for a connection when the pool is full"""
+        pool = LDAPPool('mock:///', max_size=1)
+        ldap = pool.checkout()
+        with self.assertRaises(PoolTimeout):
+            pool.checkout(timeout=0.01)
+
+        t = threading.Timer(0.05, pool.checkin, [ldap])
+        t.start()
+        self.assertIs(pool.checkout(timeout=5), ldap)
+        t.join()
+        self.assertEqual(pool.size, 1)
+
+    def test_discard(self, simple_bind):
+        """Ensure dead and failed connections are not reused"""
+        pool = LDAPPool('mock:///', min_size=1)
+        self.assertEqual(pool.size, 1)
+
+        ldap = pool.checkout()
+        pool.checkin(ldap)
+        ldap.sock.alive = False
+        new = pool.checkout()
+        self.assertIsNot(new, ldap)
+        self.assertTrue(ldap.sock.unbound)
+        self.assertEqual(pool.size, 1)
+        pool.checkin(new)
+
+        with self.assertRaises(LDAPConnectionError):
+            with pool.connection() as ldap:
+                raise LDAPConnectionError()
+        self.assertTrue(ldap.sock.unbound)
+        self.assertEqual(pool.size, 0)
+
+    def test_idle_eviction(self, simple_bind):
+        """Ensure idle connections beyond min_size are closed after the idle timeout"""
+        pool = LDAPPool('mock:///', min_size=1, idle_timeout=0.01)
+        conns = [pool.checkout() for i in range(3)]
+        for ldap in conns:
+            pool.checkin(ldap)
+        self.assertEqual(pool.size, 3)
+        time.sleep(0.02)
+        pool.evict_idle()
+        self.assertEqual(pool.size, 1)
+        self.assertEqual(len([ldap for ldap in conns if ldap.sock.unbound]), 2)
+
+    def test_validation(self, simple_bind):
+        """Ensure invalid pool parameters are rejected"""
+        with self.assertRaises(TypeError):
+            LDAPPool('mock:///', simple_bind={'username': 'foo'}, sasl_bind={'mech': 'EXTERNAL'})
+        with self.assertRaises(ValueError):
+            LDAPPool('mock:///', max_size=0)
+        with self.assertRaises(ValueError):
+            LDAPPool('mock:///', min_size=2, max_size=1)
+
+    def test_get_pool(self, simple_bind):
+        """Ensure shared pools are keyed by server, bind identity, and TLS settings"""
+        try:
+            alice = {'username': 'cn=alice,o=testing', 'password': 'secret'}
+            bob = {'username': 'cn=bob,o=testing', 'password': 'secret'}
+            pool = get_pool('mock:///', simple_bind=alice)
+            self.assertIs(get_pool('mock:///', simple_bind=dict(alice)), pool)
+            self.assertIsNot(get_pool('mock:///', simple_bind=bob), pool)
+            self.assertIsNot(get_pool('mock:///', simple_bind=alice, ssl_verify=False), pool)
+
+            pool.close()
+            self.assertIsNot(get_pool('mock:///', simple_bind=alice), pool)
+        finally:
+            laurelin.ldap.pool._pools.clear()
@@ -0,0 +1,107 @@
+from . import utils
+from .mock_ldapsocket import MockSockRootDSE
+from laurelin.ldap import LDAP, LDAPPool, ServerSet, ServerStrategy
+from laurelin.ldap.config import create_connection
+from laurelin.ldap.exceptions import LDAPConnectionError
+import laurelin.ldap.servers
+import unittest
+
+mock = utils.get_mock()
+
+
+class MockServerSocket(MockSockRootDSE):
+    """Mock socket that fails to connect to any URI listed in ``down``"""
+    down = set()
+
+    def __init__(self, uri, *args, **kwds):
+        if uri in MockServerSocket.down:
+            raise LDAPConnectionError('Connection refused')
+        MockSockRootDSE.__init__(self, uri, *args, **kwds)
+        self.uri = uri
+
+
+URIS = ['mock://one', 'mock://two', 'mock://three']
+
+
+@mock.patch.object(laurelin.ldap.servers, 'LDAPSocket', MockServerSocket)
+class TestServerSet(unittest.TestCase):
+    def tearDown(self):
+        MockServerSocket.down.clear()
+
+    def test_failover(self):
+        """Ensure servers are tried in order and failed servers are quarantined"""
+        servers = ServerSet(URIS, ServerStrategy.FAILOVER, health_check_interval=0)
+        self.assertEqual(servers.connect().uri, 'mock://one')
+        self.assertEqual(servers.stats('mock://one').connections, 1)
+
+        MockServerSocket.down.add('mock://one')
+        self.assertEqual(servers.connect().uri, 'mock://two')
+        self.assertEqual(servers.quarantined, ['mock://one'])
+        self.assertEqual(servers.candidates(), ['mock://two', 'mock://three', 'mock://one'])
+
+        MockServerSocket.down.update(URIS)
+        with self.assertRaises(LDAPConnectionError):
+            servers.connect()
+
+    def test_round_robin(self):
+        """Ensure the round robin strategy rotates the starting server"""
+        servers = ServerSet(URIS, ServerStrategy.ROUND_ROBIN, health_check_interval=0)
+        self.assertEqual([servers.connect().uri for i in range(4)], URIS + ['mock://one'])
+
+    def test_least_loaded(self):
+        """Ensure the least loaded strategy prefers servers with fewer outstanding operations and lower latency"""
+        servers = ServerSet(URIS, ServerStrategy.LEAST_LOADED, health_check_interval=0)
+        one = servers.stats('mock://one')
+        two = servers.stats('mock://two')
+        three = servers.stats('mock://three')
+
+        one.op_started()
+        one.op_finished(0.5)
+        two.op_started()
+        two.op_finished(0.1)
+        three.op_started()
+        three.op_finished(0.1)
+        three.op_started()
+        self.assertEqual(servers.candidates(), ['mock://two', 'mock://three', 'mock://one'])
+
+        two.op_started()
+        two.op_finished(1.1)
+        self.assertAlmostEqual(two.latency, 0.3)
+        self.assertEqual(servers.candidates(), ['mock://three', 'mock://two', 'mock://one'])
+
+    def test_check_health(self):
+        """Ensure health checks release servers that can be reached again"""
+        servers = ServerSet(URIS, quarantine=0, health_check_interval=0)
+        MockServerSocket.down.add('mock://one')
+        servers.connect()
+        servers.stats('mock://two').quarantined_until = 1
+        self.assertEqual(servers.check_health(), ['mock://two'])
+        self.assertTrue(servers.stats('mock://one').quarantined_until)
+
+        MockServerSocket.down.clear()
+        self.assertEqual(servers.check_health(), ['mock://one'])
+        self.assertFalse(servers.stats('mock://one').quarantined_until)
+
+    def test_validation(self):
+        """Ensure invalid server sets are rejected"""
+        with self.assertRaises(ValueError):
+            ServerSet([])
+        with self.assertRaises(ValueError):
+            ServerSet(URIS, 'fastest')
+
+    @mock.patch('laurelin.ldap.LDAP.simple_bind')
+    def test_ldap(self, simple_bind):
+        """Ensure connections and pools accept a list of servers"""
+        MockServerSocket.down.add('mock://one')
+        ldap = LDAP(URIS, server_strategy=ServerStrategy.ROUND_ROBIN)
+        self.assertEqual(ldap.host_uri, 'mock://two')
+        self.assertEqual(ldap.server_set.strategy, ServerStrategy.ROUND_ROBIN)
+
+        MockServerSocket.down.clear()
+        pool = LDAPPool(URIS, server_strategy=ServerStrategy.ROUND_ROBIN)
+        conns = [pool.checkout() for i in range(2)]
+        self.assertIs(conns[0].server_set, conns[1].server_set)
+        self.assertEqual([ldap.host_uri for ldap in conns], ['mock://one', 'mock://two'])
+
+        ldap = create_connection({'connection': {'server': URIS, 'server_strategy': 'round_robin'}})
+        self.assertEqual(ldap.server_set.strategy, ServerStrategy.ROUND_ROBIN)